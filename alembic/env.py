@@ -2,8 +2,7 @@ import os
 import sys
 from logging.config import fileConfig
 
-from sqlalchemy import engine_from_config
-from sqlalchemy import pool
+from sqlalchemy import engine_from_config, pool
 
 from alembic import context
 
@@ -11,8 +10,8 @@ from alembic import context
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 # Import our models and settings
-from app.db.base import Base
 from app.core.config import settings
+from app.db.base import Base
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -27,7 +26,6 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 # Import all models to ensure they are registered with Base
-from app.db.models import User, Query, Product, Offer, Review, Ranking
 
 # add your model's MetaData object here
 # for 'autogenerate' support
@@ -71,10 +69,10 @@ def run_migrations_online() -> None:
 
     """
     # For migration generation, use offline mode to avoid database connection
-    if context.get_x_argument(as_dictionary=True).get('offline', False):
+    if context.get_x_argument(as_dictionary=True).get("offline", False):
         run_migrations_offline()
         return
-        
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
@@ -82,9 +80,7 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(
-            connection=connection, target_metadata=target_metadata
-        )
+        context.configure(connection=connection, target_metadata=target_metadata)
 
         with context.begin_transaction():
             context.run_migrations()
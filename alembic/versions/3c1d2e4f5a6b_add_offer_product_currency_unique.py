@@ -0,0 +1,36 @@
+"""Add unique constraint on offers (product_id, currency)
+
+Revision ID: 3c1d2e4f5a6b
+Revises: f78f7b7a9a18
+Create Date: 2025-09-14 10:12:03.482117
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3c1d2e4f5a6b"
+down_revision: str | Sequence[str] | None = "f78f7b7a9a18"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep only the newest offer per (product_id, currency) before constraining
+    op.execute(
+        "DELETE FROM offers WHERE id NOT IN "
+        "(SELECT MAX(id) FROM offers GROUP BY product_id, currency)"
+    )
+    with op.batch_alter_table("offers") as batch_op:
+        batch_op.create_unique_constraint(
+            "uq_offers_product_id_currency", ["product_id", "currency"]
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("offers") as batch_op:
+        batch_op.drop_constraint("uq_offers_product_id_currency", type_="unique")
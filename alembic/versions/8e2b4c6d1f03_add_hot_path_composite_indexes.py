@@ -0,0 +1,78 @@
+"""Add hot path composite indexes and drop redundant indexes
+
+Revision ID: 8e2b4c6d1f03
+Revises: 3c1d2e4f5a6b
+Create Date: 2025-09-16 09:41:27.105583
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8e2b4c6d1f03"
+down_revision: str | Sequence[str] | None = "3c1d2e4f5a6b"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Primary keys are already indexed; these duplicates only slow down writes
+PK_INDEXES = {
+    "ix_products_id": "products",
+    "ix_users_id": "users",
+    "ix_offers_id": "offers",
+    "ix_queries_id": "queries",
+    "ix_reviews_id": "reviews",
+    "ix_rankings_id": "rankings",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Build indexes without locking writes on Postgres
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_offers_product_id_last_checked_at",
+            "offers",
+            ["product_id", sa.text("last_checked_at DESC")],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            op.f("ix_offers_last_checked_at"),
+            "offers",
+            ["last_checked_at"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_rankings_query_id_score",
+            "rankings",
+            ["query_id", sa.text("score DESC")],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+    # Covered by the leading column of the composite indexes above
+    op.drop_index(op.f("ix_offers_product_id"), table_name="offers")
+    op.drop_index(op.f("ix_rankings_query_id"), table_name="rankings")
+    for index_name, table_name in PK_INDEXES.items():
+        op.drop_index(op.f(index_name), table_name=table_name)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for index_name, table_name in PK_INDEXES.items():
+        op.create_index(op.f(index_name), table_name, ["id"], unique=False)
+    op.create_index(
+        op.f("ix_rankings_query_id"), "rankings", ["query_id"], unique=False
+    )
+    op.create_index(
+        op.f("ix_offers_product_id"), "offers", ["product_id"], unique=False
+    )
+
+    op.drop_index("ix_rankings_query_id_score", table_name="rankings")
+    op.drop_index(op.f("ix_offers_last_checked_at"), table_name="offers")
+    op.drop_index("ix_offers_product_id_last_checked_at", table_name="offers")
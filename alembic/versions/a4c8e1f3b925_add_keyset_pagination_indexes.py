@@ -0,0 +1,63 @@
+"""Add keyset pagination indexes for catalog browsing and rankings
+
+Revision ID: a4c8e1f3b925
+Revises: d3f1a8c5b7e2
+Create Date: 2025-09-24 14:12:53.418207
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a4c8e1f3b925"
+down_revision: str | Sequence[str] | None = "d3f1a8c5b7e2"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# (created_at DESC, id) after an optional equality column, for newest-first pages
+PRODUCT_INDEXES = {
+    "ix_products_created_at_id": [],
+    "ix_products_brand_created_at_id": ["brand"],
+    "ix_products_category_created_at_id": ["category"],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Build indexes without locking writes on Postgres
+    with op.get_context().autocommit_block():
+        for index_name, prefix in PRODUCT_INDEXES.items():
+            op.create_index(
+                index_name,
+                "products",
+                [*prefix, sa.text("created_at DESC"), "id"],
+                unique=False,
+                postgresql_concurrently=True,
+            )
+        op.create_index(
+            "ix_rankings_query_id_score_id",
+            "rankings",
+            ["query_id", sa.text("score DESC"), "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+    # Superseded by the index above, which also orders ties by id
+    op.drop_index("ix_rankings_query_id_score", table_name="rankings")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(
+        "ix_rankings_query_id_score",
+        "rankings",
+        ["query_id", sa.text("score DESC")],
+        unique=False,
+    )
+    op.drop_index("ix_rankings_query_id_score_id", table_name="rankings")
+    for index_name in PRODUCT_INDEXES:
+        op.drop_index(index_name, table_name="products")
@@ -0,0 +1,177 @@
+"""Add review URL hashes and SimHashes with a unique (product_id, url_hash)
+
+Revision ID: a7d3e5b9c241
+Revises: f2c7a9d4e613
+Create Date: 2025-10-13 09:47:12.503318
+
+"""
+
+import hashlib
+import re
+from collections.abc import Sequence
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import numpy as np
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a7d3e5b9c241"
+down_revision: str | Sequence[str] | None = "f2c7a9d4e613"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+BACKFILL_BATCH = 5000
+
+# URL normalization and SimHash as of this revision (app.ingest.reviews),
+# frozen here so later changes to the app do not alter this backfill
+TRACKING_PARAMS = frozenset(
+    {
+        "fbclid",
+        "gclid",
+        "pd_rd_i",
+        "pd_rd_r",
+        "pd_rd_w",
+        "pf_rd_p",
+        "pf_rd_r",
+        "psc",
+        "ref",
+        "ref_",
+        "smid",
+        "spla",
+        "tag",
+        "th",
+    }
+)
+TRACKING_PREFIXES = ("utm_",)
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_url(url: str) -> str:
+    url = url.strip()
+    parts = urlsplit(url)
+    if not parts.netloc and "://" not in url:
+        parts = urlsplit("//" + url)
+    scheme = parts.scheme.lower()
+    if scheme in ("http", ""):
+        scheme = "https"
+    host = (parts.hostname or "").removeprefix("www.")
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host if port in (None, 80, 443) else f"{host}:{port}"
+    path = re.sub(r"/{2,}", "/", parts.path).rstrip("/") or "/"
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if key.lower() not in TRACKING_PARAMS
+            and not key.lower().startswith(TRACKING_PREFIXES)
+        )
+    )
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def url_hash(url):
+    if not url or not url.strip():
+        return None
+    return hashlib.sha1(normalize_url(url).encode()).hexdigest()
+
+
+def simhashes(texts):
+    """Signed 64-bit SimHash over the words of each text; None without words."""
+    counts, hashes = [], []
+    for text in texts:
+        words = TOKEN_RE.findall(text.lower()) if text else []
+        counts.append(len(words))
+        hashes += [
+            int.from_bytes(
+                hashlib.blake2b(word.encode(), digest_size=8).digest(), "little"
+            )
+            for word in words
+        ]
+    out = [None] * len(texts)
+    if not hashes:
+        return out
+
+    bits = np.unpackbits(
+        np.asarray(hashes, dtype="<u8").view(np.uint8).reshape(-1, 8),
+        axis=1,
+        bitorder="little",
+    )
+    counts = np.asarray(counts)
+    present = counts > 0
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))[present]
+    ones = np.add.reduceat(bits, offsets, axis=0, dtype=np.int32)
+    majority = ones * 2 > counts[present, None]
+    # Viewed as signed to fit the BIGINT column
+    values = np.packbits(majority, axis=1, bitorder="little").view("<i8").ravel()
+    for position, value in zip(
+        np.flatnonzero(present).tolist(), values.tolist(), strict=True
+    ):
+        out[position] = value
+    return out
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("reviews", sa.Column("url_hash", sa.String(length=40), nullable=True))
+    op.add_column("reviews", sa.Column("simhash", sa.BigInteger(), nullable=True))
+
+    # Hashes are computed in Python (URL normalization, SimHash), keyset-paged by id
+    conn = op.get_bind()
+    reviews = sa.table(
+        "reviews",
+        sa.column("id", sa.Integer),
+        sa.column("url", sa.String),
+        sa.column("snippet", sa.Text),
+        sa.column("url_hash", sa.String),
+        sa.column("simhash", sa.BigInteger),
+    )
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(reviews.c.id, reviews.c.url, reviews.c.snippet)
+            .where(reviews.c.id > last_id)
+            .order_by(reviews.c.id)
+            .limit(BACKFILL_BATCH)
+        ).all()
+        if not rows:
+            break
+        hashes = simhashes([row.snippet for row in rows])
+        conn.execute(
+            reviews.update()
+            .where(reviews.c.id == sa.bindparam("b_id"))
+            .values(
+                url_hash=sa.bindparam("b_url_hash"), simhash=sa.bindparam("b_simhash")
+            ),
+            [
+                {
+                    "b_id": row.id,
+                    "b_url_hash": url_hash(row.url),
+                    "b_simhash": value,
+                }
+                for row, value in zip(rows, hashes, strict=True)
+            ],
+        )
+        last_id = rows[-1].id
+
+    # Keep only the first review per (product_id, normalized URL) before constraining
+    op.execute(
+        "DELETE FROM reviews WHERE url_hash IS NOT NULL AND id NOT IN "
+        "(SELECT MIN(id) FROM reviews WHERE url_hash IS NOT NULL GROUP BY product_id, url_hash)"
+    )
+    with op.batch_alter_table("reviews") as batch_op:
+        batch_op.create_unique_constraint(
+            "uq_reviews_product_id_url_hash", ["product_id", "url_hash"]
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("reviews") as batch_op:
+        batch_op.drop_constraint("uq_reviews_product_id_url_hash", type_="unique")
+        batch_op.drop_column("simhash")
+        batch_op.drop_column("url_hash")
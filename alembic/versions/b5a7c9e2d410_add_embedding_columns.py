@@ -0,0 +1,53 @@
+"""Add embedding columns and vector indexes to products and reviews
+
+Revision ID: b5a7c9e2d410
+Revises: 8e2b4c6d1f03
+Create Date: 2025-09-19 14:05:52.730914
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+from app.db.types import Embedding
+
+# revision identifiers, used by Alembic.
+revision: str = "b5a7c9e2d410"
+down_revision: str | Sequence[str] | None = "8e2b4c6d1f03"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    postgres = op.get_context().dialect.name == "postgresql"
+    if postgres:
+        op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+
+    op.add_column("products", sa.Column("embedding", Embedding(), nullable=True))
+    op.add_column("reviews", sa.Column("embedding", Embedding(), nullable=True))
+
+    # HNSW is pgvector-only; other databases search embeddings in memory
+    if postgres:
+        for table_name in ("products", "reviews"):
+            op.create_index(
+                f"ix_{table_name}_embedding_hnsw",
+                table_name,
+                ["embedding"],
+                unique=False,
+                postgresql_using="hnsw",
+                postgresql_with={"m": 16, "ef_construction": 64},
+                postgresql_ops={"embedding": "vector_cosine_ops"},
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    postgres = op.get_context().dialect.name == "postgresql"
+    for table_name in ("products", "reviews"):
+        if postgres:
+            op.drop_index(f"ix_{table_name}_embedding_hnsw", table_name=table_name)
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.drop_column("embedding")
@@ -0,0 +1,30 @@
+"""Add offers.last_attempt_at for refresh backoff
+
+Revision ID: b8e4f1c7d2a9
+Revises: a7d3e5b9c241
+Create Date: 2025-10-14 11:05:38.214907
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b8e4f1c7d2a9"
+down_revision: str | Sequence[str] | None = "a7d3e5b9c241"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("offers", sa.Column("last_attempt_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("offers") as batch_op:
+        batch_op.drop_column("last_attempt_at")
@@ -0,0 +1,81 @@
+"""Add product search documents with a GIN full-text index
+
+Revision ID: c6e2f9a1d357
+Revises: a4c8e1f3b925
+Create Date: 2025-09-26 11:03:47.620914
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c6e2f9a1d357"
+down_revision: str | Sequence[str] | None = "a4c8e1f3b925"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# SQLite has no tsvector; an external-content FTS5 table mirrors the text columns
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE product_search_fts USING fts5("
+    "title, brand, reviews, content='product_search', content_rowid='product_id', "
+    "tokenize='porter unicode61')",
+    "CREATE TRIGGER product_search_ai AFTER INSERT ON product_search BEGIN "
+    "INSERT INTO product_search_fts(rowid, title, brand, reviews) "
+    "VALUES (new.product_id, new.title, new.brand, new.reviews); END",
+    "CREATE TRIGGER product_search_ad AFTER DELETE ON product_search BEGIN "
+    "INSERT INTO product_search_fts(product_search_fts, rowid, title, brand, reviews) "
+    "VALUES ('delete', old.product_id, old.title, old.brand, old.reviews); END",
+    "CREATE TRIGGER product_search_au AFTER UPDATE ON product_search BEGIN "
+    "INSERT INTO product_search_fts(product_search_fts, rowid, title, brand, reviews) "
+    "VALUES ('delete', old.product_id, old.title, old.brand, old.reviews); "
+    "INSERT INTO product_search_fts(rowid, title, brand, reviews) "
+    "VALUES (new.product_id, new.title, new.brand, new.reviews); END",
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    postgres = op.get_context().dialect.name == "postgresql"
+    op.create_table(
+        "product_search",
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("brand", sa.String(), nullable=True),
+        sa.Column("reviews", sa.Text(), nullable=True),
+        sa.Column(
+            "document", postgresql.TSVECTOR() if postgres else sa.Text(), nullable=True
+        ),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["product_id"],
+            ["products.id"],
+        ),
+        sa.PrimaryKeyConstraint("product_id"),
+    )
+    if postgres:
+        op.create_index(
+            "ix_product_search_document",
+            "product_search",
+            ["document"],
+            unique=False,
+            postgresql_using="gin",
+        )
+    elif op.get_context().dialect.name == "sqlite":
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+    # Documents are filled by the app.tasks.search.refresh_search_index backfill
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_context().dialect.name
+    if dialect == "postgresql":
+        op.drop_index("ix_product_search_document", table_name="product_search")
+    elif dialect == "sqlite":
+        op.execute("DROP TABLE IF EXISTS product_search_fts")
+    op.drop_table("product_search")
@@ -0,0 +1,78 @@
+"""Add partitioned price tick history and daily price rollups
+
+Revision ID: d3f1a8c5b7e2
+Revises: b5a7c9e2d410
+Create Date: 2025-09-22 10:41:08.215377
+
+"""
+
+from collections.abc import Sequence
+from datetime import datetime
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d3f1a8c5b7e2"
+down_revision: str | Sequence[str] | None = "b5a7c9e2d410"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Monthly partitions created up front; the maintenance task adds later ones
+INITIAL_PARTITIONS = 3
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "price_ticks",
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("currency", sa.String(length=3), nullable=False),
+        sa.Column("observed_at", sa.DateTime(), nullable=False),
+        sa.Column("price_cents", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["product_id"],
+            ["products.id"],
+        ),
+        sa.PrimaryKeyConstraint("product_id", "currency", "observed_at"),
+        postgresql_partition_by="RANGE (observed_at)",
+    )
+    op.create_index(
+        op.f("ix_price_ticks_observed_at"), "price_ticks", ["observed_at"], unique=False
+    )
+
+    op.create_table(
+        "price_daily",
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("currency", sa.String(length=3), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("min_cents", sa.Integer(), nullable=False),
+        sa.Column("max_cents", sa.Integer(), nullable=False),
+        sa.Column("last_cents", sa.Integer(), nullable=False),
+        sa.Column("ticks", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["product_id"],
+            ["products.id"],
+        ),
+        sa.PrimaryKeyConstraint("product_id", "currency", "day"),
+    )
+
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("CREATE TABLE price_ticks_default PARTITION OF price_ticks DEFAULT")
+        now = datetime.utcnow()
+        month = datetime(now.year, now.month, 1)
+        for _ in range(INITIAL_PARTITIONS):
+            upper = datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+            op.execute(
+                f"CREATE TABLE price_ticks_{month:%Y_%m} PARTITION OF price_ticks "
+                f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+            )
+            month = upper
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("price_daily")
+    op.drop_index(op.f("ix_price_ticks_observed_at"), table_name="price_ticks")
+    op.drop_table("price_ticks")
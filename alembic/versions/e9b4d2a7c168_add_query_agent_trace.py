@@ -0,0 +1,30 @@
+"""Add per-node agent trace to queries
+
+Revision ID: e9b4d2a7c168
+Revises: c6e2f9a1d357
+Create Date: 2025-10-03 16:42:18.304512
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e9b4d2a7c168"
+down_revision: str | Sequence[str] | None = "c6e2f9a1d357"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("queries", sa.Column("agent_trace", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("queries") as batch_op:
+        batch_op.drop_column("agent_trace")
@@ -0,0 +1,60 @@
+"""Add materialized product features and their version counter
+
+Revision ID: f2c7a9d4e613
+Revises: e9b4d2a7c168
+Create Date: 2025-10-08 10:21:36.118240
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f2c7a9d4e613"
+down_revision: str | Sequence[str] | None = "e9b4d2a7c168"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "product_features",
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("min_price_cents", sa.Integer(), nullable=True),
+        sa.Column("price_drop", sa.Float(), nullable=True),
+        sa.Column("review_count", sa.Integer(), nullable=False),
+        sa.Column("review_sentiment", sa.Float(), nullable=True),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["product_id"],
+            ["products.id"],
+        ),
+        sa.PrimaryKeyConstraint("product_id"),
+    )
+    op.create_index(
+        op.f("ix_product_features_version"),
+        "product_features",
+        ["version"],
+        unique=False,
+    )
+
+    version_table = op.create_table(
+        "product_feature_version",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.bulk_insert(version_table, [{"id": 1, "version": 0}])
+    # Existing products are filled in by the refresh-product-features beat task
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("product_feature_version")
+    op.drop_index(op.f("ix_product_features_version"), table_name="product_features")
+    op.drop_table("product_features")
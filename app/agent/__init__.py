@@ -0,0 +1,23 @@
+"""Recommendation agent for ShopSherpa."""
+
+from .gateway import GatewayStats, LLMGateway, get_llm_gateway
+from .graph import AgentGraph, NodeTimeout, NodeTiming
+from .llm import LLM, FakeLLM, load_llm, parse_constraints
+from .rationales import generate_rationales
+from .recommend import build_agent_graph, run_recommendation_agent
+
+__all__ = [
+    "LLM",
+    "AgentGraph",
+    "FakeLLM",
+    "GatewayStats",
+    "LLMGateway",
+    "NodeTimeout",
+    "NodeTiming",
+    "build_agent_graph",
+    "generate_rationales",
+    "get_llm_gateway",
+    "load_llm",
+    "parse_constraints",
+    "run_recommendation_agent",
+]
@@ -0,0 +1,195 @@
+"""LLM gateway: response caching, in-flight de-duplication and usage accounting.
+
+Every completion goes through ``LLMGateway.complete``. Responses are
+cached under a content address, a SHA-256 of the backend, model, sampling
+parameters and prompt. The cache checks an in-process LRU first, then an
+optional shared tier (Redis, or a SQLite file on single-host deployments),
+read and written in a worker thread so the event loop never blocks on it.
+A prompt that is already being answered is not sent again: later callers
+wait for the pending completion.
+
+Tokens are estimated from the text (about four characters per token)
+because the backends do not share a usage format; the estimate is only
+used to report what the cache saves.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any
+
+from app.agent.llm import LLM, load_llm
+from app.cache.memory import TTLCache
+from app.cache.shared import RedisCache, redis_client
+from app.cache.sqlite import SQLiteCache
+from app.core.config import settings
+
+
+def count_tokens(text: str) -> int:
+    """Rough token count of ``text`` for usage reporting."""
+    return (len(text) + 3) // 4
+
+
+def cache_key(prompt: str, model: str, params: dict[str, Any] | None = None) -> str:
+    """Content address of a completion request."""
+    raw = json.dumps(
+        {"model": model, "params": params or {}, "prompt": prompt}, sort_keys=True
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+@dataclass
+class GatewayStats:
+    """Calls made and saved by the gateway, with estimated tokens and time."""
+
+    requests: int = 0
+    llm_calls: int = 0
+    cache_hits: int = 0
+    coalesced: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    saved_tokens: int = 0
+    llm_seconds: float = 0.0
+    saved_seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return (
+            (self.cache_hits + self.coalesced) / self.requests if self.requests else 0.0
+        )
+
+    def as_dict(self) -> dict[str, float]:
+        return {**asdict(self), "hit_rate": self.hit_rate}
+
+
+class LLMGateway:
+    """
+    Caching, de-duplicating front for an ``LLM`` backend.
+
+    Implements the ``LLM`` interface itself, so it can be passed wherever
+    a backend is expected. Prompts are de-duplicated per event loop.
+    """
+
+    def __init__(
+        self,
+        llm: LLM,
+        model: str,
+        params: dict[str, Any] | None = None,
+        memory: TTLCache | None = None,
+        shared: RedisCache | SQLiteCache | None = None,
+    ) -> None:
+        """
+        Args:
+            llm: Backend answering cache misses
+            model: Model name; part of the cache key
+            params: Sampling parameters; part of the cache key
+            memory: In-process response cache (None disables caching)
+            shared: Optional tier shared between processes
+        """
+        self.llm = llm
+        self.model = model
+        self.params = params or {}
+        self.memory = memory
+        self.shared = shared
+        self.stats = GatewayStats()
+        self._inflight: dict[tuple[asyncio.AbstractEventLoop, str], asyncio.Future] = {}
+
+    async def _cached(self, key: str) -> dict[str, Any] | None:
+        if self.memory is None:
+            return None
+        entry = self.memory.get(key)
+        if entry is None and self.shared is not None:
+            entry = await asyncio.to_thread(self.shared.get, key)
+            if entry is not None:
+                self.memory.set(key, entry)
+        return entry
+
+    def _saved(self, entry: dict[str, Any]) -> str:
+        self.stats.saved_tokens += entry["prompt_tokens"] + entry["completion_tokens"]
+        self.stats.saved_seconds += entry["seconds"]
+        return entry["text"]
+
+    async def complete(self, prompt: str) -> str:
+        """Return the completion for ``prompt``, from cache when possible."""
+        self.stats.requests += 1
+        key = cache_key(prompt, self.model, self.params)
+        loop = asyncio.get_running_loop()
+
+        while True:
+            entry = await self._cached(key)
+            if entry is not None:
+                self.stats.cache_hits += 1
+                return self._saved(entry)
+
+            future = self._inflight.get((loop, key))
+            if future is None:
+                break
+            try:
+                # One caller giving up must not cancel the completion for the others
+                entry = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if future.cancelled():
+                    # The caller that sent the prompt gave up; send it again
+                    continue
+                raise
+            self.stats.coalesced += 1
+            return self._saved(entry)
+
+        future = self._inflight[loop, key] = loop.create_future()
+        try:
+            started = time.perf_counter()
+            text = await self.llm.complete(prompt)
+            entry = {
+                "text": text,
+                "prompt_tokens": count_tokens(prompt),
+                "completion_tokens": count_tokens(text),
+                "seconds": time.perf_counter() - started,
+            }
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark retrieved so a failure nobody else awaited is not logged
+            future.exception()
+            raise
+        finally:
+            del self._inflight[loop, key]
+
+        self.stats.llm_calls += 1
+        self.stats.prompt_tokens += entry["prompt_tokens"]
+        self.stats.completion_tokens += entry["completion_tokens"]
+        self.stats.llm_seconds += entry["seconds"]
+        if self.memory is not None:
+            self.memory.set(key, entry)
+        future.set_result(entry)
+        if self.memory is not None and self.shared is not None:
+            await asyncio.to_thread(self.shared.set, key, entry)
+        return text
+
+
+@lru_cache
+def get_llm_gateway() -> LLMGateway:
+    """Process-wide gateway for ``settings.agent_llm`` configured from settings."""
+    shared: RedisCache | SQLiteCache | None = None
+    if settings.llm_cache_backend == "redis":
+        shared = RedisCache(
+            redis_client(), prefix="llm", ttl=settings.llm_cache_ttl_seconds
+        )
+    elif settings.llm_cache_backend == "sqlite":
+        shared = SQLiteCache(
+            settings.llm_cache_sqlite_path,
+            prefix="llm",
+            ttl=settings.llm_cache_ttl_seconds,
+            max_entries=settings.llm_cache_max_entries,
+        )
+    return LLMGateway(
+        load_llm(),
+        model=f"{settings.agent_llm}:{settings.llm_model}",
+        params={"temperature": settings.llm_temperature},
+        memory=TTLCache(settings.llm_cache_size, settings.llm_cache_ttl_seconds),
+        shared=shared,
+    )
@@ -0,0 +1,202 @@
+"""Dependency-driven async graph executor for agent workflows.
+
+Nodes follow LangGraph's model: each receives the current state and
+returns a partial update that is merged into it. Edges are declared as
+the nodes a node runs ``after``. Instead of advancing in lock-step
+supersteps, a node starts as soon as all of its dependencies have
+finished, so independent branches (an LLM call next to a database
+query) overlap.
+
+Per node, the executor adds:
+
+- a timeout, after which an optional ``fallback(state)`` update is used
+  instead of failing the run
+- an optional result cache for deterministic nodes, keyed by
+  ``cache_key(state)``
+- a timing record (start offset, duration, status) for the run's trace
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Hashable, Mapping
+from dataclasses import asdict, dataclass
+from types import MappingProxyType
+from typing import Any
+
+from app.cache.memory import TTLCache
+
+logger = logging.getLogger(__name__)
+
+State = Mapping[str, Any]
+NodeFunc = Callable[[State], Awaitable[dict[str, Any]]]
+
+
+@dataclass(frozen=True)
+class Node:
+    """A graph node and its execution policy."""
+
+    name: str
+    func: NodeFunc
+    after: tuple[str, ...] = ()
+    timeout: float | None = None
+    fallback: Callable[[State], dict[str, Any]] | None = None
+    cache_key: Callable[[State], Hashable] | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class NodeTiming:
+    """One node's entry in a run trace; offsets are from the start of the run."""
+
+    node: str
+    started_ms: float
+    elapsed_ms: float
+    status: str
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class NodeTimeout(Exception):
+    """A node without a fallback exceeded its timeout."""
+
+    def __init__(self, node: str, timeout: float) -> None:
+        super().__init__(f"Node '{node}' timed out after {timeout:g}s")
+        self.node = node
+
+
+class AgentGraph:
+    """A DAG of async nodes run with maximum overlap."""
+
+    def __init__(
+        self, cache: TTLCache | None = None, concurrency: int | None = None
+    ) -> None:
+        """
+        Args:
+            cache: Store for results of nodes declaring a ``cache_key``
+            concurrency: Maximum nodes running at once (1 runs them one by
+                one in dependency order); unlimited by default
+        """
+        self.nodes: dict[str, Node] = {}
+        self.cache = cache
+        self.concurrency = concurrency
+
+    def add_node(
+        self,
+        name: str,
+        func: NodeFunc,
+        after: tuple[str, ...] = (),
+        timeout: float | None = None,
+        fallback: Callable[[State], dict[str, Any]] | None = None,
+        cache_key: Callable[[State], Hashable] | None = None,
+    ) -> "AgentGraph":
+        """Register a node; dependencies must already be registered."""
+        if name in self.nodes:
+            raise ValueError(f"Duplicate node '{name}'")
+        missing = [dependency for dependency in after if dependency not in self.nodes]
+        if missing:
+            raise ValueError(f"Node '{name}' depends on unknown nodes {missing}")
+        self.nodes[name] = Node(name, func, tuple(after), timeout, fallback, cache_key)
+        return self
+
+    async def run(
+        self, state: Mapping[str, Any]
+    ) -> tuple[dict[str, Any], list[NodeTiming]]:
+        """
+        Execute every node once and return the final state and trace.
+
+        A node sees a read-only snapshot of the state as it was when the
+        node started. If a node fails (or times out without a fallback)
+        the nodes still running are cancelled and the error is raised.
+        """
+        state = dict(state)
+        trace: list[NodeTiming] = []
+        started = time.perf_counter()
+        limit = asyncio.Semaphore(self.concurrency) if self.concurrency else None
+
+        waiting = {name: set(node.after) for name, node in self.nodes.items()}
+        running: dict[asyncio.Task, str] = {}
+        try:
+            while waiting or running:
+                # Registration order makes dependency order a valid start order
+                for name in [name for name, deps in waiting.items() if not deps]:
+                    del waiting[name]
+                    task = asyncio.create_task(
+                        self._run_node(self.nodes[name], state, started, trace, limit)
+                    )
+                    running[task] = name
+
+                done, _ = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    name = running.pop(task)
+                    state.update(task.result())
+                    for deps in waiting.values():
+                        deps.discard(name)
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        return state, sorted(trace, key=lambda timing: timing.started_ms)
+
+    async def _run_node(
+        self,
+        node: Node,
+        state: dict[str, Any],
+        started: float,
+        trace: list[NodeTiming],
+        limit: asyncio.Semaphore | None,
+    ) -> dict[str, Any]:
+        if limit is not None:
+            async with limit:
+                return await self._run_node(node, state, started, trace, None)
+
+        snapshot = MappingProxyType(dict(state))
+        node_started = time.perf_counter()
+        status = "ok"
+
+        def record() -> None:
+            now = time.perf_counter()
+            trace.append(
+                NodeTiming(
+                    node.name,
+                    round((node_started - started) * 1000, 3),
+                    round((now - node_started) * 1000, 3),
+                    status,
+                )
+            )
+
+        key = None
+        if node.cache_key is not None and self.cache is not None:
+            key = (node.name, node.cache_key(snapshot))
+            cached = self.cache.get(key)
+            if cached is not None:
+                status = "cached"
+                record()
+                return cached
+
+        try:
+            update = await asyncio.wait_for(node.func(snapshot), node.timeout)
+        except TimeoutError:
+            status = "timeout"
+            record()
+            if node.fallback is None:
+                raise NodeTimeout(node.name, node.timeout) from None
+            logger.warning("Agent node %s timed out, using fallback", node.name)
+            return node.fallback(snapshot)
+        except asyncio.CancelledError:
+            status = "cancelled"
+            record()
+            raise
+        except BaseException:
+            status = "error"
+            record()
+            raise
+
+        record()
+        if key is not None:
+            self.cache.set(key, update)
+        return update
@@ -0,0 +1,139 @@
+"""Pluggable LLM backends for the recommendation agent."""
+
+import asyncio
+import json
+import re
+from typing import Protocol
+
+from kombu.utils.imports import symbol_by_name
+
+from app.core.config import settings
+
+_MONEY = r"\$?\s*(\d+(?:[.,]\d{1,2})?)"
+# Bare number pairs ("Pro 2 and 3") are only a range after "between" or a "$"
+_RANGE_RE = re.compile(
+    rf"between\s+{_MONEY}\s+and\s+{_MONEY}|\$\s*(\d+(?:[.,]\d{{1,2}})?)\s*(?:-|–|to)\s*{_MONEY}",
+    re.I,
+)
+_MAX_RE = re.compile(
+    rf"(?:under|below|less than|up to|max(?:imum)?|no more than|<)\s*{_MONEY}", re.I
+)
+_MIN_RE = re.compile(
+    rf"(?:over|above|more than|at least|min(?:imum)?|>)\s*{_MONEY}", re.I
+)
+_AROUND_RE = re.compile(rf"(?:around|about|roughly|~)\s*{_MONEY}", re.I)
+_USAGE_RE = re.compile(
+    r"\bfor\s+(?:the\s+|my\s+)?([a-z][a-z ]*?)(?=$|[,.;!?]|\s+(?:under|below|with|and|that|around|between))",
+    re.I,
+)
+
+# The fake backend recognizes prompts by their first line
+PARSE_TASK = "Extract the shopping constraints"
+SUMMARY_TASK = "Summarize these reviews"
+RATIONALE_TASK = "Explain why each product suits the request"
+
+
+class LLM(Protocol):
+    """Interface for text completion backends."""
+
+    async def complete(self, prompt: str) -> str:
+        """Return the completion for ``prompt``."""
+        ...
+
+
+def parse_constraints(text: str) -> dict[str, float | str | None]:
+    """
+    Rule-based budget and usage extraction from a shopper request.
+
+    Understands ranges ("$100-150", "between 100 and 200"), caps ("under
+    $200"), floors ("at least $50") and targets ("around $150", read as
+    +/-20%). Used by ``FakeLLM`` and as the fallback when the LLM node
+    times out.
+    """
+
+    def amount(value: str) -> float:
+        return float(value.replace(",", "."))
+
+    budget_min = budget_max = None
+    if match := _RANGE_RE.search(text):
+        low, high = (value for value in match.groups() if value is not None)
+        budget_min, budget_max = sorted((amount(low), amount(high)))
+    elif match := _AROUND_RE.search(text):
+        target = amount(match[1])
+        budget_min, budget_max = round(target * 0.8, 2), round(target * 1.2, 2)
+    else:
+        if match := _MAX_RE.search(text):
+            budget_max = amount(match[1])
+        if match := _MIN_RE.search(text):
+            budget_min = amount(match[1])
+
+    usage = _USAGE_RE.search(text)
+    return {
+        "budget_min": budget_min,
+        "budget_max": budget_max,
+        "usage": usage[1].strip().lower() if usage else None,
+    }
+
+
+def _explain(body: str) -> str:
+    """JSON rationale per product line of a rationale prompt."""
+    request, *lines = body.splitlines()
+    request = request.removeprefix("Request: ")
+    rationales = {}
+    for line in lines:
+        product = json.loads(line)
+        rationales[product["id"]] = (
+            f"{product['title']} fits \"{request}\": {product['facts']}"
+        )
+    return json.dumps(rationales)
+
+
+def _summarize(snippets: list[str]) -> str:
+    """First sentence of the most common reviews, joined; deterministic."""
+    sentences = [
+        re.split(r"(?<=[.!?])\s", snippet.strip())[0]
+        for snippet in snippets
+        if snippet.strip()
+    ]
+    return " ".join(sentences[:3])
+
+
+class FakeLLM:
+    """
+    Offline, deterministic stand-in for a hosted model.
+
+    Answers the agent's prompts with rule-based results after a fixed
+    delay, so graphs and their latency benchmarks run without network
+    access or API keys.
+    """
+
+    def __init__(self, latency: float | None = None) -> None:
+        """
+        Args:
+            latency: Seconds each completion takes (default
+                ``settings.agent_fake_llm_latency_ms``)
+        """
+        self.latency = (
+            settings.agent_fake_llm_latency_ms / 1000 if latency is None else latency
+        )
+        self.calls = 0
+
+    async def complete(self, prompt: str) -> str:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        task, _, body = prompt.partition("\n")
+        if task.startswith(PARSE_TASK):
+            return json.dumps(parse_constraints(body))
+        if task.startswith(RATIONALE_TASK):
+            return _explain(body)
+        if task.startswith(SUMMARY_TASK):
+            return _summarize(
+                body.split("\n- ")[1:] if "\n- " in body else body.splitlines()
+            )
+        return ""
+
+
+def load_llm(path: str | None = None) -> LLM:
+    """Instantiate the backend named by ``path`` or ``settings.agent_llm``."""
+    return symbol_by_name(path or settings.agent_llm)()
@@ -0,0 +1,81 @@
+"""Batched LLM rationales for ranked products.
+
+One prompt covers up to ``llm_rationale_batch_size`` products, so the
+instructions and the shopper's request are sent once per batch instead of
+once per product.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any
+
+from app.agent.llm import LLM, RATIONALE_TASK
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def rationale_prompt(raw_text: str, products: list[dict[str, Any]]) -> str:
+    """Prompt asking for a JSON object of rationales keyed by product id."""
+    lines = [f"{RATIONALE_TASK} as a JSON object keyed by id.", f"Request: {raw_text}"]
+    lines += [
+        json.dumps(
+            {
+                "id": product["product_id"],
+                "title": product["title"],
+                "facts": product["facts"],
+            },
+            sort_keys=True,
+        )
+        for product in products
+    ]
+    return "\n".join(lines)
+
+
+async def generate_rationales(
+    llm: LLM,
+    raw_text: str,
+    products: list[dict[str, Any]],
+    batch_size: int | None = None,
+) -> dict[int, str]:
+    """
+    Ask ``llm`` for a rationale per product, batching products per call.
+
+    Args:
+        llm: Backend or gateway
+        raw_text: The shopper's request
+        products: Dicts with ``product_id``, ``title`` and ``facts``
+        batch_size: Products per call (default ``settings.llm_rationale_batch_size``)
+
+    Returns:
+        Rationale per product id; products missing from an unparseable or
+        incomplete answer are left out
+    """
+    batch_size = batch_size or settings.llm_rationale_batch_size
+    batches = [
+        products[start : start + batch_size]
+        for start in range(0, len(products), batch_size)
+    ]
+    completions = await asyncio.gather(
+        *(llm.complete(rationale_prompt(raw_text, batch)) for batch in batches)
+    )
+
+    wanted = {product["product_id"] for product in products}
+    rationales = {}
+    for completion in completions:
+        try:
+            answer = json.loads(completion)
+        except json.JSONDecodeError:
+            logger.warning("Unparseable rationales from LLM")
+            continue
+        if not isinstance(answer, dict):
+            continue
+        for product_id, text in answer.items():
+            if not (
+                str(product_id).isdigit() and isinstance(text, str) and text.strip()
+            ):
+                continue
+            if int(product_id) in wanted:
+                rationales[int(product_id)] = text.strip()
+    return rationales
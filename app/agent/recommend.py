@@ -0,0 +1,399 @@
+"""Recommendation agent: request parsing, retrieval, freshness and review summaries.
+
+Node layout (arrows are dependencies)::
+
+    parse_request ─────────────────────────────┐
+    retrieve ──┬── check_freshness ────────────┼── rank ── explain
+               └── summarize_reviews ──────────┘
+
+``parse_request`` (an LLM call) and ``retrieve`` (hybrid search) start
+together; freshness checks and review summaries start as soon as the
+candidates are known. Retrieval uses the budget given explicitly with
+the request; a budget only stated in ``raw_text`` is applied by ``rank``
+once the parse has finished, so the LLM call never delays the search.
+``explain`` replaces the rule-based rationales of the ranked products
+with LLM-written ones, generated in batches.
+
+LLM calls go through the process-wide ``LLMGateway`` by default, so
+repeated prompts are answered from its response cache.
+
+Database work runs in worker threads, each with its own session.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.agent.gateway import get_llm_gateway
+from app.agent.graph import AgentGraph, State
+from app.agent.llm import LLM, PARSE_TASK, SUMMARY_TASK, parse_constraints
+from app.agent.rationales import generate_rationales
+from app.cache.memory import TTLCache
+from app.core.config import settings
+from app.db.models import Offer, Query, Review
+from app.embeddings import EmbeddingBackend, load_embedder
+from app.ranking.engine import RankingEngine
+from app.ranking.pipeline import RecommendationRequest
+from app.ranking.products import product_summaries
+from app.ranking.service import load_candidates, rank_query, update_rationales
+from app.search.hybrid import hybrid_search, within_budget
+
+logger = logging.getLogger(__name__)
+
+# Reviews per product passed to the summarizer
+SUMMARY_SNIPPETS = 5
+
+_node_cache: TTLCache | None = None
+
+
+def get_node_cache() -> TTLCache:
+    """Process-wide cache for deterministic node results."""
+    global _node_cache
+    if _node_cache is None:
+        _node_cache = TTLCache(
+            settings.agent_cache_size, settings.agent_cache_ttl_seconds
+        )
+    return _node_cache
+
+
+def dispatch_refresh(offer_ids: list[int]) -> None:
+    """Queue a high-priority refresh of stale offers."""
+    from app.tasks.refresh import PRIORITY_HOT, refresh_offer_chunk
+
+    refresh_offer_chunk.apply_async((offer_ids,), priority=PRIORITY_HOT)
+
+
+def _decimal(value: Any) -> Decimal | None:
+    return None if value is None else Decimal(str(value))
+
+
+def _constraints(completion: str) -> dict[str, Any] | None:
+    """LLM constraints as a dict, or None unless budgets are numbers and usage text."""
+    try:
+        parsed = json.loads(completion)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(parsed, dict):
+        return None
+    for key in ("budget_min", "budget_max"):
+        value = parsed.get(key)
+        if value is not None and (
+            isinstance(value, bool) or not isinstance(value, (int, float))
+        ):
+            return None
+    usage = parsed.get("usage")
+    if usage is not None and not isinstance(usage, str):
+        return None
+    return parsed
+
+
+def _stale_offers(db: Session, product_ids: list[int]) -> list[tuple[int, int]]:
+    cutoff = datetime.utcnow() - timedelta(hours=settings.offer_max_age_hours)
+    return db.execute(
+        select(Offer.id, Offer.product_id).where(
+            Offer.product_id.in_(product_ids), Offer.last_checked_at < cutoff
+        )
+    ).all()
+
+
+def _review_snippets(db: Session, product_ids: list[int]) -> dict[int, list[str]]:
+    rows = db.execute(
+        select(Review.product_id, Review.snippet)
+        .where(Review.product_id.in_(product_ids), Review.snippet.is_not(None))
+        .order_by(Review.product_id, Review.created_at.desc())
+    )
+    snippets: dict[int, list[str]] = defaultdict(list)
+    for product_id, snippet in rows:
+        if len(snippets[product_id]) < SUMMARY_SNIPPETS:
+            snippets[product_id].append(snippet)
+    return snippets
+
+
+def build_agent_graph(
+    session_factory: Callable[[], Session],
+    llm: LLM | None = None,
+    embedder: EmbeddingBackend | None = None,
+    engine: RankingEngine | None = None,
+    on_stale: Callable[[list[int]], None] | None = None,
+    cache: TTLCache | None = None,
+    concurrency: int | None = None,
+) -> AgentGraph:
+    """
+    Build the recommendation graph.
+
+    The graph is reusable across runs; each run's state starts with
+    ``query_id`` and ``request`` (a ``RecommendationRequest``).
+
+    Args:
+        session_factory: Creates a session per database step
+        llm: Backend for parsing, summaries and rationales (default
+            ``get_llm_gateway()``)
+        embedder: Embedding backend for retrieval (default ``load_embedder()``)
+        engine: Ranking engine
+        on_stale: Called in a worker thread with the ids of expired offers
+            among the candidates; errors are logged (default ``dispatch_refresh``)
+        cache: Store for parse and summary node results (default: process-wide)
+        concurrency: Maximum nodes running at once
+    """
+    llm = llm or get_llm_gateway()
+    embedder = embedder or load_embedder()
+    on_stale = on_stale or dispatch_refresh
+    llm_timeout = settings.agent_llm_timeout_seconds
+    node_timeout = settings.agent_node_timeout_seconds
+
+    async def parse_request(state: State) -> dict[str, Any]:
+        completion = await llm.complete(
+            f"{PARSE_TASK} as JSON.\n{state['request'].raw_text}"
+        )
+        parsed = _constraints(completion)
+        if parsed is None:
+            logger.warning("Unparseable constraints from LLM, using rules")
+            parsed = parse_constraints(state["request"].raw_text)
+        return {
+            "parsed": {
+                key: parsed.get(key) for key in ("budget_min", "budget_max", "usage")
+            }
+        }
+
+    async def retrieve(state: State) -> dict[str, Any]:
+        request: RecommendationRequest = state["request"]
+        hits = await hybrid_search(
+            session_factory,
+            request.raw_text,
+            embedder,
+            request.candidates,
+            budget_min=request.budget_min,
+            budget_max=request.budget_max,
+        )
+        return {"hits": hits}
+
+    def find_stale(product_ids: list[int]) -> list[tuple[int, int]]:
+        with session_factory() as db:
+            return _stale_offers(db, product_ids)
+
+    async def check_freshness(state: State) -> dict[str, Any]:
+        product_ids = [hit.id for hit in state["hits"][: state["request"].limit]]
+        stale = await asyncio.to_thread(find_stale, product_ids) if product_ids else []
+        if stale:
+            try:
+                # Publishing blocks on the broker, so keep it off the event loop
+                await asyncio.to_thread(on_stale, [offer_id for offer_id, _ in stale])
+            except Exception:
+                # Refreshing is best-effort; the stale products are still reported
+                logger.warning("Could not dispatch stale offer refresh", exc_info=True)
+        return {"stale_products": sorted({product_id for _, product_id in stale})}
+
+    def load_snippets(product_ids: list[int]) -> dict[int, list[str]]:
+        with session_factory() as db:
+            return _review_snippets(db, product_ids)
+
+    async def summarize_reviews(state: State) -> dict[str, Any]:
+        product_ids = [
+            hit.id for hit in state["hits"][: settings.agent_summary_products]
+        ]
+        snippets = (
+            await asyncio.to_thread(load_snippets, product_ids) if product_ids else {}
+        )
+        ids = [product_id for product_id in product_ids if snippets.get(product_id)]
+        summaries = await asyncio.gather(
+            *(
+                llm.complete(f"{SUMMARY_TASK}.\n- " + "\n- ".join(snippets[product_id]))
+                for product_id in ids
+            )
+        )
+        return {"summaries": dict(zip(ids, summaries, strict=True))}
+
+    def persist_rankings(state: State) -> list[dict[str, Any]]:
+        request: RecommendationRequest = state["request"]
+        parsed = state.get("parsed") or {}
+        with session_factory() as db:
+            query = db.get(Query, state["query_id"])
+            hits = state["hits"]
+            # Constraints stated only in the text fill the request's gaps
+            if query.budget_min is None and query.budget_max is None:
+                query.budget_min = _decimal(parsed.get("budget_min"))
+                query.budget_max = _decimal(parsed.get("budget_max"))
+                hits = within_budget(db, hits, query.budget_min, query.budget_max)
+            if query.usage is None:
+                query.usage = parsed.get("usage")
+
+            candidates = load_candidates(
+                db,
+                (hit.id for hit in hits),
+                similarity={
+                    hit.id: hit.similarity for hit in hits if hit.similarity is not None
+                },
+                usage=query.usage,
+            )
+            # An expired price is not trusted until its refresh lands
+            stale = np.isin(candidates.product_ids, state.get("stale_products") or [])
+            candidates.price_cents[stale] = np.nan
+            rows = rank_query(db, query, candidates, n=request.limit, engine=engine)
+            db.commit()
+        return rows
+
+    async def rank(state: State) -> dict[str, Any]:
+        rows = await asyncio.to_thread(persist_rankings, state)
+        summaries = state.get("summaries") or {}
+        return {
+            "rankings": [
+                {
+                    "rank": position,
+                    "product_id": row["product_id"],
+                    "score": float(row["score"]),
+                    "rationale": row["rationale"],
+                    "summary": summaries.get(row["product_id"]),
+                }
+                for position, row in enumerate(rows, start=1)
+            ]
+        }
+
+    def load_titles(product_ids: list[int]) -> dict[int, str]:
+        with session_factory() as db:
+            return {
+                product_id: product.title
+                for product_id, product in product_summaries(db, product_ids).items()
+            }
+
+    def save_rationales(query_id: int, rationales: dict[int, str]) -> None:
+        with session_factory() as db:
+            update_rationales(db, query_id, rationales)
+            db.commit()
+
+    async def explain(state: State) -> dict[str, Any]:
+        rankings = state["rankings"]
+        if not rankings:
+            return {}
+        titles = await asyncio.to_thread(
+            load_titles, [row["product_id"] for row in rankings]
+        )
+        products = [
+            {
+                "product_id": row["product_id"],
+                "title": titles.get(row["product_id"], ""),
+                "facts": row["rationale"]
+                + (f". Reviewers say: {row['summary']}" if row["summary"] else ""),
+            }
+            for row in rankings
+        ]
+        rationales = await generate_rationales(llm, state["request"].raw_text, products)
+        if rationales:
+            await asyncio.to_thread(save_rationales, state["query_id"], rationales)
+        return {
+            "rankings": [
+                {
+                    **row,
+                    "rationale": rationales.get(row["product_id"], row["rationale"]),
+                }
+                for row in rankings
+            ]
+        }
+
+    graph = AgentGraph(
+        cache=get_node_cache() if cache is None else cache, concurrency=concurrency
+    )
+    graph.add_node(
+        "parse_request",
+        parse_request,
+        timeout=llm_timeout,
+        fallback=lambda state: {"parsed": parse_constraints(state["request"].raw_text)},
+        cache_key=lambda state: state["request"].raw_text,
+    )
+    graph.add_node("retrieve", retrieve, timeout=node_timeout)
+    graph.add_node(
+        "check_freshness",
+        check_freshness,
+        after=("retrieve",),
+        timeout=node_timeout,
+        fallback=lambda state: {"stale_products": []},
+    )
+    graph.add_node(
+        "summarize_reviews",
+        summarize_reviews,
+        after=("retrieve",),
+        timeout=llm_timeout,
+        fallback=lambda state: {"summaries": {}},
+        cache_key=lambda state: tuple(
+            hit.id for hit in state["hits"][: settings.agent_summary_products]
+        ),
+    )
+    graph.add_node(
+        "rank",
+        rank,
+        after=("parse_request", "check_freshness", "summarize_reviews"),
+        timeout=node_timeout,
+    )
+    if settings.agent_llm_rationales:
+        # Timing out keeps the rule-based rationales
+        graph.add_node(
+            "explain",
+            explain,
+            after=("rank",),
+            timeout=llm_timeout,
+            fallback=lambda state: {},
+        )
+    return graph
+
+
+def _create_query(
+    session_factory: Callable[[], Session], request: RecommendationRequest
+) -> int:
+    with session_factory() as db:
+        query = Query(
+            raw_text=request.raw_text,
+            budget_min=request.budget_min,
+            budget_max=request.budget_max,
+            usage=request.usage,
+        )
+        db.add(query)
+        db.commit()
+        return query.id
+
+
+def _save_trace(
+    session_factory: Callable[[], Session], query_id: int, trace: dict[str, Any]
+) -> None:
+    with session_factory() as db:
+        db.get(Query, query_id).agent_trace = trace
+        db.commit()
+
+
+async def run_recommendation_agent(
+    session_factory: Callable[[], Session],
+    request: RecommendationRequest,
+    graph: AgentGraph | None = None,
+) -> dict[str, Any]:
+    """
+    Run the agent for one request and persist its per-node trace.
+
+    Returns:
+        Dict with ``query_id``, ``rankings`` (best first, each with an
+        optional review ``summary``), the ``parsed`` constraints and the
+        ``trace`` stored on the Query
+    """
+    graph = graph or build_agent_graph(session_factory)
+    started = time.perf_counter()
+    query_id = await asyncio.to_thread(_create_query, session_factory, request)
+
+    state, timings = await graph.run({"query_id": query_id, "request": request})
+    trace = {
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+        "nodes": [timing.as_dict() for timing in timings],
+    }
+    await asyncio.to_thread(_save_trace, session_factory, query_id, trace)
+    return {
+        "query_id": query_id,
+        "rankings": state["rankings"],
+        "parsed": state["parsed"],
+        "trace": trace,
+    }
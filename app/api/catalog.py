@@ -0,0 +1,91 @@
+"""Catalog browsing, product detail and ranking list endpoints."""
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from sqlalchemy.orm import Session
+
+from app.cache.catalog import get_catalog_cache
+from app.db.session import get_db
+from app.repositories import InvalidCursor, list_products, page_ranked_products
+
+router = APIRouter(tags=["catalog"])
+
+
+@router.get("/products")
+def get_products_page(
+    brand: str | None = Query(default=None, max_length=100),
+    category: str | None = Query(default=None, max_length=100),
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: str | None = Query(default=None, max_length=512),
+    db: Session = Depends(get_db),
+) -> dict:
+    """Products newest first; pass ``next_cursor`` back as ``cursor`` for the next page."""
+    try:
+        page = list_products(
+            db, brand=brand, category=category, limit=limit, cursor=cursor
+        )
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return {
+        "items": [
+            {
+                "id": product.id,
+                "asin": product.asin,
+                "title": product.title,
+                "brand": product.brand,
+                "category": product.category,
+            }
+            for product in page.items
+        ],
+        "next_cursor": page.next_cursor,
+    }
+
+
+@router.get("/products/{asin}")
+def get_product(
+    asin: str = Path(max_length=20),
+    db: Session = Depends(get_db),
+) -> dict:
+    """One product with its offers and reviews, served through the catalog cache."""
+    product = get_catalog_cache().get_product(db, asin)
+    if product is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return product.to_dict()
+
+
+@router.get("/queries/{query_id}/rankings")
+def get_rankings_page(
+    query_id: int,
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = Query(default=None, max_length=512),
+    currency: str | None = Query(default=None, min_length=3, max_length=3),
+    db: Session = Depends(get_db),
+) -> dict:
+    """A query's ranked products, highest score first, with their latest offer."""
+    try:
+        page = page_ranked_products(
+            db,
+            query_id,
+            limit=limit,
+            cursor=cursor,
+            currency=currency.upper() if currency else None,
+        )
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return {
+        "query_id": query_id,
+        "items": [
+            {
+                "product_id": item.product.id,
+                "asin": item.product.asin,
+                "title": item.product.title,
+                "score": float(item.ranking.score),
+                "rationale": item.ranking.rationale,
+                "price_cents": (
+                    item.latest_offer.price_cents if item.latest_offer else None
+                ),
+                "currency": item.latest_offer.currency if item.latest_offer else None,
+            }
+            for item in page.items
+        ],
+        "next_cursor": page.next_cursor,
+    }
@@ -0,0 +1,44 @@
+"""Price history endpoints."""
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.repositories.prices import price_trend
+
+router = APIRouter(prefix="/products", tags=["prices"])
+
+
+@router.get("/{product_id}/price-trend")
+def get_price_trend(
+    product_id: int,
+    days: int = Query(default=90, ge=1, le=365),
+    currency: str = Query(default="USD", min_length=3, max_length=3),
+    db: Session = Depends(get_db),
+) -> dict:
+    """Daily min/max/last prices over the last ``days`` days, from rollups only."""
+    points = price_trend(db, product_id, currency.upper(), days)
+    summary = {}
+    if points:
+        first, last = points[0].last_cents, points[-1].last_cents
+        summary = {
+            "low_cents": min(point.min_cents for point in points),
+            "high_cents": max(point.max_cents for point in points),
+            "last_cents": last,
+            "change_pct": round((last - first) / first * 100, 2) if first else None,
+        }
+    return {
+        "product_id": product_id,
+        "currency": currency.upper(),
+        "days": days,
+        "points": [
+            {
+                "day": point.day.isoformat(),
+                "min_cents": point.min_cents,
+                "max_cents": point.max_cents,
+                "last_cents": point.last_cents,
+            }
+            for point in points
+        ],
+        **summary,
+    }
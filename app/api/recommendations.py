@@ -0,0 +1,134 @@
+"""Recommendation endpoints, buffered and streaming."""
+
+import json
+from collections.abc import AsyncIterator, Callable, Iterator
+from decimal import Decimal
+from typing import Literal
+
+import anyio
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.agent import run_recommendation_agent
+from app.cache.results import get_result_cache
+from app.db.session import SessionLocal
+from app.ranking.pipeline import PipelineEvent, RecommendationRequest, recommend
+
+router = APIRouter(prefix="/recommendations", tags=["recommendations"])
+
+MEDIA_TYPES = {"sse": "text/event-stream", "ndjson": "application/x-ndjson"}
+
+
+class RecommendationIn(BaseModel):
+    """Recommendation request body."""
+
+    raw_text: str = Field(min_length=1, max_length=500)
+    budget_min: Decimal | None = Field(default=None, ge=0)
+    budget_max: Decimal | None = Field(default=None, ge=0)
+    usage: str | None = Field(default=None, max_length=100)
+    limit: int = Field(default=20, ge=1, le=100)
+    candidates: int = Field(default=200, ge=1, le=5000)
+
+
+def get_session_factory() -> Callable[[], Session]:
+    """Session factory used by the pipeline; overridden in tests."""
+    return SessionLocal
+
+
+def _pipeline(body: RecommendationIn, session_factory: Callable[[], Session]):
+    return recommend(
+        session_factory,
+        RecommendationRequest(**body.model_dump()),
+        cache=get_result_cache(),
+    )
+
+
+def encode_event(event: PipelineEvent, fmt: str) -> bytes:
+    """Frame an event as a server-sent event or an NDJSON line."""
+    payload = json.dumps(event.data, separators=(",", ":"))
+    if fmt == "sse":
+        return f"event: {event.event}\ndata: {payload}\n\n".encode()
+    return f'{{"event":"{event.event}","data":{payload}}}\n'.encode()
+
+
+_EXHAUSTED = object()
+
+
+async def stream_events(
+    events: Iterator[PipelineEvent], fmt: str
+) -> AsyncIterator[bytes]:
+    """
+    Drive a blocking pipeline from the event loop one stage at a time.
+
+    Each stage runs in the threadpool only when the previous event has
+    been handed to the server, so a slow client stalls the pipeline
+    instead of buffering its output. If the client disconnects, Starlette
+    cancels this generator and closing ``events`` abandons the remaining
+    stages and rolls back uncommitted work.
+    """
+    try:
+        while True:
+            event = await run_in_threadpool(next, events, _EXHAUSTED)
+            if event is _EXHAUSTED:
+                break
+            yield encode_event(event, fmt)
+    finally:
+        # A cancelled step still runs to completion first, so closing is safe
+        with anyio.CancelScope(shield=True):
+            await run_in_threadpool(events.close)
+
+
+@router.post("")
+async def recommendations(
+    body: RecommendationIn,
+    session_factory: Callable[[], Session] = Depends(get_session_factory),
+) -> dict:
+    """Run the whole pipeline and return the query id and rankings."""
+    events = await run_in_threadpool(list, _pipeline(body, session_factory))
+    done = events[-1].data
+    return {
+        "query_id": done["query_id"],
+        "rankings": [event.data for event in events if event.event == "ranking"],
+    }
+
+
+@router.post("/agent")
+async def agent_recommendations(
+    body: RecommendationIn,
+    session_factory: Callable[[], Session] = Depends(get_session_factory),
+) -> dict:
+    """
+    Answer with the agent graph.
+
+    Returns the query id, rankings with review summaries, the constraints
+    parsed from ``raw_text`` and the per-node latency trace.
+    """
+    return await run_recommendation_agent(
+        session_factory, RecommendationRequest(**body.model_dump())
+    )
+
+
+@router.post("/stream")
+async def stream_recommendations(
+    body: RecommendationIn,
+    request: Request,
+    format: Literal["sse", "ndjson"] | None = None,
+    session_factory: Callable[[], Session] = Depends(get_session_factory),
+) -> StreamingResponse:
+    """
+    Stream pipeline events as they are produced.
+
+    The format is SSE when requested with ``?format=sse`` or an
+    ``Accept: text/event-stream`` header, NDJSON otherwise.
+    """
+    if format is None:
+        accept = request.headers.get("accept", "")
+        format = "sse" if MEDIA_TYPES["sse"] in accept else "ndjson"
+    return StreamingResponse(
+        stream_events(_pipeline(body, session_factory), format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
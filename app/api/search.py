@@ -0,0 +1,35 @@
+"""Keyword product search endpoint."""
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.ranking.products import product_summaries
+from app.search.keyword import search_keyword
+
+router = APIRouter(tags=["search"])
+
+
+@router.get("/search")
+def search_products(
+    q: str = Query(min_length=1, max_length=200),
+    limit: int = Query(default=50, ge=1, le=100),
+    db: Session = Depends(get_db),
+) -> dict:
+    """Products ranked by keyword relevance over title, brand and reviews."""
+    hits = search_keyword(db, q, limit)
+    products = product_summaries(db, (hit.id for hit in hits))
+    return {
+        "query": q,
+        "items": [
+            {
+                "product_id": hit.id,
+                "asin": products[hit.id].asin,
+                "title": products[hit.id].title,
+                "brand": products[hit.id].brand,
+                "score": round(hit.score, 4),
+            }
+            for hit in hits
+            if hit.id in products
+        ],
+    }
@@ -0,0 +1,20 @@
+"""Caching layers for ShopSherpa."""
+
+from .catalog import CatalogCache, CatalogProduct, get_catalog_cache
+from .memory import CacheStats, TTLCache
+from .results import RankingKey, RankingResultCache, get_result_cache
+from .shared import RedisCache
+from .sqlite import SQLiteCache
+
+__all__ = [
+    "CacheStats",
+    "CatalogCache",
+    "CatalogProduct",
+    "RankingKey",
+    "RankingResultCache",
+    "RedisCache",
+    "SQLiteCache",
+    "TTLCache",
+    "get_catalog_cache",
+    "get_result_cache",
+]
@@ -0,0 +1,205 @@
+"""Read-through cache for product catalog lookups."""
+
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+
+from app.cache.memory import TTLCache
+from app.cache.shared import RedisCache, redis_client
+from app.core.config import settings
+from app.db.models import Product
+from app.ingest.signals import offers_changed
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogOffer:
+    """Cached view of an Offer."""
+
+    id: int
+    price_cents: int
+    currency: str
+    availability: str | None
+    last_checked_at: datetime
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogReview:
+    """Cached view of a Review."""
+
+    id: int
+    source: str
+    url: str | None
+    snippet: str | None
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogProduct:
+    """Cached view of a Product with its offers and reviews."""
+
+    id: int
+    asin: str
+    title: str
+    brand: str | None
+    category: str | None
+    offers: tuple[CatalogOffer, ...]
+    reviews: tuple[CatalogReview, ...]
+
+    @classmethod
+    def from_model(cls, product: Product) -> "CatalogProduct":
+        return cls(
+            id=product.id,
+            asin=product.asin,
+            title=product.title,
+            brand=product.brand,
+            category=product.category,
+            offers=tuple(
+                CatalogOffer(
+                    id=offer.id,
+                    price_cents=offer.price_cents,
+                    currency=offer.currency,
+                    availability=offer.availability,
+                    last_checked_at=offer.last_checked_at,
+                )
+                for offer in product.offers
+            ),
+            reviews=tuple(
+                CatalogReview(
+                    id=review.id,
+                    source=review.source,
+                    url=review.url,
+                    snippet=review.snippet,
+                )
+                for review in product.reviews
+            ),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        for offer in data["offers"]:
+            offer["last_checked_at"] = offer["last_checked_at"].isoformat()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "CatalogProduct":
+        return cls(
+            **{
+                **data,
+                "offers": tuple(
+                    CatalogOffer(
+                        **{
+                            **offer,
+                            "last_checked_at": datetime.fromisoformat(
+                                offer["last_checked_at"]
+                            ),
+                        }
+                    )
+                    for offer in data["offers"]
+                ),
+                "reviews": tuple(CatalogReview(**review) for review in data["reviews"]),
+            }
+        )
+
+
+class CatalogCache:
+    """
+    Two-tier read-through cache in front of Product lookups by ASIN.
+
+    Lookups check the in-process LRU, then the optional Redis tier, then the
+    database. The Redis tier is keyed by product id with an ASIN pointer so
+    any worker can invalidate it from the ids carried by ``offers_changed``
+    (see ``invalidate_catalog``).
+    ``invalidate`` drops both tiers; the in-process tier of other workers
+    converges within its TTL.
+    """
+
+    def __init__(self, memory: TTLCache, shared: RedisCache | None = None) -> None:
+        self.memory = memory
+        self.shared = shared
+        # ASINs of the products in the memory tier, pruned as it evicts them
+        self._asins_by_id: dict[int, str] = {}
+        memory.on_evict = self._forget
+
+    def _forget(self, asin: str, product: CatalogProduct) -> None:
+        if self._asins_by_id.get(product.id) == asin:
+            del self._asins_by_id[product.id]
+
+    def _remember(self, product: CatalogProduct) -> CatalogProduct:
+        self._asins_by_id[product.id] = product.asin
+        self.memory.set(product.asin, product)
+        return product
+
+    def get_product(self, db: Session, asin: str) -> CatalogProduct | None:
+        """Return the cached product for ``asin``, loading it on a miss."""
+        product = self.memory.get(asin)
+        if product is not None:
+            return product
+
+        if self.shared is not None:
+            product_id = self.shared.get(f"asin:{asin}")
+            data = self.shared.get(product_id) if product_id is not None else None
+            if data is not None:
+                return self._remember(CatalogProduct.from_dict(data))
+
+        model = db.scalar(
+            select(Product)
+            .where(Product.asin == asin)
+            .options(selectinload(Product.offers), selectinload(Product.reviews))
+        )
+        if model is None:
+            return None
+
+        product = self._remember(CatalogProduct.from_model(model))
+        if self.shared is not None:
+            self.shared.set(f"asin:{asin}", product.id, ttl=30 * 24 * 3600)
+            self.shared.set(product.id, product.to_dict())
+        return product
+
+    def invalidate(self, product_ids: Iterable[int]) -> None:
+        """Drop cached entries for the given products from every tier."""
+        product_ids = list(product_ids)
+        for product_id in product_ids:
+            asin = self._asins_by_id.pop(product_id, None)
+            if asin is not None:
+                self.memory.delete(asin)
+        if self.shared is not None:
+            self.shared.delete_many(product_ids)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Hit/miss/eviction counters per tier."""
+        tiers = {"memory": self.memory.stats}
+        if self.shared is not None:
+            tiers["redis"] = self.shared.stats
+        return {name: asdict(stats) for name, stats in tiers.items()}
+
+
+@lru_cache
+def get_catalog_cache() -> CatalogCache:
+    """Process-wide catalog cache configured from settings."""
+    shared = None
+    if settings.catalog_cache_redis_enabled:
+        shared = RedisCache(
+            redis_client(),
+            prefix="catalog:product",
+            ttl=settings.catalog_cache_ttl_seconds,
+        )
+    return CatalogCache(
+        TTLCache(settings.catalog_cache_size, settings.catalog_cache_ttl_seconds),
+        shared,
+    )
+
+
+@offers_changed.connect
+def invalidate_catalog(sender: Any = None, product_ids=(), **kwargs: Any) -> None:
+    """
+    offers_changed receiver: offers are part of the cached product.
+
+    Connected on import so the ingest and refresh workers that write offers
+    delete the shared Redis entries, not only the API process that reads them.
+    """
+    if product_ids:
+        get_catalog_cache().invalidate(product_ids)
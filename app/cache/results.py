@@ -0,0 +1,390 @@
+"""Ranking result cache for identical or near-identical queries."""
+
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Protocol
+
+import redis
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.cache.memory import TTLCache
+from app.cache.shared import RedisCache, redis_client
+from app.core.config import settings
+from app.db.models import Offer
+from app.ingest.signals import offers_changed
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_PRICE_RE = re.compile(r"\$\s*\d[\d,]*(?:\.\d+)?|\b\d+\s*(?:dollars|usd|bucks)\b")
+
+# Words that don't change what a shopper is asking for
+STOPWORDS = frozenset(
+    "a an and any are best for good i in is me my of on or please recommend "
+    "some the to top under below over with within around about less than "
+    "cheap cheapest".split()
+)
+
+
+def normalize_query_text(raw_text: str) -> str:
+    """
+    Reduce query text to a canonical form.
+
+    Prices are dropped (budgets are keyed separately), words are lowercased,
+    stopwords removed and the remainder de-duplicated and sorted, so
+    "Best noise-cancelling headphones under $200" and "noise cancelling
+    headphones" normalize identically.
+    """
+    text = _PRICE_RE.sub(" ", raw_text.lower())
+    words = {word for word in _WORD_RE.findall(text) if word not in STOPWORDS}
+    return " ".join(sorted(words))
+
+
+def budget_bucket(
+    amount: Decimal | float | None, width: int, round_up: bool
+) -> int | None:
+    """Snap a budget (currency units) onto a ``width``-sized grid."""
+    if amount is None:
+        return None
+    steps = float(amount) / width
+    return int((math.ceil(steps) if round_up else math.floor(steps)) * width)
+
+
+@dataclass(frozen=True, slots=True)
+class RankingKey:
+    """Cache key for a query: normalized text, budget buckets, usage and retrieval depth."""
+
+    text: str
+    budget_min: int | None
+    budget_max: int | None
+    usage: str | None
+    candidates: int | None = None
+
+    @classmethod
+    def from_query(
+        cls,
+        raw_text: str,
+        budget_min: Decimal | float | None = None,
+        budget_max: Decimal | float | None = None,
+        usage: str | None = None,
+        candidates: int | None = None,
+    ) -> "RankingKey":
+        width = settings.result_cache_budget_bucket
+        return cls(
+            text=normalize_query_text(raw_text),
+            budget_min=budget_bucket(budget_min, width, round_up=False),
+            budget_max=budget_bucket(budget_max, width, round_up=True),
+            usage=usage.strip().lower() if usage else None,
+            candidates=candidates,
+        )
+
+    @property
+    def digest(self) -> str:
+        raw = f"{self.text}|{self.budget_min}|{self.budget_max}|{self.usage}"
+        if self.candidates is not None:
+            raw += f"|{self.candidates}"
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class CachedResult:
+    """
+    Rankings computed for a key, with freshness bookkeeping (epoch seconds).
+
+    ``limit`` is how many rankings were asked for (None: all of them); the
+    entry can answer any request for at most that many.
+    """
+
+    rankings: tuple[dict[str, Any], ...]
+    product_ids: tuple[int, ...]
+    created_at: float
+    fresh_until: float
+    compute_seconds: float
+    limit: int | None = None
+
+    def covers(self, limit: int | None) -> bool:
+        """Whether the top ``limit`` rankings are all in this entry."""
+        return self.limit is None or (limit is not None and limit <= self.limit)
+
+
+@dataclass
+class ResultCacheStats:
+    """Hit rate and latency saved by the result cache."""
+
+    hits: int = 0
+    misses: int = 0
+    invalidated: int = 0
+    saved_seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @property
+    def saved_ms_per_hit(self) -> float:
+        return self.saved_seconds * 1000 / self.hits if self.hits else 0.0
+
+    def as_dict(self) -> dict[str, float]:
+        return {
+            **asdict(self),
+            "hit_rate": self.hit_rate,
+            "saved_ms_per_hit": self.saved_ms_per_hit,
+        }
+
+
+class ChangeLog(Protocol):
+    """
+    Records when each product's offers last changed (epoch seconds).
+
+    ``latest`` returns None when none changed, and ``math.inf`` when it
+    cannot tell, which invalidates any entry checked against it.
+    """
+
+    def mark(self, product_ids: Iterable[int], at: float) -> None: ...
+
+    def latest(self, product_ids: Iterable[int]) -> float | None: ...
+
+
+class LocalChangeLog:
+    """In-process change log; only sees offer changes made by this process."""
+
+    def __init__(self) -> None:
+        self._changed: dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, product_ids: Iterable[int], at: float) -> None:
+        with self._lock:
+            for product_id in product_ids:
+                self._changed[product_id] = at
+
+    def latest(self, product_ids: Iterable[int]) -> float | None:
+        return (
+            max((self._changed.get(pid, 0.0) for pid in product_ids), default=0.0)
+            or None
+        )
+
+
+class RedisChangeLog:
+    """Change log shared through Redis so ingest workers can invalidate API caches."""
+
+    def __init__(
+        self, client: redis.Redis, prefix: str = "offers:changed", ttl: int = 2 * 86400
+    ):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def mark(self, product_ids: Iterable[int], at: float) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for product_id in product_ids:
+            pipe.set(f"{self.prefix}:{product_id}", at, ex=self.ttl)
+        try:
+            pipe.execute()
+        except redis.RedisError:
+            logger.warning("Redis change log write failed", exc_info=True)
+
+    def latest(self, product_ids: Iterable[int]) -> float | None:
+        keys = [f"{self.prefix}:{product_id}" for product_id in product_ids]
+        if not keys:
+            return None
+        try:
+            raw = self.client.mget(keys)
+        except redis.RedisError:
+            # Unknown, so treat every entry as changed: an outage bypasses the cache
+            logger.warning("Redis change log read failed", exc_info=True)
+            return math.inf
+        values = [float(value) for value in raw if value is not None]
+        return max(values) if values else None
+
+
+def freshness_deadline(db: Session, product_ids: Iterable[int]) -> datetime:
+    """Time at which the oldest offer behind these products exceeds the max age."""
+    product_ids = list(product_ids)
+    oldest = None
+    if product_ids:
+        oldest = db.scalar(
+            select(func.min(Offer.last_checked_at)).where(
+                Offer.product_id.in_(product_ids)
+            )
+        )
+    oldest = oldest or datetime.utcnow()
+    return oldest + timedelta(hours=settings.offer_max_age_hours)
+
+
+class RankingResultCache:
+    """
+    Caches ranking results per RankingKey.
+
+    An entry is served only while every offer behind it is inside the
+    freshness window and none of its products' offers changed after it was
+    computed (checked against the change log on every hit).
+    """
+
+    def __init__(
+        self,
+        memory: TTLCache,
+        changes: ChangeLog,
+        shared: RedisCache | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.memory = memory
+        self.changes = changes
+        self.shared = shared
+        self.stats = ResultCacheStats()
+        self._clock = clock
+
+    def _valid(self, entry: CachedResult, now: float) -> bool:
+        if entry.fresh_until <= now:
+            return False
+        changed = self.changes.latest(entry.product_ids)
+        return changed is None or changed < entry.created_at
+
+    def now(self) -> float:
+        """Current time on the cache clock, for ``put(created_at=...)``."""
+        return self._clock()
+
+    def get(self, key: RankingKey, limit: int | None = None) -> CachedResult | None:
+        """Return a still-valid cached result for ``key`` holding the top ``limit`` rankings."""
+        now = self._clock()
+        entry = self.memory.get(key.digest)
+        if entry is None and self.shared is not None:
+            data = self.shared.get(key.digest)
+            if data is not None:
+                entry = CachedResult(
+                    **{
+                        **data,
+                        "rankings": tuple(data["rankings"]),
+                        "product_ids": tuple(data["product_ids"]),
+                    }
+                )
+        if entry is not None and not self._valid(entry, now):
+            self.memory.delete(key.digest)
+            self.stats.invalidated += 1
+            entry = None
+
+        # A shorter result stays cached until a longer one replaces it
+        if entry is None or not entry.covers(limit):
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        self.stats.saved_seconds += entry.compute_seconds
+        self.memory.set(key.digest, entry, ttl=entry.fresh_until - now)
+        return entry
+
+    def put(
+        self,
+        key: RankingKey,
+        rankings: Iterable[dict[str, Any]],
+        fresh_until: datetime,
+        compute_seconds: float,
+        created_at: float | None = None,
+        limit: int | None = None,
+    ) -> CachedResult:
+        """
+        Store freshly computed rankings for ``key``.
+
+        Pass the time computation started as ``created_at`` so offer changes
+        made while computing invalidate the entry, and the number of
+        rankings asked for as ``limit``.
+        """
+        rankings = tuple(
+            {
+                "product_id": int(row["product_id"]),
+                "score": float(row["score"]),
+                "rationale": row.get("rationale"),
+            }
+            for row in rankings
+        )
+        now = self._clock()
+        entry = CachedResult(
+            rankings=rankings,
+            product_ids=tuple(row["product_id"] for row in rankings),
+            created_at=now if created_at is None else created_at,
+            fresh_until=(fresh_until - datetime.utcnow()).total_seconds() + now,
+            compute_seconds=compute_seconds,
+            limit=limit,
+        )
+        ttl = entry.fresh_until - now
+        if ttl > 0:
+            self.memory.set(key.digest, entry, ttl=ttl)
+            if self.shared is not None:
+                self.shared.set(key.digest, asdict(entry), ttl=max(int(ttl), 1))
+        return entry
+
+    def get_or_compute(
+        self,
+        key: RankingKey,
+        compute: Callable[[], tuple[list[dict[str, Any]], datetime]],
+    ) -> tuple[CachedResult, bool]:
+        """
+        Serve ``key`` from cache or run ``compute`` and cache its result.
+
+        Args:
+            key: Cache key for the query
+            compute: Returns (ranking rows, freshness deadline)
+
+        Returns:
+            Tuple of (result, whether it was a cache hit)
+        """
+        entry = self.get(key)
+        if entry is not None:
+            return entry, True
+
+        # Changes made while computing must still invalidate this entry
+        started = self._clock()
+        rankings, fresh_until = compute()
+        return (
+            self.put(
+                key, rankings, fresh_until, self._clock() - started, created_at=started
+            ),
+            False,
+        )
+
+
+@lru_cache
+def get_change_log() -> ChangeLog:
+    """Process-wide offer change log configured from settings."""
+    if settings.result_cache_redis_enabled:
+        return RedisChangeLog(redis_client())
+    return LocalChangeLog()
+
+
+@lru_cache
+def get_result_cache() -> RankingResultCache:
+    """Process-wide ranking result cache configured from settings."""
+    shared = None
+    if settings.result_cache_redis_enabled:
+        shared = RedisCache(
+            redis_client(), prefix="results", ttl=settings.offer_max_age_hours * 3600
+        )
+    return RankingResultCache(
+        TTLCache(settings.result_cache_size, ttl=settings.offer_max_age_hours * 3600),
+        get_change_log(),
+        shared,
+    )
+
+
+@offers_changed.connect
+def record_offer_changes(
+    sender: Any = None, changed_product_ids=(), **kwargs: Any
+) -> None:
+    """
+    offers_changed receiver: mark price/availability changes in the change log.
+
+    Connected on import rather than by ``get_result_cache`` so that ingest
+    and refresh workers, which never serve cached results, still publish
+    their changes to the API processes.
+    """
+    if changed_product_ids:
+        get_change_log().mark(changed_product_ids, time.time())
@@ -0,0 +1,68 @@
+"""Redis-backed cache tier shared across API and Celery workers."""
+
+import json
+import logging
+from typing import Any
+
+import redis
+
+from app.cache.memory import CacheStats
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def redis_client(url: str | None = None) -> redis.Redis:
+    """Create a client for the cache Redis, defaulting to the Celery broker."""
+    return redis.Redis.from_url(
+        url or settings.cache_redis_url or settings.celery_broker_url
+    )
+
+
+class RedisCache:
+    """
+    JSON-serialized key/value tier on Redis with a fixed TTL.
+
+    Redis failures are logged and reported as misses so a cache outage only
+    costs latency, never correctness.
+    """
+
+    def __init__(self, client: redis.Redis, prefix: str, ttl: int) -> None:
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.stats = CacheStats()
+
+    def _key(self, key: Any) -> str:
+        return f"{self.prefix}:{key}"
+
+    def get(self, key: Any) -> Any | None:
+        """Return the decoded value for ``key`` or None."""
+        try:
+            raw = self.client.get(self._key(key))
+        except redis.RedisError:
+            logger.warning("Redis cache read failed", exc_info=True)
+            raw = None
+        if raw is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: Any, value: Any, ttl: int | None = None) -> None:
+        """Store a JSON-serializable value."""
+        try:
+            self.client.set(
+                self._key(key), json.dumps(value, default=str), ex=ttl or self.ttl
+            )
+        except redis.RedisError:
+            logger.warning("Redis cache write failed", exc_info=True)
+
+    def delete_many(self, keys: list[Any]) -> None:
+        """Remove several keys in one round trip."""
+        if not keys:
+            return
+        try:
+            self.client.delete(*(self._key(key) for key in keys))
+        except redis.RedisError:
+            logger.warning("Redis cache delete failed", exc_info=True)
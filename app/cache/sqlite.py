@@ -0,0 +1,151 @@
+"""SQLite-file cache tier for single-host deployments without Redis."""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from app.cache.memory import CacheStats
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteCache:
+    """
+    JSON-serialized key/value tier in a local SQLite file.
+
+    Entries expire after a TTL and the table is bounded to ``max_entries``,
+    evicting the least recently read entries first. The file survives
+    restarts and is shared by every process on the host (WAL mode). Like
+    ``RedisCache``, database errors are logged and reported as misses.
+
+    Rows are only counted when this process's running count of the table
+    passes ``max_entries``; eviction then goes 1% below the limit, so the
+    count (a full index scan) runs about once per 1% of ``max_entries``
+    writes rather than on every write. Writes from other processes are
+    noticed at the next count.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        prefix: str,
+        ttl: int,
+        max_entries: int,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.prefix = prefix
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._slack = max_entries // 100
+        # Upper bound on rows as seen by this process; None until counted
+        self._size: int | None = None
+        self.stats = CacheStats()
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(path), check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_cache_entries_accessed_at "
+            "ON cache_entries (accessed_at)"
+        )
+
+    def _key(self, key: Any) -> str:
+        return f"{self.prefix}:{key}"
+
+    def get(self, key: Any) -> Any | None:
+        """Return the decoded value for ``key`` or None."""
+        now = self._clock()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM cache_entries WHERE key = ?",
+                    (self._key(key),),
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    self._conn.execute(
+                        "UPDATE cache_entries SET accessed_at = ? WHERE key = ?",
+                        (now, self._key(key)),
+                    )
+        except sqlite3.Error:
+            logger.warning("SQLite cache read failed", exc_info=True)
+            row = None
+        if row is None or row[1] <= now:
+            self.stats.misses += 1
+            if row is not None:
+                self.stats.expirations += 1
+            return None
+        self.stats.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: Any, value: Any, ttl: int | None = None) -> None:
+        """Store a JSON-serializable value, evicting old entries when full."""
+        now = self._clock()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?)",
+                    (
+                        self._key(key),
+                        json.dumps(value, default=str),
+                        now + (ttl or self.ttl),
+                        now,
+                    ),
+                )
+                self._evict(now)
+        except sqlite3.Error:
+            logger.warning("SQLite cache write failed", exc_info=True)
+
+    def _evict(self, now: float) -> None:
+        if self._size is not None:
+            self._size += 1
+            if self._size <= self.max_entries:
+                return
+        (count,) = self._conn.execute("SELECT count(*) FROM cache_entries").fetchone()
+        self._size = count
+        if count <= self.max_entries:
+            return
+        expired = self._conn.execute(
+            "DELETE FROM cache_entries WHERE expires_at <= ?", (now,)
+        ).rowcount
+        self.stats.expirations += expired
+        excess = count - expired - (self.max_entries - self._slack)
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM cache_entries WHERE key IN "
+                "(SELECT key FROM cache_entries ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+            self.stats.evictions += excess
+        self._size = count - expired - max(excess, 0)
+
+    def delete_many(self, keys: list[Any]) -> None:
+        """Remove several keys."""
+        if not keys:
+            return
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    "DELETE FROM cache_entries WHERE key = ?",
+                    [(self._key(key),) for key in keys],
+                )
+        except sqlite3.Error:
+            logger.warning("SQLite cache delete failed", exc_info=True)
+
+    def close(self) -> None:
+        self._conn.close()
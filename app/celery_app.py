@@ -2,8 +2,14 @@
 
 import logging
 import os
-from celery import Celery
+
+from celery import Celery, signals
+
 from app.core.config import settings
+from app.core.logs import configure_json_logging
+from app.core.metrics import instrument_celery
+from app.core.serialization import register_compressed_serializers
+from app.tasks import queues
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -17,31 +23,94 @@ if os.environ.get("CELERY_TASK_ALWAYS_EAGER") == "true":
     result_backend = "cache+memory://"
     broker_url = "memory://"
 
+# Compressed serializers must be registered before they are configured or accepted
+register_compressed_serializers()
+accept_content = sorted(
+    {
+        *settings.celery_accept_content,
+        settings.celery_task_serializer,
+        settings.celery_result_serializer,
+    }
+)
+
 celery_app = Celery(
     "shopsherpa",
     broker=broker_url,
     backend=result_backend,
-    include=["app.tasks.example"],
+    include=[
+        "app.tasks.example",
+        "app.tasks.refresh",
+        "app.tasks.embeddings",
+        "app.tasks.prices",
+        "app.tasks.results",
+        "app.tasks.search",
+        "app.tasks.features",
+    ],
 )
 
 # Celery configuration
 celery_app.conf.update(
+    # Imported by every worker at startup: connects the offers_changed
+    # receivers, so offers written here invalidate caches in other processes
+    imports=["app.cache.catalog", "app.cache.results"],
     task_serializer=settings.celery_task_serializer,
     result_serializer=settings.celery_result_serializer,
-    accept_content=settings.celery_accept_content,
+    accept_content=accept_content,
+    result_accept_content=accept_content,
+    task_compression=settings.celery_task_compression,
+    result_expires=settings.celery_result_expires,
     timezone=settings.celery_timezone,
     enable_utc=settings.celery_enable_utc,
     # Task execution settings
-    task_track_started=True,
+    task_track_started=settings.celery_task_track_started,
     task_time_limit=30 * 60,  # 30 minutes
     task_soft_time_limit=25 * 60,  # 25 minutes
     worker_prefetch_multiplier=1,
+    # Queue topology: see app.tasks.queues
+    task_queues=queues.task_queues(),
+    task_routes=queues.TASK_ROUTES,
+    task_default_queue=queues.INTERACTIVE,
+    task_default_routing_key=queues.INTERACTIVE,
+    task_queue_max_priority=settings.celery_max_priority,
+    task_default_priority=settings.celery_default_priority,
+    broker_transport_options=queues.broker_transport_options(),
     # Retry settings
     task_acks_late=True,
     worker_disable_rate_limits=False,
     # Logging
     worker_log_format="[%(asctime)s: %(levelname)s/%(processName)s] %(message)s",
     worker_task_log_format="[%(asctime)s: %(levelname)s/%(processName)s][%(task_name)s(%(task_id)s)] %(message)s",
+    # Periodic tasks
+    beat_schedule={
+        "schedule-offer-refresh": {
+            "task": "app.tasks.refresh.schedule_offer_refresh",
+            "schedule": float(settings.offer_refresh_interval_seconds),
+        },
+        "embed-products": {
+            "task": "app.tasks.embeddings.embed_products",
+            "schedule": float(settings.embedding_interval_seconds),
+        },
+        "embed-reviews": {
+            "task": "app.tasks.embeddings.embed_reviews",
+            "schedule": float(settings.embedding_interval_seconds),
+        },
+        "maintain-price-history": {
+            "task": "app.tasks.prices.maintain_price_history",
+            "schedule": float(settings.price_maintenance_interval_seconds),
+        },
+        "refresh-search-documents": {
+            "task": "app.tasks.search.refresh_search_index",
+            "schedule": float(settings.search_refresh_interval_seconds),
+        },
+        "refresh-product-features": {
+            "task": "app.tasks.features.refresh_feature_table",
+            "schedule": float(settings.product_features_refresh_interval_seconds),
+        },
+        "prune-result-blobs": {
+            "task": "app.tasks.results.prune_result_blobs",
+            "schedule": float(settings.celery_result_expires),
+        },
+    },
 )
 
 # Apply test configuration if CELERY_TASK_ALWAYS_EAGER is set
@@ -51,39 +120,18 @@ if os.environ.get("CELERY_TASK_ALWAYS_EAGER") == "true":
         task_eager_propagates=True,
     )
 
-# Configure JSON logging for retries/backoff
-class JSONFormatter(logging.Formatter):
-    """JSON formatter for structured logging."""
-    
-    def format(self, record):
-        import json
-        log_entry = {
-            "timestamp": self.formatTime(record),
-            "level": record.levelname,
-            "logger": record.name,
-            "message": record.getMessage(),
-            "module": record.module,
-            "function": record.funcName,
-            "line": record.lineno,
-        }
-        
-        # Add Celery-specific fields
-        if hasattr(record, "task_id"):
-            log_entry["task_id"] = record.task_id
-        if hasattr(record, "task_name"):
-            log_entry["task_name"] = record.task_name
-        if hasattr(record, "retries"):
-            log_entry["retries"] = record.retries
-        if hasattr(record, "backoff"):
-            log_entry["backoff"] = record.backoff
-            
-        return json.dumps(log_entry)
+if settings.metrics_enabled:
+    instrument_celery()
 
-# Apply JSON formatter to Celery logger
+# JSON logging for retries/backoff, written off-thread by a queue listener
 celery_logger = logging.getLogger("celery")
-handler = logging.StreamHandler()
-handler.setFormatter(JSONFormatter())
-celery_logger.addHandler(handler)
-celery_logger.setLevel(logging.INFO)
+log_listener = configure_json_logging(celery_logger, logging.INFO)
+
+
+@signals.worker_process_shutdown.connect
+def flush_log_listener(**kwargs) -> None:
+    """Flush queued records; pool children exit without running atexit."""
+    log_listener.stop()
+
 
 logger.info("Celery app configured successfully")
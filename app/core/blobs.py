@@ -0,0 +1,137 @@
+"""Filesystem blob store for task results too large for the results backend."""
+
+import hashlib
+import os
+import tempfile
+import time
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from celery import states
+from kombu.serialization import dumps, loads
+
+from app.core.config import settings
+
+# Marker key of a result that was offloaded to the blob store
+BLOB_KEY = "__blob__"
+
+
+class BlobStore:
+    """
+    Content-addressed, zlib-compressed blobs under a root directory.
+
+    Writes go to a temporary file that is renamed into place, so readers
+    never see partial blobs and concurrent writers of the same content
+    are harmless.
+    """
+
+    def __init__(self, root: str | os.PathLike) -> None:
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def put(self, data: bytes) -> str:
+        """Store ``data`` and return its key."""
+        key = hashlib.sha256(data).hexdigest()
+        path = self._path(key)
+        if path.exists():
+            path.touch()
+            return key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(zlib.compress(data, 1))
+        os.replace(tmp, path)
+        return key
+
+    def get(self, key: str) -> bytes:
+        """Load the blob stored under ``key``; raises FileNotFoundError if pruned."""
+        return zlib.decompress(self._path(key).read_bytes())
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    def prune(self, max_age_seconds: float, now: float | None = None) -> int:
+        """Delete blobs not written or re-put within ``max_age_seconds``."""
+        if not self.root.exists():
+            return 0
+        cutoff = (now or time.time()) - max_age_seconds
+        removed = 0
+        for path in self.root.glob("*/*"):
+            if path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+
+@lru_cache
+def get_blob_store() -> BlobStore:
+    """Process-wide blob store rooted at ``settings.celery_result_blob_dir``."""
+    return BlobStore(settings.celery_result_blob_dir)
+
+
+def offload_result(value: Any, store: BlobStore | None = None) -> Any:
+    """
+    Replace a large task result with a reference to a stored blob.
+
+    Results are serialized with the configured result serializer; those at
+    or above ``celery_result_offload_threshold_bytes`` are written to the
+    blob store. Smaller results, and all results when offloading is
+    disabled, are returned unchanged.
+    """
+    if not settings.celery_result_offload_enabled or value is None:
+        return value
+    content_type, encoding, data = dumps(
+        value, serializer=settings.celery_result_serializer
+    )
+    if isinstance(data, str):
+        data = data.encode(encoding)
+    if len(data) < settings.celery_result_offload_threshold_bytes:
+        return value
+    key = (store or get_blob_store()).put(data)
+    return {
+        BLOB_KEY: key,
+        "content_type": content_type,
+        "encoding": encoding,
+        "bytes": len(data),
+    }
+
+
+def resolve_result(value: Any, store: BlobStore | None = None) -> Any:
+    """Load the original result behind an offloaded reference; pass others through."""
+    if not (isinstance(value, dict) and BLOB_KEY in value):
+        return value
+    data = (store or get_blob_store()).get(value[BLOB_KEY])
+    return loads(data, value["content_type"], value["encoding"])
+
+
+class OffloadingBackend:
+    """
+    Result backend proxy that offloads large results as they are stored.
+
+    Only the stored copy is replaced by a reference: the worker still hands
+    the real return value to direct callers, ``apply()``, chained tasks and
+    ``on_success``. Everything but ``mark_as_done`` goes to the wrapped
+    backend.
+    """
+
+    def __init__(self, backend: Any) -> None:
+        self.backend = backend
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.backend, name)
+
+    def mark_as_done(
+        self,
+        task_id: str,
+        result: Any,
+        request: Any = None,
+        store_result: bool = True,
+        state: str = states.SUCCESS,
+    ) -> Any:
+        if store_result:
+            result = offload_result(result)
+        return self.backend.mark_as_done(task_id, result, request, store_result, state)
@@ -0,0 +1,212 @@
+"""Shared async HTTP client for upstream retailer APIs.
+
+One ``HTTPClient`` per process keeps a pool of keep-alive connections per
+host, so repeated lookups skip TCP and TLS handshakes. Every request first
+takes a token from the host's bucket (shared across workers when
+``RATE_LIMIT_REDIS_ENABLED`` is set). A 429 or 503 pauses that bucket for
+the ``Retry-After`` delay, or an exponential backoff, so all callers back
+off together, and the request is retried. Waits longer than
+``HTTP_MAX_RETRY_WAIT_SECONDS`` are not slept through: ``RateLimited`` is
+raised so a Celery task can retry later without holding its worker.
+
+Synchronous callers such as Celery tasks run coroutines on a process-wide
+background loop with ``run_sync``, which keeps pooled connections alive
+between calls.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+from collections.abc import Coroutine
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from typing import Any, TypeVar
+
+import httpx
+
+from app.core.config import settings
+from app.core.rate_limit import RateLimiter, get_bucket
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Statuses that mean "slow down and try again"
+RETRY_STATUSES = frozenset({429, 503})
+
+
+class UpstreamError(Exception):
+    """An upstream request failed with a status that is not worth retrying."""
+
+    def __init__(self, response: httpx.Response) -> None:
+        super().__init__(
+            f"{response.request.method} {response.request.url} returned {response.status_code}"
+        )
+        self.response = response
+
+
+class RateLimited(Exception):
+    """An upstream is still rate limiting; try again after ``retry_after`` seconds."""
+
+    def __init__(self, host: str, retry_after: float) -> None:
+        super().__init__(
+            f"{host} is rate limiting requests; retry in {retry_after:.1f}s"
+        )
+        self.host = host
+        self.retry_after = retry_after
+
+
+def retry_after_seconds(response: httpx.Response) -> float | None:
+    """Parse ``Retry-After`` as delay seconds or an HTTP date; None if absent or invalid."""
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((when - datetime.now(UTC)).total_seconds(), 0.0)
+
+
+class HTTPClient:
+    """Pooled async HTTP client with per-host rate limiting and 429 backoff."""
+
+    def __init__(
+        self,
+        rate: float | None = None,
+        burst: int | None = None,
+        max_retries: int | None = None,
+        backoff: float | None = None,
+        max_retry_wait: float | None = None,
+        **options: Any,
+    ) -> None:
+        """
+        Args:
+            rate: Requests per second per host
+            burst: Requests allowed back to back per host
+            max_retries: Retries after 429/503 before raising ``RateLimited``
+            backoff: First retry delay when no ``Retry-After`` is sent
+            max_retry_wait: Longest delay awaited in-process
+            **options: Passed to ``httpx.AsyncClient`` (``auth``,
+                ``headers``, ``transport``, ...)
+        """
+        self.rate = rate or settings.http_rate_per_second
+        self.burst = burst or settings.http_burst
+        self.max_retries = (
+            settings.http_max_retries if max_retries is None else max_retries
+        )
+        self.backoff = settings.http_backoff_seconds if backoff is None else backoff
+        self.max_retry_wait = (
+            settings.http_max_retry_wait_seconds
+            if max_retry_wait is None
+            else max_retry_wait
+        )
+        options.setdefault(
+            "limits",
+            httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry_seconds,
+            ),
+        )
+        options.setdefault("timeout", settings.http_timeout_seconds)
+        self._client = httpx.AsyncClient(**options)
+
+    def bucket(self, host: str) -> RateLimiter:
+        """Token bucket limiting requests to ``host``."""
+        return get_bucket(f"http:{host}", self.rate, self.burst)
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """
+        Send a request, waiting for a rate limit token and retrying 429/503.
+
+        Raises:
+            RateLimited: If the upstream still refuses after ``max_retries``
+                retries or asks for a longer wait than ``max_retry_wait``
+            UpstreamError: On any other 4xx/5xx response
+        """
+        request = self._client.build_request(method, url, **kwargs)
+        host = request.url.host
+        bucket = self.bucket(host)
+
+        attempt = 0
+        while True:
+            await _acquire(bucket)
+            response = await self._client.send(request)
+            if response.status_code not in RETRY_STATUSES:
+                if response.is_error:
+                    raise UpstreamError(response)
+                return response
+
+            wait = retry_after_seconds(response)
+            if wait is None:
+                wait = self.backoff * 2**attempt * random.uniform(0.5, 1.0)
+            # Every caller sharing the bucket waits, not just this one
+            bucket.pause(wait)
+            if attempt >= self.max_retries or wait > self.max_retry_wait:
+                raise RateLimited(host, wait)
+
+            attempt += 1
+            logger.info(
+                "Upstream %s returned %s, retry %s/%s in %.2fs",
+                host,
+                response.status_code,
+                attempt,
+                self.max_retries,
+                wait,
+            )
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self) -> None:
+        """Close pooled connections."""
+        await self._client.aclose()
+
+    async def __aenter__(self) -> "HTTPClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+
+async def _acquire(bucket: RateLimiter) -> None:
+    while wait := bucket.try_acquire():
+        await asyncio.sleep(wait)
+
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_pid: int | None = None
+_loop_lock = threading.Lock()
+
+
+def background_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the process-wide event loop used by synchronous callers.
+
+    The loop runs in a daemon thread started on first use. A forked Celery
+    worker child starts its own, since threads do not survive a fork.
+    """
+    global _loop, _loop_pid
+    with _loop_lock:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            threading.Thread(
+                target=_loop.run_forever, name="http-loop", daemon=True
+            ).start()
+        return _loop
+
+
+def run_sync(coro: Coroutine[Any, Any, T], timeout: float | None = None) -> T:
+    """Run ``coro`` on the background loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, background_loop()).result(timeout)
@@ -0,0 +1,183 @@
+"""Structured JSON logging with off-thread output."""
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+# Record extras copied into the entry when present (Celery task context)
+EXTRA_FIELDS = ("task_id", "task_name", "retries", "backoff")
+
+_MISSING = object()
+_TRACEBACKS = logging.Formatter()
+_json_encode = json.JSONEncoder(default=str).encode
+
+
+def _orjson_encode(entry: dict) -> str:
+    return orjson.dumps(entry, default=str).decode()
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    JSON formatter for structured logging.
+
+    Formats one line per record with the timestamp, level, logger, message,
+    call site and any EXTRA_FIELDS set through ``extra=``. The per-second
+    part of the timestamp is cached, extras are read straight from the
+    record ``__dict__`` and entries are encoded with orjson when installed.
+    """
+
+    def __init__(
+        self, extra_fields: tuple[str, ...] = EXTRA_FIELDS, use_orjson: bool = True
+    ):
+        super().__init__()
+        self.extra_fields = extra_fields
+        self.encode = (
+            _orjson_encode if use_orjson and orjson is not None else _json_encode
+        )
+        self._second = -1
+        self._second_text = ""
+
+    def formatTime(self, record: logging.LogRecord, datefmt: str | None = None) -> str:
+        """Same output as ``logging.Formatter.formatTime``, one strftime per second."""
+        if datefmt:
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        if second != self._second:
+            self._second_text = time.strftime(
+                self.default_time_format, self.converter(second)
+            )
+            self._second = second
+        return self.default_msec_format % (self._second_text, record.msecs)
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+        }
+
+        # Add Celery-specific fields
+        attrs = record.__dict__
+        for name in self.extra_fields:
+            value = attrs.get(name, _MISSING)
+            if value is not _MISSING:
+                entry[name] = value
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return self.encode(entry)
+
+
+class ProcessQueueListener(QueueListener):
+    """
+    QueueListener that follows its logger into forked children.
+
+    Threads do not survive a fork, so a prefork worker child inherits the
+    QueueHandler but not the thread draining its queue. ``ensure_started``
+    gives a child its own queue and thread on first use; records still
+    queued in the parent at fork time stay with the parent.
+    """
+
+    def __init__(self, *handlers: logging.Handler):
+        super().__init__(queue.SimpleQueue(), *handlers, respect_handler_level=True)
+        self.pid: int | None = None
+
+    def start(self) -> None:
+        self.pid = os.getpid()
+        super().start()
+
+    def ensure_started(self) -> None:
+        """Start a fresh queue and thread when running in a forked child."""
+        if self.pid != os.getpid():
+            self.queue = queue.SimpleQueue()
+            self._thread = None
+            self.start()
+
+    def stop(self) -> None:
+        # Only the process that started the thread can stop it
+        # (QueueListener.stop also fails when called twice before Python 3.12)
+        if self.pid == os.getpid() and self._thread is not None:
+            super().stop()
+
+
+class RecordQueueHandler(QueueHandler):
+    """
+    QueueHandler that defers formatting to the listener.
+
+    The stock ``prepare`` runs the full formatter in the caller and folds
+    any traceback into the message. Here only what cannot safely cross
+    threads is resolved (message arguments and the traceback text), and
+    JSON encoding happens on the listener thread.
+
+    With a ``listener``, records are queued on that listener's current
+    queue, restarting it first when the handler is used in a forked child.
+    """
+
+    def __init__(self, queue: Any, listener: ProcessQueueListener | None = None):
+        super().__init__(queue)
+        self.listener = listener
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = _TRACEBACKS.formatException(record.exc_info)
+        record = copy.copy(record)
+        record.msg, record.args, record.exc_info = message, None, None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # Runs under the handler lock, which logging re-creates after a fork
+        if self.listener is not None:
+            self.listener.ensure_started()
+            self.queue = self.listener.queue
+        super().enqueue(record)
+
+
+def configure_json_logging(
+    logger: logging.Logger, level: int = logging.INFO, stream: Any = None
+) -> ProcessQueueListener:
+    """
+    Log ``logger`` as JSON lines without blocking the caller on output.
+
+    The logger gets a QueueHandler; a listener thread formats records and
+    writes them to ``stream`` (stderr by default), so a slow stdout never
+    stalls a worker. Forked children start their own listener thread on
+    their first record. Records are flushed at interpreter exit; processes
+    that leave through ``os._exit`` (prefork pool children) should call
+    ``stop`` on the listener first.
+
+    Args:
+        logger: Logger to configure
+        level: Level set on the logger
+        stream: Output stream for the JSON lines
+
+    Returns:
+        The started listener (stop it to flush and detach)
+    """
+    output = logging.StreamHandler(stream)
+    output.setFormatter(JSONFormatter())
+
+    listener = ProcessQueueListener(output)
+    listener.start()
+    atexit.register(listener.stop)
+
+    logger.addHandler(RecordQueueHandler(listener.queue, listener))
+    logger.setLevel(level)
+    return listener
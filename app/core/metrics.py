@@ -0,0 +1,330 @@
+"""Prometheus metrics for HTTP requests, database access and Celery tasks.
+
+Instrumentation is attached at the edges instead of inside call sites:
+
+- ``MetricsMiddleware`` times every request against its route template
+- ``instrument_engine`` times SQL statements through SQLAlchemy dialect
+  events and waits for pooled connections
+- ``instrument_celery`` stamps published tasks and ``run_timed_task`` times
+  them from the base task class
+- The offer refresh scheduler sets the refresh backlog gauges on each run
+
+Collectors live in a dedicated registry rendered by ``GET /metrics``. When
+``PROMETHEUS_MULTIPROC_DIR`` is set (prefork Celery workers, several uvicorn
+workers) samples are aggregated across processes sharing that directory.
+"""
+
+import os
+import time
+import weakref
+from collections.abc import Callable
+from typing import Any
+
+from celery import signals
+from celery.exceptions import Retry
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.multiprocess import MultiProcessCollector
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+registry = CollectorRegistry()
+
+# Sub-millisecond buckets matter for cache hits and indexed lookups
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+TASK_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 1800.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "shopsherpa_http_request_seconds",
+    "HTTP request latency, including streamed bodies",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+DB_QUERY_SECONDS = Histogram(
+    "shopsherpa_db_query_seconds",
+    "SQL statement execution time; the count is the number of statements",
+    ["engine", "operation"],
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "shopsherpa_db_pool_checkout_seconds",
+    "Time spent waiting for a pooled connection, including opening a new one",
+    ["engine"],
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+TASK_RUNTIME_SECONDS = Histogram(
+    "shopsherpa_task_runtime_seconds",
+    "Celery task execution time",
+    ["task", "state"],
+    buckets=TASK_BUCKETS,
+    registry=registry,
+)
+TASK_QUEUE_WAIT_SECONDS = Histogram(
+    "shopsherpa_task_queue_wait_seconds",
+    "Time between publishing a task and a worker starting it",
+    ["task", "queue"],
+    buckets=TASK_BUCKETS,
+    registry=registry,
+)
+TASKS_PUBLISHED = Counter(
+    "shopsherpa_tasks_published_total",
+    "Celery tasks published",
+    ["task"],
+    registry=registry,
+)
+# Set by each offer refresh scheduler run; "mostrecent" keeps the last run's
+# value when samples are aggregated across processes
+OFFER_REFRESH_BACKLOG = Gauge(
+    "shopsherpa_offer_refresh_backlog",
+    "Offers due for refresh",
+    registry=registry,
+    multiprocess_mode="mostrecent",
+)
+OFFER_REFRESH_STALE = Gauge(
+    "shopsherpa_offer_refresh_stale",
+    "Offers past the maximum age",
+    registry=registry,
+    multiprocess_mode="mostrecent",
+)
+OFFER_REFRESH_LAG_SECONDS = Gauge(
+    "shopsherpa_offer_refresh_lag_seconds",
+    "Age of the oldest offer beyond the refresh cutoff",
+    registry=registry,
+    multiprocess_mode="mostrecent",
+)
+
+# Message header carrying the publish wall-clock time
+SENT_AT_HEADER = "shopsherpa_sent_at"
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+_instrumented: "weakref.WeakSet[Engine]" = weakref.WeakSet()
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Return the exposition payload and its content type."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        collected = CollectorRegistry()
+        MultiProcessCollector(collected)
+        return generate_latest(collected), CONTENT_TYPE_LATEST
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request latency per route template.
+
+    Routes are labelled by their template
+    (``/products/{product_id}/price-trend``), not the concrete path, so
+    label cardinality stays bounded. Latency covers the whole response,
+    including streamed bodies.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"], route.path if route else UNMATCHED_ROUTE, status
+            ).observe(time.perf_counter() - start)
+
+
+# Operations DB_QUERY_SECONDS is labelled with, bounded for cardinality
+DB_OPERATIONS = ("select", "insert", "update", "delete", "other")
+
+
+def _text_operation(statement: str) -> str:
+    verb = statement.lstrip()[:6].lower()
+    return verb if verb in DB_OPERATIONS else "other"
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """
+    Record statement timings and pool checkout waits for an engine.
+
+    Statements are timed by the dialect's ``do_execute``,
+    ``do_executemany`` and ``do_execute_no_params`` events, which run the
+    dialect method themselves: one listener call per statement, where a
+    ``before/after_cursor_execute`` pair costs several times more. Checkout
+    wait is the time ``engine.raw_connection()`` takes to hand out a pooled
+    connection (including opening one when none is idle), so it also covers
+    pools ``engine.dispose()`` creates. Pass ``async_engine.sync_engine``
+    for async engines; instrumenting an engine twice is a no-op.
+
+    Args:
+        engine: Engine to instrument
+        name: Value of the ``engine`` label
+    """
+    if engine in _instrumented:
+        return
+    _instrumented.add(engine)
+
+    dialect = engine.dialect
+    perf_counter = time.perf_counter
+    queries = {
+        operation: DB_QUERY_SECONDS.labels(name, operation)
+        for operation in DB_OPERATIONS
+    }
+    select, insert, update, delete, other = (
+        queries[operation] for operation in DB_OPERATIONS
+    )
+    checkout = DB_POOL_CHECKOUT_SECONDS.labels(name)
+
+    def child(statement: str, context: Any) -> Any:
+        if context.isinsert:
+            return insert
+        if context.isupdate:
+            return update
+        if context.isdelete:
+            return delete
+        if context.is_text:
+            return queries[_text_operation(statement)]
+        return other if context.isddl else select
+
+    def do_execute(cursor: Any, statement: str, parameters: Any, context: Any) -> bool:
+        start = perf_counter()
+        try:
+            dialect.do_execute(cursor, statement, parameters, context)
+        finally:
+            child(statement, context).observe(perf_counter() - start)
+        return True
+
+    def do_executemany(
+        cursor: Any, statement: str, parameters: Any, context: Any
+    ) -> bool:
+        start = perf_counter()
+        try:
+            dialect.do_executemany(cursor, statement, parameters, context)
+        finally:
+            child(statement, context).observe(perf_counter() - start)
+        return True
+
+    def do_execute_no_params(cursor: Any, statement: str, context: Any) -> bool:
+        start = perf_counter()
+        try:
+            dialect.do_execute_no_params(cursor, statement, context)
+        finally:
+            child(statement, context).observe(perf_counter() - start)
+        return True
+
+    raw_connection = engine.raw_connection
+
+    def timed_raw_connection() -> Any:
+        start = perf_counter()
+        try:
+            return raw_connection()
+        finally:
+            checkout.observe(perf_counter() - start)
+
+    event.listen(engine, "do_execute", do_execute)
+    event.listen(engine, "do_executemany", do_executemany)
+    event.listen(engine, "do_execute_no_params", do_execute_no_params)
+    engine.raw_connection = timed_raw_connection  # type: ignore[method-assign]
+
+
+def on_before_task_publish(
+    sender: Any = None, headers: dict | None = None, **kwargs: Any
+) -> None:
+    """Stamp the publish time on outgoing task messages."""
+    if headers is not None:
+        headers[SENT_AT_HEADER] = time.time()
+    TASKS_PUBLISHED.labels(str(sender)).inc()
+
+
+def instrument_celery() -> None:
+    """Stamp published tasks so workers can report queue wait (idempotent)."""
+    signals.before_task_publish.connect(
+        on_before_task_publish, weak=False, dispatch_uid="metrics-publish"
+    )
+
+
+_task_children: dict[tuple[str, str, str], Any] = {}
+
+
+def _child(histogram: Histogram, task: str, label: str) -> Any:
+    key = (histogram._name, task, label)
+    child = _task_children.get(key)
+    if child is None:
+        child = _task_children[key] = histogram.labels(task, label)
+    return child
+
+
+def run_timed_task(
+    task: Any, run: Callable[..., Any], *args: Any, **kwargs: Any
+) -> Any:
+    """
+    Call ``run`` for ``task``, recording queue wait and runtime.
+
+    Used from the base task's ``__call__`` rather than ``task_prerun`` and
+    ``task_postrun`` handlers: connecting any receiver to those signals adds
+    ~15us of dispatch to every task, several times the cost of the timing.
+
+    Args:
+        task: Bound task whose request carries the publish stamp
+        run: Callable executing the task body
+
+    Returns:
+        Whatever ``run`` returns
+    """
+    request = task.request
+    sent_at = getattr(request, SENT_AT_HEADER, None)
+    if sent_at is not None and not request.is_eager:
+        queue = (request.delivery_info or {}).get("routing_key") or "unknown"
+        _child(TASK_QUEUE_WAIT_SECONDS, task.name, queue).observe(
+            max(time.time() - float(sent_at), 0.0)
+        )
+
+    state = "FAILURE"
+    start = time.perf_counter()
+    try:
+        result = run(*args, **kwargs)
+        state = "SUCCESS"
+        return result
+    except Retry:
+        state = "RETRY"
+        raise
+    finally:
+        _child(TASK_RUNTIME_SECONDS, task.name, state).observe(
+            time.perf_counter() - start
+        )
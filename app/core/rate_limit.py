@@ -0,0 +1,217 @@
+"""Token bucket rate limiting for upstream APIs."""
+
+import logging
+import threading
+import time
+from typing import Protocol
+
+import redis
+
+from app.cache.shared import redis_client
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter(Protocol):
+    """Interface shared by the in-process and Redis token buckets."""
+
+    rate: float
+    capacity: int
+
+    def try_acquire(self, tokens: int = 1) -> float:
+        """Take tokens or return the seconds until they will be available."""
+        ...
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for the next ``seconds``."""
+        ...
+
+
+class TokenBucket:
+    """Thread-safe in-process token bucket."""
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        """
+        Create a bucket that refills ``rate`` tokens per second.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum tokens held (burst size)
+        """
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def try_acquire(self, tokens: int = 1) -> float:
+        """
+        Take tokens if available without blocking.
+
+        Returns:
+            0.0 when the tokens were taken, otherwise the number of seconds
+            until enough tokens will be available
+        """
+        if tokens > self.capacity:
+            raise ValueError("Cannot acquire more tokens than the bucket capacity")
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: int = 1, timeout: float | None = None) -> bool:
+        """Block until tokens are taken; return False if timeout elapses first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0.0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining < wait:
+                    return False
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hand out no tokens for the next ``seconds``.
+
+        Used when the upstream asks callers to back off (HTTP 429 with
+        ``Retry-After``): the bucket goes into debt instead of waiting out
+        a fixed sleep, so every caller sharing it slows down.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 1.0 - seconds * self.rate)
+
+
+# Generic cell rate algorithm: the key holds the theoretical arrival time
+# (TAT) of the next token. Redis TIME is the clock, so workers with skewed
+# clocks agree. Returns the wait in seconds as a string (Lua numbers are
+# truncated to integers in replies).
+_ACQUIRE_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local tokens = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local tat = math.max(tonumber(redis.call('GET', KEYS[1]) or now), now)
+local new_tat = tat + tokens * interval
+local allowed_at = new_tat - capacity * interval
+if allowed_at > now then
+    return tostring(allowed_at - now)
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000) + 1000)
+return '0'
+"""
+
+_PAUSE_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local seconds = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local tat = math.max(tonumber(redis.call('GET', KEYS[1]) or now), now + seconds + (capacity - 1) * interval)
+redis.call('SET', KEYS[1], tostring(tat), 'PX', math.ceil((tat - now) * 1000) + 1000)
+return '0'
+"""
+
+
+class RedisTokenBucket:
+    """
+    Token bucket kept in Redis so every API process and Celery worker
+    draws from the same budget for an upstream.
+
+    Each acquire is one atomic script call. If Redis is unreachable the
+    bucket falls back to an in-process bucket with the same rate, so an
+    outage loosens the limit to per-process instead of stopping requests.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        name: str,
+        rate: float,
+        capacity: int,
+        prefix: str = "ratelimit",
+    ) -> None:
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self.key = f"{prefix}:{name}"
+        self.fallback = TokenBucket(rate, capacity)
+        self._acquire = client.register_script(_ACQUIRE_SCRIPT)
+        self._pause = client.register_script(_PAUSE_SCRIPT)
+
+    def try_acquire(self, tokens: int = 1) -> float:
+        """
+        Take tokens if available without blocking.
+
+        Returns:
+            0.0 when the tokens were taken, otherwise the number of seconds
+            until enough tokens will be available
+        """
+        if tokens > self.capacity:
+            raise ValueError("Cannot acquire more tokens than the bucket capacity")
+        try:
+            wait = self._acquire(
+                keys=[self.key], args=[1.0 / self.rate, self.capacity, tokens]
+            )
+        except redis.RedisError:
+            logger.warning(
+                "Redis rate limiter unavailable, limiting per process", exc_info=True
+            )
+            return self.fallback.try_acquire(tokens)
+        return float(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens, in any process, for the next ``seconds``."""
+        self.fallback.pause(seconds)
+        try:
+            self._pause(keys=[self.key], args=[1.0 / self.rate, self.capacity, seconds])
+        except redis.RedisError:
+            logger.warning("Redis rate limiter pause failed", exc_info=True)
+
+
+_buckets: dict[str, RateLimiter] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(name: str, rate: float, capacity: int) -> RateLimiter:
+    """
+    Return the bucket for an upstream, creating it on first use.
+
+    There is one bucket per name: every caller of an upstream shares its
+    limit. Buckets live in Redis and are shared by all processes when
+    ``settings.rate_limit_redis_enabled`` is set, otherwise in this process.
+
+    Raises:
+        ValueError: If the bucket already exists with a different rate or
+            capacity
+    """
+    with _buckets_lock:
+        bucket = _buckets.get(name)
+        if bucket is None:
+            if settings.rate_limit_redis_enabled:
+                bucket = RedisTokenBucket(redis_client(), name, rate, capacity)
+            else:
+                bucket = TokenBucket(rate, capacity)
+            _buckets[name] = bucket
+        elif (bucket.rate, bucket.capacity) != (rate, capacity):
+            raise ValueError(
+                f"Rate limit bucket {name!r} exists with rate={bucket.rate}, "
+                f"capacity={bucket.capacity}; requested rate={rate}, capacity={capacity}"
+            )
+        return bucket
@@ -0,0 +1,69 @@
+"""Compressed kombu serializers for task payloads and results."""
+
+import zlib
+
+from kombu.serialization import register, registry
+from kombu.utils.json import dumps as json_dumps
+from kombu.utils.json import loads as json_loads
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+JSON_ZLIB = "json+zlib"
+MSGPACK_ZLIB = "msgpack+zlib"
+
+# Favour speed: level 1 gets most of the size win on repetitive JSON
+COMPRESSION_LEVEL = 1
+
+
+def _json_encode(value) -> bytes:
+    return zlib.compress(json_dumps(value).encode(), COMPRESSION_LEVEL)
+
+
+def _json_decode(data: bytes):
+    return json_loads(zlib.decompress(data))
+
+
+def _msgpack_encode(value) -> bytes:
+    return zlib.compress(msgpack.packb(value, use_bin_type=True), COMPRESSION_LEVEL)
+
+
+def _msgpack_decode(data: bytes):
+    return msgpack.unpackb(zlib.decompress(data), raw=False)
+
+
+def register_compressed_serializers() -> list[str]:
+    """
+    Register zlib-compressed JSON (and msgpack, when installed) with kombu.
+
+    Usable as ``task_serializer``/``result_serializer`` names. Unlike
+    Celery's ``task_compression``, these also shrink results stored by the
+    Redis result backend, which does not compress on its own.
+
+    Returns:
+        Names of the serializers available
+    """
+    names = []
+    if JSON_ZLIB not in registry._encoders:
+        register(
+            JSON_ZLIB,
+            _json_encode,
+            _json_decode,
+            content_type="application/x-json-zlib",
+            content_encoding="binary",
+        )
+    names.append(JSON_ZLIB)
+
+    if msgpack is not None:
+        if MSGPACK_ZLIB not in registry._encoders:
+            register(
+                MSGPACK_ZLIB,
+                _msgpack_encode,
+                _msgpack_decode,
+                content_type="application/x-msgpack-zlib",
+                content_encoding="binary",
+            )
+        names.append(MSGPACK_ZLIB)
+    return names
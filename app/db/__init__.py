@@ -1,6 +1,21 @@
 """Database module for ShopSherpa."""
 
 from .base import Base
-from .session import engine, get_db, SessionLocal
+from .session import (
+    AsyncSessionLocal,
+    SessionLocal,
+    async_engine,
+    engine,
+    get_async_db,
+    get_db,
+)
 
-__all__ = ["Base", "engine", "get_db", "SessionLocal"]
+__all__ = [
+    "Base",
+    "engine",
+    "get_db",
+    "SessionLocal",
+    "async_engine",
+    "get_async_db",
+    "AsyncSessionLocal",
+]
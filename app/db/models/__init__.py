@@ -1,10 +1,25 @@
 """Database models for ShopSherpa."""
 
-from .user import User
-from .query import Query
-from .product import Product
+from .features import ProductFeatures, ProductFeatureVersion
 from .offer import Offer
-from .review import Review
+from .price import PriceDaily, PriceTick
+from .product import Product
+from .query import Query
 from .ranking import Ranking
+from .review import Review
+from .search import ProductSearch
+from .user import User
 
-__all__ = ["User", "Query", "Product", "Offer", "Review", "Ranking"]
+__all__ = [
+    "User",
+    "Query",
+    "Product",
+    "Offer",
+    "Review",
+    "Ranking",
+    "PriceTick",
+    "PriceDaily",
+    "ProductSearch",
+    "ProductFeatures",
+    "ProductFeatureVersion",
+]
@@ -0,0 +1,36 @@
+"""Materialized per-product ranking features."""
+
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer
+
+from app.db.base import Base
+
+
+class ProductFeatures(Base):
+    """
+    Ranking aggregates of a product, rebuilt when its offers or reviews change.
+
+    Rows are written by ``app.ranking.features.refresh_product_features``
+    and stamped with the ``ProductFeatureVersion`` counter of the writing
+    transaction, so readers can load only what changed since their copy.
+    """
+
+    __tablename__ = "product_features"
+
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    min_price_cents = Column(Integer, nullable=True)
+    price_drop = Column(Float, nullable=True)
+    review_count = Column(Integer, default=0, nullable=False)
+    review_sentiment = Column(Float, nullable=True)
+    version = Column(Integer, nullable=False, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ProductFeatureVersion(Base):
+    """Single-row counter bumped by every product_features write."""
+
+    __tablename__ = "product_feature_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
@@ -1,7 +1,17 @@
 """Offer model."""
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Numeric
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+)
+
 from app.db.base import Base
 
 
@@ -9,10 +19,27 @@ class Offer(Base):
     """Offer model."""
 
     __tablename__ = "offers"
+    __table_args__ = (
+        UniqueConstraint(
+            "product_id", "currency", name="uq_offers_product_id_currency"
+        ),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
     price_cents = Column(Integer, nullable=False)
     currency = Column(String(3), default="USD", nullable=False)
     availability = Column(String, nullable=True)
-    last_checked_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_checked_at = Column(
+        DateTime, default=datetime.utcnow, nullable=False, index=True
+    )
+    # Last refresh attempt, whether or not the upstream returned the offer
+    last_attempt_at = Column(DateTime, nullable=True)
+
+
+# Latest offer per product
+Index(
+    "ix_offers_product_id_last_checked_at",
+    Offer.product_id,
+    Offer.last_checked_at.desc(),
+)
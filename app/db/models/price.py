@@ -0,0 +1,31 @@
+"""Price history models."""
+
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, String
+
+from app.db.base import Base
+
+
+class PriceTick(Base):
+    """Append-only price observation, range-partitioned by month on Postgres."""
+
+    __tablename__ = "price_ticks"
+    __table_args__ = {"postgresql_partition_by": "RANGE (observed_at)"}
+
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    currency = Column(String(3), primary_key=True)
+    observed_at = Column(DateTime, primary_key=True, index=True)
+    price_cents = Column(Integer, nullable=False)
+
+
+class PriceDaily(Base):
+    """Daily min/max/last price rolled up from PriceTick."""
+
+    __tablename__ = "price_daily"
+
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    currency = Column(String(3), primary_key=True)
+    day = Column(Date, primary_key=True)
+    min_cents = Column(Integer, nullable=False)
+    max_cents = Column(Integer, nullable=False)
+    last_cents = Column(Integer, nullable=False)
+    ticks = Column(Integer, nullable=False)
@@ -1,9 +1,12 @@
 """Product model."""
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime
+
+from sqlalchemy import Column, DateTime, Index, Integer, String
 from sqlalchemy.orm import relationship
+
 from app.db.base import Base
+from app.db.types import Embedding
 
 
 class Product(Base):
@@ -11,14 +14,41 @@ class Product(Base):
 
     __tablename__ = "products"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     asin = Column(String, unique=True, index=True, nullable=False)
     title = Column(String, nullable=False)
     brand = Column(String, nullable=True)
     category = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    embedding = Column(Embedding(), nullable=True)
 
     # Relationships
     offers = relationship("Offer", backref="product")
     reviews = relationship("Review", backref="product")
     rankings = relationship("Ranking", backref="product")
+
+
+# Approximate nearest neighbour search (pgvector HNSW, cosine distance)
+Index(
+    "ix_products_embedding_hnsw",
+    Product.embedding,
+    postgresql_using="hnsw",
+    postgresql_with={"m": 16, "ef_construction": 64},
+    postgresql_ops={"embedding": "vector_cosine_ops"},
+).ddl_if(dialect="postgresql")
+
+
+# Catalog browsing, newest first with ties broken by id (keyset pages)
+Index("ix_products_created_at_id", Product.created_at.desc(), Product.id)
+Index(
+    "ix_products_brand_created_at_id",
+    Product.brand,
+    Product.created_at.desc(),
+    Product.id,
+)
+Index(
+    "ix_products_category_created_at_id",
+    Product.category,
+    Product.created_at.desc(),
+    Product.id,
+)
@@ -1,8 +1,10 @@
 """Query model."""
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Numeric
+
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Integer, Numeric, String
 from sqlalchemy.orm import relationship
+
 from app.db.base import Base
 
 
@@ -11,13 +13,15 @@ class Query(Base):
 
     __tablename__ = "queries"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
     raw_text = Column(String, nullable=False)
     budget_min = Column(Numeric(10, 2), nullable=True)
     budget_max = Column(Numeric(10, 2), nullable=True)
     usage = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Per-node timings of the agent run that answered this query
+    agent_trace = Column(JSON, nullable=True)
 
     # Relationships
     user = relationship("User", backref="queries")
@@ -1,7 +1,17 @@
 """Ranking model."""
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Numeric, Text
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    Numeric,
+    Text,
+)
+
 from app.db.base import Base
 
 
@@ -10,9 +20,15 @@ class Ranking(Base):
 
     __tablename__ = "rankings"
 
-    id = Column(Integer, primary_key=True, index=True)
-    query_id = Column(Integer, ForeignKey("queries.id"), nullable=False, index=True)
+    id = Column(Integer, primary_key=True)
+    query_id = Column(Integer, ForeignKey("queries.id"), nullable=False)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
     score = Column(Numeric(5, 2), nullable=False)
     rationale = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+# Rankings for a query ordered by score, ties broken by id (keyset pages)
+Index(
+    "ix_rankings_query_id_score_id", Ranking.query_id, Ranking.score.desc(), Ranking.id
+)
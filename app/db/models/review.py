@@ -1,18 +1,50 @@
 """Review model."""
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+)
+
 from app.db.base import Base
+from app.db.types import Embedding
 
 
 class Review(Base):
     """Review model."""
 
     __tablename__ = "reviews"
+    __table_args__ = (
+        UniqueConstraint(
+            "product_id", "url_hash", name="uq_reviews_product_id_url_hash"
+        ),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
     source = Column(String, nullable=False)
     url = Column(String, nullable=True)
     snippet = Column(Text, nullable=True)
+    # SHA-1 of the normalized URL and 64-bit SimHash of the snippet (see app.ingest.reviews)
+    url_hash = Column(String(40), nullable=True)
+    simhash = Column(BigInteger, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    embedding = Column(Embedding(), nullable=True)
+
+
+# Approximate nearest neighbour search (pgvector HNSW, cosine distance)
+Index(
+    "ix_reviews_embedding_hnsw",
+    Review.embedding,
+    postgresql_using="hnsw",
+    postgresql_with={"m": 16, "ef_construction": 64},
+    postgresql_ops={"embedding": "vector_cosine_ops"},
+).ddl_if(dialect="postgresql")
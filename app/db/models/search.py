@@ -0,0 +1,76 @@
+"""Full-text search document model."""
+
+from datetime import datetime
+
+from sqlalchemy import (
+    DDL,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    event,
+)
+
+from app.db.base import Base
+from app.db.types import SearchDocument
+
+
+class ProductSearch(Base):
+    """
+    Searchable text of a product: title, brand and its review snippets.
+
+    Rows are rebuilt by ``app.search.keyword.refresh_search_documents``.
+    On Postgres ``document`` holds the weighted tsvector; on SQLite the
+    text columns are mirrored into the ``product_search_fts`` FTS5 table.
+    """
+
+    __tablename__ = "product_search"
+
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    title = Column(String, nullable=False)
+    brand = Column(String, nullable=True)
+    reviews = Column(Text, nullable=True)
+    document = Column(SearchDocument(), nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+# Keyword search (Postgres GIN over the tsvector)
+Index(
+    "ix_product_search_document",
+    ProductSearch.document,
+    postgresql_using="gin",
+).ddl_if(dialect="postgresql")
+
+# SQLite: external-content FTS5 table kept in sync by triggers
+FTS_TABLE = "product_search_fts"
+SQLITE_FTS_DDL = (
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    "title, brand, reviews, content='product_search', content_rowid='product_id', "
+    "tokenize='porter unicode61')",
+    "CREATE TRIGGER product_search_ai AFTER INSERT ON product_search BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, brand, reviews) "
+    "VALUES (new.product_id, new.title, new.brand, new.reviews); END",
+    "CREATE TRIGGER product_search_ad AFTER DELETE ON product_search BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, brand, reviews) "
+    "VALUES ('delete', old.product_id, old.title, old.brand, old.reviews); END",
+    "CREATE TRIGGER product_search_au AFTER UPDATE ON product_search BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, brand, reviews) "
+    "VALUES ('delete', old.product_id, old.title, old.brand, old.reviews); "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, brand, reviews) "
+    "VALUES (new.product_id, new.title, new.brand, new.reviews); END",
+)
+
+for statement in SQLITE_FTS_DDL:
+    event.listen(
+        ProductSearch.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="sqlite"),
+    )
+event.listen(
+    ProductSearch.__table__,
+    "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}").execute_if(dialect="sqlite"),
+)
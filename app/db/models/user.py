@@ -1,7 +1,9 @@
 """User model."""
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime
+
+from sqlalchemy import Column, DateTime, Integer, String
+
 from app.db.base import Base
 
 
@@ -10,7 +12,7 @@ class User(Base):
 
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     email = Column(String, unique=True, index=True, nullable=False)
     plan = Column(String, default="free")
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,67 @@
+"""Custom column types."""
+
+import numpy as np
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import LargeBinary, Text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.types import TypeDecorator
+
+# Dimension of product/review embeddings stored in the database
+EMBEDDING_DIM = 384
+
+
+class Embedding(TypeDecorator):
+    """
+    Fixed-size float32 embedding.
+
+    Stored as a pgvector ``vector(dim)`` on Postgres and as packed float32
+    bytes everywhere else. Values are returned as 1-D float32 NumPy arrays.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, dim: int = EMBEDDING_DIM) -> None:
+        super().__init__()
+        self.dim = dim
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(Vector(self.dim))
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        array = np.asarray(value, dtype=np.float32)
+        if array.shape != (self.dim,):
+            raise ValueError(
+                f"Expected embedding of shape ({self.dim},), got {array.shape}"
+            )
+        if dialect.name == "postgresql":
+            return array
+        return array.tobytes()
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, (bytes, memoryview)):
+            return np.frombuffer(value, dtype=np.float32)
+        return np.asarray(value, dtype=np.float32)
+
+
+class SearchDocument(TypeDecorator):
+    """
+    Full-text search document.
+
+    A ``tsvector`` on Postgres; elsewhere a plain text column that stays
+    empty, since SQLite indexes the source columns with FTS5 instead.
+    """
+
+    impl = Text
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(TSVECTOR())
+        return dialect.type_descriptor(Text())
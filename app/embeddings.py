@@ -0,0 +1,57 @@
+"""Pluggable text embedding backends."""
+
+import hashlib
+import re
+from collections.abc import Sequence
+from typing import Protocol
+
+import numpy as np
+from kombu.utils.imports import symbol_by_name
+
+from app.core.config import settings
+from app.db.types import EMBEDDING_DIM
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class EmbeddingBackend(Protocol):
+    """Interface for batch text embedders."""
+
+    #: Size of the vectors returned by ``embed``
+    dim: int
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed a batch of texts into a (len(texts), dim) float32 array."""
+        ...
+
+
+class StubEmbedder:
+    """
+    Deterministic offline embedder based on feature hashing.
+
+    Each lowercased token is hashed to a signed bucket, so texts sharing
+    words get similar vectors. Intended for tests and local development.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM) -> None:
+        self.dim = dim
+
+    def _embed_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in _TOKEN_RE.findall(text.lower()):
+            digest = int.from_bytes(
+                hashlib.blake2b(token.encode(), digest_size=8).digest(), "little"
+            )
+            vector[digest % self.dim] += 1.0 if digest >> 63 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+        return np.stack([self._embed_one(text) for text in texts])
+
+
+def load_embedder(path: str | None = None) -> EmbeddingBackend:
+    """Instantiate the backend named by ``path`` or ``settings.embedding_backend``."""
+    return symbol_by_name(path or settings.embedding_backend)()
@@ -0,0 +1,15 @@
+"""Bulk ingestion pipelines for ShopSherpa."""
+
+from .offers import IngestStats, OfferRecord, ingest_offers
+from .reviews import ReviewIngestStats, ReviewRecord, ingest_reviews
+from .signals import offers_changed
+
+__all__ = [
+    "IngestStats",
+    "OfferRecord",
+    "ReviewIngestStats",
+    "ReviewRecord",
+    "ingest_offers",
+    "ingest_reviews",
+    "offers_changed",
+]
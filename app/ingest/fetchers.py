@@ -0,0 +1,95 @@
+"""Pluggable upstream offer fetchers."""
+
+import logging
+from collections.abc import Callable
+from datetime import datetime
+from typing import Protocol
+
+from kombu.utils.imports import symbol_by_name
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.http import run_sync
+from app.db.models import Product
+from app.db.session import SessionLocal
+from app.ingest.items import MAX_ITEM_IDS, get_item_lookup
+from app.ingest.offers import OfferRecord
+
+logger = logging.getLogger(__name__)
+
+
+class OfferFetcher(Protocol):
+    """Interface for upstream offer sources."""
+
+    #: Upstream name, used to key rate limiting
+    name: str
+    #: Maximum products per upstream call
+    max_batch: int
+
+    def fetch(self, product_ids: list[int]) -> list[OfferRecord]:
+        """Fetch current offers for up to ``max_batch`` products in one call."""
+        ...
+
+
+class NullOfferFetcher:
+    """Fetcher used until a real upstream is configured; returns nothing."""
+
+    name = "null"
+    max_batch = 10
+
+    def fetch(self, product_ids: list[int]) -> list[OfferRecord]:
+        logger.warning(
+            "No offer fetcher configured; skipping refresh",
+            extra={"products": len(product_ids)},
+        )
+        return []
+
+
+class HTTPOfferFetcher:
+    """
+    Fetch offers from the GetItems-style API at ``settings.offer_api_url``.
+
+    Lookups go through the process-wide ``ItemLookup`` on the background
+    HTTP loop, so connections are reused across calls and ASINs requested
+    concurrently by other threads share requests. Raises
+    ``app.core.http.RateLimited`` when the upstream keeps returning 429.
+    """
+
+    name = "offer-api"
+    max_batch = MAX_ITEM_IDS
+
+    def __init__(
+        self,
+        url: str | None = None,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ) -> None:
+        self.url = url
+        self.session_factory = session_factory
+
+    def fetch(self, product_ids: list[int]) -> list[OfferRecord]:
+        with self.session_factory() as db:
+            asins = dict(
+                db.execute(
+                    select(Product.id, Product.asin).where(Product.id.in_(product_ids))
+                ).all()
+            )
+        offers = run_sync(get_item_lookup(self.url).get_many(asins.values()))
+
+        now = datetime.utcnow()
+        return [
+            OfferRecord(
+                product_id=product_id,
+                price_cents=offers[asin].price_cents,
+                currency=offers[asin].currency,
+                availability=offers[asin].availability,
+                last_checked_at=now,
+            )
+            for product_id, asin in asins.items()
+            if asin in offers
+        ]
+
+
+def load_fetcher(path: str | None = None) -> OfferFetcher:
+    """Instantiate the fetcher named by ``path`` or ``settings.offer_fetcher``."""
+    return symbol_by_name(path or settings.offer_fetcher)()
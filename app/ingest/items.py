@@ -0,0 +1,170 @@
+"""Coalesced, batched item lookups against a GetItems-style offer API.
+
+Concurrent callers asking for ASINs share requests: an ASIN already in
+flight is answered by the pending lookup instead of a new one, and new
+ASINs are queued for a few milliseconds so up to ``max_batch`` of them go
+out in a single call (the PA-API GetItems limit is 10 item ids).
+"""
+
+import asyncio
+import os
+import threading
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any
+
+from app.core.config import settings
+from app.core.http import HTTPClient
+
+# GetItems accepts at most this many item ids per request
+MAX_ITEM_IDS = 10
+
+OFFER_RESOURCES = ["Offers.Listings.Price", "Offers.Listings.Availability.Message"]
+
+
+@dataclass(frozen=True, slots=True)
+class ItemOffer:
+    """Best listing of an item returned by the offer API."""
+
+    asin: str
+    price_cents: int
+    currency: str
+    availability: str | None = None
+
+
+def parse_items(payload: dict[str, Any]) -> dict[str, ItemOffer]:
+    """
+    Extract the first priced listing of each item from a GetItems response.
+
+    Items without a priced listing, and ASINs reported under ``Errors``,
+    are left out.
+    """
+    offers = {}
+    for item in (payload.get("ItemsResult") or {}).get("Items", []):
+        for listing in (item.get("Offers") or {}).get("Listings", []):
+            price = listing.get("Price") or {}
+            if price.get("Amount") is None:
+                continue
+            offers[item["ASIN"]] = ItemOffer(
+                asin=item["ASIN"],
+                price_cents=int(Decimal(str(price["Amount"])) * 100),
+                currency=price.get("Currency", "USD"),
+                availability=(listing.get("Availability") or {}).get("Message"),
+            )
+            break
+    return offers
+
+
+class ItemLookup:
+    """
+    Look up items by ASIN, coalescing duplicates and batching requests.
+
+    Must be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        fetch_batch: Callable[[list[str]], Awaitable[dict[str, ItemOffer]]],
+        max_batch: int = MAX_ITEM_IDS,
+        window: float | None = None,
+    ) -> None:
+        """
+        Args:
+            fetch_batch: Fetches up to ``max_batch`` ASINs in one request
+            max_batch: ASINs per request
+            window: Seconds to wait for more ASINs before sending a partial batch
+        """
+        self.fetch_batch = fetch_batch
+        self.max_batch = max_batch
+        self.window = (
+            settings.offer_lookup_window_ms / 1000 if window is None else window
+        )
+        self.requests = 0
+        self._inflight: dict[str, asyncio.Future[ItemOffer | None]] = {}
+        self._pending: list[str] = []
+        self._timer: asyncio.TimerHandle | None = None
+
+    async def get(self, asin: str) -> ItemOffer | None:
+        """Offer for ``asin``, or None when the API returned none."""
+        future = self._inflight.get(asin)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._inflight[asin] = loop.create_future()
+            self._pending.append(asin)
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._flush)
+        # One caller giving up must not cancel the lookup for the others
+        return await asyncio.shield(future)
+
+    async def get_many(self, asins: Iterable[str]) -> dict[str, ItemOffer]:
+        """Offers for several ASINs; ASINs without an offer are omitted."""
+        asins = list(dict.fromkeys(asins))
+        offers = await asyncio.gather(*(self.get(asin) for asin in asins))
+        return {
+            asin: offer
+            for asin, offer in zip(asins, offers, strict=True)
+            if offer is not None
+        }
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        for start in range(0, len(pending), self.max_batch):
+            asyncio.get_running_loop().create_task(
+                self._send(pending[start : start + self.max_batch])
+            )
+
+    async def _send(self, asins: list[str]) -> None:
+        self.requests += 1
+        try:
+            offers = await self.fetch_batch(asins)
+        except Exception as exc:
+            for asin in asins:
+                self._inflight.pop(asin).set_exception(exc)
+        else:
+            for asin in asins:
+                self._inflight.pop(asin).set_result(offers.get(asin))
+
+
+def get_items_fetcher(
+    client: HTTPClient, url: str, partner_tag: str | None = None
+) -> Callable[[list[str]], Awaitable[dict[str, ItemOffer]]]:
+    """Batch function POSTing a GetItems request for the offer resources."""
+
+    async def fetch(asins: list[str]) -> dict[str, ItemOffer]:
+        body: dict[str, Any] = {"ItemIds": asins, "Resources": OFFER_RESOURCES}
+        if partner_tag:
+            body.update(PartnerTag=partner_tag, PartnerType="Associates")
+        response = await client.post(url, json=body)
+        return parse_items(response.json())
+
+    return fetch
+
+
+_lookups: dict[tuple[int, str], ItemLookup] = {}
+_lookups_lock = threading.Lock()
+
+
+def get_item_lookup(url: str | None = None) -> ItemLookup:
+    """
+    Return this process's lookup for ``url`` (default ``settings.offer_api_url``).
+
+    Shared by every caller in the process, so concurrent requests for the
+    same ASIN coalesce and connections stay pooled between Celery tasks.
+    """
+    url = url or settings.offer_api_url
+    if not url:
+        raise ValueError("No offer API URL configured (OFFER_API_URL)")
+    key = (os.getpid(), url)
+    with _lookups_lock:
+        lookup = _lookups.get(key)
+        if lookup is None:
+            lookup = _lookups[key] = ItemLookup(
+                get_items_fetcher(HTTPClient(), url, settings.offer_api_partner_tag)
+            )
+        return lookup
@@ -0,0 +1,188 @@
+"""Bulk offer ingestion with upsert semantics."""
+
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+from typing import Any
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import Offer
+from app.ingest.prices import record_price_ticks
+from app.ingest.signals import mark_offers_changed
+
+# Columns compared to decide whether an existing offer actually changed
+TRACKED_FIELDS = ("price_cents", "availability")
+
+
+@dataclass(slots=True)
+class OfferRecord:
+    """A single upstream offer observation."""
+
+    product_id: int
+    price_cents: int
+    currency: str = "USD"
+    availability: str | None = None
+    last_checked_at: datetime | None = None
+
+
+@dataclass
+class IngestStats:
+    """Counts reported by an ingestion run."""
+
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    product_ids: set[int] = field(default_factory=set)
+    changed_product_ids: set[int] = field(default_factory=set)
+
+    @property
+    def total(self) -> int:
+        """Total number of distinct offers written."""
+        return self.inserted + self.updated + self.unchanged
+
+
+def _to_row(record: OfferRecord | Mapping[str, Any], now: datetime) -> dict[str, Any]:
+    """Normalize a record into an insertable row dict."""
+    if isinstance(record, OfferRecord):
+        record = {
+            "product_id": record.product_id,
+            "price_cents": record.price_cents,
+            "currency": record.currency,
+            "availability": record.availability,
+            "last_checked_at": record.last_checked_at,
+        }
+    return {
+        "product_id": record["product_id"],
+        "price_cents": record["price_cents"],
+        "currency": record.get("currency") or "USD",
+        "availability": record.get("availability"),
+        "last_checked_at": record.get("last_checked_at") or now,
+    }
+
+
+def _batches(
+    records: Iterable[OfferRecord | Mapping[str, Any]], batch_size: int
+) -> Iterator[list]:
+    """Yield lists of at most batch_size records from any iterable."""
+    iterator = iter(records)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+def _upsert_statement(dialect_name: str):
+    """Build an INSERT ... ON CONFLICT DO UPDATE for dialects that support it."""
+    if dialect_name == "postgresql":
+        stmt = postgresql.insert(Offer)
+    elif dialect_name == "sqlite":
+        stmt = sqlite.insert(Offer)
+    else:
+        return None
+
+    return stmt.on_conflict_do_update(
+        index_elements=[Offer.product_id, Offer.currency],
+        set_={
+            "price_cents": stmt.excluded.price_cents,
+            "availability": stmt.excluded.availability,
+            "last_checked_at": stmt.excluded.last_checked_at,
+        },
+    )
+
+
+def _write_batch(db: Session, rows: list[dict[str, Any]], stats: IngestStats) -> None:
+    """Classify and upsert one de-duplicated batch of rows."""
+    product_ids = {row["product_id"] for row in rows}
+    stats.product_ids |= product_ids
+    existing = {
+        (product_id, currency): (offer_id, (price_cents, availability))
+        for offer_id, product_id, currency, price_cents, availability in db.execute(
+            select(
+                Offer.id,
+                Offer.product_id,
+                Offer.currency,
+                Offer.price_cents,
+                Offer.availability,
+            ).where(Offer.product_id.in_(product_ids))
+        )
+    }
+
+    new_rows = []
+    for row in rows:
+        key = (row["product_id"], row["currency"])
+        current = existing.get(key)
+        if current is None:
+            new_rows.append(row)
+            stats.inserted += 1
+            stats.changed_product_ids.add(row["product_id"])
+        elif current[1] != tuple(row[name] for name in TRACKED_FIELDS):
+            stats.updated += 1
+            stats.changed_product_ids.add(row["product_id"])
+        else:
+            stats.unchanged += 1
+
+    upsert = _upsert_statement(db.get_bind().dialect.name)
+    if upsert is not None:
+        db.execute(upsert, rows)
+        return
+
+    # Generic fallback: plain executemany inserts and keyed updates
+    if new_rows:
+        db.execute(insert(Offer), new_rows)
+    touched = [
+        {"id": existing[(row["product_id"], row["currency"])][0], **row}
+        for row in rows
+        if (row["product_id"], row["currency"]) in existing
+    ]
+    if touched:
+        db.execute(update(Offer), touched)
+
+
+def ingest_offers(
+    db: Session,
+    records: Iterable[OfferRecord | Mapping[str, Any]],
+    batch_size: int = 1000,
+) -> IngestStats:
+    """
+    Upsert a stream of offer records keyed on (product_id, currency).
+
+    Records are consumed lazily in batches of ``batch_size``. Each batch is
+    written with a single ``INSERT ... ON CONFLICT DO UPDATE`` on Postgres and
+    SQLite, so every offer's ``last_checked_at`` is refreshed even when its
+    price and availability are unchanged. Each observation is also appended
+    to the price history when enabled, and the product_features rows of
+    products whose price or availability changed are rebuilt. The caller
+    owns the transaction; ``offers_changed`` is sent once it commits.
+
+    Args:
+        db: Database session to write through
+        records: OfferRecord instances or mappings with the same keys
+        batch_size: Number of records per statement
+
+    Returns:
+        IngestStats with inserted/updated/unchanged counts and the ids of
+        products whose offers were written or changed
+    """
+    stats = IngestStats()
+    now = datetime.utcnow()
+
+    for batch in _batches(records, batch_size):
+        # Last observation wins when a key repeats within a batch
+        rows = {}
+        for record in batch:
+            row = _to_row(record, now)
+            rows[(row["product_id"], row["currency"])] = row
+        _write_batch(db, list(rows.values()), stats)
+        if settings.price_history_enabled:
+            record_price_ticks(db, rows.values())
+
+    if settings.product_features_enabled:
+        # Imported here: app.ranking imports app.cache, which imports app.ingest
+        from app.ranking.features import refresh_product_features
+
+        refresh_product_features(db, stats.changed_product_ids)
+    mark_offers_changed(db, stats.product_ids, stats.changed_product_ids)
+    return stats
@@ -0,0 +1,205 @@
+"""Append-only price history: tick recording, daily rollups and pruning."""
+
+import re
+from collections.abc import Iterable
+from datetime import date, datetime, time, timedelta
+from typing import Any
+
+from sqlalchemy import and_, delete, func, insert, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.db.models import PriceDaily, PriceTick
+
+_PARTITION_RE = re.compile(r"^price_ticks_(\d{4})_(\d{2})$")
+
+# Keeps executemany batches bounded
+CHUNK_SIZE = 5000
+
+
+def month_start(value: date) -> datetime:
+    """First instant of the month containing ``value``."""
+    return datetime(value.year, value.month, 1)
+
+
+def next_month(value: datetime) -> datetime:
+    """First instant of the month after ``value``'s month."""
+    return datetime(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def partition_name(month: datetime) -> str:
+    """Name of the price_ticks partition holding ``month``."""
+    return f"price_ticks_{month:%Y_%m}"
+
+
+def ensure_price_partitions(db: Session, start: date, months: int) -> list[str]:
+    """
+    Create monthly price_ticks partitions from ``start``'s month onwards.
+
+    No-op outside Postgres, where price_ticks is a plain table.
+
+    Returns:
+        Names of the partitions ensured
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return []
+
+    names = []
+    month = month_start(start)
+    for _ in range(months):
+        upper = next_month(month)
+        name = partition_name(month)
+        db.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF price_ticks "
+                f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+            )
+        )
+        names.append(name)
+        month = upper
+    return names
+
+
+def _insert_ignore(dialect_name: str):
+    """INSERT that skips ticks already recorded for the same instant."""
+    if dialect_name == "postgresql":
+        return postgresql.insert(PriceTick).on_conflict_do_nothing()
+    if dialect_name == "sqlite":
+        return sqlite.insert(PriceTick).on_conflict_do_nothing()
+    return insert(PriceTick)
+
+
+def record_price_ticks(db: Session, rows: Iterable[dict[str, Any]]) -> None:
+    """Append one tick per offer row (as produced by ingest) in a single executemany."""
+    ticks = [
+        {
+            "product_id": row["product_id"],
+            "currency": row["currency"],
+            "observed_at": row["last_checked_at"],
+            "price_cents": row["price_cents"],
+        }
+        for row in rows
+    ]
+    if ticks:
+        db.execute(_insert_ignore(db.get_bind().dialect.name), ticks)
+
+
+def _upsert_daily(dialect_name: str):
+    if dialect_name == "postgresql":
+        stmt = postgresql.insert(PriceDaily)
+    elif dialect_name == "sqlite":
+        stmt = sqlite.insert(PriceDaily)
+    else:
+        return None
+    return stmt.on_conflict_do_update(
+        index_elements=[PriceDaily.product_id, PriceDaily.currency, PriceDaily.day],
+        set_={
+            name: stmt.excluded[name]
+            for name in ("min_cents", "max_cents", "last_cents", "ticks")
+        },
+    )
+
+
+def rollup_day(db: Session, day: date) -> int:
+    """
+    Aggregate one day's ticks into PriceDaily rows, replacing earlier rollups.
+
+    Returns:
+        Number of (product, currency) rows written
+    """
+    start = datetime.combine(day, time.min)
+    in_day = and_(
+        PriceTick.observed_at >= start,
+        PriceTick.observed_at < start + timedelta(days=1),
+    )
+    keys = (PriceTick.product_id, PriceTick.currency)
+
+    totals = (
+        select(
+            *keys,
+            func.min(PriceTick.price_cents).label("min_cents"),
+            func.max(PriceTick.price_cents).label("max_cents"),
+            func.count().label("ticks"),
+        )
+        .where(in_day)
+        .group_by(*keys)
+        .subquery()
+    )
+    latest = (
+        select(
+            *keys,
+            PriceTick.price_cents,
+            func.row_number()
+            .over(partition_by=keys, order_by=PriceTick.observed_at.desc())
+            .label("position"),
+        )
+        .where(in_day)
+        .subquery()
+    )
+    rows = [
+        {**row._mapping, "day": day}
+        for row in db.execute(
+            select(
+                totals.c.product_id,
+                totals.c.currency,
+                totals.c.min_cents,
+                totals.c.max_cents,
+                latest.c.price_cents.label("last_cents"),
+                totals.c.ticks,
+            ).join(
+                latest,
+                and_(
+                    latest.c.product_id == totals.c.product_id,
+                    latest.c.currency == totals.c.currency,
+                    latest.c.position == 1,
+                ),
+            )
+        )
+    ]
+    if not rows:
+        return 0
+
+    upsert = _upsert_daily(db.get_bind().dialect.name)
+    for offset in range(0, len(rows), CHUNK_SIZE):
+        chunk = rows[offset : offset + CHUNK_SIZE]
+        if upsert is not None:
+            db.execute(upsert, chunk)
+        else:
+            db.execute(
+                delete(PriceDaily).where(
+                    PriceDaily.day == day,
+                    PriceDaily.product_id.in_({row["product_id"] for row in chunk}),
+                )
+            )
+            db.execute(insert(PriceDaily), chunk)
+    return len(rows)
+
+
+def prune_price_ticks(db: Session, before: datetime) -> int:
+    """
+    Remove ticks observed before ``before``.
+
+    On Postgres, whole monthly partitions that end by the cutoff are
+    dropped instead of deleted row by row.
+
+    Returns:
+        Number of rows deleted (dropped partitions are not counted)
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        partitions = db.scalars(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "WHERE parent.relname = 'price_ticks'"
+            )
+        ).all()
+        for name in partitions:
+            match = _PARTITION_RE.match(name)
+            if (
+                match
+                and next_month(datetime(int(match[1]), int(match[2]), 1)) <= before
+            ):
+                db.execute(text(f"DROP TABLE {name}"))
+
+    return db.execute(delete(PriceTick).where(PriceTick.observed_at < before)).rowcount
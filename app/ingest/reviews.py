@@ -0,0 +1,440 @@
+"""Streaming review ingestion with URL and near-duplicate de-duplication.
+
+Crawlers see the same reviews again and again, often under URLs that
+differ only in tracking parameters, and syndicated copies of one review
+with small edits. Each review is keyed on its product and the SHA-1 of
+its normalized URL (``uq_reviews_product_id_url_hash``), and every
+snippet gets a 64-bit SimHash. A review is skipped when its URL is
+already stored for the product, or when its SimHash is within
+``review_dedup_max_distance`` bits of a stored snippet of the product.
+
+Near-duplicates are found with an LSH index over the SimHashes: the 64
+bits are split into ``max_distance + 1`` bands, and two hashes that
+differ in at most ``max_distance`` bits must agree exactly on at least
+one band. Only hashes sharing a band are compared bit by bit. Each batch
+is checked in bulk with NumPy against the stored hashes of its products
+and against its own earlier records.
+"""
+
+import hashlib
+import re
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+from typing import Any
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import numpy as np
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import Review
+
+# Query parameters that identify the visit rather than the review
+TRACKING_PARAMS = frozenset(
+    {
+        "fbclid",
+        "gclid",
+        "pd_rd_i",
+        "pd_rd_r",
+        "pd_rd_w",
+        "pf_rd_p",
+        "pf_rd_r",
+        "psc",
+        "ref",
+        "ref_",
+        "smid",
+        "spla",
+        "tag",
+        "th",
+    }
+)
+TRACKING_PREFIXES = ("utm_",)
+
+# Words per SimHash feature. Hashes of two texts differ in about
+# 64 * arccos(overlap) / pi bits, so single words (whose overlap drops least
+# under an edit) keep a one-word edit of a 30-word snippet within ~6 bits
+SHINGLE_SIZE = 1
+HASH_BITS = 64
+# Odd 64-bit multiplier spreading scopes over the band key space
+_SCOPE_MIX = np.uint64(0x9E3779B97F4A7C15)
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a review URL.
+
+    Lowercases the host and drops ``www.``, default ports, the fragment,
+    trailing slashes and tracking parameters; remaining parameters are
+    sorted and http is treated as https, as is a URL without a scheme.
+    """
+    url = url.strip()
+    parts = urlsplit(url)
+    if not parts.netloc and "://" not in url:
+        # "example.com/r/1" (or "example.com:443/r/1") would parse as a path
+        parts = urlsplit("//" + url)
+    scheme = parts.scheme.lower()
+    if scheme in ("http", ""):
+        scheme = "https"
+    host = (parts.hostname or "").removeprefix("www.")
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host if port in (None, 80, 443) else f"{host}:{port}"
+    path = parts.path
+    if "//" in path:
+        path = re.sub(r"/{2,}", "/", path)
+    path = path.rstrip("/") or "/"
+    query = ""
+    if parts.query:
+        query = urlencode(
+            sorted(
+                (key, value)
+                for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                if key.lower() not in TRACKING_PARAMS
+                and not key.lower().startswith(TRACKING_PREFIXES)
+            )
+        )
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def url_hash(url: str | None) -> str | None:
+    """SHA-1 hex digest of the normalized URL; None without a URL."""
+    if not url or not url.strip():
+        return None
+    return hashlib.sha1(normalize_url(url).encode()).hexdigest()
+
+
+def _features(text: str) -> list[str]:
+    tokens = _TOKEN_RE.findall(text.lower())
+    if SHINGLE_SIZE == 1:
+        return tokens
+    if len(tokens) <= SHINGLE_SIZE:
+        return [" ".join(tokens)] if tokens else []
+    return [
+        " ".join(tokens[i : i + SHINGLE_SIZE])
+        for i in range(len(tokens) - SHINGLE_SIZE + 1)
+    ]
+
+
+@lru_cache(maxsize=1 << 16)
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little"
+    )
+
+
+def simhashes(texts: Sequence[str | None]) -> list[int | None]:
+    """
+    64-bit SimHash of each text over its ``SHINGLE_SIZE``-word shingles.
+
+    Bit votes are counted for the whole batch with NumPy. Texts without
+    words hash to None.
+    """
+    counts, hashes = [], []
+    for text in texts:
+        features = _features(text) if text else []
+        counts.append(len(features))
+        hashes += map(_feature_hash, features)
+    if not hashes:
+        return [None] * len(texts)
+
+    # One row of 64 little-endian bits per feature; a bit is set in the
+    # SimHash when it is set in more than half of the text's features
+    bits = np.unpackbits(
+        np.asarray(hashes, dtype="<u8").view(np.uint8).reshape(-1, 8),
+        axis=1,
+        bitorder="little",
+    )
+    counts = np.asarray(counts)
+    present = counts > 0
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))[present]
+    ones = np.add.reduceat(bits, offsets, axis=0, dtype=np.int32)
+    majority = ones * 2 > counts[present, None]
+    values = np.packbits(majority, axis=1, bitorder="little").view("<u8").ravel()
+
+    out: list[int | None] = [None] * len(texts)
+    for position, value in zip(
+        np.flatnonzero(present).tolist(), values.tolist(), strict=True
+    ):
+        out[position] = value
+    return out
+
+
+def to_signed(value: int) -> int:
+    """Store an unsigned 64-bit hash in a signed BIGINT column."""
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    """Set bits of each uint64 in ``values``."""
+    return _POPCOUNT[values.view(np.uint8).reshape(-1, 8)].sum(axis=1)
+
+
+class SimHashIndex:
+    """
+    LSH index of 64-bit SimHashes, partitioned by integer scope.
+
+    Per band the index keeps the (scope, band value) keys of its hashes
+    sorted, so a bulk query finds every stored hash sharing a band with a
+    queried one by binary search; candidates are then compared bit by bit.
+    Hashes of the same scope within ``max_distance`` bits are never
+    missed: with ``max_distance + 1`` bands, they agree on at least one.
+    """
+
+    def __init__(
+        self, scopes: Sequence[int], hashes: Sequence[int], max_distance: int
+    ) -> None:
+        self.scopes = np.asarray(scopes, dtype=np.int64)
+        self.hashes = np.asarray(hashes, dtype=np.uint64)
+        self.max_distance = max_distance
+        bands = max_distance + 1
+        widths = [HASH_BITS // bands + (i < HASH_BITS % bands) for i in range(bands)]
+        shifts = np.concatenate(([0], np.cumsum(widths)[:-1])).tolist()
+        self._bands = [
+            (np.uint64(shift), np.uint64((1 << width) - 1))
+            for shift, width in zip(shifts, widths, strict=True)
+        ]
+        self._tables = []
+        for shift, mask in self._bands:
+            keys = self._keys(self.scopes, self.hashes, shift, mask)
+            order = np.argsort(keys, kind="stable")
+            self._tables.append((keys[order], order))
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    @staticmethod
+    def _keys(
+        scopes: np.ndarray, hashes: np.ndarray, shift: np.uint64, mask: np.uint64
+    ) -> np.ndarray:
+        # Distinct (scope, band value) pairs may collide; candidates are re-checked
+        return ((hashes >> shift) & mask) ^ (scopes.view(np.uint64) * _SCOPE_MIX)
+
+    def pairs(
+        self, scopes: Sequence[int], hashes: Sequence[int]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Matches of the queried hashes among the stored ones.
+
+        Returns:
+            (query positions, stored positions) of every pair with the same
+            scope within ``max_distance`` bits, possibly repeated
+        """
+        scopes = np.asarray(scopes, dtype=np.int64)
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        found_queries, found_stored = [], []
+        for (shift, mask), (keys, order) in zip(self._bands, self._tables, strict=True):
+            query_keys = self._keys(scopes, hashes, shift, mask)
+            left = np.searchsorted(keys, query_keys, side="left")
+            counts = np.searchsorted(keys, query_keys, side="right") - left
+            total = int(counts.sum())
+            if not total:
+                continue
+            queries = np.repeat(np.arange(len(hashes)), counts)
+            ends = np.cumsum(counts)
+            stored = order[np.repeat(left - ends + counts, counts) + np.arange(total)]
+            found_queries.append(queries)
+            found_stored.append(stored)
+        if not found_queries:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        queries = np.concatenate(found_queries)
+        stored = np.concatenate(found_stored)
+        close = (self.scopes[stored] == scopes[queries]) & (
+            _popcount(self.hashes[stored] ^ hashes[queries]) <= self.max_distance
+        )
+        return queries[close], stored[close]
+
+    def matches(self, scopes: Sequence[int], hashes: Sequence[int]) -> np.ndarray:
+        """Mask of the queried hashes with a stored hash of the same scope within distance."""
+        out = np.zeros(len(hashes), dtype=bool)
+        out[self.pairs(scopes, hashes)[0]] = True
+        return out
+
+
+@dataclass(slots=True)
+class ReviewRecord:
+    """A single crawled review."""
+
+    product_id: int
+    source: str
+    url: str | None = None
+    snippet: str | None = None
+    created_at: datetime | None = None
+
+
+@dataclass
+class ReviewIngestStats:
+    """Counts reported by a review ingestion run."""
+
+    inserted: int = 0
+    duplicate_urls: int = 0
+    near_duplicates: int = 0
+    product_ids: set[int] = field(default_factory=set)
+
+    @property
+    def total(self) -> int:
+        """Total number of records seen."""
+        return self.inserted + self.duplicate_urls + self.near_duplicates
+
+
+def _to_row(record: ReviewRecord | Mapping[str, Any], now: datetime) -> dict[str, Any]:
+    """Normalize a record into an insertable row dict (SimHash filled in later)."""
+    if isinstance(record, ReviewRecord):
+        record = {
+            "product_id": record.product_id,
+            "source": record.source,
+            "url": record.url,
+            "snippet": record.snippet,
+            "created_at": record.created_at,
+        }
+    url = (record.get("url") or "").strip() or None
+    snippet = (record.get("snippet") or "").strip() or None
+    return {
+        "product_id": record["product_id"],
+        "source": record["source"],
+        "url": url,
+        "url_hash": url_hash(url),
+        "snippet": snippet,
+        "created_at": record.get("created_at") or now,
+    }
+
+
+def _batches(
+    records: Iterable[ReviewRecord | Mapping[str, Any]], batch_size: int
+) -> Iterator[list]:
+    """Yield lists of at most batch_size records from any iterable."""
+    iterator = iter(records)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+def _insert_statement(dialect_name: str):
+    """INSERT that skips rows a concurrent ingest stored first."""
+    if dialect_name == "postgresql":
+        stmt = postgresql.insert(Review)
+    elif dialect_name == "sqlite":
+        stmt = sqlite.insert(Review)
+    else:
+        return insert(Review)
+    return stmt.on_conflict_do_nothing(
+        index_elements=[Review.product_id, Review.url_hash]
+    )
+
+
+def _write_batch(
+    db: Session, rows: list[dict[str, Any]], stats: ReviewIngestStats
+) -> None:
+    """Drop duplicate rows of one batch and insert the rest."""
+    product_ids = {row["product_id"] for row in rows}
+    seen_urls: set[tuple[int, str]] = set()
+    stored_scopes, stored_hashes = [], []
+    for product_id, hashed_url, simhash in db.execute(
+        select(Review.product_id, Review.url_hash, Review.simhash).where(
+            Review.product_id.in_(product_ids)
+        )
+    ):
+        if hashed_url is not None:
+            seen_urls.add((product_id, hashed_url))
+        if simhash is not None:
+            stored_scopes.append(product_id)
+            stored_hashes.append(simhash)
+
+    candidates = []
+    for row in rows:
+        key = (row["product_id"], row["url_hash"])
+        if row["url_hash"] is not None:
+            if key in seen_urls:
+                stats.duplicate_urls += 1
+                continue
+            seen_urls.add(key)
+        candidates.append(row)
+
+    hashes = simhashes([row["snippet"] for row in candidates])
+    hashed = [position for position, value in enumerate(hashes) if value is not None]
+    scopes = np.array(
+        [candidates[position]["product_id"] for position in hashed], dtype=np.int64
+    )
+    values = np.array([hashes[position] for position in hashed], dtype=np.uint64)
+
+    max_distance = settings.review_dedup_max_distance
+    stored = SimHashIndex(
+        stored_scopes,
+        np.array(stored_hashes, dtype=np.int64).view(np.uint64),
+        max_distance,
+    )
+    near = stored.matches(scopes, values)
+    # Within the batch, a snippet close to an earlier one is the duplicate
+    queries, earlier = SimHashIndex(scopes, values, max_distance).pairs(scopes, values)
+    near[queries[earlier < queries]] = True
+
+    duplicates = {hashed[position] for position in np.flatnonzero(near).tolist()}
+    new_rows = []
+    for position, (row, simhash) in enumerate(zip(candidates, hashes, strict=True)):
+        if position in duplicates:
+            stats.near_duplicates += 1
+            continue
+        row["simhash"] = None if simhash is None else to_signed(simhash)
+        new_rows.append(row)
+
+    if new_rows:
+        dialect = db.get_bind().dialect
+        stmt = _insert_statement(dialect.name)
+        if dialect.insert_executemany_returning:
+            # Rows a concurrent ingest stored first are skipped and not returned
+            inserted = db.scalars(stmt.returning(Review.product_id), new_rows).all()
+        else:
+            db.execute(stmt, new_rows)
+            inserted = [row["product_id"] for row in new_rows]
+        stats.inserted += len(inserted)
+        stats.duplicate_urls += len(new_rows) - len(inserted)
+        stats.product_ids.update(inserted)
+
+
+def ingest_reviews(
+    db: Session,
+    records: Iterable[ReviewRecord | Mapping[str, Any]],
+    batch_size: int = 1000,
+) -> ReviewIngestStats:
+    """
+    Insert a stream of crawled reviews, skipping duplicates.
+
+    Records are consumed lazily in batches of ``batch_size``. Per batch,
+    the stored URL hashes and SimHashes of the batch's products are read
+    in one query, duplicates (against the database and earlier records)
+    are dropped and the rest are inserted with one executemany. Search
+    documents and product_features of products that gained reviews are
+    rebuilt at the end. The caller owns the transaction.
+
+    Args:
+        db: Database session to write through
+        records: ReviewRecord instances or mappings with the same keys
+        batch_size: Number of records per statement
+
+    Returns:
+        ReviewIngestStats with inserted and skipped counts and the ids of
+        products that gained reviews
+    """
+    stats = ReviewIngestStats()
+    now = datetime.utcnow()
+
+    for batch in _batches(records, batch_size):
+        _write_batch(db, [_to_row(record, now) for record in batch], stats)
+
+    if stats.product_ids:
+        # Imported here: both packages import app.cache, which imports app.ingest
+        from app.ranking.features import refresh_product_features
+        from app.search.keyword import refresh_search_documents
+
+        refresh_search_documents(db, stats.product_ids)
+        if settings.product_features_enabled:
+            refresh_product_features(db, stats.product_ids)
+    return stats
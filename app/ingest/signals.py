@@ -0,0 +1,37 @@
+"""Signals fired by the ingestion pipelines."""
+
+from celery.utils.dispatch import Signal
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+#: Sent after a commit that wrote offers.
+#: ``product_ids`` holds every product whose offers were written,
+#: ``changed_product_ids`` only those whose price or availability changed.
+offers_changed = Signal(
+    name="offers_changed", providing_args={"product_ids", "changed_product_ids"}
+)
+
+_PENDING_KEY = "pending_offer_changes"
+
+
+def mark_offers_changed(
+    db: Session, product_ids: set[int], changed_product_ids: set[int]
+) -> None:
+    """Queue an offers_changed notification for when ``db`` commits."""
+    touched, changed = db.info.setdefault(_PENDING_KEY, (set(), set()))
+    touched |= product_ids
+    changed |= changed_product_ids
+
+
+@event.listens_for(Session, "after_commit")
+def _send_pending(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending and pending[0]:
+        offers_changed.send(
+            sender=session, product_ids=pending[0], changed_product_ids=pending[1]
+        )
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
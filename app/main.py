@@ -2,8 +2,14 @@
 
 from fastapi import FastAPI
 
+from app.api.catalog import router as catalog_router
 from app.api.health import router as health_router
+from app.api.metrics import router as metrics_router
+from app.api.prices import router as prices_router
+from app.api.recommendations import router as recommendations_router
+from app.api.search import router as search_router
 from app.core.config import settings
+from app.core.metrics import MetricsMiddleware
 
 app = FastAPI(
     title=settings.app_name,
@@ -14,3 +20,11 @@ app = FastAPI(
 
 # Include routers
 app.include_router(health_router)
+app.include_router(recommendations_router)
+app.include_router(prices_router)
+app.include_router(catalog_router)
+app.include_router(search_router)
+
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics_router)
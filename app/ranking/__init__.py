@@ -0,0 +1,18 @@
+"""Product ranking for ShopSherpa."""
+
+from .engine import Candidates, QueryParams, RankingEngine, RankingWeights
+from .pipeline import PipelineEvent, RecommendationRequest, recommend
+from .service import load_candidates, rank_query, update_rationales
+
+__all__ = [
+    "Candidates",
+    "PipelineEvent",
+    "QueryParams",
+    "RankingEngine",
+    "RankingWeights",
+    "RecommendationRequest",
+    "load_candidates",
+    "rank_query",
+    "recommend",
+    "update_rationales",
+]
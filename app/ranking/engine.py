@@ -0,0 +1,206 @@
+"""Vectorized candidate scoring."""
+
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+import numpy as np
+
+# Ranking.score is Numeric(5, 2); engine scores are scaled into [0, MAX_SCORE]
+MAX_SCORE = 10.0
+
+
+@dataclass
+class Candidates:
+    """
+    Struct-of-arrays view of a candidate set; all arrays share one length.
+
+    Missing values are NaN (prices, similarity, sentiment, price drop) or 0
+    (review counts).
+    """
+
+    product_ids: np.ndarray
+    price_cents: np.ndarray
+    review_count: np.ndarray
+    similarity: np.ndarray
+    review_sentiment: np.ndarray | None = None
+    usage_match: np.ndarray | None = None
+    price_drop: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self.product_ids)
+
+    @classmethod
+    def from_columns(
+        cls,
+        product_ids,
+        price_cents,
+        review_count=None,
+        similarity=None,
+        review_sentiment=None,
+        usage_match=None,
+        price_drop=None,
+    ) -> "Candidates":
+        """Build candidates from any sequences, filling missing columns."""
+        ids = np.asarray(product_ids, dtype=np.int64)
+        n = len(ids)
+        return cls(
+            product_ids=ids,
+            price_cents=np.asarray(price_cents, dtype=np.float64),
+            review_count=(
+                np.zeros(n)
+                if review_count is None
+                else np.asarray(review_count, dtype=np.float64)
+            ),
+            similarity=(
+                np.full(n, np.nan)
+                if similarity is None
+                else np.asarray(similarity, dtype=np.float64)
+            ),
+            review_sentiment=(
+                None
+                if review_sentiment is None
+                else np.asarray(review_sentiment, dtype=np.float64)
+            ),
+            usage_match=(
+                None if usage_match is None else np.asarray(usage_match, dtype=bool)
+            ),
+            price_drop=(
+                None if price_drop is None else np.asarray(price_drop, dtype=np.float64)
+            ),
+        )
+
+
+@dataclass(frozen=True)
+class QueryParams:
+    """Scoring inputs taken from a Query."""
+
+    budget_min_cents: float | None = None
+    budget_max_cents: float | None = None
+    usage: str | None = None
+
+    @classmethod
+    def from_budget(
+        cls,
+        budget_min: Decimal | float | None,
+        budget_max: Decimal | float | None,
+        usage: str | None = None,
+    ) -> "QueryParams":
+        """Convert Query budgets (currency units) to cents."""
+        return cls(
+            budget_min_cents=None if budget_min is None else float(budget_min) * 100,
+            budget_max_cents=None if budget_max is None else float(budget_max) * 100,
+            usage=usage,
+        )
+
+
+@dataclass(frozen=True)
+class RankingWeights:
+    """Relative weight of each feature score."""
+
+    price_fit: float = 0.4
+    reviews: float = 0.25
+    similarity: float = 0.35
+    usage: float = 0.1
+
+
+@dataclass
+class ScoredCandidates:
+    """Top-N result: positions into the candidate arrays plus scores."""
+
+    indices: np.ndarray
+    scores: np.ndarray
+    components: dict[str, np.ndarray] = field(default_factory=dict)
+
+
+class RankingEngine:
+    """
+    Scores every candidate with array operations, no per-candidate Python.
+
+    Feature scores are each in [0, 1]:
+
+    - price fit: 1 inside the budget, decaying exponentially above the
+      maximum and linearly below the minimum; 0 when there is no price
+    - reviews: log review volume relative to the set, blended with mean
+      sentiment when available
+    - similarity: cosine similarity mapped from [-1, 1]; 0 when unknown
+    - usage: 1 when the product matches the query's usage, else 0
+    """
+
+    #: Price overshoot (fraction of budget_max) that costs ~63% of the price score
+    OVER_BUDGET_SCALE = 0.15
+
+    def __init__(self, weights: RankingWeights | None = None) -> None:
+        self.weights = weights or RankingWeights()
+
+    def price_fit(self, params: QueryParams, price_cents: np.ndarray) -> np.ndarray:
+        fit = np.ones_like(price_cents)
+        if params.budget_max_cents:
+            over = np.maximum(price_cents - params.budget_max_cents, 0.0)
+            fit *= np.exp(-over / (self.OVER_BUDGET_SCALE * params.budget_max_cents))
+        if params.budget_min_cents:
+            under = np.maximum(params.budget_min_cents - price_cents, 0.0)
+            fit *= 1.0 - 0.5 * np.minimum(under / params.budget_min_cents, 1.0)
+        return np.where(np.isnan(price_cents), 0.0, fit)
+
+    @staticmethod
+    def review_signal(candidates: Candidates) -> np.ndarray:
+        volume = np.log1p(candidates.review_count)
+        top = volume.max(initial=0.0)
+        volume = volume / top if top > 0 else volume
+        if candidates.review_sentiment is None:
+            return volume
+        sentiment = np.nan_to_num(candidates.review_sentiment, nan=0.5)
+        return 0.5 * volume + 0.5 * sentiment
+
+    @staticmethod
+    def similarity_signal(candidates: Candidates) -> np.ndarray:
+        return np.nan_to_num((candidates.similarity + 1.0) / 2.0, nan=0.0)
+
+    def components(
+        self, params: QueryParams, candidates: Candidates
+    ) -> dict[str, np.ndarray]:
+        """Per-feature scores for every candidate."""
+        components = {
+            "price_fit": self.price_fit(params, candidates.price_cents),
+            "reviews": self.review_signal(candidates),
+            "similarity": self.similarity_signal(candidates),
+        }
+        if params.usage and candidates.usage_match is not None:
+            components["usage"] = candidates.usage_match.astype(np.float64)
+        return components
+
+    def score(self, params: QueryParams, candidates: Candidates) -> np.ndarray:
+        """Weighted score in [0, MAX_SCORE] for every candidate."""
+        return self._combine(self.components(params, candidates))
+
+    def _combine(self, components: dict[str, np.ndarray]) -> np.ndarray:
+        weights = {name: getattr(self.weights, name) for name in components}
+        total = sum(weights.values())
+        combined = sum(components[name] * weight for name, weight in weights.items())
+        return combined * (MAX_SCORE / total)
+
+    def top_n(
+        self, params: QueryParams, candidates: Candidates, n: int = 20
+    ) -> ScoredCandidates:
+        """
+        Best ``n`` candidates, highest score first.
+
+        Uses argpartition to find the ``n``-th best score, then fully sorts
+        only the candidates scoring at least that much. Ties are broken by
+        product id, including ties straddling the cutoff, so the same
+        candidates always make the cut.
+        """
+        if not len(candidates):
+            return ScoredCandidates(np.empty(0, dtype=np.int64), np.empty(0))
+        components = self.components(params, candidates)
+        scores = self._combine(components)
+        n = min(n, len(scores))
+        cutoff = -np.partition(-scores, n - 1)[n - 1]
+        # Every candidate tied at the cutoff competes on product id
+        top = np.flatnonzero(scores >= cutoff)
+        top = top[np.lexsort((candidates.product_ids[top], -scores[top]))][:n]
+        return ScoredCandidates(
+            indices=top,
+            scores=scores[top],
+            components={name: values[top] for name, values in components.items()},
+        )
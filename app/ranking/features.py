@@ -0,0 +1,443 @@
+"""Materialized per-product ranking features and their in-memory column store.
+
+``product_features`` holds, per product, the aggregates ranking needs:
+lowest current price, drop below the recent high (from the daily price
+rollups), review count and review sentiment. Rows are rebuilt for the
+products whose offers or reviews changed, never for the whole catalog, so
+a plain table is used rather than a Postgres materialized view (which can
+only be refreshed in full).
+
+Every rebuild bumps the single-row ``product_feature_version`` counter in
+its own transaction and stamps the rows it writes with the new value. The
+bump row-locks the counter until commit, so versions become visible in
+order. Each API worker keeps the table as NumPy columns sorted by product
+id (``FeatureStore``) and, when the counter has moved, loads only the rows
+stamped after its copy. Deleted rows leave no version behind, so the copy
+is also rebuilt in full every ``product_features_reload_seconds``, in a
+background thread.
+"""
+
+import logging
+import re
+import threading
+import time
+import weakref
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import Offer, Product, ProductFeatures, ProductFeatureVersion, Review
+from app.repositories.prices import price_drops
+
+logger = logging.getLogger(__name__)
+
+# Keeps IN lists under SQLite's bound parameter limit
+CHUNK_SIZE = 5000
+
+# Small review lexicon; a negator flips the next sentiment word
+POSITIVE = frozenset(
+    "amazing awesome comfortable comfy crisp clear excellent fantastic good great "
+    "impressive love loved perfect recommend reliable solid superb sturdy worth".split()
+)
+NEGATIVE = frozenset(
+    "awful bad broke broken cheap disappointed disappointing flimsy hate hurts "
+    "muffled painful poor returned terrible tinny uncomfortable useless worse worst".split()
+)
+NEGATORS = frozenset("not no never hardly isn't wasn't don't doesn't didn't".split())
+_WORD_RE = re.compile(r"[a-z']+")
+
+
+def snippet_sentiment(text: str) -> float | None:
+    """Share of positive sentiment words in ``text``; None when it has none."""
+    positive = negative = 0
+    negate = False
+    for word in _WORD_RE.findall(text.lower()):
+        if word in NEGATORS:
+            negate = True
+            continue
+        if word in POSITIVE or word in NEGATIVE:
+            if (word in POSITIVE) != negate:
+                positive += 1
+            else:
+                negative += 1
+        negate = False
+    total = positive + negative
+    return positive / total if total else None
+
+
+def review_sentiment(snippets: Iterable[str]) -> float | None:
+    """Mean sentiment of the snippets that carry any, in [0, 1]."""
+    scores = [
+        score
+        for snippet in snippets
+        if (score := snippet_sentiment(snippet)) is not None
+    ]
+    return sum(scores) / len(scores) if scores else None
+
+
+def bump_feature_version(db: Session) -> int:
+    """Increment the feature version; the counter stays locked until commit."""
+    version = db.scalar(
+        update(ProductFeatureVersion)
+        .where(ProductFeatureVersion.id == 1)
+        .values(version=ProductFeatureVersion.version + 1)
+        .returning(ProductFeatureVersion.version)
+    )
+    if version is None:
+        db.execute(insert(ProductFeatureVersion).values(id=1, version=1))
+        version = 1
+    return version
+
+
+def current_feature_version(db: Session) -> int:
+    """Version of the latest committed product_features write."""
+    return (
+        db.scalar(
+            select(ProductFeatureVersion.version).where(ProductFeatureVersion.id == 1)
+        )
+        or 0
+    )
+
+
+def _upsert_statement(dialect_name: str):
+    if dialect_name == "postgresql":
+        stmt = postgresql.insert(ProductFeatures)
+    elif dialect_name == "sqlite":
+        stmt = sqlite.insert(ProductFeatures)
+    else:
+        return None
+    columns = (
+        "min_price_cents",
+        "price_drop",
+        "review_count",
+        "review_sentiment",
+        "version",
+        "updated_at",
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[ProductFeatures.product_id],
+        set_={name: stmt.excluded[name] for name in columns},
+    )
+
+
+def refresh_product_features(db: Session, product_ids: Iterable[int]) -> int:
+    """
+    Rebuild the feature rows of ``product_ids``.
+
+    Call after offers or reviews of the products are written; the caller
+    owns the transaction. Prices use ``settings.product_features_currency``.
+    Rows of products that no longer exist are removed.
+
+    Returns:
+        Number of feature rows written
+    """
+    ids = sorted(set(product_ids))
+    if not ids:
+        return 0
+    currency = settings.product_features_currency
+    upsert = _upsert_statement(db.get_bind().dialect.name)
+    version = bump_feature_version(db)
+    now = datetime.utcnow()
+    written = 0
+
+    for start in range(0, len(ids), CHUNK_SIZE):
+        chunk = ids[start : start + CHUNK_SIZE]
+        existing = db.scalars(select(Product.id).where(Product.id.in_(chunk))).all()
+        prices = dict(
+            db.execute(
+                select(Offer.product_id, func.min(Offer.price_cents))
+                .where(Offer.product_id.in_(chunk), Offer.currency == currency)
+                .group_by(Offer.product_id)
+            ).all()
+        )
+        drops = price_drops(
+            db, chunk, currency, days=settings.product_features_trend_days
+        )
+        snippets: dict[int, list[str]] = {}
+        for product_id, snippet in db.execute(
+            select(Review.product_id, Review.snippet).where(
+                Review.product_id.in_(chunk)
+            )
+        ):
+            snippets.setdefault(product_id, []).append(snippet or "")
+
+        rows = [
+            {
+                "product_id": product_id,
+                "min_price_cents": prices.get(product_id),
+                "price_drop": drops.get(product_id),
+                "review_count": len(snippets.get(product_id, ())),
+                "review_sentiment": review_sentiment(snippets.get(product_id, ())),
+                "version": version,
+                "updated_at": now,
+            }
+            for product_id in existing
+        ]
+
+        missing = set(chunk) - set(existing)
+        if upsert is None:
+            # Generic fallback: replace the chunk's rows
+            db.execute(
+                delete(ProductFeatures).where(ProductFeatures.product_id.in_(chunk))
+            )
+            if rows:
+                db.execute(insert(ProductFeatures), rows)
+        else:
+            if missing:
+                db.execute(
+                    delete(ProductFeatures).where(
+                        ProductFeatures.product_id.in_(missing)
+                    )
+                )
+            if rows:
+                db.execute(upsert, rows)
+        written += len(rows)
+
+    return written
+
+
+def stale_feature_ids(
+    db: Session, after_id: int, limit: int, now: datetime | None = None
+) -> tuple[list[int], int | None]:
+    """
+    Products after ``after_id`` whose feature row is missing or out of date.
+
+    A row is out of date when the product has a review newer than it, or
+    it is older than ``product_features_max_age_hours`` (price drops move
+    with the rollup window even when offers do not change). One page of
+    ``limit`` products is examined per call, in id order.
+
+    Returns:
+        Stale product ids in the page and the last id examined (None when
+        there are no more products)
+    """
+    now = now or datetime.utcnow()
+    page = (
+        select(Product.id)
+        .where(Product.id > after_id)
+        .order_by(Product.id)
+        .limit(limit)
+    )
+    page_ids = db.scalars(page).all()
+    if not page_ids:
+        return [], None
+
+    newer_review = (
+        select(Review.id)
+        .where(
+            Review.product_id == Product.id,
+            Review.created_at > ProductFeatures.updated_at,
+        )
+        .exists()
+    )
+    expired = ProductFeatures.updated_at < now - timedelta(
+        hours=settings.product_features_max_age_hours
+    )
+    stale = db.scalars(
+        select(Product.id)
+        .outerjoin(ProductFeatures, ProductFeatures.product_id == Product.id)
+        .where(Product.id.in_(page_ids))
+        .where(ProductFeatures.product_id.is_(None) | expired | newer_review)
+        .order_by(Product.id)
+    ).all()
+    return list(stale), page_ids[-1]
+
+
+@dataclass(frozen=True)
+class FeatureColumns:
+    """
+    Immutable snapshot of product_features as arrays sorted by product id.
+
+    Missing values are NaN; review counts are never missing.
+    """
+
+    product_ids: np.ndarray
+    price_cents: np.ndarray
+    price_drop: np.ndarray
+    review_count: np.ndarray
+    review_sentiment: np.ndarray
+    version: int = 0
+
+    def __len__(self) -> int:
+        return len(self.product_ids)
+
+    @classmethod
+    def empty(cls) -> "FeatureColumns":
+        return cls(np.empty(0, dtype=np.int64), *(np.empty(0) for _ in range(4)))
+
+    def locate(self, product_ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Return (found mask, positions) of ``product_ids`` in these columns."""
+        if not len(self):
+            return np.zeros(len(product_ids), dtype=bool), np.zeros(
+                len(product_ids), dtype=np.int64
+            )
+        positions = np.minimum(
+            np.searchsorted(self.product_ids, product_ids), len(self) - 1
+        )
+        return self.product_ids[positions] == product_ids, positions
+
+    def merge(self, rows: list[tuple], version: int) -> "FeatureColumns":
+        """New snapshot with ``rows`` (product_features column tuples) applied."""
+        if not rows:
+            return FeatureColumns(*self._arrays(), version=version)
+        count = len(rows)
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+        values = [
+            np.fromiter(
+                (np.nan if row[column] is None else row[column] for row in rows),
+                dtype=np.float64,
+                count=count,
+            )
+            for column in range(1, 5)
+        ]
+
+        found, positions = self.locate(ids)
+        arrays = [array.copy() for array in self._arrays()]
+        for array, column in zip(arrays[1:], values, strict=True):
+            array[positions[found]] = column[found]
+        if not found.all():
+            arrays = [
+                np.concatenate((array, column[~found]))
+                for array, column in zip(arrays, [ids, *values], strict=True)
+            ]
+            order = np.argsort(arrays[0], kind="stable")
+            arrays = [array[order] for array in arrays]
+        return FeatureColumns(*arrays, version=version)
+
+    def _arrays(self) -> list[np.ndarray]:
+        return [
+            self.product_ids,
+            self.price_cents,
+            self.price_drop,
+            self.review_count,
+            self.review_sentiment,
+        ]
+
+
+_FEATURE_COLUMNS = (
+    ProductFeatures.product_id,
+    ProductFeatures.min_price_cents,
+    ProductFeatures.price_drop,
+    ProductFeatures.review_count,
+    ProductFeatures.review_sentiment,
+)
+
+
+class FeatureStore:
+    """
+    Per-process copy of product_features, kept current by version checks.
+
+    ``get`` compares the database version with the copy's at most every
+    ``check_interval`` seconds and loads only rows written since. Every
+    ``reload_interval`` seconds it also starts a full rebuild in a
+    background thread, which drops rows deleted since (for removed
+    products) without making a request wait for it. Readers always see a
+    complete snapshot: updates build a new ``FeatureColumns`` and swap it in.
+    """
+
+    def __init__(
+        self,
+        check_interval: float | None = None,
+        reload_interval: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.check_interval = (
+            settings.product_features_check_seconds
+            if check_interval is None
+            else check_interval
+        )
+        self.reload_interval = (
+            settings.product_features_reload_seconds
+            if reload_interval is None
+            else reload_interval
+        )
+        self.columns = FeatureColumns.empty()
+        self._clock = clock
+        self._checked_at: float | None = None
+        self._loaded_at: float | None = None
+        self._reloader: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> FeatureColumns:
+        """Current snapshot, refreshed first when due."""
+        now = self._clock()
+        due = self._checked_at is None or now - self._checked_at >= self.check_interval
+        reload = (
+            self._loaded_at is not None
+            and now - self._loaded_at >= self.reload_interval
+        )
+        # Only one thread refreshes; the others keep using the current snapshot
+        if (due or reload) and self._lock.acquire(blocking=self._checked_at is None):
+            try:
+                if reload:
+                    self._loaded_at = now
+                    self._reload_in_background(db.get_bind())
+                if due:
+                    self.refresh(db)
+                    self._checked_at = now
+                    if self._loaded_at is None:
+                        self._loaded_at = now
+            finally:
+                self._lock.release()
+        return self.columns
+
+    def refresh(self, db: Session) -> bool:
+        """Load rows written since the snapshot's version; True if it changed."""
+        version = current_feature_version(db)
+        if version == self.columns.version:
+            return False
+        rows = db.execute(
+            select(*_FEATURE_COLUMNS).where(
+                ProductFeatures.version > self.columns.version,
+                ProductFeatures.version <= version,
+            )
+        ).all()
+        self.columns = self.columns.merge(rows, version)
+        return True
+
+    def reload(self, db: Session) -> None:
+        """Replace the snapshot with every current row."""
+        # Rows stamped after this version are loaded again by the next refresh
+        version = current_feature_version(db)
+        columns = FeatureColumns.empty().merge(
+            db.execute(select(*_FEATURE_COLUMNS)).all(), version
+        )
+        with self._lock:
+            self.columns = columns
+
+    def _reload_in_background(self, engine: Engine) -> None:
+        if self._reloader is not None and self._reloader.is_alive():
+            return
+
+        def run() -> None:
+            try:
+                with Session(engine) as db:
+                    self.reload(db)
+            except Exception:
+                logger.exception("Feature store reload failed")
+
+        self._reloader = threading.Thread(
+            target=run, name="feature-store-reload", daemon=True
+        )
+        self._reloader.start()
+
+
+_stores: "weakref.WeakKeyDictionary[Engine, FeatureStore]" = weakref.WeakKeyDictionary()
+_stores_lock = threading.Lock()
+
+
+def get_feature_store(db: Session) -> FeatureStore:
+    """This process's feature store for the database ``db`` is bound to."""
+    engine = db.get_bind()
+    with _stores_lock:
+        store = _stores.get(engine)
+        if store is None:
+            store = _stores[engine] = FeatureStore()
+        return store
@@ -0,0 +1,168 @@
+"""Staged recommendation pipeline that reports results as each stage finishes."""
+
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.cache.results import RankingKey, RankingResultCache, freshness_deadline
+from app.db.models import Query, Ranking
+from app.embeddings import EmbeddingBackend, load_embedder
+from app.ranking.engine import RankingEngine
+from app.ranking.service import load_candidates, rank_query
+from app.search import hybrid_search_sync
+
+
+@dataclass(frozen=True, slots=True)
+class PipelineEvent:
+    """One pipeline output: an event name and a JSON-serializable payload."""
+
+    event: str
+    data: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class RecommendationRequest:
+    """Inputs for one recommendation run."""
+
+    raw_text: str
+    budget_min: Decimal | None = None
+    budget_max: Decimal | None = None
+    usage: str | None = None
+    limit: int = 20
+    candidates: int = 200
+
+
+def _ranking_event(rank: int, row: dict[str, Any]) -> PipelineEvent:
+    return PipelineEvent(
+        "ranking",
+        {
+            "rank": rank,
+            "product_id": row["product_id"],
+            "score": float(row["score"]),
+            "rationale": row["rationale"],
+        },
+    )
+
+
+def recommend(
+    session_factory: Callable[[], Session],
+    request: RecommendationRequest,
+    embedder: EmbeddingBackend | None = None,
+    engine: RankingEngine | None = None,
+    cache: RankingResultCache | None = None,
+) -> Iterator[PipelineEvent]:
+    """
+    Run the recommendation pipeline, yielding events as stages complete.
+
+    Events, in order: ``query`` (the new Query id), ``candidates``
+    (in-budget products from hybrid keyword and vector retrieval, skipped
+    on a result-cache hit), one ``ranking``
+    per ranked product, then ``done``.
+
+    The generator owns its session. The Query is committed up front so no
+    transaction stays open across slow stages; rankings are committed once
+    ranking finishes. Closing the generator early (client disconnect)
+    skips the remaining stages, leaving the Query without rankings.
+    """
+    started = time.perf_counter()
+    with session_factory() as db:
+        query = Query(
+            raw_text=request.raw_text,
+            budget_min=request.budget_min,
+            budget_max=request.budget_max,
+            usage=request.usage,
+        )
+        db.add(query)
+        db.commit()
+        query_id = query.id
+
+        key = RankingKey.from_query(
+            request.raw_text,
+            request.budget_min,
+            request.budget_max,
+            request.usage,
+            candidates=request.candidates,
+        )
+        cached = cache.get(key, limit=request.limit) if cache is not None else None
+        yield PipelineEvent(
+            "query", {"query_id": query_id, "cached": cached is not None}
+        )
+
+        if cached is not None:
+            rows = [dict(row) for row in cached.rankings[: request.limit]]
+            if rows:
+                now = datetime.utcnow()
+                db.execute(
+                    insert(Ranking),
+                    [{**row, "query_id": query_id, "created_at": now} for row in rows],
+                )
+        else:
+            compute_started = time.perf_counter()
+            # Offer changes from here on must invalidate what gets cached
+            created_at = cache.now() if cache is not None else None
+            embedder = embedder or load_embedder()
+            # Pipeline steps run in worker threads, which have no event loop
+            hits = hybrid_search_sync(
+                session_factory,
+                request.raw_text,
+                embedder,
+                request.candidates,
+                budget_min=request.budget_min,
+                budget_max=request.budget_max,
+            )
+            yield PipelineEvent(
+                "candidates",
+                {
+                    "count": len(hits),
+                    "products": [
+                        {
+                            "product_id": hit.id,
+                            "score": round(hit.score, 4),
+                            "similarity": (
+                                None
+                                if hit.similarity is None
+                                else round(hit.similarity, 4)
+                            ),
+                        }
+                        for hit in hits[: request.limit]
+                    ],
+                },
+            )
+
+            candidates = load_candidates(
+                db,
+                (hit.id for hit in hits),
+                similarity={
+                    hit.id: hit.similarity for hit in hits if hit.similarity is not None
+                },
+                usage=request.usage,
+            )
+            rows = rank_query(db, query, candidates, n=request.limit, engine=engine)
+            if cache is not None:
+                cache.put(
+                    key,
+                    rows,
+                    freshness_deadline(db, [row["product_id"] for row in rows]),
+                    time.perf_counter() - compute_started,
+                    created_at=created_at,
+                    limit=request.limit,
+                )
+        db.commit()
+
+        for rank, row in enumerate(rows, start=1):
+            yield _ranking_event(rank, row)
+
+        yield PipelineEvent(
+            "done",
+            {
+                "query_id": query_id,
+                "count": len(rows),
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+            },
+        )
@@ -0,0 +1,340 @@
+"""Compact per-worker product store for retrieval and ranking.
+
+Retrieval and ranking only need a handful of product attributes (ASIN,
+title, brand, category) for thousands of candidates per request. Loading
+them as ORM ``Product`` instances costs an identity-map entry, instance
+state and a ``__dict__`` per row, far more than the scoring itself.
+
+``ProductColumns`` keeps those attributes as arrays sorted by product id,
+loaded with Core ``select()`` in keyset pages. Brands and categories have
+few distinct values, so they are stored as integer codes into interned
+string tables. Per-candidate records are ``__slots__`` dataclasses built
+only for the products a response actually shows.
+
+Products are written by catalog imports rather than per request, so the
+store appends new products (ids above its last one) every
+``product_store_check_seconds`` and reloads in full every
+``product_store_reload_seconds`` to pick up edits; reloads run in a
+background thread, off the request path. Callers fall back to the
+database for ids the store does not know yet.
+"""
+
+import logging
+import sys
+import threading
+import time
+import weakref
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import Product
+
+logger = logging.getLogger(__name__)
+
+# Products per keyset page when loading the store
+PAGE_SIZE = 50_000
+# Keeps IN lists under SQLite's bound parameter limit
+CHUNK_SIZE = 5000
+
+_COLUMNS = (Product.id, Product.asin, Product.title, Product.brand, Product.category)
+
+
+@dataclass(frozen=True, slots=True)
+class ProductSummary:
+    """Read-only view of the product attributes shown with a candidate."""
+
+    id: int
+    asin: str
+    title: str
+    brand: str | None
+    category: str | None
+
+
+def _encode(
+    values: Iterable[str | None], table: list[str], codes: dict[str, int]
+) -> np.ndarray:
+    """Codes of ``values`` in ``table`` (-1 for None), extending it as needed."""
+    out = []
+    for value in values:
+        if value is None:
+            out.append(-1)
+            continue
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(table)
+            table.append(sys.intern(value))
+        out.append(code)
+    return np.asarray(out, dtype=np.int32)
+
+
+@dataclass(frozen=True)
+class ProductColumns:
+    """
+    Immutable snapshot of product attributes as arrays sorted by product id.
+
+    ``brand_codes`` and ``category_codes`` index ``brands`` and
+    ``categories``; -1 means the product has none.
+    """
+
+    product_ids: np.ndarray
+    asins: np.ndarray
+    titles: np.ndarray
+    brand_codes: np.ndarray
+    category_codes: np.ndarray
+    brands: tuple[str, ...] = ()
+    categories: tuple[str, ...] = ()
+
+    def __len__(self) -> int:
+        return len(self.product_ids)
+
+    @classmethod
+    def empty(cls) -> "ProductColumns":
+        return cls(
+            np.empty(0, dtype=np.int64),
+            np.empty(0, dtype=object),
+            np.empty(0, dtype=object),
+            np.empty(0, dtype=np.int32),
+            np.empty(0, dtype=np.int32),
+        )
+
+    @property
+    def last_id(self) -> int:
+        return int(self.product_ids[-1]) if len(self) else 0
+
+    def append(self, rows: Sequence[tuple]) -> "ProductColumns":
+        """
+        New snapshot with ``rows`` (id, asin, title, brand, category) added.
+
+        Rows must be ordered by id and come after ``last_id``.
+        """
+        if not rows:
+            return self
+        ids, asins, titles, brands, categories = zip(*rows, strict=True)
+        brand_table, category_table = list(self.brands), list(self.categories)
+        brand_codes = _encode(
+            brands, brand_table, {b: i for i, b in enumerate(brand_table)}
+        )
+        category_codes = _encode(
+            categories, category_table, {c: i for i, c in enumerate(category_table)}
+        )
+        return ProductColumns(
+            product_ids=np.concatenate(
+                (self.product_ids, np.asarray(ids, dtype=np.int64))
+            ),
+            asins=np.concatenate((self.asins, np.asarray(asins, dtype=object))),
+            titles=np.concatenate((self.titles, np.asarray(titles, dtype=object))),
+            brand_codes=np.concatenate((self.brand_codes, brand_codes)),
+            category_codes=np.concatenate((self.category_codes, category_codes)),
+            brands=tuple(brand_table),
+            categories=tuple(category_table),
+        )
+
+    def locate(self, product_ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Return (found mask, positions) of ``product_ids`` in these columns."""
+        product_ids = np.asarray(product_ids, dtype=np.int64)
+        if not len(self):
+            return np.zeros(len(product_ids), dtype=bool), np.zeros(
+                len(product_ids), dtype=np.int64
+            )
+        positions = np.minimum(
+            np.searchsorted(self.product_ids, product_ids), len(self) - 1
+        )
+        return self.product_ids[positions] == product_ids, positions
+
+    def summaries(self, product_ids: Iterable[int]) -> dict[int, ProductSummary]:
+        """Summaries of the known products among ``product_ids``."""
+        ids = np.fromiter(product_ids, dtype=np.int64)
+        found, positions = self.locate(ids)
+        out = {}
+        for product_id, position in zip(
+            ids[found].tolist(), positions[found].tolist(), strict=True
+        ):
+            brand = self.brand_codes[position]
+            category = self.category_codes[position]
+            out[product_id] = ProductSummary(
+                id=product_id,
+                asin=self.asins[position],
+                title=self.titles[position],
+                brand=self.brands[brand] if brand >= 0 else None,
+                category=self.categories[category] if category >= 0 else None,
+            )
+        return out
+
+    def usage_match(
+        self, product_ids: np.ndarray, usage: str
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Match ``usage`` case-insensitively against title and category.
+
+        Returns:
+            (found mask, match mask) aligned with ``product_ids``; products
+            that are not found never match
+        """
+        needle = usage.lower()
+        found, positions = self.locate(product_ids)
+        positions = positions[found]
+        # Categories are matched once per distinct value, titles per candidate
+        category_hits = np.fromiter(
+            (needle in category.lower() for category in self.categories),
+            dtype=bool,
+            count=len(self.categories),
+        )
+        codes = self.category_codes[positions]
+        matched = np.zeros(len(positions), dtype=bool)
+        if len(category_hits):
+            matched = (codes >= 0) & category_hits[np.maximum(codes, 0)]
+        titles = self.titles[positions]
+        matched |= np.fromiter(
+            (needle in title.lower() for title in titles), dtype=bool, count=len(titles)
+        )
+        match = np.zeros(len(found), dtype=bool)
+        match[found] = matched
+        return found, match
+
+
+def load_product_rows(
+    db: Session, after_id: int = 0, page_size: int = PAGE_SIZE
+) -> list[tuple]:
+    """(id, asin, title, brand, category) of products after ``after_id``, by id."""
+    rows: list[tuple] = []
+    while True:
+        page = db.execute(
+            select(*_COLUMNS)
+            .where(Product.id > after_id)
+            .order_by(Product.id)
+            .limit(page_size)
+        ).all()
+        rows += page
+        if len(page) < page_size:
+            return rows
+        after_id = page[-1][0]
+
+
+class ProductStore:
+    """
+    Per-process product columns, kept current by appends and full reloads.
+
+    The first ``get`` loads the store; later full reloads are built by a
+    background thread with its own session while requests keep using the
+    current snapshot. Readers always see a complete snapshot: updates
+    build a new ``ProductColumns`` and swap it in.
+    """
+
+    def __init__(
+        self,
+        check_interval: float | None = None,
+        reload_interval: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.check_interval = (
+            settings.product_store_check_seconds
+            if check_interval is None
+            else check_interval
+        )
+        self.reload_interval = (
+            settings.product_store_reload_seconds
+            if reload_interval is None
+            else reload_interval
+        )
+        self.columns = ProductColumns.empty()
+        self._clock = clock
+        self._loaded_at: float | None = None
+        self._checked_at: float | None = None
+        self._reloader: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> ProductColumns:
+        """Current snapshot, extended first when due; full reloads start in the background."""
+        now = self._clock()
+        if self._loaded_at is None:
+            with self._lock:
+                if self._loaded_at is None:
+                    self.columns = ProductColumns.empty().append(load_product_rows(db))
+                    self._loaded_at = self._checked_at = now
+            return self.columns
+
+        reload = now - self._loaded_at >= self.reload_interval
+        check = now - self._checked_at >= self.check_interval
+        # Only one thread updates; the others keep using the current snapshot
+        if (reload or check) and self._lock.acquire(blocking=False):
+            try:
+                if reload:
+                    self._loaded_at = now
+                    self._reload_in_background(db.get_bind())
+                if check:
+                    self.load_new(db)
+                    self._checked_at = now
+            finally:
+                self._lock.release()
+        return self.columns
+
+    def reload(self, db: Session) -> None:
+        """Replace the snapshot with every product."""
+        columns = ProductColumns.empty().append(load_product_rows(db))
+        # Products appended meanwhile have higher ids and are loaded again by load_new
+        with self._lock:
+            self.columns = columns
+
+    def _reload_in_background(self, engine: Engine) -> None:
+        if self._reloader is not None and self._reloader.is_alive():
+            return
+
+        def run() -> None:
+            try:
+                with Session(engine) as db:
+                    self.reload(db)
+            except Exception:
+                logger.exception("Product store reload failed")
+
+        self._reloader = threading.Thread(
+            target=run, name="product-store-reload", daemon=True
+        )
+        self._reloader.start()
+
+    def load_new(self, db: Session) -> int:
+        """Append products added since the snapshot; returns how many."""
+        rows = load_product_rows(db, after_id=self.columns.last_id)
+        self.columns = self.columns.append(rows)
+        return len(rows)
+
+
+_stores: "weakref.WeakKeyDictionary[Engine, ProductStore]" = weakref.WeakKeyDictionary()
+_stores_lock = threading.Lock()
+
+
+def get_product_store(db: Session) -> ProductStore:
+    """This process's product store for the database ``db`` is bound to."""
+    engine = db.get_bind()
+    with _stores_lock:
+        store = _stores.get(engine)
+        if store is None:
+            store = _stores[engine] = ProductStore()
+        return store
+
+
+def product_summaries(
+    db: Session, product_ids: Iterable[int]
+) -> dict[int, ProductSummary]:
+    """
+    Summaries of ``product_ids`` from the product store.
+
+    Ids the store does not know yet (or all of them when
+    ``settings.product_store_enabled`` is off) are read with Core queries
+    of at most ``CHUNK_SIZE`` ids.
+    """
+    product_ids = list(product_ids)
+    found: dict[int, ProductSummary] = {}
+    if settings.product_store_enabled:
+        found = get_product_store(db).get(db).summaries(product_ids)
+    missing = [product_id for product_id in product_ids if product_id not in found]
+    for start in range(0, len(missing), CHUNK_SIZE):
+        chunk = missing[start : start + CHUNK_SIZE]
+        for row in db.execute(select(*_COLUMNS).where(Product.id.in_(chunk))):
+            found[row.id] = ProductSummary(*row)
+    return found
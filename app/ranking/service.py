@@ -0,0 +1,235 @@
+"""Candidate loading and Ranking persistence."""
+
+from collections.abc import Iterable, Mapping
+from datetime import datetime
+from decimal import Decimal
+from typing import Any
+
+import numpy as np
+from sqlalchemy import bindparam, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import Offer, Product, Query, Ranking, Review
+from app.ranking.engine import Candidates, QueryParams, RankingEngine, ScoredCandidates
+from app.ranking.features import get_feature_store
+from app.ranking.products import get_product_store
+
+# Keeps IN lists under SQLite's bound parameter limit
+CHUNK_SIZE = 5000
+
+
+def _chunks(ids: np.ndarray) -> Iterable[list[int]]:
+    for start in range(0, len(ids), CHUNK_SIZE):
+        yield ids[start : start + CHUNK_SIZE].tolist()
+
+
+def _scatter(
+    ids: np.ndarray, rows: Iterable[tuple[int, Any]], fill: float
+) -> np.ndarray:
+    """Place (product_id, value) rows into an array aligned with sorted ``ids``."""
+    out = np.full(len(ids), fill, dtype=np.float64)
+    rows = list(rows)
+    if rows and len(ids):
+        keys = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        values = np.fromiter(
+            (row[1] for row in rows), dtype=np.float64, count=len(rows)
+        )
+        positions = np.minimum(np.searchsorted(ids, keys), len(ids) - 1)
+        known = ids[positions] == keys
+        out[positions[known]] = values[known]
+    return out
+
+
+def _from_store(
+    values: np.ndarray, positions: np.ndarray, found: np.ndarray
+) -> np.ndarray | None:
+    """Store values for found candidates (NaN elsewhere); None if none are known."""
+    out = np.full(len(found), np.nan)
+    out[found] = values[positions[found]]
+    return out if not np.isnan(out).all() else None
+
+
+def load_candidates(
+    db: Session,
+    product_ids: Iterable[int],
+    currency: str = "USD",
+    similarity: Mapping[int, float] | None = None,
+    usage: str | None = None,
+    use_features: bool | None = None,
+) -> Candidates:
+    """
+    Load feature columns for a candidate set.
+
+    Prices, review counts, review sentiment and price drops come from the
+    worker's in-memory copy of product_features; products it does not
+    cover yet fall back to aggregate queries over offers and reviews
+    (which have no sentiment or price drop).
+
+    Args:
+        db: Database session
+        product_ids: Candidate product ids
+        currency: Offer currency used for prices (lowest price wins)
+        similarity: Optional cosine similarity per product from retrieval
+        usage: Optional usage keyword matched against title and category
+            (in the worker's product store when enabled)
+        use_features: Read product_features (default
+            ``settings.product_features_enabled``); only used when
+            ``currency`` is the materialized currency
+
+    Returns:
+        Candidates sorted by product id
+    """
+    ids = np.unique(np.fromiter(product_ids, dtype=np.int64))
+    if use_features is None:
+        use_features = settings.product_features_enabled
+    use_features = use_features and currency == settings.product_features_currency
+
+    found = np.zeros(len(ids), dtype=bool)
+    if use_features:
+        columns = get_feature_store(db).get(db)
+        found, positions = columns.locate(ids)
+    missing = ids[~found]
+
+    price_rows, review_rows, usage_ids = [], [], []
+    for chunk in _chunks(missing):
+        price_rows += db.execute(
+            select(Offer.product_id, func.min(Offer.price_cents))
+            .where(Offer.product_id.in_(chunk), Offer.currency == currency)
+            .group_by(Offer.product_id)
+        ).all()
+        review_rows += db.execute(
+            select(Review.product_id, func.count())
+            .where(Review.product_id.in_(chunk))
+            .group_by(Review.product_id)
+        ).all()
+    if usage:
+        # The product store matches usage in memory; unknown ids go to SQL
+        usage_match, unmatched = np.zeros(len(ids), dtype=bool), ids
+        if settings.product_store_enabled:
+            known, usage_match = get_product_store(db).get(db).usage_match(ids, usage)
+            unmatched = ids[~known]
+        pattern = f"%{usage}%"
+        for chunk in _chunks(unmatched):
+            usage_ids += db.scalars(
+                select(Product.id).where(
+                    Product.id.in_(chunk),
+                    or_(Product.title.ilike(pattern), Product.category.ilike(pattern)),
+                )
+            ).all()
+
+    price_cents = _scatter(ids, price_rows, np.nan)
+    review_count = _scatter(ids, review_rows, 0.0)
+    review_sentiment = price_drop = None
+    if found.any():
+        price_cents[found] = columns.price_cents[positions[found]]
+        review_count[found] = columns.review_count[positions[found]]
+        review_sentiment = _from_store(columns.review_sentiment, positions, found)
+        price_drop = _from_store(columns.price_drop, positions, found)
+
+    return Candidates(
+        product_ids=ids,
+        price_cents=price_cents,
+        review_count=review_count,
+        similarity=_scatter(ids, (similarity or {}).items(), np.nan),
+        review_sentiment=review_sentiment,
+        usage_match=(
+            usage_match | np.isin(ids, np.asarray(usage_ids, dtype=np.int64))
+            if usage
+            else None
+        ),
+        price_drop=price_drop,
+    )
+
+
+def build_rationale(
+    result: ScoredCandidates, position: int, candidates: Candidates
+) -> str:
+    """Short human-readable explanation of a candidate's feature scores."""
+    index = result.indices[position]
+    parts = []
+
+    price_fit = result.components["price_fit"][position]
+    price = candidates.price_cents[index]
+    if np.isnan(price):
+        parts.append("no current offer")
+    elif price_fit >= 0.999:
+        parts.append(f"${price / 100:,.2f}, within budget")
+    else:
+        parts.append(f"${price / 100:,.2f}, outside budget")
+
+    if candidates.price_drop is not None and candidates.price_drop[index] >= 0.05:
+        parts.append(f"{candidates.price_drop[index]:.0%} below its recent high")
+
+    reviews = int(candidates.review_count[index])
+    if reviews:
+        parts.append(f"{reviews} review{'s' if reviews != 1 else ''}")
+
+    similarity = candidates.similarity[index]
+    if not np.isnan(similarity):
+        parts.append(f"{similarity:.0%} match to request")
+
+    if "usage" in result.components and result.components["usage"][position]:
+        parts.append("suited to stated usage")
+
+    rationale = "; ".join(parts)
+    return rationale[:1].upper() + rationale[1:]
+
+
+def rank_query(
+    db: Session,
+    query: Query,
+    candidates: Candidates,
+    n: int = 20,
+    engine: RankingEngine | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Score candidates for ``query`` and insert the top ``n`` as Ranking rows.
+
+    All rows are written with a single executemany INSERT; the caller owns
+    the transaction.
+
+    Returns:
+        The inserted row dicts, best first
+    """
+    engine = engine or RankingEngine()
+    params = QueryParams.from_budget(query.budget_min, query.budget_max, query.usage)
+    result = engine.top_n(params, candidates, n)
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "query_id": query.id,
+            "product_id": int(candidates.product_ids[index]),
+            "score": Decimal(f"{score:.2f}"),
+            "rationale": build_rationale(result, position, candidates),
+            "created_at": now,
+        }
+        for position, (index, score) in enumerate(
+            zip(result.indices, result.scores, strict=True)
+        )
+    ]
+    if rows:
+        db.execute(insert(Ranking), rows)
+    return rows
+
+
+def update_rationales(
+    db: Session, query_id: int, rationales: Mapping[int, str]
+) -> None:
+    """Replace the rationale of a query's Ranking rows in one executemany UPDATE."""
+    if not rationales:
+        return
+    rankings = Ranking.__table__
+    db.execute(
+        update(rankings)
+        .where(
+            rankings.c.query_id == bindparam("b_query_id"),
+            rankings.c.product_id == bindparam("b_product_id"),
+        )
+        .values(rationale=bindparam("b_rationale")),
+        [
+            {"b_query_id": query_id, "b_product_id": product_id, "b_rationale": text}
+            for product_id, text in rationales.items()
+        ],
+    )
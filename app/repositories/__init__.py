@@ -0,0 +1,26 @@
+"""Query layer with explicit loader strategies per use case."""
+
+from .pagination import InvalidCursor, Page
+from .prices import price_drops, price_trend
+from .products import get_products, latest_offers, latest_prices, list_products
+from .rankings import (
+    RankedProduct,
+    get_query_with_rankings,
+    list_ranked_products,
+    page_ranked_products,
+)
+
+__all__ = [
+    "InvalidCursor",
+    "Page",
+    "RankedProduct",
+    "get_products",
+    "get_query_with_rankings",
+    "latest_offers",
+    "latest_prices",
+    "list_products",
+    "list_ranked_products",
+    "page_ranked_products",
+    "price_drops",
+    "price_trend",
+]
@@ -0,0 +1,98 @@
+"""Keyset (cursor) pagination over a sort key with an id tie-breaker."""
+
+import base64
+import binascii
+import json
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+from sqlalchemy import and_, or_
+from sqlalchemy.sql.elements import ColumnElement
+
+T = TypeVar("T")
+
+
+class InvalidCursor(ValueError):
+    """A page token that was not issued for this listing."""
+
+
+@dataclass
+class Page(Generic[T]):
+    """One page of results and the token for the next one, if any."""
+
+    items: list[T]
+    next_cursor: str | None
+
+
+def encode_cursor(scope: str, sort_value: Any, last_id: int) -> str:
+    """
+    Encode the position after a row as an opaque page token.
+
+    Args:
+        scope: Listing the token belongs to, checked when decoding
+        sort_value: Sort key of the last row on the page
+        last_id: Id of the last row on the page
+
+    Returns:
+        URL-safe token
+    """
+    payload = json.dumps([scope, str(sort_value), last_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(
+    token: str, scope: str, parse: Callable[[str], Any]
+) -> tuple[Any, int]:
+    """
+    Decode a page token from ``encode_cursor``.
+
+    Args:
+        token: Token from a previous page
+        scope: Listing the token must belong to
+        parse: Converts the encoded sort key back to its column type
+
+    Returns:
+        Sort key and id of the last row of the previous page
+
+    Raises:
+        InvalidCursor: If the token is malformed or from another listing
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        token_scope, sort_value, last_id = json.loads(raw)
+        if token_scope != scope or type(last_id) is not int:
+            raise ValueError(token_scope)
+        return parse(sort_value), last_id
+    except (ArithmeticError, binascii.Error, TypeError, ValueError) as exc:
+        raise InvalidCursor("Invalid page cursor") from exc
+
+
+def after_keyset(
+    sort_column: Any, sort_value: Any, id_column: Any, last_id: int
+) -> ColumnElement[bool]:
+    """
+    Rows after a position in ``sort_column DESC, id_column ASC`` order.
+
+    The leading ``sort_column <= value`` bound is what lets an index on
+    ``(..., sort_column DESC, id)`` seek straight to the position; the
+    tie-break on id is then checked on the rows it scans.
+    """
+    return and_(
+        sort_column <= sort_value,
+        or_(sort_column < sort_value, id_column > last_id),
+    )
+
+
+def paginate(
+    rows: list[T], limit: int, position: Callable[[T], tuple[Any, int]], scope: str
+) -> Page[T]:
+    """
+    Build a page from up to ``limit + 1`` rows fetched in keyset order.
+
+    The extra row only signals that another page exists; it is dropped.
+    """
+    if len(rows) <= limit:
+        return Page(rows, None)
+    rows = rows[:limit]
+    return Page(rows, encode_cursor(scope, *position(rows[-1])))
@@ -0,0 +1,77 @@
+"""Price trend queries over daily rollups."""
+
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db.models import PriceDaily
+
+
+def price_trend(
+    db: Session,
+    product_id: int,
+    currency: str = "USD",
+    days: int = 90,
+    today: date | None = None,
+) -> list[PriceDaily]:
+    """Daily rollups for a product over the last ``days`` days, oldest first."""
+    today = today or datetime.utcnow().date()
+    return list(
+        db.scalars(
+            select(PriceDaily)
+            .where(
+                PriceDaily.product_id == product_id,
+                PriceDaily.currency == currency,
+                PriceDaily.day >= today - timedelta(days=days),
+            )
+            .order_by(PriceDaily.day)
+        )
+    )
+
+
+def price_drops(
+    db: Session,
+    product_ids: Iterable[int],
+    currency: str = "USD",
+    days: int = 30,
+    today: date | None = None,
+) -> dict[int, float]:
+    """
+    Fractional drop of each product's latest daily price below its window high.
+
+    Computed from rollups in one query; products without rollups are omitted.
+    """
+    product_ids = list(product_ids)
+    if not product_ids:
+        return {}
+    today = today or datetime.utcnow().date()
+
+    window = (
+        select(
+            PriceDaily.product_id,
+            PriceDaily.last_cents,
+            func.max(PriceDaily.max_cents)
+            .over(partition_by=PriceDaily.product_id)
+            .label("high"),
+            func.row_number()
+            .over(partition_by=PriceDaily.product_id, order_by=PriceDaily.day.desc())
+            .label("position"),
+        )
+        .where(
+            PriceDaily.product_id.in_(product_ids),
+            PriceDaily.currency == currency,
+            PriceDaily.day >= today - timedelta(days=days),
+        )
+        .subquery()
+    )
+    rows = db.execute(
+        select(window.c.product_id, window.c.last_cents, window.c.high).where(
+            window.c.position == 1
+        )
+    )
+    return {
+        product_id: (high - last) / high if high else 0.0
+        for product_id, last, high in rows
+    }
@@ -0,0 +1,154 @@
+"""Product and offer queries."""
+
+from collections.abc import Iterable
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, selectinload
+
+from app.db.models import Offer, Product
+from app.repositories.pagination import Page, after_keyset, decode_cursor, paginate
+
+PRODUCTS_SCOPE = "products"
+
+
+def get_products(
+    db: Session,
+    product_ids: Iterable[int],
+    with_offers: bool = False,
+    with_reviews: bool = False,
+) -> list[Product]:
+    """
+    Load products by id with the requested collections eagerly loaded.
+
+    Each requested collection costs one extra SELECT for the whole set,
+    regardless of how many products are returned.
+    """
+    options = []
+    if with_offers:
+        options.append(selectinload(Product.offers))
+    if with_reviews:
+        options.append(selectinload(Product.reviews))
+
+    return list(
+        db.scalars(
+            select(Product).where(Product.id.in_(list(product_ids))).options(*options)
+        )
+    )
+
+
+def latest_offers(
+    db: Session, product_ids: Iterable[int], currency: str | None = None
+) -> dict[int, Offer]:
+    """
+    Return the most recently checked offer for each product in one query.
+
+    Only the newest offer per product is fetched, ranked with ROW_NUMBER over
+    the (product_id, last_checked_at DESC) index, instead of loading every
+    offer through ``Product.offers``.
+    """
+    product_ids = list(product_ids)
+    if not product_ids:
+        return {}
+
+    ranked = _ranked_offers(product_ids, currency)
+    offers = db.scalars(
+        select(Offer)
+        .join(ranked, Offer.id == ranked.c.id)
+        .where(ranked.c.position == 1)
+    )
+    return {offer.product_id: offer for offer in offers}
+
+
+def latest_prices(
+    db: Session, product_ids: Iterable[int], currency: str | None = None
+) -> dict[int, int]:
+    """
+    Return the price in cents of each product's most recently checked offer.
+
+    Same ranking as ``latest_offers`` but selects only two columns, for
+    callers that filter many candidates by price.
+    """
+    product_ids = list(product_ids)
+    if not product_ids:
+        return {}
+
+    ranked = _ranked_offers(product_ids, currency)
+    rows = db.execute(
+        select(ranked.c.product_id, ranked.c.price_cents).where(ranked.c.position == 1)
+    )
+    return dict(rows.all())
+
+
+def _ranked_offers(product_ids: list[int], currency: str | None):
+    """Offers of ``product_ids`` numbered newest first within each product."""
+    filters = [Offer.product_id.in_(product_ids)]
+    if currency is not None:
+        filters.append(Offer.currency == currency)
+
+    return (
+        select(
+            Offer.id,
+            Offer.product_id,
+            Offer.price_cents,
+            func.row_number()
+            .over(partition_by=Offer.product_id, order_by=Offer.last_checked_at.desc())
+            .label("position"),
+        )
+        .where(*filters)
+        .subquery()
+    )
+
+
+def list_products(
+    db: Session,
+    brand: str | None = None,
+    category: str | None = None,
+    limit: int = 50,
+    cursor: str | None = None,
+) -> Page[Product]:
+    """
+    Browse products newest first, optionally within a brand and/or category.
+
+    Pages are keyset-paginated on ``(created_at DESC, id)``: each page seeks
+    into the ``ix_products_*created_at_id`` indexes instead of skipping
+    rows with OFFSET, so deep pages cost the same as the first one.
+
+    Args:
+        db: Database session
+        brand: Only products of this brand
+        category: Only products in this category
+        limit: Maximum number of products per page
+        cursor: ``next_cursor`` of the previous page
+
+    Returns:
+        Page of products and the cursor of the next page
+
+    Raises:
+        InvalidCursor: If ``cursor`` was not issued by this listing
+    """
+    filters = []
+    if brand is not None:
+        filters.append(Product.brand == brand)
+    if category is not None:
+        filters.append(Product.category == category)
+    if cursor is not None:
+        created_at, last_id = decode_cursor(
+            cursor, PRODUCTS_SCOPE, datetime.fromisoformat
+        )
+        filters.append(
+            after_keyset(Product.created_at, created_at, Product.id, last_id)
+        )
+
+    products = db.scalars(
+        select(Product)
+        .where(*filters)
+        .order_by(Product.created_at.desc(), Product.id)
+        .limit(limit + 1)
+    ).all()
+    return paginate(
+        list(products),
+        limit,
+        lambda product: (product.created_at.isoformat(), product.id),
+        PRODUCTS_SCOPE,
+    )
@@ -0,0 +1,129 @@
+"""Ranking result set queries."""
+
+from dataclasses import dataclass
+from decimal import Decimal
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.db.models import Offer, Product, Query, Ranking
+from app.repositories.pagination import Page, after_keyset, decode_cursor, paginate
+from app.repositories.products import latest_offers
+
+
+@dataclass
+class RankedProduct:
+    """A ranking row with its product and that product's latest offer."""
+
+    ranking: Ranking
+    product: Product
+    latest_offer: Offer | None
+
+
+def list_ranked_products(
+    db: Session,
+    query_id: int,
+    limit: int = 20,
+    with_reviews: bool = False,
+    currency: str | None = None,
+) -> list[RankedProduct]:
+    """
+    Load the top rankings for a query ready for rendering.
+
+    Issues a fixed number of statements however many rows are returned:
+    rankings joined to their products, the latest offer per product, and
+    optionally one more SELECT for reviews.
+
+    Args:
+        db: Database session
+        query_id: Query whose rankings to load
+        limit: Maximum number of rankings, highest score first
+        with_reviews: Also load each product's reviews
+        currency: Restrict latest offers to one currency
+
+    Returns:
+        RankedProduct entries ordered by score descending
+    """
+    return _load_ranked(db, query_id, limit, with_reviews, currency)
+
+
+def page_ranked_products(
+    db: Session,
+    query_id: int,
+    limit: int = 20,
+    cursor: str | None = None,
+    with_reviews: bool = False,
+    currency: str | None = None,
+) -> Page[RankedProduct]:
+    """
+    Page through a query's rankings, highest score first.
+
+    Keyset-paginated on ``(score DESC, id)`` over the
+    ``ix_rankings_query_id_score_id`` index, with the same fixed statement
+    count as ``list_ranked_products``.
+
+    Args:
+        db: Database session
+        query_id: Query whose rankings to load
+        limit: Maximum number of rankings per page
+        cursor: ``next_cursor`` of the previous page
+        with_reviews: Also load each product's reviews
+        currency: Restrict latest offers to one currency
+
+    Returns:
+        Page of RankedProduct entries and the cursor of the next page
+
+    Raises:
+        InvalidCursor: If ``cursor`` was not issued for this query
+    """
+    scope = f"rankings:{query_id}"
+    after = None
+    if cursor is not None:
+        score, last_id = decode_cursor(cursor, scope, Decimal)
+        after = after_keyset(Ranking.score, score, Ranking.id, last_id)
+
+    ranked = _load_ranked(db, query_id, limit + 1, with_reviews, currency, after)
+    return paginate(
+        ranked, limit, lambda item: (item.ranking.score, item.ranking.id), scope
+    )
+
+
+def _load_ranked(
+    db: Session,
+    query_id: int,
+    limit: int,
+    with_reviews: bool,
+    currency: str | None,
+    after: ColumnElement[bool] | None = None,
+) -> list[RankedProduct]:
+    product_loader = joinedload(Ranking.product)
+    if with_reviews:
+        product_loader = product_loader.selectinload(Product.reviews)
+
+    filters = [Ranking.query_id == query_id]
+    if after is not None:
+        filters.append(after)
+
+    rankings = db.scalars(
+        select(Ranking)
+        .where(*filters)
+        .order_by(Ranking.score.desc(), Ranking.id)
+        .limit(limit)
+        .options(product_loader)
+    ).all()
+
+    offers = latest_offers(db, {ranking.product_id for ranking in rankings}, currency)
+    return [
+        RankedProduct(ranking, ranking.product, offers.get(ranking.product_id))
+        for ranking in rankings
+    ]
+
+
+def get_query_with_rankings(db: Session, query_id: int) -> Query | None:
+    """Load a query with all its rankings and their products in two SELECTs."""
+    return db.scalar(
+        select(Query)
+        .where(Query.id == query_id)
+        .options(selectinload(Query.rankings).joinedload(Ranking.product))
+    )
@@ -0,0 +1,19 @@
+"""Candidate retrieval for ShopSherpa."""
+
+from .hybrid import HybridHit, hybrid_search, hybrid_search_sync, reciprocal_rank_fusion
+from .keyword import KeywordHit, refresh_search_documents, search_keyword
+from .vector import VectorHit, VectorIndex, search_products, search_reviews
+
+__all__ = [
+    "HybridHit",
+    "KeywordHit",
+    "VectorHit",
+    "VectorIndex",
+    "hybrid_search",
+    "hybrid_search_sync",
+    "reciprocal_rank_fusion",
+    "refresh_search_documents",
+    "search_keyword",
+    "search_products",
+    "search_reviews",
+]
@@ -0,0 +1,226 @@
+"""Hybrid candidate retrieval fusing keyword and vector search.
+
+Keyword search finds exact model names and brand/feature words; vector
+search finds semantically similar products. Both retrievers run at the
+same time, each in a thread with its own session, so a request waits for
+the slower of the two instead of their sum. ``hybrid_search`` is for
+coroutines; ``hybrid_search_sync`` serves threads without an event loop. Each list is
+filtered by budget before fusion and the survivors are merged with
+reciprocal rank fusion, which needs no calibration between BM25-style and
+cosine scores: a product scores ``sum(1 / (rrf_k + rank))`` over the lists
+it appears in.
+"""
+
+import asyncio
+import os
+import threading
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from decimal import Decimal
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.embeddings import EmbeddingBackend
+from app.repositories.products import latest_prices
+from app.search.keyword import KeywordHit, search_keyword
+from app.search.vector import VectorHit, search_products
+
+
+@dataclass(frozen=True, slots=True)
+class HybridHit:
+    """
+    A fused candidate.
+
+    ``score`` is the reciprocal rank fusion score; ranks are 1-based
+    positions in each retriever's budget-filtered list and ``similarity``
+    is the cosine similarity when vector search returned the product.
+    """
+
+    id: int
+    score: float
+    keyword_rank: int | None = None
+    vector_rank: int | None = None
+    similarity: float | None = None
+
+
+def _to_cents(amount: Decimal | float | None) -> int | None:
+    return None if amount is None else int(round(Decimal(amount) * 100))
+
+
+def within_budget(
+    db: Session,
+    hits: Sequence[KeywordHit | VectorHit],
+    budget_min: Decimal | None = None,
+    budget_max: Decimal | None = None,
+    currency: str = "USD",
+) -> list:
+    """
+    Keep hits whose latest offer price lies within the budget, in order.
+
+    Without a budget all hits are kept; with one, products that have no
+    offer in ``currency`` are dropped since their price cannot be checked.
+    """
+    low, high = _to_cents(budget_min), _to_cents(budget_max)
+    if low is None and high is None:
+        return list(hits)
+
+    prices = latest_prices(db, (hit.id for hit in hits), currency)
+    return [
+        hit
+        for hit in hits
+        if hit.id in prices
+        and (low is None or prices[hit.id] >= low)
+        and (high is None or prices[hit.id] <= high)
+    ]
+
+
+def reciprocal_rank_fusion(
+    keyword_hits: Sequence[KeywordHit],
+    vector_hits: Sequence[VectorHit],
+    k: int,
+    rrf_k: int | None = None,
+) -> list[HybridHit]:
+    """
+    Merge two ranked lists into the ``k`` best fused candidates.
+
+    Ties are broken by the better single-list rank, then by product id.
+    """
+    rrf_k = settings.hybrid_rrf_k if rrf_k is None else rrf_k
+    keyword_ranks = {hit.id: rank for rank, hit in enumerate(keyword_hits, start=1)}
+    vector_ranks = {hit.id: rank for rank, hit in enumerate(vector_hits, start=1)}
+    similarity = {hit.id: hit.score for hit in vector_hits}
+
+    fused = []
+    for product_id in keyword_ranks.keys() | vector_ranks.keys():
+        keyword_rank = keyword_ranks.get(product_id)
+        vector_rank = vector_ranks.get(product_id)
+        score = sum(
+            1.0 / (rrf_k + rank) for rank in (keyword_rank, vector_rank) if rank
+        )
+        fused.append(
+            HybridHit(
+                product_id, score, keyword_rank, vector_rank, similarity.get(product_id)
+            )
+        )
+
+    fused.sort(
+        key=lambda hit: (
+            -hit.score,
+            min(rank for rank in (hit.keyword_rank, hit.vector_rank) if rank),
+            hit.id,
+        )
+    )
+    return fused[:k]
+
+
+def _retrieve(
+    session_factory: Callable[[], Session],
+    search: Callable[[Session], list],
+    budget_min: Decimal | None,
+    budget_max: Decimal | None,
+    currency: str,
+) -> list:
+    with session_factory() as db:
+        return within_budget(db, search(db), budget_min, budget_max, currency)
+
+
+_pool: ThreadPoolExecutor | None = None
+_pool_pid: int | None = None
+_pool_lock = threading.Lock()
+
+
+def _retrieval_pool() -> ThreadPoolExecutor:
+    """Process-wide pool for ``hybrid_search_sync``; forked children get their own."""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ThreadPoolExecutor(thread_name_prefix="hybrid-search")
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _retrievers(
+    text: str, embedder: EmbeddingBackend, depth: int
+) -> tuple[Callable[[Session], list[KeywordHit]], Callable[[Session], list[VectorHit]]]:
+    def keyword(db: Session) -> list[KeywordHit]:
+        return search_keyword(db, text, depth)
+
+    def vector(db: Session) -> list[VectorHit]:
+        return search_products(db, embedder.embed([text])[0], depth)
+
+    return keyword, vector
+
+
+async def hybrid_search(
+    session_factory: Callable[[], Session],
+    text: str,
+    embedder: EmbeddingBackend,
+    k: int = 200,
+    budget_min: Decimal | None = None,
+    budget_max: Decimal | None = None,
+    currency: str = "USD",
+    depth: int | None = None,
+) -> list[HybridHit]:
+    """
+    Retrieve up to ``k`` candidates for ``text`` from both retrievers.
+
+    The keyword query and the embedding plus vector query run concurrently
+    on separate sessions from ``session_factory``. Each retriever returns
+    its top ``depth`` products (at least ``k``), which are filtered by
+    ``budget_min``/``budget_max`` against the latest offer price before
+    fusion so out-of-budget products do not crowd out affordable ones.
+
+    Args:
+        session_factory: Creates one session per retriever
+        text: Shopper request
+        embedder: Embeds ``text`` for vector search
+        k: Maximum number of fused candidates
+        budget_min: Lowest acceptable price
+        budget_max: Highest acceptable price
+        currency: Offer currency the budget is expressed in
+        depth: Products fetched per retriever
+
+    Returns:
+        Fused candidates, best first
+    """
+    keyword, vector = _retrievers(
+        text, embedder, max(k, depth or settings.hybrid_retrieval_depth)
+    )
+    keyword_hits, vector_hits = await asyncio.gather(
+        asyncio.to_thread(
+            _retrieve, session_factory, keyword, budget_min, budget_max, currency
+        ),
+        asyncio.to_thread(
+            _retrieve, session_factory, vector, budget_min, budget_max, currency
+        ),
+    )
+    return reciprocal_rank_fusion(keyword_hits, vector_hits, k)
+
+
+def hybrid_search_sync(
+    session_factory: Callable[[], Session],
+    text: str,
+    embedder: EmbeddingBackend,
+    k: int = 200,
+    budget_min: Decimal | None = None,
+    budget_max: Decimal | None = None,
+    currency: str = "USD",
+    depth: int | None = None,
+) -> list[HybridHit]:
+    """
+    Blocking ``hybrid_search`` for threads that have no event loop.
+
+    Keyword retrieval runs on a shared thread pool while the calling
+    thread runs vector retrieval; arguments and result are those of
+    ``hybrid_search``.
+    """
+    keyword, vector = _retrievers(
+        text, embedder, max(k, depth or settings.hybrid_retrieval_depth)
+    )
+    pending = _retrieval_pool().submit(
+        _retrieve, session_factory, keyword, budget_min, budget_max, currency
+    )
+    vector_hits = _retrieve(session_factory, vector, budget_min, budget_max, currency)
+    return reciprocal_rank_fusion(pending.result(), vector_hits, k)
@@ -0,0 +1,371 @@
+"""Keyword search over product titles, brands and review snippets.
+
+Search rows live in ``product_search``: a weighted tsvector with a GIN
+index on Postgres, an FTS5 table on SQLite. Ranked queries score every
+match with the index's own ranking and keep the best with
+``ORDER BY rank LIMIT k``. Ranking cost is kept flat as the catalog grows
+by treating terms found in ``search_common_term_docs`` products or more
+like stopwords for ranking (FTS5's bm25 derives IDF from each term's full
+posting list): ranked match sets stay below that size per term. Common
+terms still filter candidates when a query has nothing more selective.
+"""
+
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import REAL, bindparam, cast, delete, func, insert, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.cache.memory import TTLCache
+from app.core.config import settings
+from app.db.models import Product, ProductSearch, Review
+from app.db.models.search import FTS_TABLE
+
+# Keeps IN lists under SQLite's bound parameter limit
+CHUNK_SIZE = 5000
+
+# At most this many distinct terms of a query are matched
+MAX_TERMS = 16
+
+# Relative weight of matches in the title, brand and review snippets
+TITLE_WEIGHT, BRAND_WEIGHT, REVIEWS_WEIGHT = 10.0, 5.0, 1.0
+
+# Dropped before matching, like the Postgres ``english`` configuration does
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have i in is it its me my of on or "
+    "that the this to under was with without".split()
+)
+
+_TERM = re.compile(r"\w+")
+
+# Capped document counts per term, keyed by (database, cap, term)
+_term_documents = TTLCache(max_size=50_000, ttl=settings.search_term_stats_ttl_seconds)
+
+
+@dataclass(frozen=True, slots=True)
+class KeywordHit:
+    """A search result: product id and relevance (higher is better)."""
+
+    id: int
+    score: float
+
+
+def search_terms(query: str) -> list[str]:
+    """Distinct lowercase word terms of ``query`` in order, without stopwords."""
+    terms = dict.fromkeys(
+        term for term in _TERM.findall(query.lower()) if term not in STOPWORDS
+    )
+    return list(terms)[:MAX_TERMS]
+
+
+def _tsquery(terms: list[str], match_all: bool) -> Any:
+    return func.to_tsquery(
+        settings.search_text_config, (" & " if match_all else " | ").join(terms)
+    )
+
+
+def _fts_match(terms: list[str], match_all: bool) -> str:
+    return (" " if match_all else " OR ").join(f'"{term}"' for term in terms)
+
+
+_SQLITE_COUNT = text(
+    f"SELECT count(*) FROM (SELECT 1 FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match LIMIT :cap)"
+)
+# FTS5's rank column, set to weighted bm25 for this query by "rank MATCH"
+_SQLITE_RANKED = text(
+    f"SELECT rowid, rank FROM {FTS_TABLE} "
+    f"WHERE {FTS_TABLE} MATCH :match AND rank MATCH :rank_function "
+    "ORDER BY rank, rowid LIMIT :k"
+)
+_SQLITE_RANK_FUNCTION = f"bm25({TITLE_WEIGHT}, {BRAND_WEIGHT}, {REVIEWS_WEIGHT})"
+_SQLITE_RECENT = text(
+    f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match ORDER BY rowid DESC LIMIT :k"
+)
+
+
+def _count_documents(db: Session, term: str, cap: int) -> int:
+    """Products containing ``term``, counting no further than ``cap``."""
+    if db.get_bind().dialect.name == "postgresql":
+        matches = (
+            select(ProductSearch.product_id)
+            .where(ProductSearch.document.op("@@")(_tsquery([term], True)))
+            .limit(cap)
+            .subquery()
+        )
+        return db.scalar(select(func.count()).select_from(matches))
+    return db.scalar(_SQLITE_COUNT, {"match": _fts_match([term], True), "cap": cap})
+
+
+def _ranked(db: Session, terms: list[str], match_all: bool, k: int) -> list[KeywordHit]:
+    """
+    Top-k of all matches by BM25 (SQLite) or weighted, length-normalized
+    ts_rank (Postgres), ties broken by product id.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        tsquery = _tsquery(terms, match_all)
+        # ts_rank weights are ordered D, C, B, A; A is the title
+        weights = cast(
+            postgresql.array([0.0, REVIEWS_WEIGHT, BRAND_WEIGHT, TITLE_WEIGHT]),
+            postgresql.ARRAY(REAL),
+        )
+        # Normalization 1 divides by 1 + log(document length), like BM25's length term
+        rank = func.ts_rank(weights, ProductSearch.document, tsquery, 1)
+        rows = db.execute(
+            select(ProductSearch.product_id, rank)
+            .where(ProductSearch.document.op("@@")(tsquery))
+            .order_by(rank.desc(), ProductSearch.product_id)
+            .limit(k)
+        )
+        return [KeywordHit(product_id, float(score)) for product_id, score in rows]
+
+    rows = db.execute(
+        _SQLITE_RANKED,
+        {
+            "match": _fts_match(terms, match_all),
+            "rank_function": _SQLITE_RANK_FUNCTION,
+            "k": k,
+        },
+    )
+    # bm25() is lower-is-better; flip it so scores compare like ts_rank
+    return [KeywordHit(product_id, -rank) for product_id, rank in rows]
+
+
+def _recent(db: Session, terms: list[str], match_all: bool, k: int) -> list[KeywordHit]:
+    """Newest k matches, unranked (score 0)."""
+    if db.get_bind().dialect.name == "postgresql":
+        ids = db.scalars(
+            select(ProductSearch.product_id)
+            .where(ProductSearch.document.op("@@")(_tsquery(terms, match_all)))
+            .order_by(ProductSearch.product_id.desc())
+            .limit(k)
+        )
+    else:
+        ids = db.scalars(
+            _SQLITE_RECENT, {"match": _fts_match(terms, match_all), "k": k}
+        )
+    return [KeywordHit(product_id, 0.0) for product_id in ids]
+
+
+def term_documents(db: Session, terms: Iterable[str]) -> dict[str, int]:
+    """
+    Number of products containing each term, capped at ``search_common_term_docs``.
+
+    Non-zero counts are cached for ``search_term_stats_ttl_seconds``; each
+    uncached term costs one index probe bounded by the cap.
+    """
+    cap = settings.search_common_term_docs
+    database = str(db.get_bind().url)
+    counts = {}
+    for term in terms:
+        key = (database, cap, term)
+        count = _term_documents.get(key)
+        if count is None:
+            count = _count_documents(db, term, cap)
+            # Unseen terms are probed again: they may be indexed any time
+            if count:
+                _term_documents.set(key, count)
+        counts[term] = count
+    return counts
+
+
+def search_keyword(db: Session, query: str, k: int = 50) -> list[KeywordHit]:
+    """
+    Top-k products matching the words of ``query``, best first.
+
+    Hits are gathered in stages until ``k`` are found:
+
+    1. products containing every selective term, ranked
+    2. products containing any selective term, ranked
+    3. newest products containing every term, then any term (score 0)
+
+    Ranking is BM25 over title, brand and review snippets (weighted
+    10:5:1) via FTS5 on SQLite, and ``ts_rank`` with the same weights and
+    length normalization over the GIN-indexed tsvector on Postgres.
+    Selective terms are those in fewer than ``search_common_term_docs``
+    products; common terms carry little IDF weight and would make ranking
+    cost grow with the catalog.
+
+    Args:
+        db: Database session
+        query: Free text, e.g. "sony wh-1000xm5 noise cancelling"
+        k: Maximum number of hits
+
+    Returns:
+        KeywordHit entries ordered by score descending
+    """
+    terms = search_terms(query)
+    if not terms or k <= 0:
+        return []
+    counts = term_documents(db, terms)
+    terms = [term for term in terms if counts[term]]
+    selective = [
+        term for term in terms if counts[term] < settings.search_common_term_docs
+    ]
+
+    stages = []
+    if selective:
+        stages.append((_ranked, selective, True))
+        if len(selective) > 1:
+            stages.append((_ranked, selective, False))
+    if terms:
+        stages.append((_recent, terms, True))
+        if len(terms) > 1:
+            stages.append((_recent, terms, False))
+
+    hits: list[KeywordHit] = []
+    seen: set[int] = set()
+    for search, stage_terms, match_all in stages:
+        for hit in search(db, stage_terms, match_all, k):
+            if hit.id not in seen:
+                seen.add(hit.id)
+                hits.append(hit)
+        if len(hits) >= k:
+            break
+    return hits[:k]
+
+
+def _document(config: str) -> Any:
+    """Weighted tsvector built from the bound title, brand and reviews."""
+
+    def weighted(name: str, weight: str) -> Any:
+        return func.setweight(
+            func.to_tsvector(config, func.coalesce(bindparam(name), "")), weight
+        )
+
+    return (
+        weighted("title", "A")
+        .op("||")(weighted("brand", "B"))
+        .op("||")(weighted("reviews", "C"))
+    )
+
+
+def _upsert_statement(dialect_name: str):
+    """INSERT ... ON CONFLICT DO UPDATE of search rows, or None if unsupported."""
+    if dialect_name == "postgresql":
+        stmt = postgresql.insert(ProductSearch).values(
+            product_id=bindparam("product_id"),
+            title=bindparam("title"),
+            brand=bindparam("brand"),
+            reviews=bindparam("reviews"),
+            updated_at=bindparam("updated_at"),
+            document=_document(settings.search_text_config),
+        )
+        columns = ("title", "brand", "reviews", "document", "updated_at")
+    elif dialect_name == "sqlite":
+        # FTS5 is kept in sync by triggers on product_search
+        stmt = sqlite.insert(ProductSearch)
+        columns = ("title", "brand", "reviews", "updated_at")
+    else:
+        return None
+    return stmt.on_conflict_do_update(
+        index_elements=[ProductSearch.product_id],
+        set_={name: stmt.excluded[name] for name in columns},
+    )
+
+
+def refresh_search_documents(db: Session, product_ids: Iterable[int]) -> int:
+    """
+    Rebuild the search rows of ``product_ids`` from products and reviews.
+
+    Call after products or their reviews are written; the caller owns the
+    transaction. Each product's first ``search_review_snippets`` snippets
+    are indexed. Rows of products that no longer exist are removed.
+
+    Returns:
+        Number of search rows written
+    """
+    ids = sorted(set(product_ids))
+    upsert = _upsert_statement(db.get_bind().dialect.name)
+    now = datetime.utcnow()
+    written = 0
+
+    for start in range(0, len(ids), CHUNK_SIZE):
+        chunk = ids[start : start + CHUNK_SIZE]
+        products = db.execute(
+            select(Product.id, Product.title, Product.brand).where(
+                Product.id.in_(chunk)
+            )
+        ).all()
+
+        snippets: dict[int, list[str]] = {}
+        for product_id, snippet in db.execute(
+            select(Review.product_id, Review.snippet)
+            .where(Review.product_id.in_(chunk), Review.snippet.is_not(None))
+            .order_by(Review.product_id, Review.id)
+        ):
+            kept = snippets.setdefault(product_id, [])
+            if len(kept) < settings.search_review_snippets:
+                kept.append(snippet)
+
+        rows = [
+            {
+                "product_id": product_id,
+                "title": title,
+                "brand": brand,
+                "reviews": "\n".join(snippets.get(product_id, ())) or None,
+                "updated_at": now,
+            }
+            for product_id, title, brand in products
+        ]
+
+        if upsert is None:
+            # Generic fallback: replace the chunk's rows
+            db.execute(delete(ProductSearch).where(ProductSearch.product_id.in_(chunk)))
+            if rows:
+                db.execute(insert(ProductSearch), rows)
+        else:
+            missing = set(chunk) - {row["product_id"] for row in rows}
+            if missing:
+                db.execute(
+                    delete(ProductSearch).where(ProductSearch.product_id.in_(missing))
+                )
+            if rows:
+                db.execute(upsert, rows)
+        written += len(rows)
+
+    return written
+
+
+def stale_product_ids(
+    db: Session, after_id: int, limit: int
+) -> tuple[list[int], int | None]:
+    """
+    Products after ``after_id`` whose search row is missing or out of date.
+
+    A row is out of date when the product has a review newer than it. One
+    page of ``limit`` products is examined per call, in id order.
+
+    Returns:
+        Stale product ids in the page and the last id examined (None when
+        there are no more products)
+    """
+    page = (
+        select(Product.id)
+        .where(Product.id > after_id)
+        .order_by(Product.id)
+        .limit(limit)
+    )
+    page_ids = db.scalars(page).all()
+    if not page_ids:
+        return [], None
+
+    newer_review = (
+        select(Review.id)
+        .where(
+            Review.product_id == Product.id,
+            Review.created_at > ProductSearch.updated_at,
+        )
+        .exists()
+    )
+    stale = db.scalars(
+        select(Product.id)
+        .outerjoin(ProductSearch, ProductSearch.product_id == Product.id)
+        .where(Product.id.in_(page_ids))
+        .where(ProductSearch.product_id.is_(None) | newer_review)
+        .order_by(Product.id)
+    ).all()
+    return list(stale), page_ids[-1]
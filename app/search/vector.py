@@ -0,0 +1,152 @@
+"""Vector similarity search over product and review embeddings."""
+
+import threading
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy import Float, literal, select
+from sqlalchemy.orm import Session
+
+from app.cache.memory import TTLCache
+from app.core.config import settings
+from app.db.models import Product, Review
+from app.db.types import Embedding
+
+
+@dataclass(frozen=True, slots=True)
+class VectorHit:
+    """A search result: row id and cosine similarity to the query."""
+
+    id: int
+    score: float
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class VectorIndex:
+    """
+    Brute-force cosine similarity index held in memory.
+
+    Rows are L2-normalized once at build time so a query is a single
+    matrix-vector product followed by a partial sort.
+    """
+
+    def __init__(self, ids: Sequence[int], vectors: np.ndarray) -> None:
+        """
+        Args:
+            ids: Row id for each vector
+            vectors: 2-D array with one embedding per row
+        """
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_rows(
+        cls, rows: Sequence[tuple[int, np.ndarray]], dim: int
+    ) -> "VectorIndex":
+        """Build an index from (id, embedding) rows."""
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        vectors = np.empty((len(rows), dim), dtype=np.float32)
+        for i, row in enumerate(rows):
+            vectors[i] = row[1]
+        return cls(ids, vectors)
+
+    def search(self, query: np.ndarray, k: int = 10) -> list[VectorHit]:
+        """Return the ``k`` rows most similar to ``query``, best first."""
+        return self.search_many(np.asarray(query, dtype=np.float32)[None, :], k)[0]
+
+    def search_many(self, queries: np.ndarray, k: int = 10) -> list[list[VectorHit]]:
+        """Search several queries at once with one matrix multiply."""
+        if not len(self.ids):
+            return [[] for _ in range(len(queries))]
+        k = min(k, len(self.ids))
+        scores = _normalize(np.asarray(queries, dtype=np.float32)) @ self.vectors.T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in zip(scores, top, strict=True):
+            order = candidates[np.argsort(-row[candidates], kind="stable")]
+            results.append([VectorHit(int(self.ids[i]), float(row[i])) for i in order])
+        return results
+
+
+_indexes = TTLCache(max_size=8, ttl=settings.vector_index_ttl_seconds)
+_index_lock = threading.Lock()
+
+
+def get_index(db: Session, model: type[Product] | type[Review]) -> VectorIndex:
+    """
+    Return the in-memory index for ``model``, rebuilding it once its TTL lapses.
+
+    Used when the database has no pgvector support; indexes are cached per
+    database URL and table.
+    """
+    key = (str(db.get_bind().url), model.__tablename__)
+    index = _indexes.get(key)
+    if index is None:
+        with _index_lock:
+            index = _indexes.get(key)
+            if index is None:
+                rows = db.execute(
+                    select(model.id, model.embedding).where(
+                        model.embedding.is_not(None)
+                    )
+                ).all()
+                index = VectorIndex.from_rows(rows, model.embedding.type.dim)
+                _indexes.set(key, index)
+    return index
+
+
+def invalidate_indexes() -> None:
+    """Drop cached in-memory indexes so the next search rebuilds them."""
+    _indexes.clear()
+
+
+def search_similar(
+    db: Session,
+    model: type[Product] | type[Review],
+    query: Sequence[float] | np.ndarray,
+    k: int = 10,
+) -> list[VectorHit]:
+    """
+    Top-k rows of ``model`` by cosine similarity to ``query``.
+
+    Uses pgvector's ``<=>`` operator (served by the HNSW index) on Postgres
+    and the in-memory NumPy index everywhere else.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        distance = model.embedding.op("<=>", return_type=Float)(
+            literal(
+                np.asarray(query, dtype=np.float32), Embedding(model.embedding.type.dim)
+            )
+        )
+        rows = db.execute(
+            select(model.id, distance)
+            .where(model.embedding.is_not(None))
+            .order_by(distance)
+            .limit(k)
+        )
+        return [VectorHit(row_id, 1.0 - dist) for row_id, dist in rows]
+
+    return get_index(db, model).search(np.asarray(query, dtype=np.float32), k)
+
+
+def search_products(
+    db: Session, query: Sequence[float] | np.ndarray, k: int = 10
+) -> list[VectorHit]:
+    """Top-k products by embedding similarity."""
+    return search_similar(db, Product, query, k)
+
+
+def search_reviews(
+    db: Session, query: Sequence[float] | np.ndarray, k: int = 10
+) -> list[VectorHit]:
+    """Top-k reviews by embedding similarity."""
+    return search_similar(db, Review, query, k)
@@ -0,0 +1,140 @@
+"""Batched embedding backfill for product titles and review snippets."""
+
+import logging
+from typing import Any
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.db.models import Product, Review
+from app.db.session import SessionLocal
+from app.embeddings import EmbeddingBackend, load_embedder
+from app.tasks.example import CallbackTask
+
+logger = logging.getLogger(__name__)
+
+# Model and the text column embedded for it
+EMBEDDED_TEXT = {
+    "products": (Product, Product.title),
+    "reviews": (Review, Review.snippet),
+}
+
+
+def embed_pending(
+    db: Session,
+    table: str,
+    backend: EmbeddingBackend,
+    after_id: int = 0,
+    page_size: int | None = None,
+    batch_size: int | None = None,
+    max_pages: int | None = None,
+) -> dict[str, Any]:
+    """
+    Embed rows of ``table`` that have no embedding yet.
+
+    Rows are read in id order with keyset pagination (``id > after_id``),
+    embedded in backend batches and written back with one executemany
+    UPDATE per page. Each page is committed, and the UPDATE only touches
+    rows whose embedding is still NULL, so re-running after a crash or
+    concurrently with another worker never redoes committed work.
+
+    Args:
+        db: Database session
+        table: Key of EMBEDDED_TEXT ("products" or "reviews")
+        backend: Embedding backend
+        after_id: Resume after this id
+        page_size: Rows per page
+        batch_size: Texts per backend call
+        max_pages: Stop after this many pages
+
+    Returns:
+        Dict with the number of rows embedded, the last id seen and whether
+        the table was exhausted
+    """
+    model, text_column = EMBEDDED_TEXT[table]
+    page_size = page_size or settings.embedding_page_size
+    batch_size = batch_size or settings.embedding_batch_size
+    max_pages = max_pages or settings.embedding_pages_per_task
+
+    write = (
+        update(model.__table__)
+        .where(model.__table__.c.id == bindparam("row_id"))
+        .where(model.__table__.c.embedding.is_(None))
+        .values(embedding=bindparam("vector", type_=model.embedding.type))
+    )
+
+    embedded = 0
+    for _ in range(max_pages):
+        rows = db.execute(
+            select(model.id, text_column)
+            .where(model.id > after_id)
+            .where(model.embedding.is_(None))
+            .where(text_column.is_not(None))
+            .order_by(model.id)
+            .limit(page_size)
+        ).all()
+        if not rows:
+            return {"embedded": embedded, "last_id": after_id, "done": True}
+
+        params = []
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start : start + batch_size]
+            vectors = backend.embed([text for _, text in batch])
+            params.extend(
+                {"row_id": row_id, "vector": vector}
+                for (row_id, _), vector in zip(batch, vectors, strict=True)
+            )
+        db.execute(write, params)
+        db.commit()
+
+        embedded += len(params)
+        after_id = rows[-1][0]
+
+    return {"embedded": embedded, "last_id": after_id, "done": False}
+
+
+def _run(task: CallbackTask, table: str, after_id: int) -> dict[str, Any]:
+    with SessionLocal() as db:
+        result = embed_pending(db, table, load_embedder(), after_id=after_id)
+
+    if not result["done"]:
+        # Hand the rest to a fresh task so no single run holds a worker for long
+        task.apply_async(kwargs={"after_id": result["last_id"]})
+
+    logger.info(
+        "Embedded %s %s",
+        result["embedded"],
+        table,
+        extra={"task_name": task.name, **result},
+    )
+    return result
+
+
+@celery_app.task(bind=True, base=CallbackTask, max_retries=3, default_retry_delay=5)
+def embed_products(self: CallbackTask, after_id: int = 0) -> dict[str, Any]:
+    """
+    Embed product titles that have no embedding yet.
+
+    Args:
+        after_id: Resume keyset pagination after this product id
+
+    Returns:
+        Dict with rows embedded, last id and completion flag
+    """
+    return _run(self, "products", after_id)
+
+
+@celery_app.task(bind=True, base=CallbackTask, max_retries=3, default_retry_delay=5)
+def embed_reviews(self: CallbackTask, after_id: int = 0) -> dict[str, Any]:
+    """
+    Embed review snippets that have no embedding yet.
+
+    Args:
+        after_id: Resume keyset pagination after this review id
+
+    Returns:
+        Dict with rows embedded, last id and completion flag
+    """
+    return _run(self, "reviews", after_id)
@@ -0,0 +1,78 @@
+"""Product feature table maintenance."""
+
+import logging
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.ranking.features import refresh_product_features, stale_feature_ids
+from app.tasks.example import CallbackTask
+
+logger = logging.getLogger(__name__)
+
+
+def refresh_stale_features(
+    db: Session,
+    after_id: int = 0,
+    page_size: int | None = None,
+    max_pages: int | None = None,
+) -> dict[str, Any]:
+    """
+    Rebuild feature rows that are missing, behind new reviews or expired.
+
+    Offer changes are applied during ingest; this pass covers new
+    products, new reviews and drift of the price drop window. Products are
+    examined in id order with keyset pagination and each page is committed.
+
+    Args:
+        db: Database session
+        after_id: Resume after this product id
+        page_size: Products examined per page
+        max_pages: Stop after this many pages
+
+    Returns:
+        Dict with the number of rows refreshed, the last id examined and
+        whether all products were examined
+    """
+    page_size = page_size or settings.product_features_refresh_page_size
+    max_pages = max_pages or settings.product_features_refresh_pages_per_task
+
+    refreshed = 0
+    for _ in range(max_pages):
+        stale, last_id = stale_feature_ids(db, after_id, page_size)
+        if last_id is None:
+            return {"refreshed": refreshed, "last_id": after_id, "done": True}
+        if stale:
+            refreshed += refresh_product_features(db, stale)
+            db.commit()
+        after_id = last_id
+
+    return {"refreshed": refreshed, "last_id": after_id, "done": False}
+
+
+@celery_app.task(bind=True, base=CallbackTask, max_retries=3, default_retry_delay=60)
+def refresh_feature_table(self: CallbackTask, after_id: int = 0) -> dict[str, Any]:
+    """
+    Refresh product_features rows of new products, reviewed products and expired rows.
+
+    Args:
+        after_id: Resume keyset pagination after this product id
+
+    Returns:
+        Dict with rows refreshed, last id and completion flag
+    """
+    try:
+        with SessionLocal() as db:
+            result = refresh_stale_features(db, after_id=after_id)
+    except Exception as exc:
+        raise self.retry(exc=exc) from exc
+
+    if not result["done"]:
+        # Hand the rest to a fresh task so no single run holds a worker for long
+        self.apply_async(kwargs={"after_id": result["last_id"]})
+
+    logger.info("Refreshed product features", extra={"task_name": self.name, **result})
+    return result
@@ -0,0 +1,70 @@
+"""Price history maintenance: partitions, daily rollups and tick pruning."""
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.ingest.prices import ensure_price_partitions, prune_price_ticks, rollup_day
+from app.tasks.example import CallbackTask
+
+logger = logging.getLogger(__name__)
+
+
+def maintain_prices(db: Session, today: date | None = None) -> dict[str, Any]:
+    """
+    Roll up recent completed days and drop ticks past retention.
+
+    The last ``price_rollup_lookback_days`` completed days are re-aggregated
+    so late-arriving ticks are picked up. Ticks are only pruned once they
+    are older than both the retention period and the rollup window.
+
+    Args:
+        db: Database session
+        today: Current UTC date (defaults to now)
+
+    Returns:
+        Dict with partitions ensured, rollup rows per day and ticks pruned
+    """
+    today = today or datetime.utcnow().date()
+
+    partitions = ensure_price_partitions(
+        db, today, settings.price_partition_months_ahead + 1
+    )
+
+    rolled_up = {}
+    for back in range(settings.price_rollup_lookback_days, 0, -1):
+        day = today - timedelta(days=back)
+        rolled_up[day.isoformat()] = rollup_day(db, day)
+        db.commit()
+
+    keep_days = max(
+        settings.price_tick_retention_days, settings.price_rollup_lookback_days
+    )
+    cutoff = datetime.combine(today - timedelta(days=keep_days), datetime.min.time())
+    pruned = prune_price_ticks(db, cutoff)
+    db.commit()
+
+    return {"partitions": partitions, "rolled_up": rolled_up, "pruned": pruned}
+
+
+@celery_app.task(bind=True, base=CallbackTask, max_retries=3, default_retry_delay=60)
+def maintain_price_history(self: CallbackTask) -> dict[str, Any]:
+    """
+    Create upcoming partitions, roll up daily prices and prune old ticks.
+
+    Returns:
+        Dict with partitions ensured, rollup rows per day and ticks pruned
+    """
+    try:
+        with SessionLocal() as db:
+            result = maintain_prices(db)
+    except Exception as exc:
+        raise self.retry(exc=exc) from exc
+
+    logger.info("Maintained price history", extra={"task_name": self.name, **result})
+    return result
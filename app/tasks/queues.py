@@ -0,0 +1,94 @@
+"""Celery queue topology, task routes and per-queue worker profiles.
+
+Work is split by latency class so a burst on one queue cannot starve
+another:
+
+- ``interactive``: user-facing tasks; low prefetch so a slow task never
+  holds others hostage
+- ``ingest``: upstream offer refreshes, rate limited and bursty
+- ``embed``: CPU-heavy embedding backfill
+- ``maintenance``: beat-driven schedulers and housekeeping
+
+Each queue is consumed by its own worker (``make worker-<queue>``) sized by
+``celery_queue_concurrency`` and ``celery_queue_prefetch``.
+"""
+
+import sys
+
+from kombu import Queue
+
+from app.core.config import settings
+
+INTERACTIVE = "interactive"
+INGEST = "ingest"
+EMBED = "embed"
+MAINTENANCE = "maintenance"
+
+QUEUE_NAMES = (INTERACTIVE, INGEST, EMBED, MAINTENANCE)
+
+# Task name patterns (fnmatch globs, first match wins) to queue
+TASK_ROUTES = {
+    "app.tasks.refresh.schedule_offer_refresh": {"queue": MAINTENANCE},
+    "app.tasks.refresh.*": {"queue": INGEST},
+    "app.tasks.embeddings.*": {"queue": EMBED},
+    "app.tasks.prices.*": {"queue": MAINTENANCE},
+    "app.tasks.results.*": {"queue": MAINTENANCE},
+    "app.tasks.search.*": {"queue": MAINTENANCE},
+    "app.tasks.features.*": {"queue": MAINTENANCE},
+    "app.tasks.example.*": {"queue": INTERACTIVE},
+}
+
+
+def task_queues() -> list[Queue]:
+    """Declare every queue with priority support."""
+    return [
+        Queue(
+            name,
+            routing_key=name,
+            queue_arguments={"x-max-priority": settings.celery_max_priority},
+        )
+        for name in QUEUE_NAMES
+    ]
+
+
+def broker_transport_options() -> dict[str, object]:
+    """
+    Redis transport options for per-message priorities and queue order.
+
+    Redis has no native priority queues; kombu emulates per-message
+    priorities with one list per ``priority_steps`` entry (named with the
+    default ``sep``) and drains lower steps first, so 0 is the most urgent.
+    ``queue_order_strategy`` only sets the order in which a worker consumes
+    its queues: "priority" polls them in the order they are declared
+    instead of round-robin.
+    """
+    return {
+        "queue_order_strategy": "priority",
+        "priority_steps": list(range(settings.celery_max_priority + 1)),
+    }
+
+
+def worker_args(queue: str) -> list[str]:
+    """
+    Celery worker command-line options for one queue's profile.
+
+    Args:
+        queue: Name of a queue in QUEUE_NAMES
+
+    Returns:
+        Options selecting the queue, its concurrency and its prefetch multiplier
+    """
+    if queue not in QUEUE_NAMES:
+        raise ValueError(
+            f"Unknown queue {queue!r}; expected one of {', '.join(QUEUE_NAMES)}"
+        )
+    return [
+        f"--queues={queue}",
+        f"--concurrency={settings.celery_queue_concurrency.get(queue, 1)}",
+        f"--prefetch-multiplier={settings.celery_queue_prefetch.get(queue, 1)}",
+        f"--hostname={queue}@%h",
+    ]
+
+
+if __name__ == "__main__":
+    print(" ".join(worker_args(sys.argv[1])))
@@ -0,0 +1,240 @@
+"""Periodic refresh of offers approaching the 24h freshness limit."""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any
+
+from celery import group
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.core.http import RateLimited
+from app.core.metrics import (
+    OFFER_REFRESH_BACKLOG,
+    OFFER_REFRESH_LAG_SECONDS,
+    OFFER_REFRESH_STALE,
+)
+from app.core.rate_limit import get_bucket
+from app.db.models import Offer, Ranking
+from app.db.session import SessionLocal
+from app.ingest.fetchers import load_fetcher
+from app.ingest.offers import ingest_offers
+from app.tasks.example import CallbackTask
+
+logger = logging.getLogger(__name__)
+
+# Redis transport priorities: lower values are consumed first. Other chunks
+# go at settings.celery_default_priority, like every other task.
+PRIORITY_HOT = 0
+
+# Each retry either fetched part of the chunk or waited for the rate limit;
+# offers left over when this runs out are picked up again by the next run
+MAX_CHUNK_RETRIES = 10
+
+
+def refresh_cutoff(now: datetime | None = None) -> datetime:
+    """Offers checked before this time are due for refresh."""
+    now = now or datetime.utcnow()
+    return now - timedelta(
+        hours=settings.offer_max_age_hours - settings.offer_refresh_lead_hours
+    )
+
+
+def refresh_metrics(db: Session, now: datetime | None = None) -> dict[str, Any]:
+    """
+    Report refresh backlog size and lag.
+
+    Returns:
+        Dict with ``backlog`` (offers due for refresh), ``stale`` (offers past
+        the maximum age) and ``lag_seconds`` (age of the oldest offer beyond
+        the refresh cutoff, 0 when nothing is due)
+    """
+    now = now or datetime.utcnow()
+    cutoff = refresh_cutoff(now)
+    max_age_cutoff = now - timedelta(hours=settings.offer_max_age_hours)
+
+    backlog = db.scalar(
+        select(func.count()).select_from(Offer).where(Offer.last_checked_at < cutoff)
+    )
+    stale = db.scalar(
+        select(func.count())
+        .select_from(Offer)
+        .where(Offer.last_checked_at < max_age_cutoff)
+    )
+    oldest = db.scalar(select(func.min(Offer.last_checked_at)))
+    lag = max((cutoff - oldest).total_seconds(), 0.0) if oldest else 0.0
+
+    return {"backlog": backlog, "stale": stale, "lag_seconds": lag}
+
+
+def select_due_offers(
+    db: Session, now: datetime | None = None, limit: int | None = None
+) -> tuple[list[int], list[int]]:
+    """
+    Find offers due for refresh, oldest first, split by ranking activity.
+
+    Offers attempted within ``offer_refresh_retry_minutes`` are skipped, so
+    offers the upstream has nothing for are not re-dispatched every run.
+
+    Returns:
+        Tuple of (hot offer ids, other offer ids); hot offers belong to
+        products that appeared in a Ranking within the hot window
+    """
+    now = now or datetime.utcnow()
+    limit = limit or settings.offer_refresh_max_per_run
+    hot_since = now - timedelta(hours=settings.offer_refresh_hot_window_hours)
+    retry_before = now - timedelta(minutes=settings.offer_refresh_retry_minutes)
+
+    hot_products = (
+        select(Ranking.product_id).where(Ranking.created_at >= hot_since).distinct()
+    )
+    rows = db.execute(
+        select(Offer.id, Offer.product_id.in_(hot_products))
+        .where(
+            Offer.last_checked_at < refresh_cutoff(now),
+            or_(Offer.last_attempt_at.is_(None), Offer.last_attempt_at < retry_before),
+        )
+        .order_by(Offer.last_checked_at)
+        .limit(limit)
+    )
+
+    hot, other = [], []
+    for offer_id, is_hot in rows:
+        (hot if is_hot else other).append(offer_id)
+    return hot, other
+
+
+def _chunks(ids: list[int], size: int) -> list[list[int]]:
+    return [ids[i : i + size] for i in range(0, len(ids), size)]
+
+
+def _mark_attempted(db: Session, offer_ids: list[int]) -> None:
+    # Only ingested records move last_checked_at; this just backs off offers
+    # the upstream returned nothing for
+    if offer_ids:
+        db.execute(
+            update(Offer)
+            .where(Offer.id.in_(offer_ids))
+            .values(last_attempt_at=datetime.utcnow())
+        )
+
+
+@celery_app.task(bind=True, base=CallbackTask)
+def schedule_offer_refresh(self: CallbackTask) -> dict[str, Any]:
+    """
+    Fan out refresh tasks for offers approaching staleness.
+
+    Runs from Celery beat. Due offers are sharded into fixed-size chunks and
+    dispatched as a group, with recently ranked products sent first at a
+    higher priority.
+
+    Returns:
+        Dict with dispatch counts and the current refresh metrics
+    """
+    with SessionLocal() as db:
+        hot, other = select_due_offers(db)
+        metrics = refresh_metrics(db)
+    OFFER_REFRESH_BACKLOG.set(metrics["backlog"])
+    OFFER_REFRESH_STALE.set(metrics["stale"])
+    OFFER_REFRESH_LAG_SECONDS.set(metrics["lag_seconds"])
+
+    size = settings.offer_refresh_chunk_size
+    signatures = [
+        refresh_offer_chunk.s(chunk).set(priority=PRIORITY_HOT)
+        for chunk in _chunks(hot, size)
+    ] + [
+        refresh_offer_chunk.s(chunk).set(priority=settings.celery_default_priority)
+        for chunk in _chunks(other, size)
+    ]
+    if signatures:
+        group(signatures).apply_async()
+
+    result = {
+        "dispatched": len(hot) + len(other),
+        "hot": len(hot),
+        "chunks": len(signatures),
+        **metrics,
+    }
+    logger.info("Offer refresh scheduled", extra={"task_name": self.name, **result})
+    return result
+
+
+@celery_app.task(
+    bind=True,
+    base=CallbackTask,
+    max_retries=MAX_CHUNK_RETRIES,
+    default_retry_delay=1,
+)
+def refresh_offer_chunk(self: CallbackTask, offer_ids: list[int]) -> dict[str, Any]:
+    """
+    Re-fetch and upsert one chunk of offers.
+
+    Every offer whose product was sent upstream gets ``last_attempt_at``
+    stamped; ``last_checked_at`` only moves when a record comes back. Upstream
+    calls are gated by a per-upstream token bucket. When the bucket
+    is empty, or the upstream keeps answering 429, the task retries with
+    only the unfetched offers, after the refill or ``Retry-After`` delay,
+    instead of blocking the worker, up to ``MAX_CHUNK_RETRIES`` times.
+
+    Args:
+        offer_ids: Ids of offers to refresh
+
+    Returns:
+        Dict containing ingestion counts for the chunk
+    """
+    fetcher = load_fetcher()
+    bucket = get_bucket(
+        fetcher.name, settings.offer_fetch_rate_per_second, settings.offer_fetch_burst
+    )
+
+    with SessionLocal() as db:
+        offer_ids_by_product: dict[int, list[int]] = {}
+        for offer_id, product_id in db.execute(
+            select(Offer.id, Offer.product_id).where(Offer.id.in_(offer_ids))
+        ):
+            offer_ids_by_product.setdefault(product_id, []).append(offer_id)
+        product_ids = list(offer_ids_by_product)
+
+        records = []
+        for start in range(0, len(product_ids), fetcher.max_batch):
+            wait = bucket.try_acquire()
+            if not wait:
+                try:
+                    records.extend(
+                        fetcher.fetch(product_ids[start : start + fetcher.max_batch])
+                    )
+                    continue
+                except RateLimited as exc:
+                    wait = exc.retry_after
+            _mark_attempted(
+                db,
+                [
+                    offer_id
+                    for product_id in product_ids[:start]
+                    for offer_id in offer_ids_by_product[product_id]
+                ],
+            )
+            if records:
+                ingest_offers(db, records)
+            db.commit()
+            remaining = [
+                offer_id
+                for product_id in product_ids[start:]
+                for offer_id in offer_ids_by_product[product_id]
+            ]
+            raise self.retry(args=(remaining,), countdown=wait)
+
+        _mark_attempted(
+            db, [offer_id for ids in offer_ids_by_product.values() for offer_id in ids]
+        )
+        stats = ingest_offers(db, records)
+        db.commit()
+
+    return {
+        "offers": len(offer_ids),
+        "inserted": stats.inserted,
+        "updated": stats.updated,
+        "unchanged": stats.unchanged,
+    }
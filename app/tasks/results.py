@@ -0,0 +1,26 @@
+"""Housekeeping for offloaded task results."""
+
+import logging
+from typing import Any
+
+from app.celery_app import celery_app
+from app.core.blobs import get_blob_store
+from app.core.config import settings
+from app.tasks.example import CallbackTask
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(bind=True, base=CallbackTask)
+def prune_result_blobs(self: CallbackTask) -> dict[str, Any]:
+    """
+    Delete offloaded results older than the backend's result expiry.
+
+    Returns:
+        Dict with the number of blobs removed
+    """
+    removed = get_blob_store().prune(settings.celery_result_expires)
+    logger.info(
+        "Pruned result blobs", extra={"task_name": self.name, "removed": removed}
+    )
+    return {"removed": removed}
@@ -0,0 +1,77 @@
+"""Keyword search document refresh."""
+
+import logging
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.search.keyword import refresh_search_documents, stale_product_ids
+from app.tasks.example import CallbackTask
+
+logger = logging.getLogger(__name__)
+
+
+def refresh_stale_documents(
+    db: Session,
+    after_id: int = 0,
+    page_size: int | None = None,
+    max_pages: int | None = None,
+) -> dict[str, Any]:
+    """
+    Rebuild search rows that are missing or older than a product's reviews.
+
+    Products are examined in id order with keyset pagination and each page
+    is committed, so an interrupted run resumes without redoing work.
+
+    Args:
+        db: Database session
+        after_id: Resume after this product id
+        page_size: Products examined per page
+        max_pages: Stop after this many pages
+
+    Returns:
+        Dict with the number of rows refreshed, the last id examined and
+        whether all products were examined
+    """
+    page_size = page_size or settings.search_refresh_page_size
+    max_pages = max_pages or settings.search_refresh_pages_per_task
+
+    refreshed = 0
+    for _ in range(max_pages):
+        stale, last_id = stale_product_ids(db, after_id, page_size)
+        if last_id is None:
+            return {"refreshed": refreshed, "last_id": after_id, "done": True}
+        if stale:
+            refreshed += refresh_search_documents(db, stale)
+            db.commit()
+        after_id = last_id
+
+    return {"refreshed": refreshed, "last_id": after_id, "done": False}
+
+
+@celery_app.task(bind=True, base=CallbackTask, max_retries=3, default_retry_delay=60)
+def refresh_search_index(self: CallbackTask, after_id: int = 0) -> dict[str, Any]:
+    """
+    Refresh search documents of new products and products with new reviews.
+
+    Args:
+        after_id: Resume keyset pagination after this product id
+
+    Returns:
+        Dict with rows refreshed, last id and completion flag
+    """
+    try:
+        with SessionLocal() as db:
+            result = refresh_stale_documents(db, after_id=after_id)
+    except Exception as exc:
+        raise self.retry(exc=exc) from exc
+
+    if not result["done"]:
+        # Hand the rest to a fresh task so no single run holds a worker for long
+        self.apply_async(kwargs={"after_id": result["last_id"]})
+
+    logger.info("Refreshed search documents", extra={"task_name": self.name, **result})
+    return result
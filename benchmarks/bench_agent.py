@@ -0,0 +1,163 @@
+"""Benchmark the recommendation agent graph with the offline fake LLM.
+
+Seeds SQLite with headphone products, offers (a share of them stale),
+reviews and stub embeddings, then answers the same requests three ways:
+
+- sequential: the graph limited to one node at a time
+- concurrent: independent nodes overlap (parse next to retrieval, then
+  freshness next to the per-product summary calls)
+- cached: concurrent again with the parse and summary results cached by
+  the previous pass
+
+Reports the mean end-to-end latency per mode and the mean time spent in
+each node. ``--llm-ms`` sets the fake LLM's latency per completion.
+
+Usage:
+    python -m benchmarks.bench_agent [--products 5000] [--requests 10] [--llm-ms 150]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.agent import FakeLLM, build_agent_graph, run_recommendation_agent
+from app.cache import TTLCache
+from app.db.base import Base
+from app.db.models import Offer, Product, Review
+from app.embeddings import StubEmbedder
+from app.ranking import RecommendationRequest
+from app.search import refresh_search_documents, vector
+
+BRANDS = ["Sony", "Bose", "Sennheiser", "Jabra", "Anker", "Audio-Technica"]
+FEATURES = [
+    "noise cancelling",
+    "wireless",
+    "waterproof",
+    "bass",
+    "studio",
+    "lightweight",
+]
+FORMS = ["headphones", "earbuds", "headset"]
+USAGES = ["running", "travel", "gaming", "the office"]
+
+
+def seed(session_factory, products: int, rng: random.Random) -> None:
+    now = datetime.utcnow()
+    titles = [
+        f"{rng.choice(BRANDS)} {rng.choice(FEATURES)} {rng.choice(FORMS)} {i}"
+        for i in range(products)
+    ]
+    embeddings = StubEmbedder().embed(titles)
+    with session_factory() as db:
+        for i, (title, embedding) in enumerate(
+            zip(titles, embeddings, strict=True), start=1
+        ):
+            db.add(
+                Product(id=i, asin=f"B0BENCH{i:05d}", title=title, embedding=embedding)
+            )
+            stale = rng.random() < 0.1
+            db.add(
+                Offer(
+                    product_id=i,
+                    price_cents=rng.randint(2000, 40000),
+                    last_checked_at=now - timedelta(hours=30 if stale else 1),
+                )
+            )
+            db.add_all(
+                Review(
+                    product_id=i, source="bench", snippet=f"{title} review {n}. Solid."
+                )
+                for n in range(3)
+            )
+        db.commit()
+        refresh_search_documents(db, range(1, products + 1))
+        db.commit()
+    vector.invalidate_indexes()
+
+
+async def run_mode(
+    session_factory, requests, llm_ms: float, concurrency, cache
+) -> list[dict]:
+    graph = build_agent_graph(
+        session_factory,
+        llm=FakeLLM(latency=llm_ms / 1000),
+        embedder=StubEmbedder(),
+        on_stale=lambda ids: None,
+        cache=cache,
+        concurrency=concurrency,
+    )
+    traces = []
+    for request in requests:
+        result = await run_recommendation_agent(session_factory, request, graph)
+        traces.append(result["trace"])
+    return traces
+
+
+def report(label: str, traces: list[dict]) -> None:
+    per_node = defaultdict(list)
+    for trace in traces:
+        for timing in trace["nodes"]:
+            per_node[timing["node"]].append(timing["elapsed_ms"])
+    nodes = "  ".join(
+        f"{node}={statistics.mean(values):.1f}" for node, values in per_node.items()
+    )
+    total = statistics.mean(trace["elapsed_ms"] for trace in traces)
+    print(f"{label:<11} {total:8.1f} ms   {nodes}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--llm-ms", type=float, default=150.0, help="Fake LLM latency")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}", echo=False)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+
+    try:
+        seed(session_factory, args.products, rng)
+        requests = [
+            RecommendationRequest(
+                f"{rng.choice(FEATURES)} {rng.choice(FORMS)} for {rng.choice(USAGES)} "
+                f"under ${rng.randrange(100, 400, 50)}",
+                limit=10,
+            )
+            for _ in range(args.requests)
+        ]
+
+        print(
+            f"{args.products} products, {args.requests} requests, "
+            f"{args.llm_ms:g} ms per LLM call (mean ms per node)"
+        )
+        cache = TTLCache(max_size=1024, ttl=3600)
+        for label, concurrency, node_cache in (
+            ("sequential", 1, TTLCache(max_size=1024, ttl=3600)),
+            ("concurrent", None, cache),
+            ("cached", None, cache),
+        ):
+            traces = asyncio.run(
+                run_mode(
+                    session_factory, requests, args.llm_ms, concurrency, node_cache
+                )
+            )
+            report(label, traces)
+    finally:
+        engine.dispose()
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
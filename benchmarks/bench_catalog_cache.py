@@ -0,0 +1,111 @@
+"""Benchmark catalog read latency with and without the catalog cache.
+
+Usage:
+    python -m benchmarks.bench_catalog_cache [--products 5000] [--reads 20000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import selectinload, sessionmaker
+
+from app.cache import CatalogCache, CatalogProduct, TTLCache
+from app.db.base import Base
+from app.db.models import Offer, Product, Review
+
+
+def percentiles(samples: list[float]) -> str:
+    """Format p50/p99 of latency samples in microseconds."""
+    cuts = statistics.quantiles(samples, n=100)
+    return f"p50={cuts[49] * 1e6:8.1f}us  p99={cuts[98] * 1e6:8.1f}us"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--reads", type=int, default=20000)
+    parser.add_argument("--cache-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    with Session() as db:
+        db.execute(
+            insert(Product),
+            [
+                {"id": i, "asin": f"B0BENCH{i:05d}", "title": f"Headphones {i}"}
+                for i in range(1, args.products + 1)
+            ],
+        )
+        db.execute(
+            insert(Offer),
+            [
+                {"product_id": i, "price_cents": 1000 + i, "currency": currency}
+                for i in range(1, args.products + 1)
+                for currency in ("USD", "EUR", "GBP")
+            ],
+        )
+        db.execute(
+            insert(Review),
+            [
+                {"product_id": i, "source": "Amazon", "snippet": f"Review {j} of {i}"}
+                for i in range(1, args.products + 1)
+                for j in range(5)
+            ],
+        )
+        db.commit()
+
+    # Popular products dominate real traffic
+    rng = random.Random(7)
+    weights = [1 / rank for rank in range(1, args.products + 1)]
+    asins = [
+        f"B0BENCH{i:05d}"
+        for i in rng.choices(range(1, args.products + 1), weights=weights, k=args.reads)
+    ]
+
+    try:
+        with Session() as db:
+            samples = []
+            for asin in asins:
+                start = time.perf_counter()
+                model = db.scalar(
+                    select(Product)
+                    .where(Product.asin == asin)
+                    .options(
+                        selectinload(Product.offers), selectinload(Product.reviews)
+                    )
+                )
+                CatalogProduct.from_model(model)
+                samples.append(time.perf_counter() - start)
+                db.expunge_all()
+            print(f"uncached: {percentiles(samples)}")
+
+        cache = CatalogCache(TTLCache(args.cache_size, ttl=300))
+        with Session() as db:
+            samples = []
+            for asin in asins:
+                start = time.perf_counter()
+                cache.get_product(db, asin)
+                samples.append(time.perf_counter() - start)
+                db.expunge_all()
+            stats = cache.stats()["memory"]
+            print(
+                f"  cached: {percentiles(samples)}  "
+                f"hits={stats['hits']} misses={stats['misses']} evictions={stats['evictions']}"
+            )
+    finally:
+        engine.dispose()
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
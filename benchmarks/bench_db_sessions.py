@@ -0,0 +1,125 @@
+"""Benchmark sync vs async database request throughput.
+
+Serves two equivalent routes from one FastAPI app - one backed by ``get_db``
+running in the threadpool, one backed by ``get_async_db`` - and fires
+concurrent requests at each through an in-process ASGI transport.
+
+Usage:
+    python -m benchmarks.bench_db_sessions [--requests 2000] [--concurrency 200]
+    python -m benchmarks.bench_db_sessions --database-url postgresql://...
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from fastapi import Depends, FastAPI
+from httpx import AsyncClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db.base import Base
+from app.db.models import Product
+from app.db.session import engine_options, to_async_url
+
+
+def build_app(database_url: str, pool_size: int) -> tuple[FastAPI, list]:
+    """Build a FastAPI app with a sync and an async product lookup route."""
+    # Size both pools to the request concurrency so neither path is pool-bound
+    pool = {"pool_size": pool_size, "max_overflow": 0}
+    sync_engine = create_engine(
+        database_url, **{**engine_options(database_url), **pool}
+    )
+    async_url = to_async_url(database_url)
+    async_engine = create_async_engine(
+        async_url, **{**engine_options(async_url, is_async=True), **pool}
+    )
+    SyncSession = sessionmaker(bind=sync_engine)
+    AsyncSessionFactory = async_sessionmaker(bind=async_engine)
+
+    Base.metadata.create_all(bind=sync_engine)
+    with SyncSession() as session:
+        if session.scalar(select(Product.id).limit(1)) is None:
+            session.add_all(
+                Product(asin=f"B0BENCH{i:05d}", title=f"Bench Headphones {i}")
+                for i in range(1000)
+            )
+            session.commit()
+
+    def get_sync_db():
+        db = SyncSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with AsyncSessionFactory() as db:
+            yield db
+
+    app = FastAPI()
+
+    @app.get("/sync/{asin}")
+    def sync_lookup(asin: str, db: Session = Depends(get_sync_db)) -> dict:
+        product = db.scalar(select(Product).where(Product.asin == asin))
+        return {"title": product.title}
+
+    @app.get("/async/{asin}")
+    async def async_lookup(asin: str, db: AsyncSession = Depends(get_async_db)) -> dict:
+        product = await db.scalar(select(Product).where(Product.asin == asin))
+        return {"title": product.title}
+
+    return app, [sync_engine, async_engine]
+
+
+async def run(app: FastAPI, prefix: str, requests: int, concurrency: int) -> float:
+    """Issue requests with bounded concurrency and return requests/sec."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with AsyncClient(app=app, base_url="http://bench") as client:
+
+        async def one(i: int) -> None:
+            async with semaphore:
+                response = await client.get(f"/{prefix}/B0BENCH{i % 1000:05d}")
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    return requests / elapsed
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    args = parser.parse_args()
+
+    path = None
+    database_url = args.database_url
+    if database_url is None:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        database_url = f"sqlite:///{path}"
+
+    app, engines = build_app(database_url, args.concurrency)
+    try:
+        for prefix in ("sync", "async"):
+            rate = await run(app, prefix, args.requests, args.concurrency)
+            print(
+                f"{prefix:>5}: {rate:8.1f} req/s ({args.requests} requests, concurrency {args.concurrency})"
+            )
+    finally:
+        engines[0].dispose()
+        await engines[1].dispose()
+        if path:
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
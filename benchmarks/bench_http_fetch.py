@@ -0,0 +1,126 @@
+"""Benchmark pooled, batched item lookups against a local mock offer API.
+
+A threaded mock server answers GetItems requests after a fixed service
+delay. Looking up the same ASIN list is timed three ways:
+
+- one request per ASIN from a new client (and connection) each time
+- one request per ASIN over the pooled ``HTTPClient``
+- ``ItemLookup``: concurrent callers, duplicates coalesced, 10 ASINs per request
+
+Usage:
+    python -m benchmarks.bench_http_fetch [--asins 200] [--duplicates 0.3] [--delay-ms 5]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from app.core.http import HTTPClient
+from app.ingest.items import ItemLookup, get_items_fetcher
+
+
+class MockAPI(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests += 1
+        time.sleep(self.server.delay)
+        payload = json.dumps(
+            {
+                "ItemsResult": {
+                    "Items": [
+                        {
+                            "ASIN": asin,
+                            "Offers": {"Listings": [{"Price": {"Amount": 99.0}}]},
+                        }
+                        for asin in body["ItemIds"]
+                    ]
+                }
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Coalesced lookups open several connections at once
+    request_queue_size = 128
+
+
+async def new_clients(url: str, asins: list[str]) -> None:
+    for asin in asins:
+        async with httpx.AsyncClient() as client:
+            await client.post(url, json={"ItemIds": [asin]})
+
+
+async def pooled(url: str, asins: list[str]) -> None:
+    async with HTTPClient(rate=100_000.0, burst=1000) as client:
+        for asin in asins:
+            await client.post(url, json={"ItemIds": [asin]})
+
+
+async def coalesced(url: str, asins: list[str]) -> None:
+    async with HTTPClient(rate=100_000.0, burst=1000) as client:
+        lookup = ItemLookup(get_items_fetcher(client, url))
+        await asyncio.gather(*(lookup.get(asin) for asin in asins))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--asins", type=int, default=200)
+    parser.add_argument(
+        "--duplicates", type=float, default=0.3, help="Share of repeated lookups"
+    )
+    parser.add_argument(
+        "--delay-ms", type=float, default=5.0, help="Server time per request"
+    )
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    unique = [f"B0BENCH{i:04d}" for i in range(int(args.asins * (1 - args.duplicates)))]
+    asins = unique + rng.choices(unique, k=args.asins - len(unique))
+    rng.shuffle(asins)
+
+    server = MockServer(("127.0.0.1", 0), MockAPI)
+    server.delay = args.delay_ms / 1000
+    url = f"http://127.0.0.1:{server.server_address[1]}/paapi5/getitems"
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+
+    try:
+        print(
+            f"{len(asins)} lookups ({len(unique)} unique), {args.delay_ms:g} ms server time"
+        )
+        for label, run in (
+            ("new client per ASIN", new_clients),
+            ("pooled, one ASIN per call", pooled),
+            ("coalesced, 10 per call", coalesced),
+        ):
+            server.requests = 0
+            start = time.perf_counter()
+            asyncio.run(run(url, asins))
+            elapsed = time.perf_counter() - start
+            print(
+                f"{label:<27} {elapsed * 1000:8.1f} ms  {server.requests:>4} requests"
+            )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""Benchmark recall@k and latency of hybrid retrieval on a synthetic catalog.
+
+Seeds SQLite with headphone products (brand, model number, two feature
+words and a form factor), one USD offer each, stub embeddings and search
+documents. Three query families have known relevant sets:
+
+- model: a product's model number, relevant = that product
+- attributes: "<brand> <feature> <form>" under a budget, relevant = the
+  products with all three attributes priced within it
+- phrased: the same attributes wrapped in a shopper sentence
+
+For each family, recall@k is reported for keyword search alone, vector
+search alone and the fused hybrid list, all filtered by the same budget.
+Latency compares running the two retrievers back to back with
+``hybrid_search``, which runs them concurrently. Against local SQLite both
+retrievers are CPU-bound in this process, so overlap needs spare cores;
+``--rtt-ms`` adds a simulated network round trip to every statement to
+model a remote database, where the retrievers mostly wait.
+
+Usage:
+    python -m benchmarks.bench_hybrid_search [--products 100000] [--queries 30] [--k 50]
+        [--rtt-ms 0]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from decimal import Decimal
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.models import Offer, Product
+from app.embeddings import StubEmbedder
+from app.search import (
+    hybrid_search,
+    reciprocal_rank_fusion,
+    search_keyword,
+    search_products,
+)
+from app.search.hybrid import within_budget
+from app.search.keyword import refresh_search_documents
+
+BRANDS = (
+    "Sony",
+    "Bose",
+    "Sennheiser",
+    "Apple",
+    "JBL",
+    "Jabra",
+    "AKG",
+    "Beyerdynamic",
+    "Anker",
+    "Skullcandy",
+    "Shure",
+    "Marshall",
+    "Philips",
+    "Grado",
+    "Koss",
+)
+FORMS = ("Headphones", "Earbuds", "Headset", "Earphones", "Monitors", "Neckband")
+FEATURES = (
+    "Wireless",
+    "Bluetooth",
+    "Studio",
+    "Waterproof",
+    "Foldable",
+    "Lightweight",
+    "Gaming",
+    "Sport",
+    "Kids",
+    "Travel",
+    "Bass",
+    "Hybrid",
+)
+BATCH = 20_000
+
+
+def make_catalog(products: int, rng: random.Random) -> list[dict]:
+    catalog = []
+    for i in range(1, products + 1):
+        features = rng.sample(FEATURES, 2)
+        catalog.append(
+            {
+                "id": i,
+                "brand": rng.choice(BRANDS),
+                "model": f"{rng.choice('ABCDEFHJKMRSTWX')}{rng.choice('ABHMSX')}-{rng.randint(100, 99999)}",
+                "features": features,
+                "form": rng.choice(FORMS),
+                "price_cents": rng.randint(2000, 40000),
+            }
+        )
+    return catalog
+
+
+def seed(engine, catalog: list[dict]) -> None:
+    """Insert products with embeddings and offers, then build search documents."""
+    embedder = StubEmbedder()
+    with engine.begin() as conn:
+        for low in range(0, len(catalog), BATCH):
+            rows = catalog[low : low + BATCH]
+            titles = [
+                f"{row['brand']} {row['model']} {' '.join(row['features'])} {row['form']}"
+                for row in rows
+            ]
+            conn.execute(
+                insert(Product),
+                [
+                    {
+                        "id": row["id"],
+                        "asin": f"B0HY{row['id']:07d}",
+                        "title": title,
+                        "brand": row["brand"],
+                        "embedding": embedding,
+                    }
+                    for row, title, embedding in zip(
+                        rows, titles, embedder.embed(titles), strict=True
+                    )
+                ],
+            )
+            conn.execute(
+                insert(Offer),
+                [
+                    {"product_id": row["id"], "price_cents": row["price_cents"]}
+                    for row in rows
+                ],
+            )
+
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        for low in range(0, len(catalog), BATCH):
+            refresh_search_documents(
+                db, [row["id"] for row in catalog[low : low + BATCH]]
+            )
+            db.commit()
+
+
+def make_queries(
+    catalog: list[dict], count: int, rng: random.Random
+) -> dict[str, list]:
+    """Queries per family as (text, budget_max, relevant ids)."""
+    families: dict[str, list] = {"model": [], "attributes": [], "phrased": []}
+    for row in rng.sample(catalog, count):
+        families["model"].append((row["model"], None, {row["id"]}))
+
+    for row in rng.sample(catalog, count):
+        feature = rng.choice(row["features"])
+        budget = rng.choice((100, 150, 200, 300))
+        relevant = {
+            other["id"]
+            for other in catalog
+            if other["brand"] == row["brand"]
+            and other["form"] == row["form"]
+            and feature in other["features"]
+            and other["price_cents"] <= budget * 100
+        }
+        if not relevant:
+            continue
+        attributes = f"{row['brand']} {feature} {row['form']}"
+        families["attributes"].append((attributes, budget, relevant))
+        families["phrased"].append(
+            (
+                f"looking for {feature.lower()} {row['form'].lower()} from {row['brand']} "
+                f"that sound great",
+                budget,
+                relevant,
+            )
+        )
+    return families
+
+
+def recall(hits, relevant: set[int], k: int) -> float:
+    found = len({hit.id for hit in hits[:k]} & relevant)
+    return found / min(len(relevant), k)
+
+
+def percentiles(samples: list[float]) -> str:
+    cuts = statistics.quantiles(samples, n=100)
+    return f"p50={cuts[49] * 1000:7.2f}ms  p99={cuts[98] * 1000:7.2f}ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=30)
+    parser.add_argument("--k", type=int, default=50)
+    parser.add_argument("--depth", type=int, default=400)
+    parser.add_argument(
+        "--rtt-ms", type=float, default=0.0, help="Simulated round trip per statement"
+    )
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    catalog = make_catalog(args.products, rng)
+    families = make_queries(catalog, args.queries, rng)
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    Session = sessionmaker(bind=engine)
+    embedder = StubEmbedder()
+
+    try:
+        Base.metadata.create_all(bind=engine)
+        start = time.perf_counter()
+        seed(engine, catalog)
+        print(
+            f"seeded {args.products:,} products in {time.perf_counter() - start:.1f}s"
+        )
+
+        if args.rtt_ms:
+            event.listen(
+                engine,
+                "before_cursor_execute",
+                lambda *_: time.sleep(args.rtt_ms / 1000),
+            )
+
+        # Warm the in-memory vector index and term counts
+        asyncio.run(hybrid_search(Session, "wireless headphones", embedder, args.k))
+
+        for family, queries in families.items():
+            recalls: dict[str, list[float]] = {
+                "keyword": [],
+                "vector": [],
+                "hybrid": [],
+            }
+            sequential, concurrent = [], []
+            for text, budget, relevant in queries:
+                budget_max = Decimal(budget) if budget else None
+
+                start = time.perf_counter()
+                with Session() as db:
+                    keyword = within_budget(
+                        db, search_keyword(db, text, args.depth), budget_max=budget_max
+                    )
+                    vector = within_budget(
+                        db,
+                        search_products(db, embedder.embed([text])[0], args.depth),
+                        budget_max=budget_max,
+                    )
+                    reciprocal_rank_fusion(keyword, vector, args.k)
+                sequential.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                fused = asyncio.run(
+                    hybrid_search(
+                        Session,
+                        text,
+                        embedder,
+                        args.k,
+                        budget_max=budget_max,
+                        depth=args.depth,
+                    )
+                )
+                concurrent.append(time.perf_counter() - start)
+
+                recalls["keyword"].append(recall(keyword, relevant, args.k))
+                recalls["vector"].append(recall(vector, relevant, args.k))
+                recalls["hybrid"].append(recall(fused, relevant, args.k))
+
+            print(f"{family} ({len(queries)} queries)")
+            print(
+                f"  recall@{args.k}: "
+                + "  ".join(
+                    f"{name}={statistics.mean(values):.3f}"
+                    for name, values in recalls.items()
+                )
+            )
+            print(f"  sequential  {percentiles(sequential)}")
+            print(f"  concurrent  {percentiles(concurrent)}")
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""Benchmark top-50 keyword search latency over a synthetic catalog.
+
+Seeds SQLite with headphone-like titles (brand, model number, form factor
+and feature words) plus review snippets for a share of products, builds
+search documents with ``refresh_search_documents`` and times
+``search_keyword`` for model-number, brand/feature and natural-language
+queries. The first call also probes term document counts; later calls hit
+the count cache and show the steady state. An ``ILIKE '%...%'`` title scan
+is timed once for comparison.
+
+Seeding a million products takes a few minutes; pass ``--database`` to keep
+the SQLite file and reuse it on the next run.
+
+Usage:
+    python -m benchmarks.bench_keyword_search [--products 1000000] [--repeats 50]
+        [--database /tmp/keyword.db]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.models import Product, Review
+from app.search.keyword import refresh_search_documents, search_keyword
+
+BRANDS = (
+    "Sony",
+    "Bose",
+    "Sennheiser",
+    "Apple",
+    "JBL",
+    "Jabra",
+    "AKG",
+    "Beyerdynamic",
+    "Anker",
+    "Skullcandy",
+    "Audio-Technica",
+    "Shure",
+    "Marshall",
+    "Bang",
+    "Philips",
+)
+FORMS = (
+    "Over-Ear Headphones",
+    "On-Ear Headphones",
+    "Earbuds",
+    "In-Ear Monitors",
+    "Gaming Headset",
+    "Sport Earphones",
+)
+FEATURES = (
+    "Wireless",
+    "Bluetooth",
+    "Noise Cancelling",
+    "Studio",
+    "Open Back",
+    "Closed Back",
+    "Waterproof",
+    "Foldable",
+    "Hi-Res",
+    "Bass Boost",
+    "USB-C",
+    "Lightweight",
+)
+# Review snippets combine an opinion with a use case and an aspect
+OPINIONS = (
+    "Comfortable",
+    "Great",
+    "Solid",
+    "Decent",
+    "Excellent",
+    "Perfect",
+    "Reliable",
+    "Disappointing",
+    "Impressive",
+    "Surprisingly good",
+    "Lightweight and snug",
+    "Overpriced but nice",
+    "Sturdy",
+    "Flimsy",
+    "Cozy",
+    "Secure",
+)
+USES = (
+    "long flights",
+    "the gym",
+    "running",
+    "commuting",
+    "zoom calls",
+    "gaming",
+    "podcasts",
+    "mixing",
+    "studying",
+    "sleeping",
+    "the office",
+    "cycling",
+    "hiking",
+    "the train",
+    "audiobooks",
+    "classical music",
+    "hip hop",
+    "movies",
+    "yoga",
+    "travel",
+)
+ASPECTS = (
+    "deep bass",
+    "crisp highs",
+    "wide soundstage",
+    "clear mic",
+    "long battery",
+    "fast charging",
+    "quick pairing",
+    "strong clamping",
+    "warm ear pads",
+    "sturdy hinges",
+    "tangle free cable",
+    "good isolation",
+    "low latency",
+    "comfy headband",
+    "bright treble",
+    "muddy mids",
+    "easy controls",
+    "loud volume",
+)
+
+QUERIES = {
+    "model number": "WH-1000XM5",
+    "brand + form": "sennheiser open back headphones",
+    "feature words": "wireless noise cancelling earbuds",
+    "natural language": "comfortable headphones for long flights with deep bass",
+}
+BATCH = 50_000
+
+
+def seed(engine, products: int) -> None:
+    """Insert products and reviews, then build their search documents."""
+    rng = random.Random(7)
+    with engine.begin() as conn:
+        for low in range(1, products + 1, BATCH):
+            rows = []
+            for i in range(low, min(low + BATCH, products + 1)):
+                brand = BRANDS[i % len(BRANDS)]
+                model = f"{rng.choice('ABCDEFGHJKLMNPQRSTWXZ')}{rng.choice('ABCDEFHMSWX')}-{rng.randint(100, 9999)}"
+                features = " ".join(rng.sample(FEATURES, 2))
+                rows.append(
+                    {
+                        "id": i,
+                        "asin": f"B0KW{i:07d}",
+                        "title": f"{brand} {model} {features} {rng.choice(FORMS)}",
+                        "brand": brand,
+                    }
+                )
+            conn.execute(insert(Product), rows)
+            conn.execute(
+                insert(Review),
+                [
+                    {
+                        "product_id": row["id"],
+                        "source": "Amazon",
+                        "snippet": f"{rng.choice(OPINIONS)} for {rng.choice(USES)}, "
+                        f"{rng.choice(ASPECTS)}",
+                    }
+                    for row in rows
+                    if row["id"] % 4 == 0
+                ],
+            )
+        # One real model number to look up
+        conn.execute(
+            Product.__table__.update()
+            .where(Product.id == products // 2)
+            .values(
+                title="Sony WH-1000XM5 Wireless Noise Cancelling Over-Ear Headphones"
+            )
+        )
+
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        for low in range(1, products + 1, BATCH):
+            refresh_search_documents(db, range(low, min(low + BATCH, products + 1)))
+            db.commit()
+
+
+def percentiles(samples: list[float]) -> str:
+    cuts = statistics.quantiles(samples, n=100)
+    return f"p50={cuts[49] * 1000:7.2f}ms  p99={cuts[98] * 1000:7.2f}ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--k", type=int, default=50)
+    parser.add_argument("--database", help="SQLite file to keep (reused when present)")
+    args = parser.parse_args()
+
+    reuse = bool(args.database) and os.path.exists(args.database)
+    if args.database:
+        path = args.database
+    else:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    Session = sessionmaker(bind=engine)
+
+    try:
+        if not reuse:
+            Base.metadata.create_all(bind=engine)
+            start = time.perf_counter()
+            seed(engine, args.products)
+            print(
+                f"seeded and indexed {args.products:,} products "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
+
+        with Session() as db:
+            for label, query in QUERIES.items():
+                start = time.perf_counter()
+                hits = search_keyword(db, query, args.k)
+                first = time.perf_counter() - start
+                samples = []
+                for _ in range(args.repeats):
+                    start = time.perf_counter()
+                    search_keyword(db, query, args.k)
+                    samples.append(time.perf_counter() - start)
+                print(
+                    f"{label:<17} {len(hits):>3} hits  first={first * 1000:7.2f}ms  "
+                    f"{percentiles(samples)}  {query!r}"
+                )
+
+            # Substring match on the title, the alternative without an index
+            start = time.perf_counter()
+            db.execute(
+                select(Product.id).where(Product.title.ilike("%1000xm5%")).limit(args.k)
+            ).all()
+            print(
+                f"ILIKE title scan for the model number: {(time.perf_counter() - start) * 1000:.2f}ms"
+            )
+    finally:
+        engine.dispose()
+        if not args.database:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
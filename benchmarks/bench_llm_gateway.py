@@ -0,0 +1,181 @@
+"""Benchmark LLM calls, tokens and wall time saved by the gateway on a replayed query log.
+
+A synthetic query log with repeats (popular requests recur, Zipf-like)
+is replayed in waves of concurrent requests. Each request makes the
+agent's LLM calls: one constraint parse, a review summary for each of
+the top 5 products and rationales for the top N. The model is the
+offline ``FakeLLM`` behind a simulated provider: a fixed latency per call
+plus a per-output-token delay, with a cap on concurrent calls.
+
+Three setups are compared:
+
+- direct: every call goes to the model, one rationale call per product
+- batched: rationales for all top N products in one call per request
+- gateway: batched, behind ``LLMGateway``'s response cache and in-flight
+  de-duplication
+
+Usage:
+    python -m benchmarks.bench_llm_gateway [--queries 200] [--unique 60] [--top-n 20]
+        [--concurrency 8] [--call-ms 50] [--token-ms 0.5]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from app.agent import FakeLLM, LLMGateway, generate_rationales
+from app.agent.gateway import count_tokens
+from app.agent.llm import PARSE_TASK, SUMMARY_TASK
+from app.cache import TTLCache
+
+FEATURES = [
+    "noise cancelling",
+    "wireless",
+    "waterproof",
+    "bass heavy",
+    "studio",
+    "lightweight",
+]
+FORMS = ["headphones", "earbuds", "headset"]
+USAGES = ["running", "travel", "gaming", "the office", "flights"]
+
+
+class SimulatedProvider:
+    """FakeLLM answers with provider-like latency, a concurrency cap and usage counters."""
+
+    def __init__(self, call_ms: float, token_ms: float, max_concurrent: int) -> None:
+        self.model = FakeLLM(latency=0)
+        self.call_ms = call_ms
+        self.token_ms = token_ms
+        self.slots = asyncio.Semaphore(max_concurrent)
+        self.calls = self.prompt_tokens = self.completion_tokens = 0
+
+    async def complete(self, prompt: str) -> str:
+        async with self.slots:
+            text = await self.model.complete(prompt)
+            tokens = count_tokens(text)
+            await asyncio.sleep((self.call_ms + tokens * self.token_ms) / 1000)
+        self.calls += 1
+        self.prompt_tokens += count_tokens(prompt)
+        self.completion_tokens += tokens
+        return text
+
+
+def build_log(queries: int, unique: int, rng: random.Random) -> list[str]:
+    texts = [
+        f"{rng.choice(FEATURES)} {rng.choice(FORMS)} for {rng.choice(USAGES)} "
+        f"under ${rng.randrange(80, 400, 20)}"
+        for _ in range(unique)
+    ]
+    weights = [1 / rank for rank in range(1, unique + 1)]
+    return rng.choices(texts, weights=weights, k=queries)
+
+
+def ranked_products(text: str, n: int) -> list[dict]:
+    rng = random.Random(text)
+    return [
+        {
+            "product_id": product_id,
+            "title": f"Headphones model {product_id}",
+            "facts": f"${rng.randint(40, 400)}.99, within budget; {rng.randint(1, 900)} reviews",
+        }
+        for product_id in rng.sample(range(1, 50_000), n)
+    ]
+
+
+async def handle(llm, text: str, top_n: int, batch_size: int) -> None:
+    products = ranked_products(text, top_n)
+    await asyncio.gather(
+        llm.complete(f"{PARSE_TASK} as JSON.\n{text}"),
+        *(
+            llm.complete(
+                f"{SUMMARY_TASK}.\n- {product['title']} is comfortable. Great battery."
+                f"\n- Solid build on the {product['title']}."
+            )
+            for product in products[:5]
+        ),
+    )
+    await generate_rationales(llm, text, products, batch_size=batch_size)
+
+
+async def replay(
+    log: list[str], args, batch_size: int, gateway: bool
+) -> tuple[SimulatedProvider, float, LLMGateway | None]:
+    provider = SimulatedProvider(args.call_ms, args.token_ms, args.concurrency)
+    llm = provider
+    llm_gateway = None
+    if gateway:
+        llm = llm_gateway = LLMGateway(provider, "fake", memory=TTLCache(10_000, 3600))
+
+    started = time.perf_counter()
+    for start in range(0, len(log), args.concurrency):
+        wave = log[start : start + args.concurrency]
+        await asyncio.gather(
+            *(handle(llm, text, args.top_n, batch_size) for text in wave)
+        )
+    return provider, time.perf_counter() - started, llm_gateway
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument(
+        "--unique", type=int, default=60, help="Distinct requests in the log"
+    )
+    parser.add_argument(
+        "--top-n", type=int, default=20, help="Ranked products explained"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Requests per wave and provider slots",
+    )
+    parser.add_argument(
+        "--call-ms", type=float, default=50.0, help="Model latency per call"
+    )
+    parser.add_argument(
+        "--token-ms", type=float, default=0.5, help="Model latency per output token"
+    )
+    args = parser.parse_args()
+
+    log = build_log(args.queries, args.unique, random.Random(11))
+    print(
+        f"{len(log)} requests ({len(set(log))} distinct), top {args.top_n}, "
+        f"{args.concurrency} concurrent, {args.call_ms:g} ms + {args.token_ms:g} ms/token"
+    )
+    results = {}
+    for label, batch_size, gateway in (
+        ("direct", 1, False),
+        ("batched", args.top_n, False),
+        ("gateway", args.top_n, True),
+    ):
+        provider, elapsed, llm_gateway = asyncio.run(
+            replay(log, args, batch_size, gateway)
+        )
+        results[label] = (provider, elapsed)
+        print(
+            f"{label:<8} {provider.calls:>6} calls  {provider.prompt_tokens:>9} prompt tokens  "
+            f"{provider.completion_tokens:>8} completion tokens  {elapsed:7.2f} s"
+        )
+        if llm_gateway is not None:
+            stats = llm_gateway.stats
+            print(
+                f"         cache hits {stats.cache_hits}, coalesced {stats.coalesced}, "
+                f"hit rate {stats.hit_rate:.0%}"
+            )
+
+    direct, direct_s = results["direct"]
+    direct_tokens = direct.prompt_tokens + direct.completion_tokens
+    for label in ("batched", "gateway"):
+        provider, elapsed = results[label]
+        tokens = provider.prompt_tokens + provider.completion_tokens
+        print(
+            f"{label} vs direct: {1 - provider.calls / direct.calls:.0%} fewer calls, "
+            f"{1 - tokens / direct_tokens:.0%} fewer tokens, {1 - elapsed / direct_s:.0%} less wall time"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Benchmark the JSON logging pipeline used by Celery workers.
+
+Two measurements, both in records per second:
+
+1. Formatting: the previous ``JSONFormatter`` (kept here as the baseline)
+   against the current one with the stdlib encoder and with orjson.
+2. Caller cost: what a task pays per ``logger.info`` call when records are
+   written by a ``StreamHandler`` inline versus handed to a queue listener.
+   Output goes to a pipe drained by a slow reader, the way a busy log
+   collector behind stdout behaves.
+
+Records carry the task extras the base task hooks attach.
+
+Usage:
+    python -m benchmarks.bench_logging [--records 50000] [--rounds 5]
+"""
+
+import argparse
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+
+from app.core import logs
+from app.core.logs import JSONFormatter, configure_json_logging
+
+
+class BaselineJSONFormatter(logging.Formatter):
+    """The formatter as it was before the logging rework."""
+
+    def format(self, record):
+        import json
+
+        log_entry = {
+            "timestamp": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+        }
+
+        if hasattr(record, "task_id"):
+            log_entry["task_id"] = record.task_id
+        if hasattr(record, "task_name"):
+            log_entry["task_name"] = record.task_name
+        if hasattr(record, "retries"):
+            log_entry["retries"] = record.retries
+        if hasattr(record, "backoff"):
+            log_entry["backoff"] = record.backoff
+
+        return json.dumps(log_entry)
+
+
+def make_records(count: int) -> list[logging.LogRecord]:
+    """Records shaped like the base task's retry log line."""
+    records = []
+    for i in range(count):
+        record = logging.LogRecord(
+            "app.tasks.example",
+            logging.INFO,
+            __file__,
+            42,
+            "Task %s retry %s/%s",
+            ("app.tasks.refresh.refresh_offer_chunk", i % 3 + 1, 3),
+            None,
+            func="on_retry",
+        )
+        record.task_id = f"5f0c7a1e-{i:012d}"
+        record.task_name = "app.tasks.refresh.refresh_offer_chunk"
+        record.retries = i % 3 + 1
+        record.backoff = 60 * 2 ** (i % 3)
+        records.append(record)
+    return records
+
+
+def best_rate(run: Callable[[], None], count: int, rounds: int) -> float:
+    """Best records/sec over several rounds; noise only ever adds time."""
+    run()
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return count / best
+
+
+def format_rate(formatter: logging.Formatter, records: list, rounds: int) -> float:
+    def run() -> None:
+        fmt = formatter.format
+        for record in records:
+            fmt(record)
+
+    return best_rate(run, len(records), rounds)
+
+
+def slow_pipe(chunk: int = 4096, pause: float = 0.0005):
+    """Writable end of a pipe whose reader drains ``chunk`` bytes per ``pause``."""
+    read_fd, write_fd = os.pipe()
+    stop = threading.Event()
+
+    def drain() -> None:
+        with os.fdopen(read_fd, "rb", buffering=0) as reader:
+            while reader.read(chunk):
+                if not stop.is_set():
+                    time.sleep(pause)
+
+    drainer = threading.Thread(target=drain, daemon=True)
+    drainer.start()
+    writer = os.fdopen(write_fd, "w", buffering=1)
+
+    def close() -> None:
+        stop.set()
+        writer.close()
+        drainer.join()
+
+    return writer, close
+
+
+def caller_rate(queued: bool, count: int) -> float:
+    """Records/sec seen by the code calling ``logger.info``."""
+    logger = logging.getLogger(f"bench.logging.{'queued' if queued else 'inline'}")
+    logger.propagate = False
+    stream, close = slow_pipe()
+    listener = None
+    if queued:
+        listener = configure_json_logging(logger, logging.INFO, stream)
+    else:
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(BaselineJSONFormatter())
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+
+    extra = {
+        "task_id": "5f0c7a1e-000000000001",
+        "task_name": "app.tasks.refresh.refresh_offer_chunk",
+        "retries": 1,
+        "backoff": 120,
+    }
+    start = time.perf_counter()
+    for i in range(count):
+        logger.info(
+            "Task %s retry %s/%s", extra["task_name"], i % 3 + 1, 3, extra=extra
+        )
+    elapsed = time.perf_counter() - start
+
+    if listener is not None:
+        listener.stop()
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    close()
+    return count / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=50000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    records = make_records(args.records)
+    baseline = format_rate(BaselineJSONFormatter(), records, args.rounds)
+    print(f"format  baseline      {baseline:>10,.0f} records/s")
+    formatters = [("json", JSONFormatter(use_orjson=False))]
+    if logs.orjson is not None:
+        formatters.append(("orjson", JSONFormatter()))
+    for label, formatter in formatters:
+        rate = format_rate(formatter, records, args.rounds)
+        print(f"format  {label:<13} {rate:>10,.0f} records/s  {rate / baseline:5.2f}x")
+
+    # Fewer records here: the inline path is bounded by the slow reader
+    count = max(args.records // 10, 1)
+    inline = caller_rate(False, count)
+    queued = caller_rate(True, count)
+    print(f"caller  inline stream {inline:>10,.0f} records/s")
+    print(f"caller  queue handler {queued:>10,.0f} records/s  {queued / inline:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+"""Benchmark the overhead of metrics instrumentation on hot paths.
+
+Timing a whole request with and without metrics cannot resolve a 2% budget
+on a noisy box, so the overhead is measured in two parts:
+
+1. Unit cost of each hook, as the best-of-rounds difference between a
+   trivial operation with and without the hook (statement dialect events,
+   pool checkout wait timer, request middleware, base task timing).
+2. Per-operation time of a real workload, plus how many times it hits
+   each hook, counted from the metrics themselves:
+
+   - db: primary-key product lookups through an ORM session
+   - http: the price-trend route over SQLite, driven as raw ASGI calls
+   - task: eager Celery tasks doing one product lookup each
+
+Overhead is the summed hook cost per operation over the workload time.
+
+Usage:
+    python -m benchmarks.bench_metrics [--ops 2000] [--rounds 15]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import date, timedelta
+from types import SimpleNamespace
+from typing import Any
+
+from celery import Celery
+from fastapi import FastAPI
+from sqlalchemy import create_engine, insert, literal, select
+from sqlalchemy.orm import sessionmaker
+
+from app.api.prices import router as prices_router
+from app.core import metrics
+from app.db.base import Base
+from app.db.models import PriceDaily, Product
+from app.db.session import get_db
+from app.tasks.example import CallbackTask
+
+PRODUCTS = 1000
+
+SCOPE = {
+    "type": "http",
+    "asgi": {"version": "3.0"},
+    "http_version": "1.1",
+    "method": "GET",
+    "scheme": "http",
+    "path": "/products/1/price-trend",
+    "raw_path": b"/products/1/price-trend",
+    "root_path": "",
+    "query_string": b"days=30",
+    "headers": [(b"host", b"bench")],
+    "server": ("bench", 80),
+    "client": ("127.0.0.1", 1234),
+}
+
+
+def best_per_op(run: Callable[[int], Any], ops: int, rounds: int) -> float:
+    """Fastest per-op time over several rounds; noise only ever adds time."""
+    run(max(ops // 10, 1))
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        run(ops)
+        best = min(best, (time.perf_counter() - start) / ops)
+    return best
+
+
+def hook_cost(
+    hooked: Callable[[int], Any], plain: Callable[[int], Any], ops: int, rounds: int
+) -> float:
+    """
+    Per-op cost a hook adds: best hooked time minus best plain time.
+
+    Rounds alternate between the two so drift in machine speed during the
+    run affects both sides alike.
+    """
+    hooked(max(ops // 10, 1))
+    plain(max(ops // 10, 1))
+    best_hooked = best_plain = float("inf")
+    for _ in range(rounds):
+        for run, is_hooked in ((hooked, True), (plain, False)):
+            start = time.perf_counter()
+            run(ops)
+            per_op = (time.perf_counter() - start) / ops
+            if is_hooked:
+                best_hooked = min(best_hooked, per_op)
+            else:
+                best_plain = min(best_plain, per_op)
+    return best_hooked - best_plain
+
+
+def make_database() -> str:
+    """Create a SQLite file with products and 90 days of price rollups."""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    today = date.today()
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Product),
+            [
+                {"id": i, "asin": f"B0METR{i:05d}", "title": f"Headphones {i}"}
+                for i in range(1, PRODUCTS + 1)
+            ],
+        )
+        conn.execute(
+            insert(PriceDaily),
+            [
+                {
+                    "product_id": 1,
+                    "currency": "USD",
+                    "day": today - timedelta(days=back),
+                    "min_cents": 9000 + back,
+                    "max_cents": 9900 + back,
+                    "last_cents": 9500 + back,
+                    "ticks": 4,
+                }
+                for back in range(1, 91)
+            ],
+        )
+    engine.dispose()
+    return path
+
+
+# Hook unit costs
+
+
+def statement_hook_cost(ops: int, rounds: int) -> float:
+    """Cost of the statement dialect events around a trivial compiled query."""
+    plain = create_engine("sqlite://")
+    instrumented = create_engine("sqlite://")
+    metrics.instrument_engine(instrumented, "bench-unit")
+    # Compiled and parameterized, like the ORM statements of the workloads
+    statement = select(literal(1))
+
+    def loop(engine: Any) -> Callable[[int], None]:
+        conn = engine.connect()
+
+        def run(n: int) -> None:
+            for _ in range(n):
+                conn.execute(statement)
+
+        return run
+
+    return hook_cost(loop(instrumented), loop(plain), ops, rounds)
+
+
+def checkout_hook_cost(ops: int, rounds: int) -> float:
+    """Cost of the checkout wait timer around a connect and close."""
+    plain = create_engine("sqlite://")
+    instrumented = create_engine("sqlite://")
+    metrics.instrument_engine(instrumented, "bench-unit")
+
+    def loop(engine: Any) -> Callable[[int], None]:
+        def run(n: int) -> None:
+            for _ in range(n):
+                engine.connect().close()
+
+        return run
+
+    return hook_cost(loop(instrumented), loop(plain), ops, rounds)
+
+
+def middleware_cost(ops: int, rounds: int) -> float:
+    """Cost of the request middleware around a minimal ASGI app."""
+    route = type("Route", (), {"path": "/products/{product_id}/price-trend"})()
+
+    async def endpoint(scope: dict, receive: Any, send: Any) -> None:
+        scope["route"] = route
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        pass
+
+    loop = asyncio.new_event_loop()
+
+    def driver(app: Any) -> Callable[[int], None]:
+        async def drive(n: int) -> None:
+            for _ in range(n):
+                await app(dict(SCOPE), receive, send)
+
+        return lambda n: loop.run_until_complete(drive(n))
+
+    wrapped = metrics.MetricsMiddleware(endpoint)
+    return hook_cost(driver(wrapped), driver(endpoint), ops, rounds)
+
+
+def task_hook_cost(ops: int, rounds: int) -> float:
+    """Cost of the base task's timing wrapper around a no-op task body."""
+    request = SimpleNamespace(is_eager=False, delivery_info={"routing_key": "ingest"})
+    setattr(request, metrics.SENT_AT_HEADER, time.time())
+    task = SimpleNamespace(name="bench.noop", request=request)
+
+    def body() -> None:
+        return None
+
+    def timed(n: int) -> None:
+        for _ in range(n):
+            metrics.run_timed_task(task, body)
+
+    def plain(n: int) -> None:
+        for _ in range(n):
+            body()
+
+    return hook_cost(timed, plain, ops, rounds)
+
+
+# Workloads
+
+
+def statements_and_checkouts(engine_label: str) -> tuple[float, float]:
+    return (
+        sum(
+            sample.value
+            for metric in metrics.DB_QUERY_SECONDS.collect()
+            for sample in metric.samples
+            if sample.name.endswith("_count")
+            and sample.labels["engine"] == engine_label
+        ),
+        metrics.registry.get_sample_value(
+            "shopsherpa_db_pool_checkout_seconds_count", {"engine": engine_label}
+        )
+        or 0.0,
+    )
+
+
+def hook_counts(
+    run: Callable[[int], None], engine_label: str, ops: int
+) -> tuple[float, float]:
+    """Statements and pool checkouts per operation of a workload."""
+    queries, checkouts = statements_and_checkouts(engine_label)
+    run(ops)
+    after_queries, after_checkouts = statements_and_checkouts(engine_label)
+    return (after_queries - queries) / ops, (after_checkouts - checkouts) / ops
+
+
+def db_workload(path: str, label: str | None) -> Callable[[int], None]:
+    engine = create_engine(f"sqlite:///{path}")
+    if label:
+        metrics.instrument_engine(engine, label)
+    Session = sessionmaker(bind=engine)
+
+    def run(ops: int) -> None:
+        for i in range(ops):
+            with Session() as db:
+                db.scalars(select(Product).where(Product.id == i % PRODUCTS + 1)).one()
+
+    return run
+
+
+def http_workload(path: str, label: str | None) -> Callable[[int], None]:
+    engine = create_engine(f"sqlite:///{path}")
+    if label:
+        metrics.instrument_engine(engine, label)
+    Session = sessionmaker(bind=engine)
+
+    def override_db():
+        with Session() as db:
+            yield db
+
+    api = FastAPI()
+    api.include_router(prices_router)
+    api.dependency_overrides[get_db] = override_db
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            raise RuntimeError(f"Unexpected status {message['status']}")
+
+    async def drive(ops: int) -> None:
+        for _ in range(ops):
+            await api(dict(SCOPE), receive, send)
+
+    loop = asyncio.new_event_loop()
+    return lambda ops: loop.run_until_complete(drive(ops))
+
+
+def task_workload(path: str) -> Callable[[int], None]:
+    engine = create_engine(f"sqlite:///{path}")
+    Session = sessionmaker(bind=engine)
+    app = Celery("bench-metrics")
+    app.conf.update(task_always_eager=True, task_store_eager_result=False)
+
+    @app.task(name="bench.lookup", base=CallbackTask)
+    def lookup(product_id: int) -> str:
+        with Session() as db:
+            return db.scalars(
+                select(Product.title).where(Product.id == product_id)
+            ).one()
+
+    def run(ops: int) -> None:
+        for i in range(ops):
+            lookup.apply(args=(i % PRODUCTS + 1,))
+
+    return run
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=15)
+    args = parser.parse_args()
+    unit_ops = args.ops * 10
+
+    statement = statement_hook_cost(unit_ops, args.rounds)
+    checkout = checkout_hook_cost(unit_ops, args.rounds)
+    middleware = middleware_cost(unit_ops, args.rounds)
+    task = task_hook_cost(unit_ops, args.rounds)
+    print(
+        f"hook cost: statement {statement * 1e6:.2f} us  checkout {checkout * 1e6:.2f} us  "
+        f"request {middleware * 1e6:.2f} us  task {task * 1e6:.2f} us"
+    )
+
+    path = make_database()
+    try:
+        db_queries, db_checkouts = hook_counts(
+            db_workload(path, "bench-db"), "bench-db", 200
+        )
+        http_queries, http_checkouts = hook_counts(
+            http_workload(path, "bench-http"), "bench-http", 200
+        )
+        workloads = [
+            (
+                "db",
+                db_workload(path, None),
+                db_queries * statement + db_checkouts * checkout,
+            ),
+            (
+                "http",
+                http_workload(path, None),
+                middleware + http_queries * statement + http_checkouts * checkout,
+            ),
+            # The task's own statements are counted under db; only the wrapper here
+            ("task", task_workload(path), task),
+        ]
+        for label, run, cost in workloads:
+            per_op = best_per_op(run, args.ops, args.rounds)
+            print(
+                f"{label:<5} {per_op * 1e6:8.1f} us/op  metrics {cost * 1e6:6.2f} us/op  "
+                f"overhead {cost / per_op:6.2%}"
+            )
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
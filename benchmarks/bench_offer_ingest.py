@@ -0,0 +1,116 @@
+"""Benchmark bulk offer upserts against the per-object ORM path.
+
+Usage:
+    python -m benchmarks.bench_offer_ingest [--offers 100000] [--batch-size 1000]
+    python -m benchmarks.bench_offer_ingest --database-url postgresql://...
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine, delete, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.models import Offer, Product
+from app.ingest import OfferRecord, ingest_offers
+
+
+def per_object(db, records: list[OfferRecord]) -> None:
+    """Current path: look up each offer and add/update it through the ORM."""
+    for record in records:
+        offer = db.scalar(
+            select(Offer).where(
+                Offer.product_id == record.product_id,
+                Offer.currency == record.currency,
+            )
+        )
+        if offer is None:
+            db.add(
+                Offer(
+                    product_id=record.product_id,
+                    price_cents=record.price_cents,
+                    currency=record.currency,
+                )
+            )
+        else:
+            offer.price_cents = record.price_cents
+        db.flush()
+    db.commit()
+
+
+def make_records(count: int, seed: int) -> list[OfferRecord]:
+    """Build one offer per product with random prices."""
+    rng = random.Random(seed)
+    return [
+        OfferRecord(product_id=i, price_cents=rng.randint(2000, 40000))
+        for i in range(1, count + 1)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--offers", type=int, default=100_000)
+    parser.add_argument("--per-object-offers", type=int, default=5_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    path = None
+    database_url = args.database_url
+    if database_url is None:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        database_url = f"sqlite:///{path}"
+
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    with Session() as db:
+        db.execute(
+            insert(Product),
+            [
+                {"id": i, "asin": f"B0BENCH{i:06d}", "title": f"Headphones {i}"}
+                for i in range(1, args.offers + 1)
+            ],
+        )
+        db.commit()
+
+    try:
+        # Per-object path on a subset; it is too slow to run at full size
+        with Session() as db:
+            records = make_records(args.per_object_offers, seed=1)
+            start = time.perf_counter()
+            per_object(db, records)
+            elapsed = time.perf_counter() - start
+            print(f"per-object insert: {len(records) / elapsed * 60:12,.0f} offers/min")
+            db.execute(delete(Offer))
+            db.commit()
+
+        for label, seed in (
+            ("bulk insert", 1),
+            ("bulk upsert", 2),
+            ("bulk unchanged", 2),
+        ):
+            with Session() as db:
+                records = make_records(args.offers, seed=seed)
+                start = time.perf_counter()
+                stats = ingest_offers(db, records, batch_size=args.batch_size)
+                db.commit()
+                elapsed = time.perf_counter() - start
+            print(
+                f"{label + ':':<18} {args.offers / elapsed * 60:12,.0f} offers/min "
+                f"(inserted={stats.inserted} updated={stats.updated} unchanged={stats.unchanged})"
+            )
+    finally:
+        engine.dispose()
+        if path:
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
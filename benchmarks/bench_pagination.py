@@ -0,0 +1,140 @@
+"""Benchmark deep-page latency of OFFSET versus keyset pagination.
+
+Seeds SQLite with products spread over a few brands, then fetches one page
+at increasing depths, both by skipping rows with OFFSET and by seeking past
+the previous page's last row with the cursor ``list_products`` issues. Runs
+over the whole catalog and within a single brand.
+
+Usage:
+    python -m benchmarks.bench_pagination [--products 1000000] [--limit 50]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select, text
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db.base import Base
+from app.db.models import Product
+from app.repositories import list_products
+from app.repositories.pagination import encode_cursor
+from app.repositories.products import PRODUCTS_SCOPE
+
+BRANDS = ("Sony", "Bose", "Sennheiser", "Apple", "JBL", "Jabra", "AKG", "Beyerdynamic")
+BATCH = 50_000
+
+
+def seed(engine, products: int) -> None:
+    """Insert products, several per creation second, in id order."""
+    start = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        for low in range(1, products + 1, BATCH):
+            conn.execute(
+                insert(Product),
+                [
+                    {
+                        "id": i,
+                        "asin": f"B0PAGE{i:07d}",
+                        "title": f"Headphones {i}",
+                        "brand": BRANDS[i % len(BRANDS)],
+                        "category": "over-ear",
+                        "created_at": start + timedelta(seconds=i // 3),
+                    }
+                    for i in range(low, min(low + BATCH, products + 1))
+                ],
+            )
+        conn.execute(text("ANALYZE"))
+
+
+def cursor_at(db: Session, brand: str | None, depth: int) -> str | None:
+    """Cursor a client would hold after paging down to ``depth`` rows."""
+    if depth == 0:
+        return None
+    stmt = select(Product.created_at, Product.id)
+    if brand is not None:
+        stmt = stmt.where(Product.brand == brand)
+    created_at, last_id = db.execute(
+        stmt.order_by(Product.created_at.desc(), Product.id).offset(depth - 1).limit(1)
+    ).one()
+    return encode_cursor(PRODUCTS_SCOPE, created_at.isoformat(), last_id)
+
+
+def median_ms(run: Callable[[], object], repeats: int) -> float:
+    run()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=7)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine)
+
+    try:
+        start = time.perf_counter()
+        seed(engine, args.products)
+        print(
+            f"seeded {args.products:,} products in {time.perf_counter() - start:.1f}s"
+        )
+
+        for brand in (None, BRANDS[0]):
+            total = args.products if brand is None else args.products // len(BRANDS)
+            depths = sorted(
+                {0, total // 100, total // 10, total // 2, total - args.limit}
+            )
+            print(
+                f"\n{brand or 'all products'} ({total:,} rows, {args.limit} per page)"
+            )
+            print(f"{'depth':>10} {'offset ms':>10} {'keyset ms':>10} {'speedup':>8}")
+            with SessionLocal() as db:
+                for depth in depths:
+                    cursor = cursor_at(db, brand, depth)
+
+                    def by_offset(brand=brand, depth=depth) -> list[Product]:
+                        stmt = select(Product)
+                        if brand is not None:
+                            stmt = stmt.where(Product.brand == brand)
+                        return db.scalars(
+                            stmt.order_by(Product.created_at.desc(), Product.id)
+                            .offset(depth)
+                            .limit(args.limit)
+                        ).all()
+
+                    def by_keyset(brand=brand, cursor=cursor) -> list[Product]:
+                        return list_products(
+                            db, brand=brand, limit=args.limit, cursor=cursor
+                        ).items
+
+                    assert [p.id for p in by_offset()] == [p.id for p in by_keyset()]
+                    offset_ms = median_ms(by_offset, args.repeats)
+                    keyset_ms = median_ms(by_keyset, args.repeats)
+                    print(
+                        f"{depth:>10,} {offset_ms:>10.2f} {keyset_ms:>10.2f} "
+                        f"{offset_ms / keyset_ms:>7.1f}x"
+                    )
+                    db.expunge_all()
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
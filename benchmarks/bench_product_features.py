@@ -0,0 +1,198 @@
+"""Benchmark fetching ranking features for a candidate set.
+
+Seeds SQLite with products, offers, review snippets and daily price rollups,
+materializes product_features and times ``load_candidates`` for random
+candidate sets three ways:
+
+- aggregates: per-request MIN/COUNT queries over offers and reviews (no
+  sentiment or price drop, the behaviour without product_features)
+- aggregates + live features: the above plus computing review sentiment
+  and price drops per request, which is what the table precomputes
+- feature store: the worker's in-memory product_features columns
+
+Usage:
+    python -m benchmarks.bench_product_features [--products 100000] [--candidates 10000]
+        [--repeats 20]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.base import Base
+from app.db.models import Offer, PriceDaily, Product, Review
+from app.ranking.features import (
+    get_feature_store,
+    refresh_product_features,
+    review_sentiment,
+)
+from app.ranking.service import load_candidates
+from app.repositories.prices import price_drops
+
+SNIPPETS = (
+    "Great sound and very comfortable",
+    "Not comfortable after an hour",
+    "Solid build",
+    "Terrible mic, returned it",
+    "Crisp highs, deep bass",
+    "Flimsy hinge broke",
+    "Arrived on time",
+    "Excellent noise cancelling",
+    "Cheap feel but worth it",
+)
+BATCH = 50_000
+
+
+def seed(engine, products: int, rng: random.Random) -> None:
+    """Products with USD (and some EUR) offers, 0-8 reviews and a week of price rollups."""
+    today = datetime.utcnow().date()
+    with engine.begin() as conn:
+        for start in range(1, products + 1, BATCH):
+            ids = range(start, min(start + BATCH, products + 1))
+            conn.execute(
+                insert(Product),
+                [
+                    {"id": i, "asin": f"B{i:09d}", "title": f"Headphones {i}"}
+                    for i in ids
+                ],
+            )
+            conn.execute(
+                insert(Offer),
+                [
+                    {
+                        "product_id": i,
+                        "price_cents": rng.randint(1500, 60000),
+                        "currency": currency,
+                    }
+                    for i in ids
+                    for currency in ("USD", "EUR")[: rng.randint(1, 2)]
+                ],
+            )
+            conn.execute(
+                insert(Review),
+                [
+                    {
+                        "product_id": i,
+                        "source": "bench",
+                        "snippet": rng.choice(SNIPPETS),
+                    }
+                    for i in ids
+                    for _ in range(rng.randint(0, 8))
+                ],
+            )
+            rollups = []
+            for i in ids:
+                price = rng.randint(1500, 60000)
+                for day in range(7):
+                    rollups.append(
+                        {
+                            "product_id": i,
+                            "currency": "USD",
+                            "day": today - timedelta(days=day),
+                            "min_cents": price,
+                            "max_cents": price,
+                            "last_cents": price,
+                            "ticks": 1,
+                        }
+                    )
+                    price = int(price * rng.uniform(0.95, 1.1))
+            conn.execute(insert(PriceDaily), rollups)
+
+
+def live_features(db, ids: list[int]) -> None:
+    """Aggregates plus the sentiment and price drops product_features stores."""
+    load_candidates(db, ids, use_features=False)
+    price_drops(db, ids, "USD", days=settings.product_features_trend_days)
+    snippets: dict[int, list[str]] = {}
+    for product_id, snippet in db.execute(
+        select(Review.product_id, Review.snippet).where(Review.product_id.in_(ids))
+    ):
+        snippets.setdefault(product_id, []).append(snippet or "")
+    {product_id: review_sentiment(texts) for product_id, texts in snippets.items()}
+
+
+def timed(label: str, fn, samples_for: list[list[int]]) -> float:
+    samples = []
+    for ids in samples_for:
+        start = time.perf_counter()
+        fn(ids)
+        samples.append((time.perf_counter() - start) * 1e3)
+    p50 = statistics.median(samples)
+    print(f"  {label:<28} p50 {p50:8.1f} ms  max {max(samples):8.1f} ms")
+    return p50
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--candidates", type=int, default=10_000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    rng = random.Random(23)
+
+    try:
+        start = time.perf_counter()
+        seed(engine, args.products, rng)
+        print(
+            f"seeded {args.products:,} products in {time.perf_counter() - start:.1f} s"
+        )
+
+        db = sessionmaker(bind=engine)()
+        start = time.perf_counter()
+        refresh_product_features(db, range(1, args.products + 1))
+        db.commit()
+        print(f"materialized product_features in {time.perf_counter() - start:.1f} s")
+
+        start = time.perf_counter()
+        get_feature_store(db).get(db)
+        print(f"loaded feature store in {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+        # Incremental refresh after 1% of products change
+        changed = rng.sample(range(1, args.products + 1), args.products // 100)
+        refresh_product_features(db, changed)
+        db.commit()
+        store = get_feature_store(db)
+        start = time.perf_counter()
+        store.refresh(db)
+        print(
+            f"applied {len(changed):,} changed rows in {(time.perf_counter() - start) * 1e3:.1f} ms"
+        )
+
+        population = range(1, args.products + 1)
+        sets = [rng.sample(population, args.candidates) for _ in range(args.repeats)]
+        print(f"\n{args.candidates:,} candidates x {args.repeats}:")
+        before = timed(
+            "aggregates", lambda ids: load_candidates(db, ids, use_features=False), sets
+        )
+        live = timed(
+            "aggregates + live features", lambda ids: live_features(db, ids), sets
+        )
+        after = timed(
+            "feature store",
+            lambda ids: load_candidates(db, ids, use_features=True),
+            sets,
+        )
+        print(
+            f"\nspeedup: {before / after:.1f}x vs aggregates, {live / after:.1f}x vs live features"
+        )
+        db.close()
+    finally:
+        engine.dispose()
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Benchmark the in-memory product store against ORM loading.
+
+Seeds SQLite with products spread over a few dozen brands and categories,
+then compares:
+
+- load: every product as ORM ``Product`` instances (``select(Product)``)
+  versus ``ProductColumns`` built from a Core ``select()``; time and
+  memory retained, measured with tracemalloc
+- per request: usage matching plus summaries for random candidate sets,
+  via ``get_products`` (ORM) versus the loaded store
+
+Usage:
+    python -m benchmarks.bench_product_store [--products 100000] [--candidates 10000]
+        [--repeats 20]
+"""
+
+import argparse
+import gc
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.models import Product
+from app.ranking.products import ProductColumns, load_product_rows
+from app.repositories.products import get_products
+
+BRANDS = (
+    "Sony",
+    "Bose",
+    "Sennheiser",
+    "Apple",
+    "JBL",
+    "Jabra",
+    "AKG",
+    "Beyerdynamic",
+    "Anker",
+    "Skullcandy",
+    "Audio-Technica",
+    "Shure",
+    "Marshall",
+    "HyperX",
+    "Philips",
+)
+CATEGORIES = (
+    "Over-Ear Headphones",
+    "Earbuds",
+    "Gaming Headsets",
+    "Sport Earphones",
+    "Studio Monitors",
+    "Travel Headphones",
+    None,
+)
+WORDS = (
+    "Wireless",
+    "Noise Cancelling",
+    "Studio",
+    "Pro",
+    "Gaming",
+    "Sport",
+    "Bass",
+    "Lite",
+)
+USAGE = "gaming"
+BATCH = 50_000
+
+
+def seed(engine, products: int, rng: random.Random) -> None:
+    with engine.begin() as conn:
+        for start in range(1, products + 1, BATCH):
+            conn.execute(
+                insert(Product),
+                [
+                    {
+                        "id": i,
+                        "asin": f"B{i:09d}",
+                        "title": f"{rng.choice(BRANDS)} {rng.choice(WORDS)} {rng.choice(WORDS)} {i}",
+                        "brand": rng.choice(BRANDS),
+                        "category": rng.choice(CATEGORIES),
+                    }
+                    for i in range(start, min(start + BATCH, products + 1))
+                ],
+            )
+
+
+def measure(fn):
+    """Run ``fn`` and return (result, seconds, bytes retained)."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, retained
+
+
+def orm_request(session_factory, ids: list[int]) -> dict:
+    """Usage match and summaries from ORM instances, as before the store."""
+    needle = USAGE.lower()
+    with session_factory() as db:
+        products = get_products(db, ids)
+        return {
+            product.id: (
+                needle in product.title.lower()
+                or needle in (product.category or "").lower(),
+                product.asin,
+                product.title,
+                product.brand,
+            )
+            for product in products
+        }
+
+
+def store_request(columns: ProductColumns, ids: list[int]) -> dict:
+    array = np.asarray(ids, dtype=np.int64)
+    _, match = columns.usage_match(array, USAGE)
+    # Responses show the top few candidates only
+    return {"matches": int(match.sum()), "summaries": columns.summaries(ids[:20])}
+
+
+def timed(label: str, fn, sets: list[list[int]]) -> float:
+    samples = []
+    for ids in sets:
+        start = time.perf_counter()
+        fn(ids)
+        samples.append((time.perf_counter() - start) * 1e3)
+    p50 = statistics.median(samples)
+    print(f"  {label:<8} p50 {p50:8.2f} ms  max {max(samples):8.2f} ms")
+    return p50
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--candidates", type=int, default=10_000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    rng = random.Random(5)
+
+    try:
+        seed(engine, args.products, rng)
+        print(f"{args.products:,} products")
+
+        with session_factory() as db:
+            products, orm_seconds, orm_bytes = measure(
+                lambda: db.scalars(select(Product)).all()
+            )
+            print(
+                f"  ORM      load {orm_seconds * 1e3:8.1f} ms  {orm_bytes / 2**20:7.1f} MiB"
+            )
+            del products
+            db.expunge_all()
+
+        with session_factory() as db:
+            columns, store_seconds, store_bytes = measure(
+                lambda: ProductColumns.empty().append(load_product_rows(db))
+            )
+            print(
+                f"  store    load {store_seconds * 1e3:8.1f} ms  {store_bytes / 2**20:7.1f} MiB"
+            )
+        print(f"  memory: {orm_bytes / store_bytes:.1f}x less with the store")
+
+        population = range(1, args.products + 1)
+        sets = [rng.sample(population, args.candidates) for _ in range(args.repeats)]
+        print(
+            f"\n{args.candidates:,} candidates x {args.repeats} (usage match + summaries):"
+        )
+        before = timed("ORM", lambda ids: orm_request(session_factory, ids), sets)
+        after = timed("store", lambda ids: store_request(columns, ids), sets)
+        print(f"\nspeedup: {before / after:.1f}x")
+    finally:
+        engine.dispose()
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Benchmark interactive-task latency while an ingest backlog drains.
+
+Runs in-process workers against Celery's in-memory broker. A
+backlog of ingest tasks is enqueued before the workers start, then
+interactive probe tasks are sent at a fixed interval until the backlog has
+drained; each probe records the
+time from enqueue to start. Three setups are compared:
+
+- idle: the routed topology with no backlog
+- shared: one queue and one worker at concurrency 4 (the old ``make worker``)
+- routed: ``app.tasks.queues`` routes, one worker per queue sized by the
+  per-queue profiles in Settings
+
+The memory transport ignores message priorities, so only queue separation
+is measured here.
+
+Usage:
+    python -m benchmarks.bench_queue_routing [--backlog 10000] [--ingest-ms 1]
+"""
+
+import argparse
+import multiprocessing
+import statistics
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from celery import Celery
+from celery.contrib.testing.worker import start_worker
+from kombu import Queue
+
+from app.core.config import settings
+from app.tasks import queues
+
+INGEST_TASK = "app.tasks.refresh.refresh_offer_chunk"
+PROBE_TASK = "app.tasks.example.demo_task"
+
+
+def make_app(
+    routed: bool, ingest_seconds: float
+) -> tuple[Celery, list[float], list[int]]:
+    """Build an isolated app with one ingest task and one probe task."""
+    app = Celery("bench", broker="memory://")
+    app.conf.update(
+        task_ignore_result=True,
+        worker_hijack_root_logger=False,
+        broker_transport_options={"polling_interval": 0.001},
+    )
+    if routed:
+        app.conf.update(
+            task_queues=queues.task_queues(),
+            task_routes=queues.TASK_ROUTES,
+            task_default_queue=queues.INTERACTIVE,
+        )
+    else:
+        app.conf.update(task_queues=[Queue("shared")], task_default_queue="shared")
+
+    latencies: list[float] = []
+    drained = [0]
+    lock = threading.Lock()
+
+    @app.task(name=INGEST_TASK)
+    def ingest() -> None:
+        time.sleep(ingest_seconds)
+        with lock:
+            drained[0] += 1
+
+    @app.task(name=PROBE_TASK)
+    def probe(sent: float) -> None:
+        latencies.append(time.perf_counter() - sent)
+
+    return app, latencies, drained
+
+
+def workers(app: Celery, routed: bool) -> list:
+    """
+    Worker contexts for the setup.
+
+    The thread pool stalls on the memory transport, so a queue's concurrency
+    is emulated with that many single-slot solo workers.
+    """
+    options = {"pool": "solo", "perform_ping_check": False, "shutdown_timeout": 60}
+    if not routed:
+        return [
+            start_worker(app, prefetch_multiplier=1, queues=["shared"], **options)
+            for _ in range(4)
+        ]
+    return [
+        start_worker(
+            app,
+            prefetch_multiplier=settings.celery_queue_prefetch.get(name, 1),
+            queues=[name],
+            **options,
+        )
+        for name in (queues.INTERACTIVE, queues.INGEST)
+        for _ in range(settings.celery_queue_concurrency.get(name, 1))
+    ]
+
+
+def run(
+    routed: bool, backlog: int, ingest_seconds: float, interval: float, min_probes: int
+):
+    """Drain the backlog while probing; return probe latencies and drain seconds."""
+    app, latencies, drained = make_app(routed, ingest_seconds)
+    ingest, probe = app.tasks[INGEST_TASK], app.tasks[PROBE_TASK]
+    for _ in range(backlog):
+        ingest.delay()
+
+    contexts = workers(app, routed)
+    start = time.perf_counter()
+    for context in contexts:
+        context.__enter__()
+    try:
+        sent = 0
+        while drained[0] < backlog or sent < min_probes:
+            probe.delay(time.perf_counter())
+            sent += 1
+            time.sleep(interval)
+        drain_seconds = time.perf_counter() - start
+
+        deadline = time.monotonic() + 60
+        while len(latencies) < sent and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        for context in reversed(contexts):
+            context.__exit__(None, None, None)
+    return sorted(latencies), drain_seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backlog", type=int, default=10000)
+    parser.add_argument("--ingest-ms", type=float, default=1.0)
+    parser.add_argument("--probe-interval-ms", type=float, default=20.0)
+    parser.add_argument(
+        "--probes", type=int, default=50, help="Minimum probes per setup"
+    )
+    args = parser.parse_args()
+
+    setups = [
+        ("idle", True, 0),
+        ("shared", False, args.backlog),
+        ("routed", True, args.backlog),
+    ]
+    for label, routed, backlog in setups:
+        # Memory broker state is process-global, so each setup gets a fresh process
+        with ProcessPoolExecutor(
+            1, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            latencies, drain = pool.submit(
+                run,
+                routed,
+                backlog,
+                args.ingest_ms / 1000,
+                args.probe_interval_ms / 1000,
+                args.probes,
+            ).result()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(
+            f"{label:<7} backlog {backlog:6d}  drained in {drain:6.2f}s  "
+            f"probes {len(latencies):4d}  p50 {statistics.median(latencies) * 1e3:8.1f} ms  "
+            f"p95 {p95 * 1e3:8.1f} ms  max {latencies[-1] * 1e3:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Benchmark vectorized candidate scoring.
+
+Target: 50k candidates scored and top-N selected in under 50 ms on one core.
+
+Usage:
+    python -m benchmarks.bench_ranking [--sizes 1000,10000,50000,200000] [--top 20]
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+# Measure single-core performance regardless of the BLAS build
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+
+import numpy as np  # noqa: E402
+
+from app.ranking import Candidates, QueryParams, RankingEngine  # noqa: E402
+
+TARGET_SIZE = 50_000
+TARGET_MS = 50.0
+
+
+def synthetic(n: int, rng: np.random.Generator) -> Candidates:
+    """Random candidates with ~5% missing prices and similarities."""
+    price = rng.uniform(1500, 60000, n)
+    price[rng.random(n) < 0.05] = np.nan
+    similarity = rng.uniform(-1, 1, n)
+    similarity[rng.random(n) < 0.05] = np.nan
+    return Candidates.from_columns(
+        product_ids=np.arange(n),
+        price_cents=price,
+        review_count=rng.integers(0, 20000, n),
+        similarity=similarity,
+        review_sentiment=rng.uniform(0, 1, n),
+        usage_match=rng.random(n) < 0.2,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,50000,200000")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(11)
+    engine = RankingEngine()
+    params = QueryParams(budget_min_cents=5000, budget_max_cents=20000, usage="gaming")
+
+    for size in (int(value) for value in args.sizes.split(",")):
+        candidates = synthetic(size, rng)
+        engine.top_n(params, candidates, args.top)  # warm up
+
+        samples = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            engine.top_n(params, candidates, args.top)
+            samples.append((time.perf_counter() - start) * 1e3)
+
+        cuts = statistics.quantiles(samples, n=100)
+        verdict = ""
+        if size == TARGET_SIZE:
+            verdict = "  PASS" if cuts[98] < TARGET_MS else "  FAIL"
+        print(
+            f"{size:>8,} candidates: p50 {cuts[49]:7.2f} ms  p99 {cuts[98]:7.2f} ms{verdict}"
+        )
+
+
+if __name__ == "__main__":
+    main()
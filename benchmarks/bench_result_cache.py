@@ -0,0 +1,168 @@
+"""Benchmark the ranking result cache on a replayed query log.
+
+Queries are drawn from a skewed mix of phrasings so popular requests repeat
+with different wording, budgets and casing. A fraction of products have
+price changes between requests, invalidating entries that include them.
+
+Usage:
+    python -m benchmarks.bench_result_cache [--products 20000] [--requests 2000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.cache import RankingKey, RankingResultCache, TTLCache
+from app.cache.results import freshness_deadline, get_change_log
+from app.db.base import Base
+from app.db.models import Offer, Product, Query, Ranking, Review
+from app.ingest import OfferRecord, ingest_offers
+from app.ranking import load_candidates, rank_query
+
+TOPICS = [
+    ("noise cancelling headphones", "travel"),
+    ("wireless earbuds", "running"),
+    ("mechanical keyboard", "gaming"),
+    ("4k monitor", "work"),
+    ("espresso machine", None),
+    ("robot vacuum", None),
+    ("standing desk", "work"),
+    ("portable speaker", "outdoor"),
+]
+TEMPLATES = [
+    "best {} under ${}",
+    "{} under {} dollars",
+    "Good {} below ${}",
+    "{}, max ${}",
+]
+
+
+def percentiles(samples: list[float]) -> str:
+    """Format p50/p99 of latency samples in milliseconds."""
+    if len(samples) < 2:
+        return "n/a"
+    cuts = statistics.quantiles(samples, n=100)
+    return f"p50={cuts[49] * 1e3:7.2f}ms  p99={cuts[98] * 1e3:7.2f}ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--candidates", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument(
+        "--change-rate",
+        type=float,
+        default=0.02,
+        help="Chance of a price change before each request",
+    )
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    with Session() as db:
+        db.execute(
+            insert(Product),
+            [
+                {
+                    "id": i,
+                    "asin": f"B0RES{i:06d}",
+                    "title": f"{TOPICS[i % len(TOPICS)][0]} {i}",
+                }
+                for i in range(1, args.products + 1)
+            ],
+        )
+        db.execute(
+            insert(Offer),
+            [
+                {"product_id": i, "price_cents": rng.randint(2000, 40000)}
+                for i in range(1, args.products + 1)
+            ],
+        )
+        db.execute(
+            insert(Review),
+            [
+                {
+                    "product_id": rng.randint(1, args.products),
+                    "source": "Amazon",
+                    "snippet": "ok",
+                }
+                for _ in range(args.products * 2)
+            ],
+        )
+        db.commit()
+
+    # Offer ingests mark the process change log, as in a worker
+    cache = RankingResultCache(TTLCache(max_size=1000, ttl=86400), get_change_log())
+    weights = [1 / (rank + 1) for rank in range(len(TOPICS))]
+    hit_times, miss_times = [], []
+
+    with Session() as db:
+        for _ in range(args.requests):
+            if rng.random() < args.change_rate:
+                ingest_offers(
+                    db,
+                    [
+                        OfferRecord(
+                            product_id=rng.randint(1, args.products),
+                            price_cents=rng.randint(2000, 40000),
+                        )
+                    ],
+                )
+                db.commit()
+
+            topic, usage = rng.choices(TOPICS, weights)[0]
+            budget = rng.choice([100, 150, 200, 300])
+            raw_text = rng.choice(TEMPLATES).format(topic, budget)
+            budget_max = budget - rng.choice([0, 1, 5])
+
+            start = time.perf_counter()
+            query = Query(raw_text=raw_text, budget_max=budget_max, usage=usage)
+            db.add(query)
+            db.flush()
+
+            def compute(query=query, usage=usage):
+                ids = rng.sample(range(1, args.products + 1), args.candidates)
+                rows = rank_query(db, query, load_candidates(db, ids, usage=usage))
+                return rows, freshness_deadline(db, [row["product_id"] for row in rows])
+
+            key = RankingKey.from_query(raw_text, None, budget_max, usage)
+            result, hit = cache.get_or_compute(key, compute)
+            if hit:
+                # Copy the cached rankings onto the new query
+                now = datetime.utcnow()
+                db.execute(
+                    insert(Ranking),
+                    [
+                        {**row, "query_id": query.id, "created_at": now}
+                        for row in result.rankings
+                    ],
+                )
+            db.commit()
+            (hit_times if hit else miss_times).append(time.perf_counter() - start)
+
+    engine.dispose()
+    os.unlink(path)
+
+    stats = cache.stats
+    print(f"requests      {args.requests:,}")
+    print(f"hit rate      {stats.hit_rate:.1%}  ({stats.invalidated} invalidated)")
+    print(f"miss latency  {percentiles(miss_times)}")
+    print(f"hit latency   {percentiles(hit_times)}")
+    print(f"saved/hit     {stats.saved_ms_per_hit:.2f} ms ranking compute")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Benchmark review ingest throughput with URL and near-duplicate detection.
+
+Streams synthetic reviews into SQLite through ``ingest_reviews``. Unique
+snippets are 15-40 words from a Zipf-weighted vocabulary. Duplicates are
+planted among them:
+
+- URL duplicates: an earlier review of the product re-crawled with
+  tracking parameters, www. and a trailing slash
+- near duplicates: an earlier snippet of the product under a new URL,
+  re-cased and with one word replaced
+
+The run reports records per second for SimHashing alone and for the full
+ingest (lookup, LSH check, insert, then search document and feature
+refresh), plus how many planted duplicates were caught.
+
+Usage:
+    python -m benchmarks.bench_review_ingest [--records 1000000] [--products 50000]
+        [--batch-size 5000]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from collections import deque
+from itertools import accumulate, islice
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.models import Product
+from app.ingest.reviews import ReviewRecord, ingest_reviews, simhashes
+
+COMMON = (
+    "the",
+    "and",
+    "for",
+    "with",
+    "very",
+    "sound",
+    "great",
+    "comfortable",
+    "battery",
+    "bass",
+    "mic",
+    "case",
+    "fit",
+    "noise",
+    "price",
+    "quality",
+    "ears",
+    "hours",
+)
+VOCABULARY = [
+    f"{prefix}{suffix}"
+    for prefix in ("sol", "ver", "mar", "tek", "lum", "dor", "kal", "zen", "pri", "bru")
+    for suffix in range(500)
+]
+URL_DUPLICATES = 0.05
+NEAR_DUPLICATES = 0.05
+RECENT = 20_000
+
+
+def synthetic(records: int, products: int, seed: int = 9):
+    """Yield (record, planted kind) tuples; kind is None, "url" or "near"."""
+    rng = random.Random(seed)
+    cum_weights = list(accumulate(1 / (rank + 1) for rank in range(len(VOCABULARY))))
+    recent: deque[ReviewRecord] = deque(maxlen=RECENT)
+    for number in range(records):
+        roll = rng.random()
+        if recent and roll < URL_DUPLICATES:
+            earlier = rng.choice(recent)
+            url = (
+                earlier.url.replace("https://", "http://www.")
+                + "/?ref=cm_cr&utm_source=feed"
+            )
+            yield ReviewRecord(
+                earlier.product_id, "crawler", url, earlier.snippet
+            ), "url"
+            continue
+        if recent and roll < URL_DUPLICATES + NEAR_DUPLICATES:
+            earlier = rng.choice(recent)
+            words = earlier.snippet.split()
+            words[rng.randrange(len(words))] = rng.choice(COMMON)
+            snippet = " ".join(words).capitalize() + "!"
+            url = f"https://mirror.example/reviews/{number}"
+            yield ReviewRecord(earlier.product_id, "mirror", url, snippet), "near"
+            continue
+        words = [
+            rng.choice(COMMON) if rng.random() < 0.3 else word
+            for word in rng.choices(
+                VOCABULARY, cum_weights=cum_weights, k=rng.randint(15, 40)
+            )
+        ]
+        record = ReviewRecord(
+            rng.randint(1, products),
+            "crawler",
+            f"https://example.com/reviews/R{number}",
+            " ".join(words),
+        )
+        recent.append(record)
+        yield record, None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--products", type=int, default=50_000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Product),
+            [
+                {"id": i, "asin": f"B{i:09d}", "title": f"Headphones {i}"}
+                for i in range(1, args.products + 1)
+            ],
+        )
+
+    try:
+        stream = synthetic(args.records, args.products)
+        sample = [
+            record.snippet
+            for record, _ in islice(synthetic(100_000, args.products), 100_000)
+        ]
+        start = time.perf_counter()
+        for offset in range(0, len(sample), args.batch_size):
+            simhashes(sample[offset : offset + args.batch_size])
+        seconds = time.perf_counter() - start
+        print(f"simhash only: {len(sample) / seconds:,.0f} snippets/s")
+
+        planted = {"url": 0, "near": 0}
+        generating = [0.0]
+
+        def records():
+            # Time spent generating the synthetic stream is not ingest time
+            while True:
+                start = time.perf_counter()
+                item = next(stream, None)
+                generating[0] += time.perf_counter() - start
+                if item is None:
+                    return
+                record, kind = item
+                if kind is not None:
+                    planted[kind] += 1
+                yield record
+
+        with sessionmaker(bind=engine)() as db:
+            start = time.perf_counter()
+            stats = ingest_reviews(db, records(), batch_size=args.batch_size)
+            db.commit()
+            seconds = time.perf_counter() - start - generating[0]
+
+        print(
+            f"ingest: {stats.total:,} records in {seconds:.1f} s ({stats.total / seconds:,.0f} records/s)"
+        )
+        print(
+            f"  inserted {stats.inserted:,} across {len(stats.product_ids):,} products"
+        )
+        print(
+            f"  URL duplicates  {stats.duplicate_urls:>8,} skipped ({planted['url']:,} planted)"
+        )
+        print(
+            f"  near duplicates {stats.near_duplicates:>8,} skipped ({planted['near']:,} planted)"
+        )
+        print(f"  database size {os.path.getsize(path) / 2**20:,.0f} MiB")
+    finally:
+        engine.dispose()
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
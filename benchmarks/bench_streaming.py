@@ -0,0 +1,184 @@
+"""Load test time-to-first-result for streaming vs buffered recommendations.
+
+Starts the app under uvicorn against a temporary SQLite database and fires
+concurrent requests at both endpoints. ``--stage-delay`` adds latency to the
+embedding stage to stand in for a remote model.
+
+Usage:
+    python -m benchmarks.bench_streaming [--products 5000] [--requests 200] [--concurrency 20]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+
+import httpx
+import uvicorn
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.api import recommendations
+from app.core.config import settings
+from app.db.base import Base
+from app.db.models import Offer, Product
+from app.embeddings import StubEmbedder
+from app.main import app
+
+WORDS = "wireless noise cancelling studio gaming bluetooth travel bass open back over ear".split()
+
+
+class SlowEmbedder(StubEmbedder):
+    """StubEmbedder with a fixed per-call delay."""
+
+    delay = 0.0
+
+    def embed(self, texts):
+        time.sleep(self.delay)
+        return super().embed(texts)
+
+
+def percentiles(samples: list[float]) -> str:
+    """Format p50/p95 of latency samples in milliseconds."""
+    cuts = statistics.quantiles(samples, n=100)
+    return f"p50={cuts[49] * 1e3:7.1f}ms  p95={cuts[94] * 1e3:7.1f}ms"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def buffered(client: httpx.AsyncClient, body: dict) -> dict[str, float]:
+    start = time.perf_counter()
+    response = await client.post("/recommendations", json=body)
+    response.raise_for_status()
+    elapsed = time.perf_counter() - start
+    return {"first_byte": elapsed, "first_result": elapsed, "total": elapsed}
+
+
+async def streamed(client: httpx.AsyncClient, body: dict) -> dict[str, float]:
+    start = time.perf_counter()
+    timings: dict[str, float] = {}
+    async with client.stream("POST", "/recommendations/stream", json=body) as response:
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            timings.setdefault("first_byte", time.perf_counter() - start)
+            if json.loads(line)["event"] in ("candidates", "ranking"):
+                timings.setdefault("first_result", time.perf_counter() - start)
+    timings["total"] = time.perf_counter() - start
+    return timings
+
+
+async def load(
+    base_url: str, fetch, requests: int, concurrency: int
+) -> dict[str, list[float]]:
+    limit = asyncio.Semaphore(concurrency)
+    results: dict[str, list[float]] = {
+        "first_byte": [],
+        "first_result": [],
+        "total": [],
+    }
+
+    async def one(i: int) -> None:
+        body = {
+            "raw_text": f"{WORDS[i % len(WORDS)]} {WORDS[(i * 7) % len(WORDS)]} headphones"
+        }
+        async with limit:
+            for name, value in (await fetch(client, body)).items():
+                results[name].append(value)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        await asyncio.gather(*(one(i) for i in range(requests)))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument(
+        "--stage-delay",
+        type=float,
+        default=0.25,
+        help="Seconds added to the embedding stage",
+    )
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}", pool_size=args.concurrency * 2)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    embedder = StubEmbedder()
+    titles = [
+        f"{WORDS[i % len(WORDS)]} {WORDS[(i * 3) % len(WORDS)]} headphones {i}"
+        for i in range(args.products)
+    ]
+    with Session() as db:
+        db.execute(
+            insert(Product),
+            [
+                {
+                    "id": i + 1,
+                    "asin": f"B0STR{i:06d}",
+                    "title": title,
+                    "embedding": vector,
+                }
+                for i, (title, vector) in enumerate(
+                    zip(titles, embedder.embed(titles), strict=True)
+                )
+            ],
+        )
+        db.execute(
+            insert(Offer),
+            [
+                {"product_id": i + 1, "price_cents": 2000 + i}
+                for i in range(args.products)
+            ],
+        )
+        db.commit()
+
+    SlowEmbedder.delay = args.stage_delay
+    settings.embedding_backend = f"{__name__}:SlowEmbedder"
+    recommendations.get_result_cache = (
+        lambda: None
+    )  # measure the full pipeline every time
+    app.dependency_overrides[recommendations.get_session_factory] = lambda: Session
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        # Build the in-memory vector index before timing anything
+        asyncio.run(load(base_url, buffered, 1, 1))
+        for name, fetch in (("buffered", buffered), ("streamed", streamed)):
+            results = asyncio.run(
+                load(base_url, fetch, args.requests, args.concurrency)
+            )
+            print(f"{name}:")
+            for metric in ("first_byte", "first_result", "total"):
+                print(f"  {metric:<13} {percentiles(results[metric])}")
+    finally:
+        server.should_exit = True
+        thread.join()
+        engine.dispose()
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
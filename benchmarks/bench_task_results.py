@@ -0,0 +1,95 @@
+"""Benchmark results-backend memory for result serializers and offloading.
+
+Stores synthetic ingest-style results through Celery's in-memory cache
+backend (a stand-in for Redis: values are kept as the encoded bytes Redis
+would hold) and reports bytes held and encode+store time per result.
+
+Usage:
+    python -m benchmarks.bench_task_results [--results 2000] [--products 500]
+"""
+
+import argparse
+import random
+import shutil
+import tempfile
+import time
+import uuid
+
+from celery import Celery
+from celery.backends.cache import DummyClient
+
+from app.core import blobs
+from app.core.config import settings
+from app.core.serialization import MSGPACK_ZLIB, register_compressed_serializers
+
+
+def synthetic_result(rng: random.Random, products: int) -> dict:
+    """Result shaped like an offer refresh chunk echoing its input."""
+    ids = sorted(rng.sample(range(1, 2_000_000), products))
+    return {
+        "original": {"offer_ids": ids, "source": "amazon-pa", "currency": "USD"},
+        "inserted": rng.randint(0, products),
+        "updated": rng.randint(0, products),
+        "changed_product_ids": ids[: products // 3],
+        "status": "processed",
+        "processed_at": time.time(),
+    }
+
+
+def measure(
+    serializer: str, results: list[dict], offload: bool
+) -> tuple[int, float, int]:
+    """Store every result; return backend bytes, seconds per result and blob bytes."""
+    app = Celery(backend="cache+memory://", result_serializer=serializer)
+    app.conf.accept_content = app.conf.result_accept_content = [serializer]
+    DummyClient().cache.clear()
+
+    settings.celery_result_offload_enabled = offload
+    blob_dir = tempfile.mkdtemp(prefix="bench-blobs-")
+    settings.celery_result_blob_dir = blob_dir
+    blobs.get_blob_store.cache_clear()
+
+    start = time.perf_counter()
+    for result in results:
+        blobs.OffloadingBackend(app.backend).mark_as_done(uuid.uuid4().hex, result)
+    elapsed = (time.perf_counter() - start) / len(results)
+
+    stored = sum(len(value) for value in DummyClient().cache.values())
+    blob_bytes = sum(
+        path.stat().st_size for path in blobs.get_blob_store().root.glob("*/*")
+    )
+    shutil.rmtree(blob_dir)
+    return stored, elapsed, blob_bytes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--results", type=int, default=2000)
+    parser.add_argument("--products", type=int, default=500)
+    args = parser.parse_args()
+
+    available = register_compressed_serializers()
+    rng = random.Random(3)
+    results = [synthetic_result(rng, args.products) for _ in range(args.results)]
+
+    settings.celery_result_offload_threshold_bytes = 4096
+    configs = [("json", False), ("json+zlib", False)]
+    if MSGPACK_ZLIB in available:
+        configs.append((MSGPACK_ZLIB, False))
+    else:
+        print("msgpack not installed; skipping msgpack+zlib")
+    configs.append(("json", True))
+
+    baseline = None
+    for serializer, offload in configs:
+        stored, per_result, blob_bytes = measure(serializer, results, offload)
+        baseline = baseline or stored
+        label = serializer + (" + offload" if offload else "")
+        print(
+            f"{label:<18} backend {stored / 1e6:8.2f} MB ({stored / baseline:6.1%})  "
+            f"blobs {blob_bytes / 1e6:6.2f} MB  {per_result * 1e6:7.1f} us/result"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Benchmark the NumPy brute-force vector index at several catalog sizes.
+
+Usage:
+    python -m benchmarks.bench_vector_search [--sizes 10000,100000,1000000] [--dim 384]
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from app.db.types import EMBEDDING_DIM
+from app.search import VectorIndex
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--dim", type=int, default=EMBEDDING_DIM)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    queries = rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+
+    for size in (int(value) for value in args.sizes.split(",")):
+        vectors = rng.standard_normal((size, args.dim), dtype=np.float32)
+        start = time.perf_counter()
+        index = VectorIndex(np.arange(size), vectors)
+        build = time.perf_counter() - start
+        del vectors
+
+        samples = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, args.k)
+            samples.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        index.search_many(queries, args.k)
+        batched = (time.perf_counter() - start) / args.queries
+
+        cuts = statistics.quantiles(samples, n=100)
+        print(
+            f"{size:>9,} vectors x {args.dim}: build {build * 1e3:8.1f} ms  "
+            f"p50 {cuts[49] * 1e3:7.2f} ms  p99 {cuts[98] * 1e3:7.2f} ms  "
+            f"batched {batched * 1e3:7.2f} ms/query  "
+            f"({index.vectors.nbytes / 2**20:,.0f} MiB)"
+        )
+        del index
+
+
+if __name__ == "__main__":
+    main()
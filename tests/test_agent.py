@@ -0,0 +1,383 @@
+"""Tests for the agent graph executor and the recommendation agent."""
+
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from kombu.exceptions import OperationalError
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.agent import (
+    AgentGraph,
+    FakeLLM,
+    LLMGateway,
+    NodeTimeout,
+    build_agent_graph,
+    parse_constraints,
+    recommend,
+)
+from app.agent.llm import PARSE_TASK
+from app.api import recommendations
+from app.cache import TTLCache
+from app.db.base import Base
+from app.db.models import Offer, Product, Query, Ranking, Review
+from app.embeddings import StubEmbedder
+from app.main import app
+from app.ranking import RecommendationRequest
+from app.search import vector
+
+PRODUCTS = [
+    ("Noise cancelling headphones", 9900),
+    ("Wireless noise cancelling earbuds", 12900),
+    ("Studio headphones for running", 7900),
+    ("Premium noise cancelling headphones", 34900),
+    ("Gaming mouse", 4900),
+]
+
+
+def sleeper(key: str, seconds: float, calls: list | None = None):
+    async def node(state):
+        if calls is not None:
+            calls.append(key)
+        await asyncio.sleep(seconds)
+        return {key: dict(state)}
+
+    return node
+
+
+@pytest.mark.asyncio
+async def test_independent_nodes_overlap():
+    """Test nodes without mutual dependencies run at the same time."""
+    graph = AgentGraph()
+    graph.add_node("a", sleeper("a", 0.1))
+    graph.add_node("b", sleeper("b", 0.1))
+    graph.add_node("c", sleeper("c", 0.0), after=("a", "b"))
+
+    start = time.perf_counter()
+    state, trace = await graph.run({"input": 1})
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.18
+    assert [timing.node for timing in trace][-1] == "c"
+    assert {timing.status for timing in trace} == {"ok"}
+    # A node sees its dependencies' updates
+    assert set(state["c"]) == {"input", "a", "b"}
+    assert state["a"] == {"input": 1}
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_serializes_nodes():
+    """Test concurrency=1 runs nodes one at a time."""
+    graph = AgentGraph(concurrency=1)
+    graph.add_node("a", sleeper("a", 0.05))
+    graph.add_node("b", sleeper("b", 0.05))
+
+    _, trace = await graph.run({})
+
+    first, second = trace
+    assert second.started_ms >= first.started_ms + first.elapsed_ms - 1
+
+
+@pytest.mark.asyncio
+async def test_timeout_uses_fallback_or_raises():
+    """Test a slow node falls back, or fails the run without a fallback."""
+    graph = AgentGraph()
+    graph.add_node(
+        "slow",
+        sleeper("slow", 1.0),
+        timeout=0.02,
+        fallback=lambda state: {"slow": "fallback"},
+    )
+    graph.add_node("next", sleeper("next", 0.0), after=("slow",))
+
+    state, trace = await graph.run({})
+    assert state["slow"] == "fallback"
+    assert state["next"]["slow"] == "fallback"
+    assert [timing.status for timing in trace] == ["timeout", "ok"]
+
+    strict = AgentGraph().add_node("slow", sleeper("slow", 1.0), timeout=0.02)
+    with pytest.raises(NodeTimeout, match="slow"):
+        await strict.run({})
+
+
+@pytest.mark.asyncio
+async def test_cached_node_skips_work():
+    """Test a deterministic node's result is reused for the same key."""
+    calls = []
+    graph = AgentGraph(cache=TTLCache(max_size=10, ttl=60))
+    graph.add_node(
+        "parse", sleeper("parsed", 0.0, calls), cache_key=lambda state: state["text"]
+    )
+
+    first, _ = await graph.run({"text": "headphones"})
+    second, trace = await graph.run({"text": "headphones"})
+    await graph.run({"text": "earbuds"})
+
+    assert calls == ["parsed", "parsed"]
+    assert second["parsed"] == first["parsed"]
+    assert trace[0].status == "cached"
+
+
+@pytest.mark.asyncio
+async def test_failure_cancels_running_nodes():
+    """Test a failing node cancels its siblings and raises."""
+
+    async def boom(state):
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    graph = AgentGraph()
+    graph.add_node("slow", sleeper("slow", 1.0))
+    graph.add_node("boom", boom)
+
+    start = time.perf_counter()
+    with pytest.raises(RuntimeError, match="boom"):
+        await graph.run({})
+    assert time.perf_counter() - start < 0.5
+
+
+def test_add_node_validates_dependencies():
+    """Test unknown dependencies and duplicate names are rejected."""
+    graph = AgentGraph().add_node("a", sleeper("a", 0))
+    with pytest.raises(ValueError, match="unknown"):
+        graph.add_node("b", sleeper("b", 0), after=("missing",))
+    with pytest.raises(ValueError, match="Duplicate"):
+        graph.add_node("a", sleeper("a", 0))
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("headphones for running under $200", (None, 200.0, "running")),
+        ("earbuds $100-150", (100.0, 150.0, None)),
+        ("between 80 and 120, for the gym", (80.0, 120.0, "gym")),
+        ("around $150", (120.0, 180.0, None)),
+        ("AirPods Pro 2 and 3 at least $90", (90.0, None, None)),
+    ],
+)
+def test_parse_constraints(text, expected):
+    """Test budget and usage phrases are recognized."""
+    parsed = parse_constraints(text)
+    assert (parsed["budget_min"], parsed["budget_max"], parsed["usage"]) == expected
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    """Temporary SQLite database of embedded products with offers and reviews."""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+
+    engine = create_engine(f"sqlite:///{path}", echo=False)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    now = datetime.utcnow()
+    vectors = StubEmbedder().embed([title for title, _ in PRODUCTS])
+    with SessionLocal() as session:
+        for i, ((title, price), embedding) in enumerate(
+            zip(PRODUCTS, vectors, strict=True), start=1
+        ):
+            session.add(
+                Product(id=i, asin=f"B0AGENT{i:03d}", title=title, embedding=embedding)
+            )
+            # Product 2's offer is past the freshness limit
+            checked = now - timedelta(hours=30) if i == 2 else now
+            session.add(
+                Offer(id=i, product_id=i, price_cents=price, last_checked_at=checked)
+            )
+            session.add_all(
+                Review(
+                    product_id=i,
+                    source="test",
+                    snippet=f"Review {n} of {title}. More detail.",
+                )
+                for n in range(2)
+            )
+        session.commit()
+    vector.invalidate_indexes()
+    monkeypatch.setattr(recommend.settings, "agent_fake_llm_latency_ms", 0)
+    monkeypatch.setattr(recommend, "_node_cache", TTLCache(max_size=100, ttl=60))
+
+    yield SessionLocal
+
+    # Cleanup
+    vector.invalidate_indexes()
+    engine.dispose()
+    os.unlink(path)
+
+
+def test_agent_ranks_and_persists_trace(session_factory):
+    """Test the agent applies parsed constraints, flags stale offers and stores its trace."""
+    stale = []
+    graph = build_agent_graph(
+        session_factory,
+        llm=FakeLLM(latency=0.01),
+        embedder=StubEmbedder(),
+        on_stale=stale.append,
+        cache=TTLCache(max_size=10, ttl=60),
+    )
+    request = RecommendationRequest(
+        "noise cancelling headphones for running under $150", limit=5
+    )
+
+    result = asyncio.run(
+        recommend.run_recommendation_agent(session_factory, request, graph)
+    )
+
+    assert result["parsed"] == {
+        "budget_min": None,
+        "budget_max": 150.0,
+        "usage": "running",
+    }
+    ranked = {row["product_id"]: row for row in result["rankings"]}
+    # The $349 product is over the budget parsed from the text
+    assert 4 not in ranked
+    assert "No current offer" in ranked[2]["rationale"]
+    assert stale == [[2]]
+    assert any(row["summary"] for row in result["rankings"])
+
+    nodes = [timing["node"] for timing in result["trace"]["nodes"]]
+    assert set(nodes) == {
+        "parse_request",
+        "retrieve",
+        "check_freshness",
+        "summarize_reviews",
+        "rank",
+        "explain",
+    }
+    assert nodes[-2:] == ["rank", "explain"]
+
+    with session_factory() as db:
+        query = db.get(Query, result["query_id"])
+        assert query.agent_trace == result["trace"]
+        assert float(query.budget_max) == 150.0
+        assert query.usage == "running"
+        rows = db.scalars(select(Ranking).where(Ranking.query_id == query.id)).all()
+        assert len(rows) == len(ranked)
+        # The LLM rationales replaced the rule-based ones in the database
+        assert {row.product_id: row.rationale for row in rows} == {
+            product_id: row["rationale"] for product_id, row in ranked.items()
+        }
+        assert all("fits" in row.rationale for row in rows)
+
+
+def test_agent_reports_stale_offers_when_dispatch_fails(session_factory, caplog):
+    """Test a broker error while queueing refreshes does not fail the run."""
+
+    def unreachable_broker(offer_ids):
+        raise OperationalError("Connection refused")
+
+    graph = build_agent_graph(
+        session_factory,
+        llm=FakeLLM(latency=0),
+        embedder=StubEmbedder(),
+        on_stale=unreachable_broker,
+        cache=TTLCache(max_size=10, ttl=60),
+    )
+    request = RecommendationRequest("noise cancelling headphones under $150", limit=5)
+
+    result = asyncio.run(
+        recommend.run_recommendation_agent(session_factory, request, graph)
+    )
+
+    ranked = {row["product_id"]: row for row in result["rankings"]}
+    assert "No current offer" in ranked[2]["rationale"]
+    statuses = {timing["node"]: timing["status"] for timing in result["trace"]["nodes"]}
+    assert statuses["check_freshness"] == "ok"
+    assert "Could not dispatch stale offer refresh" in caplog.text
+
+
+def test_agent_falls_back_when_llm_is_slow(session_factory, monkeypatch):
+    """Test LLM timeouts fall back to rule-based parsing and no summaries."""
+    monkeypatch.setattr(recommend.settings, "agent_llm_timeout_seconds", 0.05)
+    graph = build_agent_graph(
+        session_factory,
+        llm=FakeLLM(latency=1.0),
+        embedder=StubEmbedder(),
+        on_stale=lambda ids: None,
+        cache=TTLCache(max_size=10, ttl=60),
+    )
+    request = RecommendationRequest("headphones under $150", limit=5)
+
+    start = time.perf_counter()
+    result = asyncio.run(
+        recommend.run_recommendation_agent(session_factory, request, graph)
+    )
+
+    assert time.perf_counter() - start < 0.9
+    assert result["parsed"]["budget_max"] == 150.0
+    assert all(row["summary"] is None for row in result["rankings"])
+    statuses = {timing["node"]: timing["status"] for timing in result["trace"]["nodes"]}
+    assert statuses["parse_request"] == statuses["summarize_reviews"] == "timeout"
+
+
+class MalformedLLM(FakeLLM):
+    """FakeLLM answering the parse prompt with a fixed, malformed completion."""
+
+    def __init__(self, parsed: str) -> None:
+        super().__init__(latency=0)
+        self.parsed = parsed
+
+    async def complete(self, prompt: str) -> str:
+        if prompt.startswith(PARSE_TASK):
+            return self.parsed
+        return await super().complete(prompt)
+
+
+@pytest.mark.parametrize(
+    "completion",
+    ["[]", '"cheap"', '{"budget_max": "$150"}', '{"budget_max": true}', '{"usage": 1}'],
+)
+def test_agent_parses_text_when_llm_json_is_malformed(session_factory, completion):
+    """Test valid JSON of the wrong shape falls back to rule-based parsing."""
+    graph = build_agent_graph(
+        session_factory,
+        llm=MalformedLLM(completion),
+        embedder=StubEmbedder(),
+        on_stale=lambda ids: None,
+        cache=TTLCache(max_size=10, ttl=60),
+    )
+    request = RecommendationRequest("headphones for running under $150", limit=5)
+
+    result = asyncio.run(
+        recommend.run_recommendation_agent(session_factory, request, graph)
+    )
+
+    assert result["parsed"] == {
+        "budget_min": None,
+        "budget_max": 150.0,
+        "usage": "running",
+    }
+
+
+def test_agent_endpoint(session_factory, monkeypatch):
+    """Test the endpoint returns rankings with the node trace."""
+    dispatched = []
+    monkeypatch.setattr(recommend, "dispatch_refresh", dispatched.append)
+    monkeypatch.setattr(
+        recommend, "get_llm_gateway", lambda: LLMGateway(FakeLLM(0), "fake")
+    )
+    app.dependency_overrides[recommendations.get_session_factory] = (
+        lambda: session_factory
+    )
+    try:
+        response = TestClient(app).post(
+            "/recommendations/agent",
+            json={
+                "raw_text": "noise cancelling headphones",
+                "budget_max": 200,
+                "limit": 3,
+            },
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["rankings"]) == 3
+    assert len(body["trace"]["nodes"]) == 6
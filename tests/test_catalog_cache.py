@@ -0,0 +1,254 @@
+"""Tests for the product catalog cache."""
+
+import os
+import tempfile
+
+import pytest
+import redis
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api import catalog as catalog_api
+from app.cache import CatalogCache, RedisCache, TTLCache, catalog
+from app.db.base import Base
+from app.db.models import Offer, Product, Review
+from app.db.session import get_db
+from app.ingest import OfferRecord, ingest_offers, offers_changed
+from app.main import app
+from tests.utils import count_queries
+
+
+class FakeRedis:
+    """Dict-backed stand-in for the handful of Redis commands the cache uses."""
+
+    def __init__(self, fail: bool = False) -> None:
+        self.data: dict[str, bytes] = {}
+        self.fail = fail
+
+    def get(self, key):
+        if self.fail:
+            raise redis.ConnectionError("down")
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        if self.fail:
+            raise redis.ConnectionError("down")
+        self.data[key] = value.encode()
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def temp_db():
+    """Temporary SQLite database with one product, offer and review."""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+
+    engine = create_engine(f"sqlite:///{path}", echo=False)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    session = SessionLocal()
+
+    product = Product(id=1, asin="B0CACHE001", title="Cached Headphones", brand="Acme")
+    session.add(product)
+    session.add(Offer(product_id=1, price_cents=19999))
+    session.add(Review(product_id=1, source="Amazon", snippet="Great"))
+    session.commit()
+
+    yield session
+
+    # Cleanup
+    session.close()
+    engine.dispose()
+    os.unlink(path)
+
+
+def test_ttl_cache_lru_eviction():
+    """Test least recently used entries are evicted first."""
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats.evictions == 1
+
+
+def test_ttl_cache_reports_evictions_and_expirations():
+    """Test on_evict sees entries pushed out by LRU or found expired."""
+    clock = FakeClock()
+    evicted = []
+    cache = TTLCache(
+        max_size=1, ttl=5, clock=clock, on_evict=lambda *entry: evicted.append(entry)
+    )
+    cache.set("a", 1)
+    cache.set("b", 2)
+    clock.now = 5.0
+    cache.get("b")
+
+    assert evicted == [("a", 1), ("b", 2)]
+
+
+def test_ttl_cache_expiry():
+    """Test entries expire after their TTL."""
+    clock = FakeClock()
+    cache = TTLCache(max_size=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+
+    clock.now = 4.9
+    assert cache.get("a") == 1
+    clock.now = 5.0
+    assert cache.get("a") is None
+    assert cache.stats.expirations == 1
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+    assert cache.stats.hit_rate == 0.5
+
+
+def test_catalog_read_through(temp_db):
+    """Test the first lookup hits the database and the second does not."""
+    cache = CatalogCache(TTLCache(max_size=10, ttl=60))
+
+    product = cache.get_product(temp_db, "B0CACHE001")
+    with count_queries(temp_db.get_bind()) as statements:
+        again = cache.get_product(temp_db, "B0CACHE001")
+
+    assert product.title == "Cached Headphones"
+    assert product.offers[0].price_cents == 19999
+    assert product.reviews[0].snippet == "Great"
+    assert again is product
+    assert statements == []
+    assert cache.stats()["memory"]["hits"] == 1
+
+
+def test_catalog_forgets_evicted_products(temp_db):
+    """Test the id-to-ASIN map shrinks with the memory tier."""
+    temp_db.add(Product(id=2, asin="B0CACHE002", title="Other Headphones"))
+    temp_db.commit()
+    memory = TTLCache(max_size=1, ttl=60)
+    cache = CatalogCache(memory)
+
+    cache.get_product(temp_db, "B0CACHE001")
+    cache.get_product(temp_db, "B0CACHE002")
+
+    assert memory.stats.evictions == 1
+    assert cache._asins_by_id == {2: "B0CACHE002"}
+    cache.invalidate([2])
+    assert cache._asins_by_id == {} and len(memory) == 0
+
+
+def test_catalog_unknown_asin(temp_db):
+    """Test unknown products return None."""
+    cache = CatalogCache(TTLCache(max_size=10, ttl=60))
+    assert cache.get_product(temp_db, "B0MISSING0") is None
+
+
+def test_catalog_redis_tier_serves_other_processes(temp_db):
+    """Test a cold in-process tier is filled from Redis without a DB query."""
+    client = FakeRedis()
+    warm = CatalogCache(TTLCache(10, 60), RedisCache(client, "catalog:product", 60))
+    warm.get_product(temp_db, "B0CACHE001")
+
+    cold = CatalogCache(TTLCache(10, 60), RedisCache(client, "catalog:product", 60))
+    with count_queries(temp_db.get_bind()) as statements:
+        product = cold.get_product(temp_db, "B0CACHE001")
+
+    assert product.offers[0].price_cents == 19999
+    assert product.offers[0].last_checked_at is not None
+    assert statements == []
+    assert cold.stats()["redis"]["hits"] == 2
+
+
+def test_catalog_redis_outage_falls_back_to_db(temp_db):
+    """Test Redis errors degrade to database reads."""
+    cache = CatalogCache(TTLCache(10, 60), RedisCache(FakeRedis(fail=True), "p", 60))
+    assert cache.get_product(temp_db, "B0CACHE001").title == "Cached Headphones"
+
+
+def test_catalog_invalidated_by_offer_ingest(temp_db, monkeypatch):
+    """Test committing an offer ingest drops the cached product from both tiers."""
+    client = FakeRedis()
+    cache = CatalogCache(TTLCache(10, 60), RedisCache(client, "catalog:product", 60))
+    monkeypatch.setattr(catalog, "get_catalog_cache", lambda: cache)
+    assert cache.get_product(temp_db, "B0CACHE001").offers[0].price_cents == 19999
+
+    ingest_offers(temp_db, [OfferRecord(product_id=1, price_cents=14999)])
+    # Not invalidated until the transaction commits
+    assert cache.memory.get("B0CACHE001") is not None
+    temp_db.commit()
+
+    assert cache.memory.get("B0CACHE001") is None
+    assert "catalog:product:1" not in client.data
+    assert cache.get_product(temp_db, "B0CACHE001").offers[0].price_cents == 14999
+
+
+def test_worker_ingest_invalidates_shared_tier(temp_db, monkeypatch):
+    """Test an ingest in a process that never read the catalog deletes the Redis entry."""
+    client = FakeRedis()
+    api = CatalogCache(TTLCache(10, 60), RedisCache(client, "catalog:product", 60))
+    api.get_product(temp_db, "B0CACHE001")
+    assert "catalog:product:1" in client.data
+
+    monkeypatch.setattr(catalog.settings, "catalog_cache_redis_enabled", True)
+    monkeypatch.setattr(catalog, "redis_client", lambda: client)
+    catalog.get_catalog_cache.cache_clear()
+    try:
+        ingest_offers(temp_db, [OfferRecord(product_id=1, price_cents=14999)])
+        temp_db.commit()
+    finally:
+        catalog.get_catalog_cache.cache_clear()
+
+    assert "catalog:product:1" not in client.data
+
+
+def test_product_endpoint_reads_through_cache(temp_db, monkeypatch):
+    """Test the product detail endpoint serves repeat reads from the cache."""
+    cache = CatalogCache(TTLCache(10, 60))
+    monkeypatch.setattr(catalog_api, "get_catalog_cache", lambda: cache)
+    app.dependency_overrides[get_db] = lambda: temp_db
+    try:
+        client = TestClient(app)
+        first = client.get("/products/B0CACHE001")
+        with count_queries(temp_db.get_bind()) as statements:
+            second = client.get("/products/B0CACHE001")
+        missing = client.get("/products/B0MISSING0")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert second.json()["offers"][0]["price_cents"] == 19999
+    assert statements == []
+    assert missing.status_code == 404
+
+
+def test_offers_changed_not_sent_on_rollback(temp_db):
+    """Test a rolled back ingest does not fire invalidation."""
+    received = []
+
+    def receiver(sender, **kwargs):
+        received.append(kwargs)
+
+    offers_changed.connect(receiver, weak=False)
+    try:
+        ingest_offers(temp_db, [OfferRecord(product_id=1, price_cents=100)])
+        temp_db.rollback()
+        temp_db.commit()
+    finally:
+        offers_changed.disconnect(receiver)
+
+    assert received == []
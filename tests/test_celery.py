@@ -1,8 +1,9 @@
 """Tests for Celery tasks."""
 
 import os
+from unittest.mock import patch
+
 import pytest
-from unittest.mock import patch, MagicMock
 
 # Set Celery to always eager for testing and use memory backend
 os.environ["CELERY_TASK_ALWAYS_EAGER"] = "true"
@@ -20,7 +21,7 @@ class TestCeleryTasks:
         # Mock random to ensure success
         with patch("app.tasks.example.random.random", return_value=0.5):
             result = demo_task.delay("Test message")
-            
+
             assert result.successful()
             assert result.result["message"] == "Test message"
             assert result.result["status"] == "completed"
@@ -32,7 +33,7 @@ class TestCeleryTasks:
         """Test demo task with retry behavior."""
         # Mock random to simulate failures then success
         random_values = [0.1, 0.1, 0.1, 0.5]  # Fail first 3 times, succeed on 4th
-        
+
         with patch("app.tasks.example.random.random", side_effect=random_values):
             # In eager mode, retries don't work the same way, so we expect an exception
             with pytest.raises(Exception):
@@ -43,20 +44,22 @@ class TestCeleryTasks:
         # Mock random to always fail
         with patch("app.tasks.example.random.random", return_value=0.1):
             # Mock the retry method to raise Retry exception
-            with patch.object(demo_task, "retry", side_effect=Exception("Max retries exceeded")):
+            with patch.object(
+                demo_task, "retry", side_effect=Exception("Max retries exceeded")
+            ):
                 with pytest.raises(Exception, match="Max retries exceeded"):
                     demo_task.delay("Max retry test")
 
     def test_process_data_task_success(self):
         """Test process data task execution with success."""
         test_data = {"key": "value", "number": 42}
-        
+
         # Mock random to ensure success
         with patch("app.tasks.example.random.random", return_value=0.5):
             result = process_data_task.delay(test_data)
-            
+
             assert result.successful()
-            assert result.result["original"] == test_data
+            assert result.result["fields"] == 2
             assert result.result["status"] == "processed"
             assert "processed_at" in result.result
             assert "task_id" in result.result
@@ -65,10 +68,10 @@ class TestCeleryTasks:
     def test_process_data_task_with_retries(self):
         """Test process data task with retry behavior."""
         test_data = {"key": "value", "number": 42}
-        
+
         # Mock random to simulate failures then success
         random_values = [0.1, 0.1, 0.1, 0.1, 0.5]  # Fail first 4 times, succeed on 5th
-        
+
         with patch("app.tasks.example.random.random", side_effect=random_values):
             # In eager mode, retries don't work the same way, so we expect an exception
             with pytest.raises(Exception):
@@ -86,7 +89,7 @@ class TestCeleryTasks:
     def test_task_registration(self):
         """Test that tasks are properly registered."""
         registered_tasks = celery_app.tasks.keys()
-        
+
         assert "app.tasks.example.demo_task" in registered_tasks
         assert "app.tasks.example.process_data_task" in registered_tasks
 
@@ -94,7 +97,7 @@ class TestCeleryTasks:
         """Test demo task with default message."""
         with patch("app.tasks.example.random.random", return_value=0.5):
             result = demo_task.delay()
-            
+
             assert result.successful()
             assert result.result["message"] == "Hello from Celery!"
 
@@ -103,13 +106,15 @@ class TestCeleryTasks:
         with patch("app.tasks.example.logger") as mock_logger:
             with patch("app.tasks.example.random.random", return_value=0.5):
                 demo_task.delay("Logging test")
-                
+
                 # Verify that info logging was called
                 assert mock_logger.info.called
-                
+
                 # Check that the log messages contain expected content
                 log_calls = mock_logger.info.call_args_list
                 log_messages = [call[0][0] for call in log_calls]
-                
+
                 assert any("Executing demo_task" in msg for msg in log_messages)
-                assert any("Demo task completed successfully" in msg for msg in log_messages)
+                assert any(
+                    "Demo task completed successfully" in msg for msg in log_messages
+                )
@@ -0,0 +1,89 @@
+"""Tests for Celery queue topology, routing and worker profiles."""
+
+import os
+
+import pytest
+
+# Set Celery to always eager for testing and use memory backend
+os.environ["CELERY_TASK_ALWAYS_EAGER"] = "true"
+os.environ["CELERY_RESULT_BACKEND"] = "cache+memory://"
+
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.tasks import queues
+
+# Workers import the ``include`` task modules at startup; do the same here
+# so the tests do not depend on other test files importing them first
+celery_app.loader.import_default_modules()
+
+
+def routed_queue(task_name: str) -> str:
+    """Queue the app's router picks for a task name."""
+    return celery_app.amqp.router.route({}, task_name)["queue"].name
+
+
+@pytest.mark.parametrize(
+    "task_name, queue",
+    [
+        ("app.tasks.example.demo_task", queues.INTERACTIVE),
+        ("app.tasks.example.process_data_task", queues.INTERACTIVE),
+        ("app.tasks.refresh.refresh_offer_chunk", queues.INGEST),
+        ("app.tasks.refresh.schedule_offer_refresh", queues.MAINTENANCE),
+        ("app.tasks.embeddings.embed_products", queues.EMBED),
+        ("app.tasks.embeddings.embed_reviews", queues.EMBED),
+        ("app.tasks.prices.maintain_price_history", queues.MAINTENANCE),
+        ("app.tasks.results.prune_result_blobs", queues.MAINTENANCE),
+        ("app.tasks.search.refresh_search_index", queues.MAINTENANCE),
+        ("app.tasks.features.refresh_feature_table", queues.MAINTENANCE),
+    ],
+)
+def test_tasks_route_to_their_queue(task_name, queue):
+    """Test every registered task is routed by latency class."""
+    assert task_name in celery_app.tasks
+    assert routed_queue(task_name) == queue
+
+
+def test_unrouted_tasks_use_interactive_queue():
+    """Test tasks without a route land on the default queue."""
+    assert routed_queue("app.tasks.unknown.task") == queues.INTERACTIVE
+
+
+def test_queues_declared_with_priorities():
+    """Test all queues are declared and priorities are enabled."""
+    declared = {queue.name: queue for queue in celery_app.conf.task_queues}
+    assert set(declared) == set(queues.QUEUE_NAMES)
+    for queue in declared.values():
+        assert queue.queue_arguments == {"x-max-priority": settings.celery_max_priority}
+
+    assert celery_app.conf.task_queue_max_priority == settings.celery_max_priority
+    assert celery_app.conf.task_default_priority == settings.celery_default_priority
+    transport = celery_app.conf.broker_transport_options
+    assert transport["queue_order_strategy"] == "priority"
+    assert transport["priority_steps"] == list(range(settings.celery_max_priority + 1))
+
+
+def test_workers_import_cache_invalidation():
+    """Test workers import the modules connecting the offers_changed receivers."""
+    assert {"app.cache.catalog", "app.cache.results"} <= set(celery_app.conf.imports)
+
+
+def test_worker_args_follow_queue_profile(monkeypatch):
+    """Test worker options come from the per-queue settings."""
+    monkeypatch.setattr(settings, "celery_queue_concurrency", {"ingest": 8})
+    monkeypatch.setattr(settings, "celery_queue_prefetch", {"ingest": 16})
+
+    assert queues.worker_args("ingest") == [
+        "--queues=ingest",
+        "--concurrency=8",
+        "--prefetch-multiplier=16",
+        "--hostname=ingest@%h",
+    ]
+    # Queues missing from a profile fall back to a single slot prefetching one task
+    assert "--concurrency=1" in queues.worker_args("embed")
+    assert "--prefetch-multiplier=1" in queues.worker_args("embed")
+
+
+def test_worker_args_rejects_unknown_queue():
+    """Test an unknown queue name is reported."""
+    with pytest.raises(ValueError, match="Unknown queue"):
+        queues.worker_args("bulk")
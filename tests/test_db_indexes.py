@@ -0,0 +1,120 @@
+"""Query plan tests for hot read path indexes."""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, insert, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.models import Offer, Product, Query, Ranking
+
+
+@pytest.fixture(scope="module")
+def seeded_db():
+    """Create a temporary SQLite database seeded with offers and rankings."""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+
+    engine = create_engine(f"sqlite:///{path}", echo=False)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    now = datetime.utcnow()
+    session = SessionLocal()
+    session.execute(
+        insert(Product),
+        [
+            {"id": i, "asin": f"B0PLAN{i:05d}", "title": f"Headphones {i}"}
+            for i in range(1, 2001)
+        ],
+    )
+    session.execute(
+        insert(Offer),
+        [
+            {
+                "product_id": i,
+                "price_cents": 1000 + i,
+                "currency": currency,
+                "last_checked_at": now - timedelta(minutes=i),
+            }
+            for i in range(1, 2001)
+            for currency in ("USD", "EUR")
+        ],
+    )
+    session.execute(
+        insert(Query), [{"id": i, "raw_text": f"query {i}"} for i in range(1, 51)]
+    )
+    session.execute(
+        insert(Ranking),
+        [
+            {"query_id": q, "product_id": p, "score": (p * 7 % 100) / 10}
+            for q in range(1, 51)
+            for p in range(1, 41)
+        ],
+    )
+    session.commit()
+    session.execute(text("ANALYZE"))
+
+    yield session
+
+    # Cleanup
+    session.close()
+    engine.dispose()
+    os.unlink(path)
+
+
+def query_plan(session, stmt) -> str:
+    """Return SQLite's EXPLAIN QUERY PLAN output for a statement."""
+    compiled = stmt.compile(session.get_bind(), compile_kwargs={"literal_binds": True})
+    rows = session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+def test_latest_offer_per_product_uses_composite_index(seeded_db):
+    """Test the latest-offer lookup reads the (product_id, last_checked_at) index."""
+    stmt = (
+        select(Offer)
+        .where(Offer.product_id == 42)
+        .order_by(Offer.last_checked_at.desc())
+        .limit(1)
+    )
+    plan = query_plan(seeded_db, stmt)
+
+    assert "ix_offers_product_id_last_checked_at" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_rankings_by_score_uses_composite_index(seeded_db):
+    """Test rankings for a query come back in score order straight off the index."""
+    stmt = select(Ranking).where(Ranking.query_id == 7).order_by(Ranking.score.desc())
+    plan = query_plan(seeded_db, stmt)
+
+    assert "ix_rankings_query_id_score_id" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_offers_older_than_uses_last_checked_at_index(seeded_db):
+    """Test the staleness range scan uses the last_checked_at index."""
+    cutoff = datetime.utcnow() - timedelta(hours=20)
+    stmt = (
+        select(Offer.id)
+        .where(Offer.last_checked_at < cutoff)
+        .order_by(Offer.last_checked_at)
+    )
+    plan = query_plan(seeded_db, stmt)
+
+    assert "ix_offers_last_checked_at" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_primary_keys_have_no_duplicate_index():
+    """Test models no longer declare redundant ix_*_id indexes."""
+    index_names = {
+        index.name for table in Base.metadata.tables.values() for index in table.indexes
+    }
+    assert not {f"ix_{name}_id" for name in Base.metadata.tables} & index_names
+    assert "ix_offers_product_id_last_checked_at" in index_names
+    assert "ix_rankings_query_id_score_id" in index_names
@@ -0,0 +1,184 @@
+"""Tests for embedding backends and the embedding backfill tasks."""
+
+import os
+import tempfile
+
+import numpy as np
+import pytest
+
+os.environ["CELERY_TASK_ALWAYS_EAGER"] = "true"
+os.environ["CELERY_RESULT_BACKEND"] = "cache+memory://"
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.models import Product, Review
+from app.embeddings import StubEmbedder, load_embedder
+from app.tasks import embeddings
+from app.tasks.embeddings import embed_pending
+
+
+class CountingEmbedder(StubEmbedder):
+    """Stub embedder that records batch sizes and can fail mid-run."""
+
+    def __init__(self, fail_after: int | None = None) -> None:
+        super().__init__()
+        self.batches: list[int] = []
+        self.fail_after = fail_after
+
+    def embed(self, texts):
+        if self.fail_after is not None and len(self.batches) >= self.fail_after:
+            raise RuntimeError("worker crashed")
+        self.batches.append(len(texts))
+        return super().embed(texts)
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    """Temporary SQLite database wired into the embedding tasks."""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+
+    engine = create_engine(f"sqlite:///{path}", echo=False)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(embeddings, "SessionLocal", factory)
+
+    with factory() as db:
+        for i in range(1, 26):
+            db.add(
+                Product(
+                    id=i, asin=f"B0EMB{i:05d}", title=f"Wireless headphones model {i}"
+                )
+            )
+            db.add(Review(product_id=i, source="Amazon", snippet=f"Great bass {i}"))
+        db.add(Review(product_id=1, source="Amazon", snippet=None))
+        db.commit()
+
+    yield factory
+
+    # Cleanup
+    engine.dispose()
+    os.unlink(path)
+
+
+def pending(db, model) -> int:
+    return db.scalar(
+        select(func.count()).select_from(model).where(model.embedding.is_(None))
+    )
+
+
+def test_stub_embedder_is_deterministic_and_normalized():
+    """Test identical texts embed identically and vectors are unit length."""
+    embedder = StubEmbedder()
+    first, second, other = embedder.embed(
+        ["Noise cancelling", "noise  CANCELLING", "bass boost"]
+    )
+
+    np.testing.assert_array_equal(first, second)
+    assert np.linalg.norm(first) == pytest.approx(1.0)
+    assert float(first @ other) < 0.99
+    assert embedder.embed([]).shape == (0, embedder.dim)
+
+
+def test_stub_embedder_similarity_tracks_shared_words():
+    """Test texts sharing words are closer than unrelated texts."""
+    a, b, c = StubEmbedder().embed(
+        [
+            "sony wireless noise cancelling",
+            "sony noise cancelling headphones",
+            "cheap wired earbuds",
+        ]
+    )
+    assert a @ b > a @ c
+
+
+def test_load_embedder_from_settings():
+    """Test the configured backend is importable."""
+    assert isinstance(load_embedder(), StubEmbedder)
+
+
+def test_embed_pending_pages_and_batches(session_factory):
+    """Test rows are embedded in pages and backend batches."""
+    embedder = CountingEmbedder()
+    with session_factory() as db:
+        result = embed_pending(db, "products", embedder, page_size=10, batch_size=4)
+        assert pending(db, Product) == 0
+
+    assert result == {"embedded": 25, "last_id": 25, "done": True}
+    assert embedder.batches == [4, 4, 2, 4, 4, 2, 4, 1]
+
+
+def test_embed_pending_skips_null_text(session_factory):
+    """Test reviews without a snippet are left alone."""
+    with session_factory() as db:
+        result = embed_pending(db, "reviews", StubEmbedder())
+        assert pending(db, Review) == 1
+
+    assert result["embedded"] == 25
+
+
+def test_embed_pending_resumes_after_crash(session_factory):
+    """Test committed pages survive a crash and are not re-embedded."""
+    with session_factory() as db:
+        with pytest.raises(RuntimeError):
+            embed_pending(
+                db,
+                "products",
+                CountingEmbedder(fail_after=2),
+                page_size=10,
+                batch_size=5,
+            )
+        db.rollback()
+        assert pending(db, Product) == 15
+
+        # Redelivered task starts again from the beginning
+        embedder = CountingEmbedder()
+        result = embed_pending(db, "products", embedder, page_size=10, batch_size=5)
+
+    assert result["embedded"] == 15
+    assert sum(embedder.batches) == 15
+
+
+def test_embed_pending_is_idempotent(session_factory):
+    """Test a second run finds nothing to do."""
+    with session_factory() as db:
+        embed_pending(db, "products", StubEmbedder())
+        embedder = CountingEmbedder()
+        result = embed_pending(db, "products", embedder)
+
+    assert result == {"embedded": 0, "last_id": 0, "done": True}
+    assert embedder.batches == []
+
+
+def test_embedded_vectors_match_backend(session_factory):
+    """Test stored vectors are the backend output for the row's text."""
+    with session_factory() as db:
+        embed_pending(db, "products", StubEmbedder())
+        stored = db.scalar(select(Product.embedding).where(Product.id == 3))
+
+    np.testing.assert_allclose(
+        stored, StubEmbedder().embed(["Wireless headphones model 3"])[0]
+    )
+
+
+def test_embed_products_task_chains_until_done(session_factory, monkeypatch):
+    """Test the task re-enqueues itself until every page is processed."""
+    monkeypatch.setattr(embeddings.settings, "embedding_page_size", 4)
+    monkeypatch.setattr(embeddings.settings, "embedding_pages_per_task", 2)
+
+    result = embeddings.embed_products.delay().result
+
+    assert result["embedded"] == 8
+    assert result["done"] is False
+    with session_factory() as db:
+        assert pending(db, Product) == 0
+
+
+def test_embed_reviews_task(session_factory):
+    """Test the review task embeds snippets."""
+    result = embeddings.embed_reviews.delay().result
+
+    assert result["done"] is True
+    assert result["embedded"] == 25
@@ -0,0 +1,356 @@
+"""Tests for the upstream HTTP client, rate limiting and item lookups."""
+
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+import redis
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import rate_limit
+from app.core.http import (
+    HTTPClient,
+    RateLimited,
+    UpstreamError,
+    retry_after_seconds,
+    run_sync,
+)
+from app.core.rate_limit import RedisTokenBucket, TokenBucket
+from app.db.base import Base
+from app.db.models import Product
+from app.ingest.fetchers import HTTPOfferFetcher
+from app.ingest.items import ItemLookup, get_items_fetcher, parse_items
+
+
+class MockRetailer(BaseHTTPRequestHandler):
+    """GetItems-style endpoint; scripted responses are served before normal ones."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.calls.append((self.client_address[1], body))
+        status, headers = self.server.script.pop(0) if self.server.script else (200, {})
+        payload = b""
+        if status == 200:
+            items = [
+                {
+                    "ASIN": asin,
+                    "Offers": {
+                        "Listings": [
+                            {
+                                "Price": {"Amount": 100 + index, "Currency": "USD"},
+                                "Availability": {"Message": "In Stock"},
+                            }
+                        ]
+                    },
+                }
+                for index, asin in enumerate(body.get("ItemIds", []))
+                if not asin.startswith("MISSING")
+            ]
+            payload = json.dumps({"ItemsResult": {"Items": items}}).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Local mock retailer API on an ephemeral port."""
+    monkeypatch.setattr(rate_limit, "_buckets", {})
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), MockRetailer)
+    httpd.script = []
+    httpd.calls = []
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}/paapi5/getitems"
+    thread = threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+
+    yield httpd
+
+    # Cleanup
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def client(**options) -> HTTPClient:
+    return HTTPClient(**{"rate": 1000.0, "burst": 100, **options})
+
+
+class FakeRedis:
+    """Stand-in running the rate limiter scripts in Python against a dict."""
+
+    def __init__(self, fail: bool = False):
+        self.data: dict[str, float] = {}
+        self.fail = fail
+
+    def register_script(self, script: str):
+        def run(keys, args):
+            if self.fail:
+                raise redis.ConnectionError("down")
+            interval, capacity, amount = (float(arg) for arg in args)
+            now = time.time()
+            tat = max(self.data.get(keys[0], now), now)
+            if "allowed_at" not in script:
+                # Pause script
+                self.data[keys[0]] = max(tat, now + amount + (capacity - 1) * interval)
+                return b"0"
+            new_tat = tat + amount * interval
+            if new_tat - capacity * interval > now:
+                return str(new_tat - capacity * interval - now).encode()
+            self.data[keys[0]] = new_tat
+            return b"0"
+
+        return run
+
+
+def test_retry_after_parsing():
+    """Test delay seconds and HTTP dates are both understood."""
+
+    def response(value):
+        return httpx.Response(
+            429, headers={} if value is None else {"Retry-After": value}
+        )
+
+    assert retry_after_seconds(response("7")) == 7.0
+    assert retry_after_seconds(response(None)) is None
+    assert retry_after_seconds(response("soon")) is None
+    assert retry_after_seconds(response("Wed, 21 Oct 2015 07:28:00 GMT")) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_retries_429_until_success(server):
+    """Test 429 responses are retried after Retry-After and the 200 is returned."""
+    server.script = [(429, {"Retry-After": "0"}), (429, {"Retry-After": "0"})]
+
+    async with client() as http:
+        response = await http.post(server.url, json={"ItemIds": ["B0HTTP0001"]})
+
+    assert response.status_code == 200
+    assert len(server.calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_backs_off_on_503_without_retry_after(server):
+    """Test an exponential backoff is used when no Retry-After is sent."""
+    server.script = [(503, {}), (503, {})]
+
+    async with client(backoff=0.05) as http:
+        start = time.perf_counter()
+        await http.post(server.url, json={})
+        elapsed = time.perf_counter() - start
+
+    # Two retries: ~0.025-0.05s then ~0.05-0.1s
+    assert 0.07 <= elapsed < 1.0
+    assert len(server.calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_persistent_429_raises_rate_limited(server):
+    """Test retries are bounded and long waits are handed back to the caller."""
+    server.script = [(429, {"Retry-After": "0"})] * 3
+    async with client(max_retries=2) as http:
+        with pytest.raises(RateLimited):
+            await http.post(server.url, json={})
+    assert len(server.calls) == 3
+
+    server.script = [(429, {"Retry-After": "120"})]
+    async with client() as http:
+        with pytest.raises(RateLimited) as info:
+            await http.post(server.url, json={})
+        # The host's bucket is paused for everyone sharing it
+        assert http.bucket("127.0.0.1").try_acquire() > 100
+    assert info.value.retry_after == 120.0
+    assert len(server.calls) == 4
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried(server):
+    """Test other error statuses fail immediately."""
+    server.script = [(404, {})]
+
+    async with client() as http:
+        with pytest.raises(UpstreamError, match="404"):
+            await http.post(server.url, json={})
+    assert len(server.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_keepalive_connection_is_reused(server):
+    """Test sequential requests share one pooled connection."""
+    async with client() as http:
+        for _ in range(5):
+            await http.post(server.url, json={})
+
+    assert len({port for port, _ in server.calls}) == 1
+
+
+@pytest.mark.asyncio
+async def test_requests_wait_for_host_tokens(server):
+    """Test the per-host bucket spaces requests beyond the burst."""
+    async with client(rate=20.0, burst=1) as http:
+        start = time.perf_counter()
+        await asyncio.gather(*(http.post(server.url, json={}) for _ in range(3)))
+        elapsed = time.perf_counter() - start
+
+    assert elapsed >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_lookup_coalesces_and_batches(server):
+    """Test duplicate ASINs share a request and ids go out ten per call."""
+    async with client() as http:
+        lookup = ItemLookup(
+            get_items_fetcher(http, server.url, "sherpa-20"), window=0.01
+        )
+        asins = [f"B0HTTP{i:04d}" for i in range(12)] + ["MISSING01"]
+        results = await asyncio.gather(
+            *(lookup.get(asin) for asin in asins + asins[:6]),
+            lookup.get_many(asins[6:]),
+        )
+
+    assert sorted(len(body["ItemIds"]) for _, body in server.calls) == [3, 10]
+    assert lookup.requests == 2
+    assert server.calls[0][1]["PartnerTag"] == "sherpa-20"
+    assert results[0] is results[len(asins)]
+    assert results[0].price_cents == 10000
+    assert results[12] is None
+    assert set(results[-1]) == set(asins[6:12])
+
+
+@pytest.mark.asyncio
+async def test_lookup_failure_reaches_every_waiter(server):
+    """Test a failed batch raises for all callers and is not cached."""
+    server.script = [(500, {})]
+    async with client() as http:
+        lookup = ItemLookup(get_items_fetcher(http, server.url), window=0.001)
+        results = await asyncio.gather(
+            lookup.get("B0HTTP0001"), lookup.get("B0HTTP0001"), return_exceptions=True
+        )
+        assert all(isinstance(result, UpstreamError) for result in results)
+        assert await lookup.get("B0HTTP0001") is not None
+
+
+def test_parse_items_skips_unpriced_listings():
+    """Test items without a price are left out."""
+    payload = {
+        "ItemsResult": {
+            "Items": [
+                {"ASIN": "A1", "Offers": {"Listings": [{"Price": {"Amount": 19.99}}]}},
+                {"ASIN": "A2", "Offers": {"Listings": [{"Availability": {}}]}},
+                {"ASIN": "A3"},
+            ]
+        },
+        "Errors": [{"Code": "ItemNotAccessible"}],
+    }
+    offers = parse_items(payload)
+
+    assert list(offers) == ["A1"]
+    assert (offers["A1"].price_cents, offers["A1"].currency) == (1999, "USD")
+
+
+def test_redis_bucket_is_shared_between_workers():
+    """Test two processes' buckets draw from, and pause, the same budget."""
+    client = FakeRedis()
+    first = RedisTokenBucket(client, "http:paapi", rate=10.0, capacity=2)
+    second = RedisTokenBucket(client, "http:paapi", rate=10.0, capacity=2)
+
+    assert first.try_acquire() == 0.0
+    assert second.try_acquire() == 0.0
+    assert 0.0 < first.try_acquire() <= 0.1
+
+    second.pause(5)
+    assert first.try_acquire() > 4.5
+
+
+def test_redis_bucket_falls_back_when_redis_is_down():
+    """Test an outage limits per process instead of failing."""
+    bucket = RedisTokenBucket(FakeRedis(fail=True), "http:paapi", rate=10.0, capacity=1)
+
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() > 0.0
+
+
+def test_token_bucket_pause():
+    """Test pausing an in-process bucket delays the next token."""
+    bucket = TokenBucket(rate=100.0, capacity=5)
+    bucket.pause(2)
+    assert bucket.try_acquire() == pytest.approx(2, abs=0.05)
+
+
+def test_get_bucket_is_shared_per_name(monkeypatch):
+    """Test an upstream has one bucket and conflicting limits are rejected."""
+    monkeypatch.setattr(rate_limit, "_buckets", {})
+    monkeypatch.setattr(rate_limit.settings, "rate_limit_redis_enabled", False)
+
+    bucket = rate_limit.get_bucket("paapi", 1.0, 5)
+    assert rate_limit.get_bucket("paapi", 1.0, 5) is bucket
+    with pytest.raises(ValueError, match="paapi"):
+        rate_limit.get_bucket("paapi", 10.0, 5)
+    with pytest.raises(ValueError, match="paapi"):
+        rate_limit.get_bucket("paapi", 1.0, 20)
+    assert rate_limit.get_bucket("keepa", 10.0, 20) is not bucket
+
+
+def test_get_bucket_uses_redis_when_enabled(monkeypatch):
+    """Test the shared bucket is chosen by settings."""
+    monkeypatch.setattr(rate_limit, "_buckets", {})
+    monkeypatch.setattr(rate_limit.settings, "rate_limit_redis_enabled", True)
+    monkeypatch.setattr(rate_limit, "redis_client", FakeRedis)
+
+    assert isinstance(rate_limit.get_bucket("paapi", 1.0, 5), RedisTokenBucket)
+
+
+def test_http_offer_fetcher(server, monkeypatch):
+    """Test products are looked up by ASIN on the background loop."""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}", echo=False)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        db.add_all(
+            [
+                Product(id=1, asin="B0HTTP0001", title="Headphones"),
+                Product(id=2, asin="MISSING02", title="Earbuds"),
+            ]
+        )
+        db.commit()
+    monkeypatch.setattr(rate_limit.settings, "http_rate_per_second", 1000.0)
+
+    try:
+        records = HTTPOfferFetcher(server.url, factory).fetch([1, 2])
+        assert [(record.product_id, record.price_cents) for record in records] == [
+            (1, 10000)
+        ]
+        assert records[0].availability == "In Stock"
+
+        server.script = [(429, {"Retry-After": "90"})]
+        with pytest.raises(RateLimited):
+            HTTPOfferFetcher(server.url, factory).fetch([1])
+    finally:
+        engine.dispose()
+        os.unlink(path)
+
+
+def test_run_sync_reuses_one_loop():
+    """Test synchronous callers share the background loop."""
+
+    async def current():
+        return asyncio.get_running_loop()
+
+    assert run_sync(current()) is run_sync(current())
@@ -0,0 +1,187 @@
+"""Tests for hybrid keyword and vector candidate retrieval."""
+
+import os
+import tempfile
+import threading
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.models import Offer, Product
+from app.embeddings import StubEmbedder
+from app.search import hybrid, vector
+from app.search.hybrid import (
+    hybrid_search,
+    hybrid_search_sync,
+    reciprocal_rank_fusion,
+    within_budget,
+)
+from app.search.keyword import KeywordHit, refresh_search_documents
+from app.search.vector import VectorHit
+
+PRODUCTS = [
+    (1, "Sony WH-1000XM5 Wireless Noise Cancelling Headphones", 34999),
+    (2, "Wireless noise cancelling earbuds", 9999),
+    (3, "Studio headphones", 14999),
+    (4, "Noise cancelling headphones for travel", 19999),
+    (5, "Mechanical keyboard", 8999),
+]
+
+
+@pytest.fixture
+def session_factory():
+    """Temporary SQLite database of embedded, indexed products with offers."""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+
+    engine = create_engine(f"sqlite:///{path}", echo=False)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    vectors = StubEmbedder().embed([title for _, title, _ in PRODUCTS])
+    with SessionLocal() as session:
+        for (product_id, title, price), embedding in zip(
+            PRODUCTS, vectors, strict=True
+        ):
+            session.add(
+                Product(
+                    id=product_id,
+                    asin=f"B0HYBR{product_id:04d}",
+                    title=title,
+                    embedding=embedding,
+                )
+            )
+            session.add(Offer(product_id=product_id, price_cents=price))
+        session.commit()
+        refresh_search_documents(session, [product_id for product_id, _, _ in PRODUCTS])
+        session.commit()
+    vector.invalidate_indexes()
+
+    yield SessionLocal
+
+    # Cleanup
+    vector.invalidate_indexes()
+    engine.dispose()
+    os.unlink(path)
+
+
+def ids(hits) -> list[int]:
+    return [hit.id for hit in hits]
+
+
+def test_rrf_rewards_agreement():
+    """Test products found by both retrievers outrank single-list leaders."""
+    keyword = [KeywordHit(1, 9.0), KeywordHit(2, 5.0), KeywordHit(3, 1.0)]
+    vectors = [VectorHit(4, 0.9), VectorHit(2, 0.8), VectorHit(5, 0.1)]
+
+    fused = reciprocal_rank_fusion(keyword, vectors, k=10, rrf_k=60)
+
+    assert ids(fused) == [2, 1, 4, 3, 5]
+    assert fused[0].score == pytest.approx(2 / 62)
+    assert (fused[0].keyword_rank, fused[0].vector_rank, fused[0].similarity) == (
+        2,
+        2,
+        0.8,
+    )
+    assert (fused[1].vector_rank, fused[1].similarity) == (None, None)
+    assert ids(reciprocal_rank_fusion(keyword, vectors, k=2)) == [2, 1]
+
+
+def test_within_budget_filters_by_offer_price(session_factory):
+    """Test offers in the budget currency decide and products without one are dropped."""
+    with session_factory() as db:
+        db.add(Offer(product_id=3, price_cents=24999, currency="EUR"))
+        db.add(Product(id=6, asin="B0HYBR0006", title="No offer"))
+        db.commit()
+        hits = [KeywordHit(product_id, 1.0) for product_id in (1, 2, 3, 4, 6)]
+
+        assert ids(within_budget(db, hits, budget_max=Decimal("150"))) == [2, 3]
+        assert ids(within_budget(db, hits, Decimal("100"), Decimal("200"))) == [3, 4]
+        assert (
+            ids(within_budget(db, hits, budget_max=Decimal("150"), currency="EUR"))
+            == []
+        )
+        assert ids(within_budget(db, hits)) == [1, 2, 3, 4, 6]
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_fuses_both_retrievers(session_factory):
+    """Test a model number comes from keyword search and neighbours from vectors."""
+    hits = await hybrid_search(
+        session_factory, "WH-1000XM5 headphones", StubEmbedder(), k=3
+    )
+
+    assert hits[0].id == 1
+    assert hits[0].keyword_rank == 1 and hits[0].vector_rank is not None
+    assert len(hits) == 3
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_filters_budget_before_fusion(session_factory):
+    """Test out-of-budget products never reach the fused list."""
+    hits = await hybrid_search(
+        session_factory,
+        "noise cancelling headphones",
+        StubEmbedder(),
+        k=10,
+        budget_min=Decimal("95"),
+        budget_max=Decimal("200"),
+    )
+
+    assert set(ids(hits)) == {2, 3, 4}
+    assert ids(hits)[0] == 4
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_runs_retrievers_concurrently(session_factory, monkeypatch):
+    """Test both retrievers are in flight at the same time on their own sessions."""
+    barrier = threading.Barrier(2, timeout=5)
+    sessions = []
+
+    def keyword(db, text, k):
+        sessions.append(db)
+        barrier.wait()
+        return [KeywordHit(1, 1.0)]
+
+    def similar(db, query, k):
+        sessions.append(db)
+        barrier.wait()
+        return [VectorHit(2, 0.5)]
+
+    monkeypatch.setattr(hybrid, "search_keyword", keyword)
+    monkeypatch.setattr(hybrid, "search_products", similar)
+
+    hits = await hybrid_search(session_factory, "headphones", StubEmbedder(), k=5)
+
+    assert sorted(ids(hits)) == [1, 2]
+    assert sessions[0] is not sessions[1]
+
+
+@pytest.mark.asyncio
+async def test_sync_search_matches_async_inside_running_loop(
+    session_factory, monkeypatch
+):
+    """Test the blocking entry point runs both retrievers at once, even under a loop."""
+    expected = await hybrid_search(
+        session_factory, "noise cancelling headphones", StubEmbedder(), k=5
+    )
+    barrier = threading.Barrier(2, timeout=5)
+
+    def meeting(search):
+        def wrapper(*args):
+            barrier.wait()
+            return search(*args)
+
+        return wrapper
+
+    monkeypatch.setattr(hybrid, "search_keyword", meeting(hybrid.search_keyword))
+    monkeypatch.setattr(hybrid, "search_products", meeting(hybrid.search_products))
+    # The calling thread already runs an event loop, which asyncio.run would reject
+    hits = hybrid_search_sync(
+        session_factory, "noise cancelling headphones", StubEmbedder(), k=5
+    )
+
+    assert hits == expected
@@ -0,0 +1,224 @@
+"""Tests for the keyword search index and API."""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, delete, func, select, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.base import Base
+from app.db.models import Product, ProductSearch, Review
+from app.db.session import get_db
+from app.main import app
+from app.search.keyword import (
+    _upsert_statement,
+    refresh_search_documents,
+    search_keyword,
+    search_terms,
+)
+from app.tasks.search import refresh_stale_documents
+
+PRODUCTS = [
+    (1, "Sony WH-1000XM5 Wireless Noise Cancelling Headphones", "Sony"),
+    (2, "Sony WF-1000XM4 Earbuds", "Sony"),
+    (3, "Bose QuietComfort 45 Headphones", "Bose"),
+    (4, "Sennheiser HD 600 Open Back Headphones", "Sennheiser"),
+    (5, "Anker Soundcore Life Q30", "Anker"),
+]
+
+
+@pytest.fixture
+def temp_db():
+    """Temporary SQLite database with a few indexed headphones."""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+
+    engine = create_engine(f"sqlite:///{path}", echo=False)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    session = SessionLocal()
+
+    for product_id, title, brand in PRODUCTS:
+        session.add(
+            Product(
+                id=product_id, asin=f"B0TEXT{product_id:04d}", title=title, brand=brand
+            )
+        )
+    session.add(
+        Review(
+            product_id=5,
+            source="Amazon",
+            snippet="Great noise cancelling for the price",
+        )
+    )
+    session.add(
+        Review(product_id=4, source="Amazon", snippet="Reference sound, no isolation")
+    )
+    session.commit()
+    refresh_search_documents(session, range(1, 6))
+    session.commit()
+
+    yield session
+
+    # Cleanup
+    session.close()
+    engine.dispose()
+    os.unlink(path)
+
+
+def ids(hits) -> list[int]:
+    return [hit.id for hit in hits]
+
+
+def test_search_terms_normalized():
+    """Test queries are split into distinct lowercase terms without stopwords."""
+    assert search_terms("Sony WH-1000XM5 for the Gym, sony") == [
+        "sony",
+        "wh",
+        "1000xm5",
+        "gym",
+    ]
+    assert search_terms("  --  ") == []
+
+
+def test_exact_model_name_ranks_first(temp_db):
+    """Test a model number finds its product."""
+    assert ids(search_keyword(temp_db, "WH-1000XM5"))[0] == 1
+    assert ids(search_keyword(temp_db, "wf 1000xm4 earbuds"))[0] == 2
+
+
+def test_title_outweighs_review_mentions(temp_db):
+    """Test a title match ranks above a review-only match and scores descend."""
+    hits = search_keyword(temp_db, "noise cancelling")
+
+    assert ids(hits) == [1, 5]
+    assert hits[0].score > hits[1].score
+
+
+def test_stemming_and_partial_matches(temp_db):
+    """Test stemmed forms match, and requests matching no single product still return hits."""
+    assert set(ids(search_keyword(temp_db, "headphone"))) == {1, 3, 4}
+
+    hits = search_keyword(temp_db, "bose headphones for gaming", k=3)
+    assert ids(hits)[0] == 3
+    assert len(hits) == 3
+    assert search_keyword(temp_db, "the and of") == []
+
+
+def test_common_terms_only_filter(temp_db, monkeypatch):
+    """Test terms in too many products are matched newest first, after ranked hits."""
+    monkeypatch.setattr(settings, "search_common_term_docs", 3)
+
+    # "headphones" is in 3 products: unranked, newest first
+    hits = search_keyword(temp_db, "headphones")
+    assert ids(hits) == [4, 3, 1]
+    assert {hit.score for hit in hits} == {0.0}
+
+    # "sony" stays selective and is ranked ahead of the common-term matches
+    hits = search_keyword(temp_db, "sony headphones")
+    assert set(ids(hits)[:2]) == {1, 2}
+    assert ids(hits)[2:] == [4, 3]
+    assert hits[0].score > 0
+
+
+def test_ranking_covers_every_match(temp_db):
+    """Test the best match is found however many newer products match less well."""
+    temp_db.add(
+        Product(id=6, asin="B0TEXT0006", title="Studio Monitor Headphones", brand="AKG")
+    )
+    temp_db.add_all(
+        Product(
+            id=product_id,
+            asin=f"B0TEXT{product_id:04d}",
+            title=f"Accessory {product_id}",
+        )
+        for product_id in range(7, 3007)
+    )
+    temp_db.add_all(
+        Review(product_id=product_id, source="Amazon", snippet="Fine for studio use")
+        for product_id in range(7, 3007)
+    )
+    temp_db.commit()
+    refresh_search_documents(temp_db, range(6, 3007))
+    temp_db.commit()
+
+    hits = search_keyword(temp_db, "studio", k=3)
+
+    assert ids(hits) == [6, 7, 8]
+
+
+def test_refresh_picks_up_reviews_and_deletions(temp_db):
+    """Test refreshed rows reflect new reviews and removed products."""
+    temp_db.add(
+        Review(product_id=3, source="Amazon", snippet="Perfect on long flights")
+    )
+    temp_db.execute(delete(Review).where(Review.product_id == 5))
+    temp_db.execute(delete(Product).where(Product.id == 5))
+    temp_db.commit()
+    assert search_keyword(temp_db, "flights") == []
+
+    refresh_search_documents(temp_db, [3, 5])
+    temp_db.commit()
+
+    assert ids(search_keyword(temp_db, "flights")) == [3]
+    assert ids(search_keyword(temp_db, "soundcore")) == []
+    assert temp_db.get(ProductSearch, 5) is None
+
+
+def test_refresh_stale_documents(temp_db):
+    """Test the backfill only rebuilds missing or outdated rows."""
+    temp_db.add(
+        Product(
+            id=6,
+            asin="B0TEXT0006",
+            title="Beyerdynamic DT 770 Pro",
+            brand="Beyerdynamic",
+        )
+    )
+    temp_db.execute(
+        update(ProductSearch)
+        .where(ProductSearch.product_id == 1)
+        .values(updated_at=datetime.utcnow() - timedelta(hours=1))
+    )
+    temp_db.add(Review(product_id=1, source="Amazon", snippet="Folds flat"))
+    temp_db.commit()
+
+    result = refresh_stale_documents(temp_db, page_size=2)
+
+    assert result == {"refreshed": 2, "last_id": 6, "done": True}
+    assert ids(search_keyword(temp_db, "beyerdynamic")) == [6]
+    assert ids(search_keyword(temp_db, "folds")) == [1]
+    assert refresh_stale_documents(temp_db)["refreshed"] == 0
+    assert temp_db.scalar(select(func.count()).select_from(ProductSearch)) == 6
+
+
+def test_postgres_statements_compile():
+    """Test the tsvector upsert builds a weighted document from bound values."""
+    sql = str(_upsert_statement("postgresql").compile(dialect=postgresql.dialect()))
+
+    assert "setweight(to_tsvector" in sql
+    assert "ON CONFLICT (product_id) DO UPDATE" in sql
+    assert "document = excluded.document" in sql
+
+
+def test_search_endpoint(temp_db):
+    """Test the API returns ranked products with their titles."""
+    app.dependency_overrides[get_db] = lambda: temp_db
+    try:
+        client = TestClient(app)
+        response = client.get("/search", params={"q": "quietcomfort", "limit": 5})
+        empty = client.get("/search", params={"q": "zzzz"})
+        missing = client.get("/search")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert [item["product_id"] for item in response.json()["items"]] == [3]
+    assert response.json()["items"][0]["brand"] == "Bose"
+    assert empty.json()["items"] == []
+    assert missing.status_code == 422
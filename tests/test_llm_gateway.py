@@ -0,0 +1,238 @@
+"""Tests for the LLM gateway, its cache tiers and batched rationales."""
+
+import asyncio
+import itertools
+import json
+import time
+
+import pytest
+
+from app.agent import FakeLLM, LLMGateway, generate_rationales
+from app.agent.gateway import cache_key, count_tokens
+from app.cache import SQLiteCache, TTLCache
+
+
+class RecordingLLM:
+    """Backend recording prompts; optionally slow or failing."""
+
+    def __init__(self, latency: float = 0.0, fail: bool = False):
+        self.latency = latency
+        self.fail = fail
+        self.prompts: list[str] = []
+
+    async def complete(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        await asyncio.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError("backend down")
+        return f"answer to {prompt}"
+
+
+def gateway(llm, **options) -> LLMGateway:
+    return LLMGateway(llm, "fake", memory=TTLCache(max_size=100, ttl=60), **options)
+
+
+def test_cache_key_covers_model_and_params():
+    """Test the content address changes with any part of the request."""
+    base = cache_key("prompt", "model-a", {"temperature": 0})
+    assert base == cache_key("prompt", "model-a", {"temperature": 0})
+    assert base != cache_key("prompt", "model-b", {"temperature": 0})
+    assert base != cache_key("prompt", "model-a", {"temperature": 1})
+    assert base != cache_key("prompt!", "model-a", {"temperature": 0})
+
+
+@pytest.mark.asyncio
+async def test_repeated_prompt_is_served_from_cache():
+    """Test a cached prompt skips the backend and counts the savings."""
+    llm = RecordingLLM()
+    llm_gateway = gateway(llm)
+
+    first = await llm_gateway.complete("hello")
+    second = await llm_gateway.complete("hello")
+
+    assert first == second == "answer to hello"
+    assert llm.prompts == ["hello"]
+    stats = llm_gateway.stats
+    assert (stats.requests, stats.llm_calls, stats.cache_hits) == (2, 1, 1)
+    assert stats.saved_tokens == count_tokens("hello") + count_tokens("answer to hello")
+
+
+@pytest.mark.asyncio
+async def test_identical_inflight_prompts_share_one_call():
+    """Test concurrent identical prompts wait for one completion."""
+    llm = RecordingLLM(latency=0.05)
+    llm_gateway = LLMGateway(llm, "fake")
+
+    results = await asyncio.gather(*(llm_gateway.complete("same") for _ in range(5)))
+
+    assert set(results) == {"answer to same"}
+    assert llm.prompts == ["same"]
+    assert llm_gateway.stats.coalesced == 4
+
+
+@pytest.mark.asyncio
+async def test_failure_reaches_waiters_and_is_not_cached():
+    """Test a failed completion raises for every waiter and is retried later."""
+    llm = RecordingLLM(latency=0.01, fail=True)
+    llm_gateway = gateway(llm)
+
+    results = await asyncio.gather(
+        llm_gateway.complete("x"), llm_gateway.complete("x"), return_exceptions=True
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    llm.fail = False
+    assert await llm_gateway.complete("x") == "answer to x"
+    assert len(llm.prompts) == 2
+
+
+@pytest.mark.asyncio
+async def test_waiter_takes_over_when_sender_is_cancelled():
+    """Test cancelling the caller that sent a prompt does not fail the others."""
+    llm = RecordingLLM(latency=0.05)
+    llm_gateway = gateway(llm)
+
+    sender = asyncio.create_task(llm_gateway.complete("p"))
+    await asyncio.sleep(0.01)
+    waiter = asyncio.create_task(llm_gateway.complete("p"))
+    await asyncio.sleep(0.01)
+    sender.cancel()
+
+    assert await waiter == "answer to p"
+    assert len(llm.prompts) == 2
+
+
+@pytest.mark.asyncio
+async def test_shared_tier_is_read_through(tmp_path):
+    """Test a response cached by another process is served and promoted."""
+    path = tmp_path / "llm.sqlite3"
+    first = gateway(
+        RecordingLLM(), shared=SQLiteCache(path, "llm", ttl=60, max_entries=10)
+    )
+    await first.complete("shared")
+
+    llm = RecordingLLM()
+    second = gateway(llm, shared=SQLiteCache(path, "llm", ttl=60, max_entries=10))
+    assert await second.complete("shared") == "answer to shared"
+    assert llm.prompts == []
+    assert len(second.memory) == 1
+
+
+class SlowTier:
+    """Shared tier whose calls block the calling thread."""
+
+    def __init__(self, seconds: float) -> None:
+        self.seconds = seconds
+        self.data: dict = {}
+
+    def get(self, key):
+        time.sleep(self.seconds)
+        return self.data.get(key)
+
+    def set(self, key, value, ttl=None):
+        time.sleep(self.seconds)
+        self.data[key] = value
+
+
+@pytest.mark.asyncio
+async def test_shared_tier_does_not_block_event_loop():
+    """Test other coroutines keep running while the shared tier is slow."""
+    shared = SlowTier(0.1)
+    llm_gateway = gateway(RecordingLLM(), shared=shared)
+    ticks = []
+
+    async def ticker():
+        for _ in range(10):
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+
+    results = await asyncio.gather(llm_gateway.complete("slow"), ticker())
+
+    assert results[0] == "answer to slow"
+    assert len(shared.data) == 1
+    assert max(b - a for a, b in itertools.pairwise(ticks)) < 0.08
+
+
+def test_sqlite_cache_expires_and_evicts(tmp_path):
+    """Test entries expire after the TTL and the least recently read go first."""
+    now = [1000.0]
+    cache = SQLiteCache(
+        tmp_path / "cache.sqlite3", "t", ttl=10, max_entries=2, clock=lambda: now[0]
+    )
+
+    cache.set("a", {"v": 1})
+    now[0] += 1
+    cache.set("b", {"v": 2})
+    now[0] += 1
+    assert cache.get("a") == {"v": 1}
+    now[0] += 1
+    cache.set("c", {"v": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    assert cache.stats.evictions == 1
+
+    now[0] += 60
+    assert cache.get("c") is None
+    assert cache.stats.expirations == 1
+
+
+@pytest.mark.asyncio
+async def test_rationales_are_batched():
+    """Test products are explained in as few calls as the batch size allows."""
+    llm = FakeLLM(latency=0)
+    llm_gateway = LLMGateway(llm, "fake")
+    products = [
+        {
+            "product_id": i,
+            "title": f"Headphones {i}",
+            "facts": f"${i}0.00, within budget",
+        }
+        for i in range(1, 6)
+    ]
+
+    rationales = await generate_rationales(
+        llm_gateway, "quiet headphones", products, batch_size=2
+    )
+
+    assert llm.calls == 3
+    assert set(rationales) == {1, 2, 3, 4, 5}
+    assert (
+        rationales[1] == 'Headphones 1 fits "quiet headphones": $10.00, within budget'
+    )
+
+
+@pytest.mark.asyncio
+async def test_rationales_ignore_bad_answers():
+    """Test unparseable answers and unknown ids are dropped."""
+
+    class Stub:
+        def __init__(self, answer):
+            self.answer = answer
+
+        async def complete(self, prompt):
+            return self.answer
+
+    products = [{"product_id": 1, "title": "A", "facts": "f"}]
+    assert await generate_rationales(Stub("not json"), "q", products) == {}
+    answer = json.dumps({"1": "Good", "99": "Unknown", "x": "Bad"})
+    assert await generate_rationales(Stub(answer), "q", products) == {1: "Good"}
+
+
+def test_sqlite_cache_counts_rows_only_near_the_limit(tmp_path):
+    """Test the table is counted once per slack of writes, not on every write."""
+    cache = SQLiteCache(tmp_path / "cache.sqlite3", "t", ttl=60, max_entries=200)
+    counts = []
+    cache._conn.set_trace_callback(
+        lambda sql: counts.append(sql) if "count(*)" in sql else None
+    )
+
+    for i in range(400):
+        cache.set(i, {"v": i})
+    cache._conn.set_trace_callback(None)
+
+    (rows,) = cache._conn.execute("SELECT count(*) FROM cache_entries").fetchone()
+    assert rows <= 200
+    assert cache.stats.evictions == 400 - rows
+    # One count to learn the size, then one per 2 (1%) writes past the limit
+    assert len(counts) <= 1 + 200 // 2
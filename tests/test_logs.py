@@ -0,0 +1,132 @@
+"""Tests for structured JSON logging."""
+
+import io
+import json
+import logging
+import os
+import sys
+
+import pytest
+
+from app.core import logs
+from app.core.logs import JSONFormatter, RecordQueueHandler, configure_json_logging
+
+
+def make_record(
+    msg: str = "Task %s done", args: tuple = ("demo",), **extra
+) -> logging.LogRecord:
+    """Build a record as ``logger.info(msg, *args, extra=extra)`` would."""
+    record = logging.LogRecord("tests", logging.INFO, __file__, 10, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+@pytest.mark.parametrize("use_orjson", [False, True])
+def test_formatter_fields_and_extras(use_orjson):
+    """Test the entry carries the standard fields and known extras only."""
+    if use_orjson and logs.orjson is None:
+        pytest.skip("orjson not installed")
+    record = make_record(task_id="abc", retries=2, backoff=120, unrelated="x")
+
+    entry = json.loads(JSONFormatter(use_orjson=use_orjson).format(record))
+
+    assert entry["message"] == "Task demo done"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "tests"
+    assert entry["line"] == 10
+    assert entry["task_id"] == "abc"
+    assert entry["retries"] == 2
+    assert entry["backoff"] == 120
+    assert "task_name" not in entry
+    assert "unrelated" not in entry
+
+
+def test_formatter_timestamp_matches_stdlib():
+    """Test the cached timestamp renders like ``Formatter.formatTime``."""
+    formatter = JSONFormatter()
+    reference = logging.Formatter()
+    for created in (1700000000.123, 1700000000.987, 1700000001.004):
+        record = make_record()
+        record.created = created
+        record.msecs = int((created - int(created)) * 1000)
+        assert formatter.formatTime(record) == reference.formatTime(record)
+
+
+def test_formatter_includes_exception():
+    """Test tracebacks are added as their own field."""
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = make_record()
+        record.exc_info = sys.exc_info()
+
+    entry = json.loads(JSONFormatter().format(record))
+    assert "ValueError: boom" in entry["exception"]
+
+
+def test_queue_handler_resolves_message_before_enqueue():
+    """Test records cross the queue with args and tracebacks already rendered."""
+    handler = RecordQueueHandler(None)
+    mutable = ["before"]
+    try:
+        raise KeyError("missing")
+    except KeyError:
+        record = logging.LogRecord(
+            "tests", logging.ERROR, __file__, 1, "value %s", (mutable,), sys.exc_info()
+        )
+
+    prepared = handler.prepare(record)
+    mutable[0] = "after"
+
+    assert prepared.getMessage() == "value ['before']"
+    assert prepared.args is None and prepared.exc_info is None
+    assert "KeyError" in prepared.exc_text
+
+
+def test_configure_json_logging_writes_through_listener():
+    """Test records reach the stream once the listener is flushed."""
+    stream = io.StringIO()
+    logger = logging.getLogger("tests.logs.listener")
+    logger.propagate = False
+    listener = configure_json_logging(logger, logging.INFO, stream)
+    try:
+        logger.debug("hidden")
+        logger.info("Task %s retry %s/%s", "demo", 1, 3, extra={"task_id": "t1"})
+    finally:
+        listener.stop()
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 1
+    entry = json.loads(lines[0])
+    assert entry["message"] == "Task demo retry 1/3"
+    assert entry["task_id"] == "t1"
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_forked_child_starts_its_own_listener(tmp_path):
+    """Test a forked child's records are written, not left in an undrained queue."""
+    path = tmp_path / "child.log"
+    logger = logging.getLogger("tests.logs.fork")
+    logger.propagate = False
+    with open(path, "w", buffering=1) as stream:
+        listener = configure_json_logging(logger, logging.INFO, stream)
+        try:
+            logger.info("from parent")
+            pid = os.fork()
+            if pid == 0:  # pragma: no cover - runs in the child
+                logger.info("from child %s", os.getpid())
+                listener.stop()
+                os._exit(0)
+            _, status = os.waitpid(pid, 0)
+        finally:
+            listener.stop()
+            for handler in list(logger.handlers):
+                logger.removeHandler(handler)
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    messages = sorted(
+        json.loads(line)["message"] for line in path.read_text().splitlines()
+    )
+    assert messages == [f"from child {pid}", "from parent"]
@@ -0,0 +1,175 @@
+"""Tests for Prometheus metrics instrumentation."""
+
+import os
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from celery.exceptions import Retry
+from fastapi.testclient import TestClient
+from sqlalchemy import QueuePool, create_engine, text
+
+# Set Celery to always eager for testing and use memory backend
+os.environ["CELERY_TASK_ALWAYS_EAGER"] = "true"
+os.environ["CELERY_RESULT_BACKEND"] = "cache+memory://"
+
+from app.core import metrics
+from app.core.metrics import instrument_engine, registry
+from app.main import app
+from app.tasks.example import demo_task
+
+
+def sample(name: str, **labels: str) -> float:
+    """Current value of a sample, 0 when it has not been recorded yet."""
+    return registry.get_sample_value(name, labels) or 0.0
+
+
+@pytest.fixture
+def client() -> TestClient:
+    """Create test client."""
+    return TestClient(app)
+
+
+def test_metrics_endpoint_exposes_request_latency(client: TestClient) -> None:
+    """Test requests are counted per route template and served on /metrics."""
+    labels = {"method": "GET", "route": "/healthz", "status": "200"}
+    before = sample("shopsherpa_http_request_seconds_count", **labels)
+
+    client.get("/healthz")
+    client.get("/healthz")
+
+    assert sample("shopsherpa_http_request_seconds_count", **labels) == before + 2
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert (
+        'shopsherpa_http_request_seconds_count{method="GET",route="/healthz"'
+        in response.text
+    )
+
+
+def test_unmatched_paths_share_one_label(client: TestClient) -> None:
+    """Test unknown paths do not create a label per path."""
+    labels = {"method": "GET", "route": metrics.UNMATCHED_ROUTE, "status": "404"}
+    before = sample("shopsherpa_http_request_seconds_count", **labels)
+
+    client.get("/no-such-page")
+    client.get("/another-missing-page")
+
+    assert sample("shopsherpa_http_request_seconds_count", **labels) == before + 2
+
+
+def test_instrument_engine_times_queries_and_checkouts(tmp_path) -> None:
+    """Test statements and pool checkouts are recorded, also after dispose."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'metrics.db'}")
+    instrument_engine(engine, "test")
+    instrument_engine(engine, "test")  # idempotent
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        conn.execute(text("select 2"))
+    assert (
+        sample("shopsherpa_db_query_seconds_count", engine="test", operation="select")
+        == 2
+    )
+    assert sample("shopsherpa_db_pool_checkout_seconds_count", engine="test") == 1
+
+    engine.dispose()
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER)"))
+        conn.execute(text("INSERT INTO t VALUES (:id)"), [{"id": 1}, {"id": 2}])
+    assert (
+        sample("shopsherpa_db_query_seconds_count", engine="test", operation="insert")
+        == 1
+    )
+    assert sample("shopsherpa_db_pool_checkout_seconds_count", engine="test") == 2
+
+
+def test_pool_checkout_records_wait_not_hold_time(tmp_path) -> None:
+    """Test checkout time covers waiting for a busy pool, not how long it is held."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=QueuePool,
+        pool_size=1,
+        max_overflow=0,
+    )
+    instrument_engine(engine, "test-pool")
+    held = engine.connect()
+    release = threading.Timer(0.2, held.close)
+    release.start()
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        time.sleep(0.3)
+    release.join()
+
+    count = sample("shopsherpa_db_pool_checkout_seconds_count", engine="test-pool")
+    waited = sample("shopsherpa_db_pool_checkout_seconds_sum", engine="test-pool")
+    assert count == 2
+    assert 0.15 <= waited < 0.3
+
+
+def test_task_runtime_recorded() -> None:
+    """Test task runtime is recorded with the final state."""
+    labels = {"task": demo_task.name, "state": "SUCCESS"}
+    before = sample("shopsherpa_task_runtime_seconds_count", **labels)
+
+    with patch("app.tasks.example.random.random", return_value=0.5):
+        demo_task.delay("metrics")
+
+    assert sample("shopsherpa_task_runtime_seconds_count", **labels) == before + 1
+
+
+def test_queue_wait_uses_publish_stamp() -> None:
+    """Test queue wait is measured from the header stamped at publish."""
+    headers: dict = {}
+    metrics.on_before_task_publish(
+        sender="app.tasks.refresh.refresh_offer_chunk", headers=headers
+    )
+    assert metrics.SENT_AT_HEADER in headers
+
+    request = SimpleNamespace(
+        is_eager=False,
+        delivery_info={"routing_key": "ingest"},
+        **{metrics.SENT_AT_HEADER: headers[metrics.SENT_AT_HEADER] - 2.0},
+    )
+    task = SimpleNamespace(
+        name="app.tasks.refresh.refresh_offer_chunk", request=request
+    )
+    assert metrics.run_timed_task(task, lambda x: x + 1, 1) == 2
+
+    labels = {"task": task.name, "queue": "ingest"}
+    assert sample("shopsherpa_task_queue_wait_seconds_count", **labels) == 1
+    assert sample("shopsherpa_task_queue_wait_seconds_sum", **labels) >= 2.0
+
+
+def test_task_retries_and_failures_labelled() -> None:
+    """Test the runtime state label follows how the task body exits."""
+    request = SimpleNamespace(is_eager=True, delivery_info=None)
+    task = SimpleNamespace(name="tests.flaky", request=request)
+
+    def retry() -> None:
+        raise Retry()
+
+    def fail() -> None:
+        raise ValueError("boom")
+
+    with pytest.raises(Retry):
+        metrics.run_timed_task(task, retry)
+    with pytest.raises(ValueError):
+        metrics.run_timed_task(task, fail)
+
+    assert (
+        sample(
+            "shopsherpa_task_runtime_seconds_count", task="tests.flaky", state="RETRY"
+        )
+        == 1
+    )
+    assert (
+        sample(
+            "shopsherpa_task_runtime_seconds_count", task="tests.flaky", state="FAILURE"
+        )
+        == 1
+    )
@@ -0,0 +1,151 @@
+"""Tests for bulk offer ingestion."""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.models import Offer, Product
+from app.ingest import OfferRecord, ingest_offers
+
+
+@pytest.fixture
+def temp_db():
+    """Create a temporary SQLite database with a few products."""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+
+    engine = create_engine(f"sqlite:///{path}", echo=False)
+    Base.metadata.create_all(bind=engine)
+
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    session = SessionLocal()
+    session.add_all(
+        Product(id=i, asin=f"B0INGEST{i:03d}", title=f"Headphones {i}")
+        for i in range(1, 4)
+    )
+    session.commit()
+
+    yield session
+
+    # Cleanup
+    session.close()
+    engine.dispose()
+    os.unlink(path)
+
+
+def test_ingest_inserts_new_offers(temp_db):
+    """Test new offers are inserted and counted."""
+    stats = ingest_offers(
+        temp_db,
+        [
+            OfferRecord(product_id=1, price_cents=19999),
+            {"product_id": 2, "price_cents": 9999, "availability": "In Stock"},
+        ],
+    )
+    temp_db.commit()
+
+    assert (stats.inserted, stats.updated, stats.unchanged) == (2, 0, 0)
+    assert stats.changed_product_ids == {1, 2}
+    offers = temp_db.scalars(select(Offer).order_by(Offer.product_id)).all()
+    assert [offer.price_cents for offer in offers] == [19999, 9999]
+    assert offers[0].currency == "USD"
+    assert offers[1].availability == "In Stock"
+
+
+def test_ingest_updates_and_reports_unchanged(temp_db):
+    """Test re-ingestion classifies updated vs unchanged offers."""
+    ingest_offers(
+        temp_db,
+        [
+            OfferRecord(product_id=1, price_cents=19999),
+            OfferRecord(product_id=2, price_cents=9999),
+        ],
+    )
+    temp_db.commit()
+
+    stats = ingest_offers(
+        temp_db,
+        [
+            OfferRecord(product_id=1, price_cents=17999),
+            OfferRecord(product_id=2, price_cents=9999),
+            OfferRecord(product_id=3, price_cents=4999),
+        ],
+    )
+    temp_db.commit()
+
+    assert (stats.inserted, stats.updated, stats.unchanged) == (1, 1, 1)
+    assert stats.changed_product_ids == {1, 3}
+    assert (
+        temp_db.scalar(select(Offer.price_cents).where(Offer.product_id == 1)) == 17999
+    )
+    assert temp_db.scalar(select(Offer.id).where(Offer.product_id == 2)) is not None
+    assert len(temp_db.scalars(select(Offer)).all()) == 3
+
+
+def test_ingest_refreshes_last_checked_at_when_unchanged(temp_db):
+    """Test unchanged offers still have their freshness timestamp bumped."""
+    stale = datetime.utcnow() - timedelta(hours=30)
+    ingest_offers(
+        temp_db, [OfferRecord(product_id=1, price_cents=100, last_checked_at=stale)]
+    )
+    temp_db.commit()
+
+    stats = ingest_offers(temp_db, [OfferRecord(product_id=1, price_cents=100)])
+    temp_db.commit()
+    temp_db.expire_all()
+
+    assert stats.unchanged == 1
+    checked = temp_db.scalar(select(Offer.last_checked_at).where(Offer.product_id == 1))
+    assert checked > stale + timedelta(hours=29)
+
+
+def test_ingest_keys_on_product_and_currency(temp_db):
+    """Test the same product in two currencies yields two offers."""
+    stats = ingest_offers(
+        temp_db,
+        [
+            OfferRecord(product_id=1, price_cents=19999, currency="USD"),
+            OfferRecord(product_id=1, price_cents=18999, currency="EUR"),
+        ],
+    )
+    temp_db.commit()
+
+    assert stats.inserted == 2
+    assert len(temp_db.scalars(select(Offer)).all()) == 2
+
+
+def test_ingest_duplicate_keys_in_batch_keep_last(temp_db):
+    """Test repeated keys within one batch resolve to the last observation."""
+    stats = ingest_offers(
+        temp_db,
+        [
+            OfferRecord(product_id=1, price_cents=100),
+            OfferRecord(product_id=1, price_cents=200),
+        ],
+    )
+    temp_db.commit()
+
+    assert stats.inserted == 1
+    assert temp_db.scalar(select(Offer.price_cents)) == 200
+
+
+def test_ingest_streams_in_batches(temp_db):
+    """Test a generator larger than batch_size is fully ingested."""
+    temp_db.add_all(
+        Product(id=i, asin=f"B0STREAM{i:04d}", title=f"Headphones {i}")
+        for i in range(10, 260)
+    )
+    temp_db.commit()
+
+    records = (OfferRecord(product_id=i, price_cents=i * 100) for i in range(10, 260))
+    stats = ingest_offers(temp_db, records, batch_size=64)
+    temp_db.commit()
+
+    assert stats.inserted == 250
+    assert stats.total == 250
+    assert len(temp_db.scalars(select(Offer)).all()) == 250
@@ -0,0 +1,265 @@
+"""Tests for the stale-offer refresh scheduler."""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from celery.exceptions import MaxRetriesExceededError
+
+os.environ["CELERY_TASK_ALWAYS_EAGER"] = "true"
+os.environ["CELERY_RESULT_BACKEND"] = "cache+memory://"
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.celery_app import celery_app
+from app.core import metrics, rate_limit
+from app.core.http import RateLimited
+from app.core.rate_limit import TokenBucket
+from app.db.base import Base
+from app.db.models import Offer, Product, Query, Ranking
+from app.ingest.offers import OfferRecord
+from app.tasks import refresh
+
+
+class FakeFetcher:
+    """Local upstream that raises every price by one cent."""
+
+    name = "fake"
+    max_batch = 2
+    calls: list[list[int]] = []
+
+    def fetch(self, product_ids: list[int]) -> list[OfferRecord]:
+        FakeFetcher.calls.append(product_ids)
+        return [
+            OfferRecord(product_id=product_id, price_cents=1000 + product_id)
+            for product_id in product_ids
+        ]
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    """Temporary SQLite database wired into the refresh tasks."""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+
+    engine = create_engine(f"sqlite:///{path}", echo=False)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    monkeypatch.setattr(refresh, "SessionLocal", factory)
+    monkeypatch.setattr(
+        refresh.settings, "offer_fetcher", "tests.test_offer_refresh:FakeFetcher"
+    )
+    monkeypatch.setattr(refresh.settings, "offer_fetch_rate_per_second", 1000.0)
+    monkeypatch.setattr(refresh.settings, "offer_fetch_burst", 100)
+    monkeypatch.setattr(rate_limit, "_buckets", {})
+    FakeFetcher.calls = []
+
+    yield factory
+
+    # Cleanup
+    engine.dispose()
+    os.unlink(path)
+
+
+def seed(factory, ages_hours: dict[int, float], ranked: set[int] = frozenset()) -> None:
+    """Create one product and offer per id with the given offer ages."""
+    now = datetime.utcnow()
+    with factory() as db:
+        for product_id, age in ages_hours.items():
+            db.add(
+                Product(
+                    id=product_id, asin=f"B0REFRESH{product_id:02d}", title="Headphones"
+                )
+            )
+            db.add(
+                Offer(
+                    product_id=product_id,
+                    price_cents=1000,
+                    last_checked_at=now - timedelta(hours=age),
+                )
+            )
+        if ranked:
+            query = Query(raw_text="best headphones")
+            db.add(query)
+            db.flush()
+            db.add_all(
+                Ranking(query_id=query.id, product_id=product_id, score=Decimal("5"))
+                for product_id in ranked
+            )
+        db.commit()
+
+
+def test_token_bucket_try_acquire():
+    """Test tokens are consumed and the refill delay is reported."""
+    bucket = TokenBucket(rate=10.0, capacity=2)
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() == 0.0
+    wait = bucket.try_acquire()
+    assert 0.0 < wait <= 0.1
+
+
+def test_token_bucket_rejects_oversized_request():
+    """Test acquiring more than the capacity fails fast."""
+    with pytest.raises(ValueError):
+        TokenBucket(rate=1.0, capacity=1).try_acquire(2)
+
+
+def test_select_due_offers_splits_hot_products(session_factory):
+    """Test due offers are found oldest first and split by recent rankings."""
+    seed(session_factory, {1: 23, 2: 30, 3: 1, 4: 21}, ranked={4})
+
+    with session_factory() as db:
+        hot, other = refresh.select_due_offers(db)
+        offer_products = dict(db.execute(select(Offer.id, Offer.product_id)).all())
+
+    assert [offer_products[i] for i in hot] == [4]
+    assert [offer_products[i] for i in other] == [2, 1]
+
+
+def test_refresh_metrics(session_factory):
+    """Test backlog, stale count and lag are reported."""
+    seed(session_factory, {1: 23, 2: 30, 3: 1})
+
+    with session_factory() as db:
+        metrics = refresh.refresh_metrics(db)
+
+    assert metrics["backlog"] == 2
+    assert metrics["stale"] == 1
+    # Oldest offer is 30h old, the cutoff is 20h: ~10h of lag
+    assert metrics["lag_seconds"] == pytest.approx(10 * 3600, abs=60)
+
+
+def test_schedule_offer_refresh_fans_out_chunks(session_factory, monkeypatch):
+    """Test the scheduler chunks due offers and the chunks refresh them."""
+    monkeypatch.setattr(refresh.settings, "offer_refresh_chunk_size", 2)
+    seed(session_factory, {1: 22, 2: 23, 3: 25, 4: 2, 5: 21}, ranked={5})
+
+    result = refresh.schedule_offer_refresh.delay().result
+
+    assert result["dispatched"] == 4
+    assert result["hot"] == 1
+    assert result["chunks"] == 3
+    assert metrics.registry.get_sample_value("shopsherpa_offer_refresh_backlog") == 4
+    assert metrics.registry.get_sample_value("shopsherpa_offer_refresh_stale") == 1
+    with session_factory() as db:
+        prices = dict(db.execute(select(Offer.product_id, Offer.price_cents)).all())
+    assert prices == {1: 1001, 2: 1002, 3: 1003, 4: 1000, 5: 1005}
+    # Hot product is fetched first
+    assert FakeFetcher.calls[0] == [5]
+
+
+def test_refresh_offer_chunk_batches_upstream_calls(session_factory):
+    """Test fetches are grouped into max_batch products per call."""
+    seed(session_factory, {1: 22, 2: 22, 3: 22})
+
+    with session_factory() as db:
+        offer_ids = list(db.scalars(select(Offer.id)))
+    result = refresh.refresh_offer_chunk.delay(offer_ids).result
+
+    assert result["updated"] == 3
+    assert [len(call) for call in FakeFetcher.calls] == [2, 1]
+
+
+def test_offers_without_upstream_data_back_off(session_factory, monkeypatch):
+    """Test offers the fetcher returns nothing for stay unchecked but are not re-dispatched."""
+    seed(session_factory, {1: 22, 2: 23, 3: 2})
+    monkeypatch.setattr(FakeFetcher, "fetch", lambda self, product_ids: [])
+    with session_factory() as db:
+        checked = dict(db.execute(select(Offer.id, Offer.last_checked_at)).all())
+
+    assert refresh.schedule_offer_refresh.delay().result["dispatched"] == 2
+    assert refresh.schedule_offer_refresh.delay().result["dispatched"] == 0
+    with session_factory() as db:
+        assert (
+            dict(db.execute(select(Offer.id, Offer.last_checked_at)).all()) == checked
+        )
+        assert refresh.refresh_metrics(db)["backlog"] == 2
+        retry_at = datetime.utcnow() + timedelta(
+            minutes=refresh.settings.offer_refresh_retry_minutes + 1
+        )
+        assert len(refresh.select_due_offers(db, now=retry_at)[1]) == 2
+
+
+def test_refresh_offer_chunk_retries_remaining_when_rate_limited(
+    session_factory, monkeypatch
+):
+    """Test an empty bucket retries only the unfetched offers."""
+    seed(session_factory, {1: 22, 2: 22, 3: 22})
+    monkeypatch.setattr(refresh.settings, "offer_fetch_rate_per_second", 0.5)
+    monkeypatch.setattr(refresh.settings, "offer_fetch_burst", 1)
+
+    with session_factory() as db:
+        offer_ids = list(db.scalars(select(Offer.id).order_by(Offer.product_id)))
+
+    with patch.object(
+        refresh.refresh_offer_chunk, "retry", side_effect=Exception("retry")
+    ) as mock_retry:
+        with pytest.raises(Exception, match="retry"):
+            refresh.refresh_offer_chunk.delay(offer_ids)
+
+    assert mock_retry.call_args.kwargs["args"] == (offer_ids[2:],)
+    assert mock_retry.call_args.kwargs["countdown"] > 0
+    with session_factory() as db:
+        prices = dict(db.execute(select(Offer.product_id, Offer.price_cents)).all())
+    # The first batch was written before retrying
+    assert prices == {1: 1001, 2: 1002, 3: 1000}
+    with session_factory() as db:
+        due = refresh.select_due_offers(db)
+    assert due == ([], offer_ids[2:])
+
+
+def test_refresh_offer_chunk_retries_after_upstream_429(session_factory, monkeypatch):
+    """Test a rate-limited fetch retries the unfetched offers after Retry-After."""
+    seed(session_factory, {1: 22, 2: 22, 3: 22})
+    fetch = FakeFetcher.fetch
+
+    def limited(self, product_ids):
+        if 3 in product_ids:
+            raise RateLimited("api.example.com", 42.0)
+        return fetch(self, product_ids)
+
+    monkeypatch.setattr(FakeFetcher, "fetch", limited)
+    with session_factory() as db:
+        offer_ids = list(db.scalars(select(Offer.id).order_by(Offer.product_id)))
+
+    with patch.object(
+        refresh.refresh_offer_chunk, "retry", side_effect=Exception("retry")
+    ) as mock_retry:
+        with pytest.raises(Exception, match="retry"):
+            refresh.refresh_offer_chunk.delay(offer_ids)
+
+    assert mock_retry.call_args.kwargs == {"args": (offer_ids[2:],), "countdown": 42.0}
+    with session_factory() as db:
+        prices = dict(db.execute(select(Offer.product_id, Offer.price_cents)).all())
+    assert prices == {1: 1001, 2: 1002, 3: 1000}
+
+
+def test_refresh_offer_chunk_gives_up_after_max_retries(session_factory, monkeypatch):
+    """Test an upstream that never stops answering 429 fails the chunk instead of retrying forever."""
+    seed(session_factory, {1: 22})
+
+    def limited(self, product_ids):
+        raise RateLimited("api.example.com", 0.0)
+
+    monkeypatch.setattr(FakeFetcher, "fetch", limited)
+    with session_factory() as db:
+        offer_ids = list(db.scalars(select(Offer.id)))
+
+    with pytest.raises(MaxRetriesExceededError):
+        refresh.refresh_offer_chunk.apply(
+            (offer_ids,), retries=refresh.MAX_CHUNK_RETRIES
+        )
+    with session_factory() as db:
+        assert refresh.refresh_metrics(db)["backlog"] == 1
+
+
+def test_beat_schedule_registered():
+    """Test the refresh scheduler is on the beat schedule."""
+    entry = celery_app.conf.beat_schedule["schedule-offer-refresh"]
+    assert entry["task"] == "app.tasks.refresh.schedule_offer_refresh"
+    assert "app.tasks.refresh.refresh_offer_chunk" in celery_app.tasks
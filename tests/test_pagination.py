@@ -0,0 +1,190 @@
+"""Tests for keyset-paginated catalog and ranking listings."""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.models import Offer, Product, Query, Ranking
+from app.db.session import get_db
+from app.main import app
+from app.repositories import InvalidCursor, list_products, page_ranked_products
+from app.repositories.pagination import after_keyset, decode_cursor, encode_cursor
+from tests.utils import count_queries
+
+CREATED = datetime(2025, 9, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def temp_db():
+    """
+    Temporary SQLite database with 25 products and one query ranking them.
+
+    Products share creation times and rankings share scores in groups, so
+    pages have to break ties on id to stay consistent.
+    """
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+
+    engine = create_engine(f"sqlite:///{path}", echo=False)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    session = SessionLocal()
+
+    session.add(Query(id=1, raw_text="anc headphones"))
+    for i in range(1, 26):
+        session.add(
+            Product(
+                id=i,
+                asin=f"B0PAGE{i:04d}",
+                title=f"Headphones {i}",
+                brand="Sony" if i % 2 else "Bose",
+                category="over-ear" if i % 5 else "earbuds",
+                created_at=CREATED + timedelta(minutes=i // 4),
+            )
+        )
+        session.add(Offer(product_id=i, price_cents=10000 + i, currency="USD"))
+        session.add(Ranking(query_id=1, product_id=i, score=Decimal(i // 3) / 2))
+    session.commit()
+
+    yield session
+
+    # Cleanup
+    session.close()
+    engine.dispose()
+    os.unlink(path)
+
+
+def walk(fetch) -> list:
+    """Follow ``next_cursor`` from the first page to the last."""
+    items, cursor = [], None
+    while True:
+        page = fetch(cursor)
+        items.extend(page.items)
+        if page.next_cursor is None:
+            return items
+        cursor = page.next_cursor
+
+
+def test_products_pages_cover_listing_once(temp_db):
+    """Test walking all pages yields every product once in a stable order."""
+    products = walk(lambda cursor: list_products(temp_db, limit=4, cursor=cursor))
+
+    expected = sorted(range(1, 26), key=lambda i: (-(i // 4), i))
+    assert [product.id for product in products] == expected
+
+
+def test_products_filtered_by_brand_and_category(temp_db):
+    """Test filters apply across pages."""
+    products = walk(
+        lambda cursor: list_products(
+            temp_db, brand="Sony", category="over-ear", limit=3, cursor=cursor
+        )
+    )
+
+    assert {product.id for product in products} == {
+        i for i in range(1, 26) if i % 2 and i % 5
+    }
+
+
+def test_last_page_has_no_cursor(temp_db):
+    """Test an exactly full last page does not point at an empty one."""
+    page = list_products(temp_db, limit=25)
+    assert len(page.items) == 25
+    assert page.next_cursor is None
+
+
+def test_rankings_pages_break_score_ties_on_id(temp_db):
+    """Test ranking pages follow score DESC, id ASC with a fixed statement count."""
+    with count_queries(temp_db.get_bind()) as statements:
+        first = page_ranked_products(temp_db, 1, limit=7)
+    assert len(statements) == 2
+
+    ranked = walk(
+        lambda cursor: page_ranked_products(temp_db, 1, limit=7, cursor=cursor)
+    )
+    order = [(item.ranking.score, item.ranking.id) for item in ranked]
+    assert order == sorted(order, key=lambda key: (-key[0], key[1]))
+    assert len(order) == 25
+    assert [item.ranking.id for item in ranked[:7]] == [
+        item.ranking.id for item in first.items
+    ]
+    assert ranked[0].latest_offer.price_cents == 10024
+
+
+def test_cursor_rejected_outside_its_listing(temp_db):
+    """Test malformed tokens and tokens from another listing are refused."""
+    products_cursor = list_products(temp_db, limit=2).next_cursor
+
+    with pytest.raises(InvalidCursor):
+        page_ranked_products(temp_db, 1, cursor=products_cursor)
+    with pytest.raises(InvalidCursor):
+        page_ranked_products(temp_db, 2, cursor=encode_cursor("rankings:1", "1.00", 5))
+    for token in ("not-a-cursor", "", encode_cursor("rankings:1", "high", 5)):
+        with pytest.raises(InvalidCursor):
+            decode_cursor(token, "rankings:1", Decimal)
+
+
+def test_keyset_predicates_seek_indexes(temp_db):
+    """Test deep pages seek into the keyset indexes without sorting."""
+
+    def plan(stmt) -> str:
+        compiled = stmt.compile(
+            temp_db.get_bind(), compile_kwargs={"literal_binds": True}
+        )
+        rows = temp_db.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+        return "\n".join(row[-1] for row in rows)
+
+    products = plan(
+        select(Product)
+        .where(
+            Product.brand == "Sony",
+            after_keyset(Product.created_at, CREATED, Product.id, 10),
+        )
+        .order_by(Product.created_at.desc(), Product.id)
+        .limit(20)
+    )
+    rankings = plan(
+        select(Ranking)
+        .where(
+            Ranking.query_id == 1,
+            after_keyset(Ranking.score, Decimal("2.5"), Ranking.id, 10),
+        )
+        .order_by(Ranking.score.desc(), Ranking.id)
+        .limit(20)
+    )
+
+    assert "ix_products_brand_created_at_id" in products
+    assert "ix_rankings_query_id_score_id" in rankings
+    assert "TEMP B-TREE" not in products + rankings
+
+
+def test_list_endpoints(temp_db):
+    """Test the endpoints page with opaque cursors and reject bad ones."""
+    app.dependency_overrides[get_db] = lambda: temp_db
+    try:
+        client = TestClient(app)
+        first = client.get("/products", params={"brand": "Bose", "limit": 5}).json()
+        second = client.get(
+            "/products",
+            params={"brand": "Bose", "limit": 5, "cursor": first["next_cursor"]},
+        ).json()
+        rankings = client.get("/queries/1/rankings", params={"limit": 3}).json()
+        bad = client.get("/products", params={"cursor": "garbage"})
+    finally:
+        app.dependency_overrides.clear()
+
+    ids = [item["id"] for item in first["items"] + second["items"]]
+    assert len(ids) == len(set(ids)) == 10
+    assert all(item["brand"] == "Bose" for item in first["items"])
+    assert second["next_cursor"] is not None
+    assert [item["product_id"] for item in rankings["items"]] == [24, 25, 21]
+    assert rankings["items"][0]["score"] == 4.0
+    assert rankings["items"][0]["price_cents"] == 10024
+    assert bad.status_code == 400
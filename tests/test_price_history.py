@@ -0,0 +1,181 @@
+"""Tests for price history ticks, rollups and the price trend API."""
+
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.base import Base
+from app.db.models import PriceDaily, PriceTick, Product
+from app.db.session import get_db
+from app.ingest import OfferRecord, ingest_offers
+from app.ingest.prices import ensure_price_partitions, rollup_day
+from app.main import app
+from app.repositories import price_drops, price_trend
+from app.tasks.prices import maintain_prices
+
+TODAY = date(2025, 9, 20)
+
+
+def at(day: date, hour: int) -> datetime:
+    return datetime.combine(day, datetime.min.time()) + timedelta(hours=hour)
+
+
+@pytest.fixture
+def temp_db():
+    """Temporary SQLite database with two products."""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+
+    engine = create_engine(f"sqlite:///{path}", echo=False)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    session = SessionLocal()
+
+    session.add_all(
+        [
+            Product(id=1, asin="B0PRICE001", title="Headphones"),
+            Product(id=2, asin="B0PRICE002", title="Earbuds"),
+        ]
+    )
+    session.commit()
+
+    yield session
+
+    # Cleanup
+    session.close()
+    engine.dispose()
+    os.unlink(path)
+
+
+def observe(db, product_id: int, price_cents: int, when: datetime) -> None:
+    ingest_offers(db, [OfferRecord(product_id, price_cents, last_checked_at=when)])
+    db.commit()
+
+
+def count_ticks(db) -> int:
+    return db.scalar(select(func.count()).select_from(PriceTick))
+
+
+def test_ingest_appends_ticks(temp_db):
+    """Test every observation is recorded, including unchanged prices."""
+    day = TODAY - timedelta(days=1)
+    observe(temp_db, 1, 1000, at(day, 1))
+    observe(temp_db, 1, 1000, at(day, 2))
+    observe(temp_db, 1, 1000, at(day, 2))  # same instant is recorded once
+
+    assert count_ticks(temp_db) == 2
+
+
+def test_ticks_disabled(temp_db, monkeypatch):
+    """Test price history can be switched off."""
+    monkeypatch.setattr(settings, "price_history_enabled", False)
+    observe(temp_db, 1, 1000, at(TODAY, 1))
+    assert count_ticks(temp_db) == 0
+
+
+def test_rollup_day_aggregates_and_replaces(temp_db):
+    """Test daily min/max/last and that re-running picks up late ticks."""
+    day = TODAY - timedelta(days=1)
+    observe(temp_db, 1, 1200, at(day, 1))
+    observe(temp_db, 1, 900, at(day, 5))
+    observe(temp_db, 1, 1000, at(day, 9))
+    observe(temp_db, 2, 500, at(day, 3))
+    observe(temp_db, 2, 400, at(TODAY, 3))  # other day
+
+    assert rollup_day(temp_db, day) == 2
+    temp_db.commit()
+    row = temp_db.get(PriceDaily, (1, "USD", day))
+    assert (row.min_cents, row.max_cents, row.last_cents, row.ticks) == (
+        900,
+        1200,
+        1000,
+        3,
+    )
+    assert temp_db.get(PriceDaily, (2, "USD", day)).ticks == 1
+
+    observe(temp_db, 1, 1500, at(day, 23))
+    rollup_day(temp_db, day)
+    temp_db.commit()
+    temp_db.expire_all()
+    row = temp_db.get(PriceDaily, (1, "USD", day))
+    assert (row.max_cents, row.last_cents, row.ticks) == (1500, 1500, 4)
+
+
+def test_maintain_prices_rolls_up_and_prunes(temp_db, monkeypatch):
+    """Test maintenance rolls up the lookback window and prunes expired ticks."""
+    monkeypatch.setattr(settings, "price_tick_retention_days", 10)
+    old = TODAY - timedelta(days=20)
+    observe(temp_db, 1, 2000, at(old, 12))
+    observe(temp_db, 1, 1800, at(TODAY - timedelta(days=2), 12))
+    observe(temp_db, 1, 1700, at(TODAY - timedelta(days=1), 12))
+
+    result = maintain_prices(temp_db, today=TODAY)
+
+    assert result["partitions"] == []
+    assert result["rolled_up"] == {
+        (TODAY - timedelta(days=2)).isoformat(): 1,
+        (TODAY - timedelta(days=1)).isoformat(): 1,
+    }
+    assert result["pruned"] == 1
+    assert count_ticks(temp_db) == 2
+
+
+def test_ensure_partitions_noop_on_sqlite(temp_db):
+    """Test partitions are only managed on Postgres."""
+    assert ensure_price_partitions(temp_db, TODAY, 3) == []
+
+
+def add_daily(db, product_id: int, day: date, low: int, high: int, last: int) -> None:
+    db.add(
+        PriceDaily(
+            product_id=product_id,
+            currency="USD",
+            day=day,
+            min_cents=low,
+            max_cents=high,
+            last_cents=last,
+            ticks=2,
+        )
+    )
+
+
+def test_price_trend_and_drops(temp_db):
+    """Test trend windows and price drop signals read from rollups."""
+    add_daily(temp_db, 1, TODAY - timedelta(days=120), 100, 5000, 5000)
+    add_daily(temp_db, 1, TODAY - timedelta(days=30), 2000, 2400, 2400)
+    add_daily(temp_db, 1, TODAY - timedelta(days=1), 1800, 2000, 1800)
+    add_daily(temp_db, 2, TODAY - timedelta(days=1), 900, 900, 900)
+    temp_db.commit()
+
+    trend = price_trend(temp_db, 1, days=90, today=TODAY)
+    assert [point.last_cents for point in trend] == [2400, 1800]
+
+    drops = price_drops(temp_db, [1, 2, 3], days=90, today=TODAY)
+    assert drops == {1: pytest.approx(0.25), 2: 0.0}
+
+
+def test_price_trend_endpoint(temp_db):
+    """Test the trend API summarizes daily rollups."""
+    today = datetime.utcnow().date()
+    add_daily(temp_db, 1, today - timedelta(days=10), 1900, 2100, 2000)
+    add_daily(temp_db, 1, today - timedelta(days=1), 1400, 1600, 1500)
+    temp_db.commit()
+
+    app.dependency_overrides[get_db] = lambda: temp_db
+    try:
+        response = TestClient(app).get("/products/1/price-trend", params={"days": 90})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [point["last_cents"] for point in body["points"]] == [2000, 1500]
+    assert body["low_cents"] == 1400
+    assert body["high_cents"] == 2100
+    assert body["change_pct"] == -25.0
@@ -0,0 +1,264 @@
+"""Tests for the materialized product feature table and its in-memory store."""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+
+# Set Celery to always eager for testing and use memory backend
+os.environ["CELERY_TASK_ALWAYS_EAGER"] = "true"
+os.environ["CELERY_RESULT_BACKEND"] = "cache+memory://"
+
+from app.db.base import Base
+from app.db.models import Offer, PriceDaily, Product, ProductFeatures, Review
+from app.ingest.offers import OfferRecord, ingest_offers
+from app.ranking import features
+from app.ranking.engine import QueryParams, RankingEngine
+from app.ranking.features import (
+    FeatureStore,
+    current_feature_version,
+    refresh_product_features,
+    review_sentiment,
+    snippet_sentiment,
+)
+from app.ranking.service import build_rationale, load_candidates
+from app.tasks.features import refresh_stale_features
+
+
+@pytest.fixture
+def temp_db():
+    """Temporary SQLite database with offers, reviews and price rollups."""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+
+    engine = create_engine(f"sqlite:///{path}", echo=False)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+    today = datetime.utcnow().date()
+    for product_id, price in ((1, 10000), (2, 5000), (3, 20000)):
+        session.add(
+            Product(
+                id=product_id,
+                asin=f"B0FEAT{product_id:04d}",
+                title=f"Headphones {product_id}",
+            )
+        )
+        session.add(Offer(product_id=product_id, price_cents=price))
+    session.add(Offer(product_id=1, price_cents=9000, currency="EUR"))
+    session.add_all(
+        [
+            Review(
+                product_id=1, source="test", snippet="Great sound, very comfortable."
+            ),
+            Review(
+                product_id=1, source="test", snippet="Not comfortable after an hour."
+            ),
+            Review(product_id=2, source="test", snippet="Terrible, broke in a week."),
+            Review(product_id=2, source="test", snippet=None),
+        ]
+    )
+    session.add_all(
+        [
+            PriceDaily(
+                product_id=1,
+                currency="USD",
+                day=today - timedelta(days=3),
+                min_cents=12500,
+                max_cents=12500,
+                last_cents=12500,
+                ticks=1,
+            ),
+            PriceDaily(
+                product_id=1,
+                currency="USD",
+                day=today,
+                min_cents=10000,
+                max_cents=10000,
+                last_cents=10000,
+                ticks=1,
+            ),
+        ]
+    )
+    session.commit()
+
+    yield session
+
+    # Cleanup
+    session.close()
+    engine.dispose()
+    os.unlink(path)
+
+
+def test_snippet_sentiment():
+    """Test lexicon scoring with negation."""
+    assert snippet_sentiment("Great sound and comfortable") == 1.0
+    assert snippet_sentiment("Not comfortable, flimsy hinge") == 0.0
+    assert snippet_sentiment("Arrived on Tuesday") is None
+    assert review_sentiment(["Great", "Terrible", "It is blue"]) == 0.5
+
+
+def test_refresh_writes_aggregates(temp_db):
+    """Test rows hold price, drop, review count and sentiment under one version."""
+    assert refresh_product_features(temp_db, [1, 2, 3, 99]) == 3
+    temp_db.commit()
+
+    rows = {row.product_id: row for row in temp_db.scalars(select(ProductFeatures))}
+    assert set(rows) == {1, 2, 3}
+    assert rows[1].min_price_cents == 10000
+    assert rows[1].price_drop == pytest.approx(0.2)
+    assert (rows[1].review_count, rows[1].review_sentiment) == (2, 0.5)
+    assert (rows[2].review_count, rows[2].review_sentiment) == (2, 0.0)
+    assert (rows[3].review_count, rows[3].review_sentiment, rows[3].price_drop) == (
+        0,
+        None,
+        None,
+    )
+    assert {row.version for row in rows.values()} == {1}
+    assert current_feature_version(temp_db) == 1
+
+
+def test_ingest_refreshes_changed_products(temp_db):
+    """Test offer ingest rebuilds features of products whose offers changed."""
+    refresh_product_features(temp_db, [1, 2, 3])
+    temp_db.commit()
+
+    ingest_offers(
+        temp_db,
+        [
+            OfferRecord(product_id=2, price_cents=4500),
+            OfferRecord(product_id=3, price_cents=20000),
+        ],
+    )
+    temp_db.commit()
+
+    rows = {row.product_id: row for row in temp_db.scalars(select(ProductFeatures))}
+    assert (rows[2].min_price_cents, rows[2].version) == (4500, 2)
+    # Unchanged offers leave their rows alone
+    assert rows[3].version == 1
+
+    ingest_offers(temp_db, [OfferRecord(product_id=3, price_cents=20000)])
+    temp_db.commit()
+    assert current_feature_version(temp_db) == 2
+
+
+def test_store_loads_only_new_versions(temp_db):
+    """Test the store applies rows written since its copy, keeping ids sorted."""
+    refresh_product_features(temp_db, [2, 3])
+    temp_db.commit()
+    store = FeatureStore(check_interval=0)
+
+    columns = store.get(temp_db)
+    assert columns.product_ids.tolist() == [2, 3]
+    assert columns.version == 1
+
+    ingest_offers(temp_db, [OfferRecord(product_id=3, price_cents=15000)])
+    refresh_product_features(temp_db, [1])
+    temp_db.commit()
+
+    statements = []
+    event.listen(
+        temp_db.get_bind(),
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2]),
+    )
+    columns = store.get(temp_db)
+
+    assert columns.product_ids.tolist() == [1, 2, 3]
+    assert columns.price_cents.tolist() == [10000, 5000, 15000]
+    assert columns.version == 3
+    assert store.get(temp_db) is columns
+    # One version check and one load, then only version checks
+    assert len(statements) == 3
+
+
+def test_store_checks_version_at_most_every_interval(temp_db):
+    """Test version checks are throttled by the check interval."""
+    now = [0.0]
+    store = FeatureStore(check_interval=10, clock=lambda: now[0])
+    store.get(temp_db)
+
+    refresh_product_features(temp_db, [1])
+    temp_db.commit()
+    assert len(store.get(temp_db)) == 0
+
+    now[0] = 10.0
+    assert len(store.get(temp_db)) == 1
+
+
+def test_store_reload_drops_deleted_rows_in_background(temp_db):
+    """Test the periodic full reload forgets rows deleted since the last one."""
+    refresh_product_features(temp_db, [1, 2, 3])
+    temp_db.commit()
+    now = [0.0]
+    store = FeatureStore(check_interval=0, reload_interval=60, clock=lambda: now[0])
+    assert store.get(temp_db).product_ids.tolist() == [1, 2, 3]
+
+    temp_db.execute(
+        ProductFeatures.__table__.delete().where(ProductFeatures.product_id == 3)
+    )
+    temp_db.commit()
+    assert store.get(temp_db).product_ids.tolist() == [1, 2, 3]
+
+    now[0] = 60.0
+    store.get(temp_db)
+    store._reloader.join(timeout=5)
+    assert store.get(temp_db).product_ids.tolist() == [1, 2]
+    assert store.columns.version == current_feature_version(temp_db)
+
+
+def test_load_candidates_reads_store_and_falls_back(temp_db, monkeypatch):
+    """Test covered products come from the store and the rest from aggregates."""
+    refresh_product_features(temp_db, [1, 2])
+    temp_db.commit()
+    monkeypatch.setattr(features, "_stores", features.weakref.WeakKeyDictionary())
+
+    candidates = load_candidates(temp_db, [3, 2, 1])
+
+    assert candidates.price_cents.tolist() == [10000, 5000, 20000]
+    assert candidates.review_count.tolist() == [2, 2, 0]
+    assert candidates.review_sentiment[:2].tolist() == [0.5, 0.0]
+    assert np.isnan(candidates.review_sentiment[2])
+    assert candidates.price_drop[0] == pytest.approx(0.2)
+
+    # Other currencies are not materialized
+    eur = load_candidates(temp_db, [1], currency="EUR")
+    assert eur.price_cents.tolist() == [9000] and eur.review_sentiment is None
+
+    result = RankingEngine().top_n(QueryParams.from_budget(None, 150), candidates, 3)
+    position = result.indices.tolist().index(0)
+    assert "20% below its recent high" in build_rationale(result, position, candidates)
+
+
+def test_refresh_stale_features(temp_db):
+    """Test missing, reviewed and expired rows are rebuilt page by page."""
+    assert refresh_stale_features(temp_db, page_size=2) == {
+        "refreshed": 3,
+        "last_id": 3,
+        "done": True,
+    }
+    assert refresh_stale_features(temp_db)["refreshed"] == 0
+
+    temp_db.add(
+        Review(
+            product_id=3,
+            source="test",
+            snippet="Excellent",
+            created_at=datetime.utcnow() + timedelta(seconds=1),
+        )
+    )
+    temp_db.execute(
+        ProductFeatures.__table__.update()
+        .where(ProductFeatures.product_id == 2)
+        .values(updated_at=datetime.utcnow() - timedelta(days=2))
+    )
+    temp_db.commit()
+
+    result = refresh_stale_features(temp_db, page_size=1, max_pages=2)
+    assert result == {"refreshed": 1, "last_id": 2, "done": False}
+    assert refresh_stale_features(temp_db, after_id=2)["refreshed"] == 1
+    assert temp_db.get(ProductFeatures, 3).review_sentiment == 1.0
@@ -0,0 +1,189 @@
+"""Tests for the compact in-memory product store."""
+
+import os
+import tempfile
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.base import Base
+from app.db.models import Product
+from app.ranking import load_candidates
+from app.ranking import products as product_store
+from app.ranking.products import (
+    ProductColumns,
+    ProductStore,
+    ProductSummary,
+    product_summaries,
+)
+
+
+@pytest.fixture
+def temp_db():
+    """Temporary SQLite database with a few products."""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+
+    engine = create_engine(f"sqlite:///{path}", echo=False)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+    session.add_all(
+        [
+            Product(
+                id=1,
+                asin="B0STORE001",
+                title="Sony WH-1000XM5",
+                brand="Sony",
+                category="Headphones",
+            ),
+            Product(
+                id=2,
+                asin="B0STORE002",
+                title="HyperX Cloud II",
+                brand="HyperX",
+                category="Gaming Headsets",
+            ),
+            Product(
+                id=3,
+                asin="B0STORE003",
+                title="Bose QC45",
+                brand="Bose",
+                category="Headphones",
+            ),
+            Product(
+                id=5,
+                asin="B0STORE005",
+                title="Generic earbuds for GAMING",
+                brand=None,
+                category=None,
+            ),
+        ]
+    )
+    session.commit()
+
+    yield session
+
+    # Cleanup
+    session.close()
+    engine.dispose()
+    os.unlink(path)
+
+
+def count_statements(engine) -> list[str]:
+    statements: list[str] = []
+    event.listen(
+        engine, "before_cursor_execute", lambda *args: statements.append(args[2])
+    )
+    return statements
+
+
+def test_columns_intern_brands_and_categories(temp_db):
+    """Test repeated brands and categories share one table entry."""
+    columns = ProductStore(check_interval=0).get(temp_db)
+
+    assert columns.product_ids.tolist() == [1, 2, 3, 5]
+    assert columns.categories == ("Headphones", "Gaming Headsets")
+    assert columns.category_codes.tolist() == [0, 1, 0, -1]
+    assert columns.brand_codes.tolist() == [0, 1, 2, -1]
+    assert columns.summaries([5, 3, 4]) == {
+        5: ProductSummary(5, "B0STORE005", "Generic earbuds for GAMING", None, None),
+        3: ProductSummary(3, "B0STORE003", "Bose QC45", "Bose", "Headphones"),
+    }
+
+
+def test_usage_match_checks_title_and_category():
+    """Test usage matches case-insensitively and unknown ids never match."""
+    columns = ProductColumns.empty().append(
+        [
+            (1, "A1", "Studio monitors", "AKG", "Headphones"),
+            (2, "A2", "Cloud II", "HyperX", "Gaming Headsets"),
+            (4, "A4", "Earbuds for gaming", None, None),
+        ]
+    )
+
+    found, match = columns.usage_match(np.array([1, 2, 3, 4]), "Gaming")
+
+    assert found.tolist() == [True, True, False, True]
+    assert match.tolist() == [False, True, False, True]
+
+
+def test_store_appends_new_products_and_reloads(temp_db):
+    """Test new products are appended on check and edits appear on reload."""
+    now = [0.0]
+    store = ProductStore(check_interval=10, reload_interval=100, clock=lambda: now[0])
+    store.get(temp_db)
+
+    temp_db.add(
+        Product(
+            id=7,
+            asin="B0STORE007",
+            title="Jabra Elite",
+            brand="Sony",
+            category="Earbuds",
+        )
+    )
+    temp_db.get(Product, 1).title = "Sony WH-1000XM6"
+    temp_db.commit()
+    assert len(store.get(temp_db)) == 4
+
+    now[0] = 10.0
+    columns = store.get(temp_db)
+    assert columns.product_ids.tolist() == [1, 2, 3, 5, 7]
+    assert columns.brand_codes[-1] == 0 and columns.categories[-1] == "Earbuds"
+    assert columns.titles[0] == "Sony WH-1000XM5"
+
+    # The reload runs in the background; the request keeps the current snapshot
+    now[0] = 100.0
+    assert store.get(temp_db) is columns
+    store._reloader.join(timeout=5)
+    assert store.get(temp_db).titles[0] == "Sony WH-1000XM6"
+
+
+def test_product_summaries_fall_back_for_unknown_ids(temp_db, monkeypatch):
+    """Test ids added after the store loaded are read from the database."""
+    monkeypatch.setattr(
+        product_store, "_stores", product_store.weakref.WeakKeyDictionary()
+    )
+    product_summaries(temp_db, [1])
+    temp_db.add(Product(id=8, asin="B0STORE008", title="Shure Aonic", brand="Shure"))
+    temp_db.commit()
+
+    statements = count_statements(temp_db.get_bind())
+    summaries = product_summaries(temp_db, [1, 8, 99])
+
+    assert set(summaries) == {1, 8}
+    assert summaries[8].brand == "Shure"
+    assert len(statements) == 1
+
+    # Long id lists are read in chunks
+    monkeypatch.setattr(product_store, "CHUNK_SIZE", 2)
+    monkeypatch.setattr(settings, "product_store_enabled", False)
+    statements.clear()
+    assert set(product_summaries(temp_db, [1, 2, 3, 8, 99])) == {1, 2, 3, 8}
+    assert len(statements) == 3
+
+
+def test_load_candidates_matches_usage_in_memory(temp_db, monkeypatch):
+    """Test usage matching needs no query once the store is loaded."""
+    monkeypatch.setattr(
+        product_store, "_stores", product_store.weakref.WeakKeyDictionary()
+    )
+    load_candidates(temp_db, [1], usage="gaming", use_features=False)
+
+    statements = count_statements(temp_db.get_bind())
+    candidates = load_candidates(
+        temp_db, [5, 3, 2, 1], usage="gaming", use_features=False
+    )
+
+    assert candidates.usage_match.tolist() == [False, True, False, True]
+    assert not any("LIKE" in statement.upper() for statement in statements)
+
+    monkeypatch.setattr(settings, "product_store_enabled", False)
+    candidates = load_candidates(
+        temp_db, [5, 3, 2, 1], usage="gaming", use_features=False
+    )
+    assert candidates.usage_match.tolist() == [False, True, False, True]
@@ -0,0 +1,187 @@
+"""Tests for the vectorized ranking engine."""
+
+import os
+import tempfile
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.models import Offer, Product, Query, Ranking, Review
+from app.ranking import (
+    Candidates,
+    QueryParams,
+    RankingEngine,
+    load_candidates,
+    rank_query,
+)
+from tests.utils import count_queries
+
+
+@pytest.fixture
+def temp_db():
+    """Temporary SQLite database with a small headphone catalog."""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+
+    engine = create_engine(f"sqlite:///{path}", echo=False)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    session = SessionLocal()
+
+    catalog = [
+        (1, "Gaming Headset Pro", 15000, 40),
+        (2, "Studio Monitor Headphones", 18000, 5),
+        (3, "Budget Earbuds", 2500, 100),
+        (4, "Luxury Headphones", 60000, 12),
+        (5, "No Offer Headphones", None, 0),
+    ]
+    for product_id, title, price, reviews in catalog:
+        session.add(Product(id=product_id, asin=f"B0RANK{product_id:04d}", title=title))
+        if price is not None:
+            session.add(Offer(product_id=product_id, price_cents=price))
+        session.add_all(
+            Review(product_id=product_id, source="Amazon", snippet="ok")
+            for _ in range(reviews)
+        )
+    session.add(
+        Query(
+            id=1,
+            raw_text="gaming headphones under $200",
+            budget_min=Decimal("100.00"),
+            budget_max=Decimal("200.00"),
+            usage="gaming",
+        )
+    )
+    session.commit()
+
+    yield session
+
+    # Cleanup
+    session.close()
+    engine.dispose()
+    os.unlink(path)
+
+
+def test_price_fit_budget_window():
+    """Test in-budget prices score 1, overshoot decays and missing prices score 0."""
+    engine = RankingEngine()
+    params = QueryParams(budget_min_cents=10000, budget_max_cents=20000)
+    fit = engine.price_fit(params, np.array([15000, 20000, 23000, 40000, 5000, np.nan]))
+
+    assert fit[0] == fit[1] == 1.0
+    assert 0.3 < fit[2] < 0.4
+    assert fit[3] < 0.01
+    assert fit[4] == pytest.approx(0.75)
+    assert fit[5] == 0.0
+
+
+def test_price_fit_without_budget_is_neutral():
+    """Test every priced candidate fits when no budget is given."""
+    fit = RankingEngine().price_fit(QueryParams(), np.array([100.0, 100000.0]))
+    assert fit.tolist() == [1.0, 1.0]
+
+
+def test_top_n_orders_and_scales_scores():
+    """Test the best candidates come first with scores in [0, 10]."""
+    candidates = Candidates.from_columns(
+        product_ids=[10, 11, 12, 13],
+        price_cents=[15000, 15000, 90000, np.nan],
+        review_count=[100, 10, 100, 100],
+        similarity=[0.9, 0.9, 0.9, 0.9],
+    )
+    result = RankingEngine().top_n(QueryParams(budget_max_cents=20000), candidates, n=3)
+
+    assert candidates.product_ids[result.indices].tolist() == [10, 11, 12]
+    assert np.all(np.diff(result.scores) <= 0)
+    assert 0 <= result.scores.min() and result.scores.max() <= 10
+
+
+def test_top_n_breaks_ties_by_product_id():
+    """Test equal scores are ordered by product id."""
+    candidates = Candidates.from_columns(
+        product_ids=[7, 3, 5], price_cents=[100, 100, 100]
+    )
+    result = RankingEngine().top_n(QueryParams(), candidates, n=3)
+    assert candidates.product_ids[result.indices].tolist() == [3, 5, 7]
+
+
+def test_top_n_breaks_ties_at_the_cutoff_by_product_id():
+    """Test candidates tied at the n-th score make the cut by lowest product id."""
+    product_ids = np.arange(200, 0, -1)
+    # The two best, then 198 candidates tied for third
+    price_cents = np.full(200, 100.0)
+    review_count = np.zeros(200)
+    review_count[[50, 120]] = [100, 50]
+    candidates = Candidates.from_columns(
+        product_ids=product_ids, price_cents=price_cents, review_count=review_count
+    )
+
+    result = RankingEngine().top_n(QueryParams(), candidates, n=5)
+
+    assert candidates.product_ids[result.indices].tolist() == [150, 80, 1, 2, 3]
+
+
+def test_top_n_empty():
+    """Test an empty candidate set yields no results."""
+    result = RankingEngine().top_n(QueryParams(), Candidates.from_columns([], []), n=5)
+    assert len(result.indices) == 0
+
+
+def test_load_candidates_aligns_columns(temp_db):
+    """Test aggregate columns line up with sorted product ids."""
+    with count_queries(temp_db.get_bind()) as statements:
+        candidates = load_candidates(
+            temp_db,
+            [5, 3, 1, 3],
+            similarity={1: 0.8, 42: 0.9},
+            usage="gaming",
+            use_features=False,
+        )
+
+    assert len(statements) == 3
+    assert candidates.product_ids.tolist() == [1, 3, 5]
+    assert candidates.price_cents[:2].tolist() == [15000, 2500]
+    assert np.isnan(candidates.price_cents[2])
+    assert candidates.review_count.tolist() == [40, 100, 0]
+    assert candidates.similarity[0] == 0.8 and np.isnan(candidates.similarity[1])
+    assert candidates.usage_match.tolist() == [True, False, False]
+
+
+def test_rank_query_bulk_inserts_top_n(temp_db):
+    """Test the top-N rankings are written in one INSERT."""
+    query = temp_db.get(Query, 1)
+    candidates = load_candidates(temp_db, range(1, 6), usage=query.usage)
+
+    with count_queries(temp_db.get_bind()) as statements:
+        rows = rank_query(temp_db, query, candidates, n=3)
+    temp_db.commit()
+
+    assert len([s for s in statements if s.startswith("INSERT")]) == 1
+    stored = temp_db.scalars(
+        select(Ranking).where(Ranking.query_id == 1).order_by(Ranking.score.desc())
+    ).all()
+    assert [r.product_id for r in stored] == [row["product_id"] for row in rows]
+    assert stored[0].product_id == 1
+    assert "within budget" in stored[0].rationale
+    assert "suited to stated usage" in stored[0].rationale
+    assert 5 not in {r.product_id for r in stored}
+
+
+def test_scoring_50k_candidates_is_vectorized():
+    """Test a 50k candidate set scores well within an interactive budget."""
+    rng = np.random.default_rng(0)
+    n = 50_000
+    candidates = Candidates.from_columns(
+        product_ids=np.arange(n),
+        price_cents=rng.uniform(1000, 50000, n),
+        review_count=rng.integers(0, 5000, n),
+        similarity=rng.uniform(-1, 1, n),
+    )
+    result = RankingEngine().top_n(
+        QueryParams(budget_max_cents=20000), candidates, n=20
+    )
+    assert len(result.indices) == 20
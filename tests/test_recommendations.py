@@ -0,0 +1,168 @@
+"""Tests for the buffered and streaming recommendation endpoints."""
+
+import json
+import os
+import tempfile
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.api import recommendations
+from app.cache import RankingResultCache, TTLCache
+from app.cache.results import LocalChangeLog
+from app.db.base import Base
+from app.db.models import Offer, Product, Query, Ranking
+from app.embeddings import StubEmbedder
+from app.main import app
+from app.ranking import pipeline
+from app.search import vector
+
+TITLES = [
+    "Noise cancelling headphones",
+    "Wireless noise cancelling earbuds",
+    "Studio headphones",
+    "Mechanical keyboard",
+    "Gaming mouse",
+]
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    """Temporary SQLite database of embedded products wired into the API."""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+
+    engine = create_engine(f"sqlite:///{path}", echo=False)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    vectors = StubEmbedder().embed(TITLES)
+    with SessionLocal() as session:
+        for i, (title, embedding) in enumerate(
+            zip(TITLES, vectors, strict=True), start=1
+        ):
+            session.add(
+                Product(id=i, asin=f"B0STREAM{i:02d}", title=title, embedding=embedding)
+            )
+            session.add(Offer(product_id=i, price_cents=5000 * i))
+        session.commit()
+    vector.invalidate_indexes()
+
+    cache = RankingResultCache(TTLCache(max_size=100, ttl=3600), LocalChangeLog())
+    monkeypatch.setattr(recommendations, "get_result_cache", lambda: cache)
+    app.dependency_overrides[recommendations.get_session_factory] = lambda: SessionLocal
+
+    yield SessionLocal
+
+    # Cleanup
+    app.dependency_overrides.clear()
+    vector.invalidate_indexes()
+    engine.dispose()
+    os.unlink(path)
+
+
+@pytest.fixture
+def client(session_factory) -> TestClient:
+    """Create test client."""
+    return TestClient(app)
+
+
+BODY = {"raw_text": "noise cancelling headphones", "budget_max": 150, "limit": 3}
+
+
+def read_ndjson(response) -> list[dict]:
+    return [json.loads(line) for line in response.iter_lines() if line]
+
+
+def test_stream_ndjson_emits_stages_in_order(client, session_factory):
+    """Test the stream reports query, candidates, rankings and completion."""
+    with client.stream("POST", "/recommendations/stream", json=BODY) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        events = read_ndjson(response)
+
+    names = [event["event"] for event in events]
+    assert names == ["query", "candidates", "ranking", "ranking", "ranking", "done"]
+    assert events[0]["data"]["cached"] is False
+    # Products priced above the $150 budget are dropped before ranking
+    assert events[1]["data"]["count"] == 3
+    assert [event["data"]["rank"] for event in events[2:5]] == [1, 2, 3]
+
+    query_id = events[0]["data"]["query_id"]
+    with session_factory() as db:
+        stored = db.scalars(
+            select(Ranking.product_id).where(Ranking.query_id == query_id)
+        ).all()
+    assert sorted(stored) == sorted(
+        event["data"]["product_id"] for event in events[2:5]
+    )
+
+
+def test_stream_sse_from_accept_header(client):
+    """Test clients asking for text/event-stream get SSE framing."""
+    with client.stream(
+        "POST",
+        "/recommendations/stream",
+        json=BODY,
+        headers={"Accept": "text/event-stream"},
+    ) as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = response.read().decode()
+
+    frames = [frame for frame in body.split("\n\n") if frame]
+    assert frames[0].startswith("event: query\ndata: {")
+    assert frames[-1].startswith("event: done\n")
+
+
+def test_buffered_matches_stream(client):
+    """Test the buffered endpoint returns the same rankings as the stream."""
+    buffered = client.post("/recommendations", json={**BODY, "usage": "studio"}).json()
+    with client.stream(
+        "POST",
+        "/recommendations/stream?format=ndjson",
+        json={**BODY, "usage": "Studio"},
+    ) as response:
+        events = read_ndjson(response)
+
+    streamed = [event["data"] for event in events if event["event"] == "ranking"]
+    assert buffered["rankings"] == streamed
+    assert events[0]["data"]["cached"] is True
+    assert "candidates" not in [event["event"] for event in events]
+
+
+def test_cached_result_not_reused_for_larger_limit(client):
+    """Test a hit for a small limit does not truncate a later, larger request."""
+    first = client.post("/recommendations", json={**BODY, "limit": 1}).json()
+    second = client.post("/recommendations", json=BODY).json()
+
+    assert len(first["rankings"]) == 1
+    assert len(second["rankings"]) == 3
+    assert second["rankings"][0] == first["rankings"][0]
+
+
+def test_rejects_empty_text(client):
+    """Test request validation."""
+    response = client.post("/recommendations/stream", json={"raw_text": ""})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_disconnect_stops_pipeline(session_factory, monkeypatch):
+    """Test closing the stream early skips later stages."""
+    calls = []
+    monkeypatch.setattr(pipeline, "load_candidates", lambda *a, **k: calls.append(a))
+
+    events = pipeline.recommend(
+        session_factory, pipeline.RecommendationRequest("headphones")
+    )
+    stream = recommendations.stream_events(events, "ndjson")
+    first = json.loads(await stream.__anext__())
+    assert first["event"] == "query"
+    await stream.aclose()
+
+    assert calls == []
+    with session_factory() as db:
+        assert db.scalar(select(func.count()).select_from(Query)) == 1
+        assert db.scalar(select(func.count()).select_from(Ranking)) == 0
@@ -0,0 +1,146 @@
+"""Tests for the repository query layer and N+1 regressions."""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.models import Offer, Product, Query, Ranking, Review
+from app.repositories import (
+    get_products,
+    get_query_with_rankings,
+    latest_offers,
+    list_ranked_products,
+)
+from tests.utils import count_queries
+
+
+@pytest.fixture
+def temp_db():
+    """Temporary SQLite database with two queries ranking 20 and 3 products."""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+
+    engine = create_engine(f"sqlite:///{path}", echo=False)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    session = SessionLocal()
+
+    now = datetime.utcnow()
+    big, small = Query(id=1, raw_text="anc headphones"), Query(id=2, raw_text="earbuds")
+    session.add_all([big, small])
+    for i in range(1, 21):
+        session.add(Product(id=i, asin=f"B0REPO{i:04d}", title=f"Headphones {i}"))
+        session.add(
+            Offer(
+                product_id=i, price_cents=10000 + i, currency="USD", last_checked_at=now
+            )
+        )
+        session.add(
+            Offer(
+                product_id=i,
+                price_cents=9000 + i,
+                currency="EUR",
+                last_checked_at=now - timedelta(hours=2),
+            )
+        )
+        session.add(Review(product_id=i, source="Amazon", snippet=f"Review {i}"))
+        session.add(Ranking(query_id=1, product_id=i, score=Decimal(i) / 4))
+    for i in range(1, 4):
+        session.add(Ranking(query_id=2, product_id=i, score=Decimal(i)))
+    session.commit()
+
+    yield session
+
+    # Cleanup
+    session.close()
+    engine.dispose()
+    os.unlink(path)
+
+
+def render(ranked) -> list[tuple]:
+    """Touch everything a results page would show."""
+    return [
+        (
+            item.product.title,
+            item.latest_offer.price_cents,
+            [review.snippet for review in item.product.reviews],
+        )
+        for item in ranked
+    ]
+
+
+def test_list_ranked_products_orders_by_score(temp_db):
+    """Test rankings come back highest score first with the latest offer."""
+    ranked = list_ranked_products(temp_db, query_id=1, limit=5)
+
+    assert [item.product.id for item in ranked] == [20, 19, 18, 17, 16]
+    assert ranked[0].latest_offer.currency == "USD"
+    assert ranked[0].latest_offer.price_cents == 10020
+
+
+def test_list_ranked_products_fixed_statement_count(temp_db):
+    """Test rendering 20 or 3 ranked products costs the same number of SELECTs."""
+    engine = temp_db.get_bind()
+
+    with count_queries(engine) as large:
+        render(list_ranked_products(temp_db, query_id=1, with_reviews=True))
+    temp_db.expunge_all()
+    with count_queries(engine) as small:
+        render(list_ranked_products(temp_db, query_id=2, with_reviews=True))
+
+    assert len(large) == len(small) == 3
+
+
+def test_lazy_loading_is_n_plus_one(temp_db):
+    """Test the default relationship path really does issue per-row SELECTs."""
+    with count_queries(temp_db.get_bind()) as statements:
+        query = temp_db.get(Query, 1)
+        offer_counts = [len(ranking.product.offers) for ranking in query.rankings]
+
+    assert offer_counts == [2] * 20
+    assert len(statements) > 20
+
+
+def test_latest_offers_one_per_product(temp_db):
+    """Test only the newest offer per product is returned."""
+    with count_queries(temp_db.get_bind()) as statements:
+        offers = latest_offers(temp_db, [1, 2, 3])
+
+    assert len(statements) == 1
+    assert {pid: offer.currency for pid, offer in offers.items()} == {
+        1: "USD",
+        2: "USD",
+        3: "USD",
+    }
+    assert latest_offers(temp_db, [1], currency="EUR")[1].price_cents == 9001
+    assert latest_offers(temp_db, []) == {}
+
+
+def test_get_products_with_collections(temp_db):
+    """Test requested collections are loaded with one SELECT each."""
+    with count_queries(temp_db.get_bind()) as statements:
+        products = get_products(
+            temp_db, range(1, 11), with_offers=True, with_reviews=True
+        )
+        loaded = [(len(product.offers), len(product.reviews)) for product in products]
+
+    assert len(products) == 10
+    assert loaded == [(2, 1)] * 10
+    assert len(statements) == 3
+
+
+def test_get_query_with_rankings(temp_db):
+    """Test a query's rankings and products load in two SELECTs."""
+    with count_queries(temp_db.get_bind()) as statements:
+        query = get_query_with_rankings(temp_db, 1)
+        titles = [ranking.product.title for ranking in query.rankings]
+
+    assert len(titles) == 20
+    assert len(statements) == 2
+    assert get_query_with_rankings(temp_db, 999) is None
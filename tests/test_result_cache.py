@@ -0,0 +1,271 @@
+"""Tests for the ranking result cache."""
+
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pytest
+import redis
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.cache import (
+    RankingKey,
+    RankingResultCache,
+    TTLCache,
+    get_result_cache,
+    results,
+)
+from app.cache.results import (
+    LocalChangeLog,
+    RedisChangeLog,
+    freshness_deadline,
+    get_change_log,
+    normalize_query_text,
+)
+from app.db.base import Base
+from app.db.models import Offer, Product
+from app.ingest import OfferRecord, ingest_offers
+
+
+class FakeRedis:
+    """Dict-backed stand-in for the Redis commands the change log uses."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, bytes] = {}
+        self.down = False
+
+    def set(self, key, value, ex=None):
+        self.data[key] = str(value).encode()
+
+    def mget(self, keys):
+        if self.down:
+            raise redis.ConnectionError("connection refused")
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        if self.down:
+            raise redis.ConnectionError("connection refused")
+        return []
+
+
+class FakeClock:
+    """Manually advanced wall clock."""
+
+    def __init__(self) -> None:
+        self.now = time.time()
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def temp_db():
+    """Temporary SQLite database with two products and their offers."""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+
+    engine = create_engine(f"sqlite:///{path}", echo=False)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    session = SessionLocal()
+
+    session.add_all(
+        [
+            Product(id=1, asin="B0RESULT01", title="Quiet Headphones"),
+            Product(id=2, asin="B0RESULT02", title="Loud Headphones"),
+            Offer(product_id=1, price_cents=19999),
+            Offer(product_id=2, price_cents=14999),
+        ]
+    )
+    session.commit()
+
+    yield session
+
+    # Cleanup
+    session.close()
+    engine.dispose()
+    os.unlink(path)
+
+
+@pytest.fixture
+def result_cache():
+    """Result cache on a fresh process change log, which offer ingests mark."""
+    get_change_log.cache_clear()
+    yield RankingResultCache(TTLCache(max_size=100, ttl=86400), get_change_log())
+    get_change_log.cache_clear()
+
+
+def rankings():
+    return [
+        {"product_id": 1, "score": 8.5, "rationale": "Within budget"},
+        {"product_id": 2, "score": 7.25, "rationale": "Within budget"},
+    ]
+
+
+def test_normalize_query_text_ignores_noise():
+    """Test near-identical phrasings normalize to the same text."""
+    a = normalize_query_text("Best noise-cancelling headphones under $200!")
+    b = normalize_query_text("headphones, noise cancelling   under 200 dollars")
+    assert a == b == "cancelling headphones noise"
+
+
+def test_ranking_key_buckets_budgets():
+    """Test budgets in the same bucket share a key and others don't."""
+    key = RankingKey.from_query("Headphones", 51, 199, "Travel ")
+    assert key == RankingKey.from_query("headphones", 50, 185, "travel")
+    assert key.budget_min == 50 and key.budget_max == 200
+    assert key.digest != RankingKey.from_query("headphones", 50, 260, "travel").digest
+    assert key.digest != RankingKey.from_query("headphones", 50, 185, "gaming").digest
+
+
+def test_get_or_compute_hits_and_reports_savings(temp_db, result_cache):
+    """Test the second identical request is served from cache."""
+    key = RankingKey.from_query("best headphones under $200", None, 200)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return rankings(), freshness_deadline(temp_db, [1, 2])
+
+    first, hit = result_cache.get_or_compute(key, compute)
+    assert not hit
+    second, hit = result_cache.get_or_compute(
+        RankingKey.from_query("Headphones under $200", None, 200), compute
+    )
+    assert hit
+    assert second.rankings == first.rankings
+    assert len(calls) == 1
+
+    stats = result_cache.stats.as_dict()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["saved_ms_per_hit"] >= 0
+
+
+def test_offer_change_invalidates(temp_db, result_cache):
+    """Test a price change on a ranked product invalidates the entry."""
+    key = RankingKey.from_query("headphones")
+    result_cache.put(key, rankings(), freshness_deadline(temp_db, [1, 2]), 0.01)
+
+    ingest_offers(temp_db, [OfferRecord(product_id=2, price_cents=12999)])
+    temp_db.commit()
+
+    assert result_cache.get(key) is None
+    assert result_cache.stats.invalidated == 1
+
+
+def test_unchanged_refresh_keeps_entry(temp_db, result_cache):
+    """Test re-checking an offer without a price change keeps the entry."""
+    key = RankingKey.from_query("headphones")
+    result_cache.put(key, rankings(), freshness_deadline(temp_db, [1, 2]), 0.01)
+
+    ingest_offers(temp_db, [OfferRecord(product_id=2, price_cents=14999)])
+    temp_db.commit()
+
+    assert result_cache.get(key) is not None
+
+
+def test_entry_expires_with_oldest_offer(temp_db):
+    """Test entries are only served while offers are within the freshness window."""
+    temp_db.query(Offer).filter_by(product_id=1).update(
+        {"last_checked_at": datetime.utcnow() - timedelta(hours=23)}
+    )
+    temp_db.commit()
+
+    clock = FakeClock()
+    cache = RankingResultCache(
+        TTLCache(max_size=10, ttl=86400), LocalChangeLog(), clock=clock
+    )
+    key = RankingKey.from_query("headphones")
+    cache.put(key, rankings(), freshness_deadline(temp_db, [1, 2]), 0.01)
+
+    clock.now += 30 * 60
+    assert cache.get(key) is not None
+    clock.now += 31 * 60
+    assert cache.get(key) is None
+
+
+def test_redis_change_log_is_shared():
+    """Test a change marked by one process invalidates another's entry."""
+    client = FakeRedis()
+    clock = FakeClock()
+    api = RankingResultCache(TTLCache(10, 86400), RedisChangeLog(client), clock=clock)
+
+    key = RankingKey.from_query("headphones")
+    api.put(key, rankings(), datetime.utcnow() + timedelta(hours=1), 0.01)
+    assert api.get(key) is not None
+
+    clock.now += 1
+    RedisChangeLog(client).mark([2], clock.now)
+    assert api.get(key) is None
+
+
+def test_ingest_marks_change_log_without_a_result_cache(temp_db, monkeypatch):
+    """Test a worker that never built a result cache still publishes offer changes."""
+    client = FakeRedis()
+    monkeypatch.setattr(results.settings, "result_cache_redis_enabled", True)
+    monkeypatch.setattr(results, "redis_client", lambda: client)
+    get_result_cache.cache_clear()
+    get_change_log.cache_clear()
+    try:
+        before = time.time()
+        ingest_offers(temp_db, [OfferRecord(product_id=2, price_cents=12999)])
+        temp_db.commit()
+
+        assert get_result_cache.cache_info().currsize == 0
+        assert set(client.data) == {"offers:changed:2"}
+        assert RedisChangeLog(client).latest([1, 2]) >= before
+    finally:
+        get_change_log.cache_clear()
+
+
+def test_entry_only_serves_limits_it_covers(temp_db, result_cache):
+    """Test a result computed for fewer rankings does not answer a larger limit."""
+    key = RankingKey.from_query("headphones", candidates=200)
+    result_cache.put(
+        key, rankings()[:1], freshness_deadline(temp_db, [1]), 0.01, limit=1
+    )
+
+    assert result_cache.get(key, limit=1) is not None
+    assert result_cache.get(key, limit=5) is None
+    assert result_cache.get(key) is None
+
+    result_cache.put(
+        key, rankings(), freshness_deadline(temp_db, [1, 2]), 0.01, limit=5
+    )
+    assert len(result_cache.get(key, limit=2).rankings) == 2
+    assert key.digest != RankingKey.from_query("headphones", candidates=50).digest
+
+
+def test_change_during_compute_invalidates(temp_db, result_cache):
+    """Test an offer change after computation started invalidates the stored entry."""
+    key = RankingKey.from_query("headphones")
+    started = result_cache.now()
+    ingest_offers(temp_db, [OfferRecord(product_id=2, price_cents=12999)])
+    temp_db.commit()
+
+    result_cache.put(
+        key, rankings(), freshness_deadline(temp_db, [1, 2]), 0.01, created_at=started
+    )
+    assert result_cache.get(key) is None
+
+
+def test_redis_outage_bypasses_cache():
+    """Test an unreachable change log turns lookups into misses instead of errors."""
+    client = FakeRedis()
+    cache = RankingResultCache(TTLCache(10, 86400), RedisChangeLog(client))
+    key = RankingKey.from_query("headphones")
+    cache.put(key, rankings(), datetime.utcnow() + timedelta(hours=1), 0.01)
+
+    client.down = True
+    cache.changes.mark([2], time.time())
+    assert cache.get(key) is None
+
+    client.down = False
+    cache.put(key, rankings(), datetime.utcnow() + timedelta(hours=1), 0.01)
+    assert cache.get(key) is not None
@@ -0,0 +1,244 @@
+"""Tests for review ingestion and near-duplicate detection."""
+
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.models import Product, ProductFeatures, ProductSearch, Review
+from app.ingest import ReviewRecord, ingest_reviews, reviews
+from app.ingest.reviews import (
+    SimHashIndex,
+    normalize_url,
+    simhashes,
+    to_signed,
+    url_hash,
+)
+
+
+@pytest.fixture
+def temp_db():
+    """Temporary SQLite database with two products."""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+
+    engine = create_engine(f"sqlite:///{path}", echo=False)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+    session.add_all(
+        [
+            Product(id=1, asin="B0REVIEW01", title="Sony WH-1000XM5", brand="Sony"),
+            Product(id=2, asin="B0REVIEW02", title="Bose QC45", brand="Bose"),
+        ]
+    )
+    session.commit()
+
+    yield session
+
+    # Cleanup
+    session.close()
+    engine.dispose()
+    os.unlink(path)
+
+
+SNIPPET = (
+    "Great sound and very comfortable on long flights. The noise cancelling blocks engine hum, "
+    "the case is compact, pairing with my laptop and phone was quick and the battery lasts all week"
+)
+
+
+def test_normalize_url_drops_tracking_and_formatting():
+    """Test URLs that differ only in presentation normalize to one form."""
+    canonical = "https://amazon.com/gp/customer-reviews/R1?a=1&b=2"
+    assert (
+        normalize_url("HTTP://www.Amazon.com:80/gp/customer-reviews/R1/?b=2&a=1#top")
+        == canonical
+    )
+    assert (
+        normalize_url(
+            "https://amazon.com//gp/customer-reviews/R1?a=1&utm_source=x&b=2&ref=cm"
+        )
+        == canonical
+    )
+    assert normalize_url("https://amazon.com:8443/r") == "https://amazon.com:8443/r"
+    assert normalize_url("www.amazon.com/gp/customer-reviews/R1/?b=2&a=1") == canonical
+    assert normalize_url("amazon.com:443/gp/customer-reviews/R1?a=1&b=2") == canonical
+    assert url_hash("  ") is None
+
+
+def test_simhash_is_stable_and_tolerates_small_edits():
+    """Test formatting does not move the hash and one edited word moves it little."""
+    base, reformatted, edited, other = simhashes(
+        [
+            SNIPPET,
+            f"  {SNIPPET.upper()}!!",
+            SNIPPET.replace("week", "month"),
+            "Cheap plastic, the hinge snapped after two days and support never answered",
+        ]
+    )
+    assert base == reformatted
+    assert (base ^ edited).bit_count() <= 8
+    assert (base ^ other).bit_count() > 8
+    assert simhashes(["", None, "!!"]) == [None, None, None]
+    assert to_signed(2**64 - 1) == -1 and to_signed(5) == 5
+
+
+def test_index_finds_every_hash_within_distance():
+    """Test banding never misses a hash within the distance, per scope."""
+    value = 0x0123_4567_89AB_CDEF
+    index = SimHashIndex([1, 1], [value, value ^ (2**64 - 1)], max_distance=3)
+
+    # Spread the flipped bits over different bands
+    queries = [value ^ (1 << 0) ^ (1 << 20) ^ (1 << 40), value ^ 0b1111, value]
+    assert index.matches([1, 1, 2], queries).tolist() == [True, False, False]
+    pairs = index.pairs([1, 1], [value, value ^ (1 << 63)])
+    assert sorted(set(zip(*(side.tolist() for side in pairs), strict=True))) == [
+        (0, 0),
+        (1, 0),
+    ]
+    assert len(index) == 2
+
+
+def test_ingest_skips_url_and_near_duplicates(temp_db):
+    """Test duplicates within a batch, across batches and in the database are dropped."""
+    temp_db.add(
+        Review(
+            product_id=1,
+            source="seed",
+            url="https://example.com/r/seed",
+            url_hash=url_hash("https://example.com/r/seed"),
+        )
+    )
+    temp_db.commit()
+
+    records = [
+        ReviewRecord(1, "crawler", "https://example.com/r/1?utm_source=feed", SNIPPET),
+        ReviewRecord(
+            1,
+            "crawler",
+            "http://www.example.com/r/1/",
+            "Different text, same review URL",
+        ),
+        ReviewRecord(
+            1, "mirror", "https://mirror.example/r/9", SNIPPET.replace("week", "month")
+        ),
+        # The same text on another product is a different review
+        ReviewRecord(2, "crawler", "https://example.com/r/2", SNIPPET),
+        {"product_id": 1, "source": "crawler", "url": "https://example.com/r/seed#x"},
+        ReviewRecord(
+            1, "crawler", None, "Muffled mids and the clamp hurts after an hour"
+        ),
+        ReviewRecord(
+            1, "crawler", None, "muffled mids and the clamp hurts after an hour!"
+        ),
+    ]
+    stats = ingest_reviews(temp_db, records, batch_size=3)
+    temp_db.commit()
+
+    assert (stats.inserted, stats.duplicate_urls, stats.near_duplicates) == (3, 2, 2)
+    assert stats.total == len(records)
+    assert stats.product_ids == {1, 2}
+    stored = temp_db.execute(
+        select(Review.product_id, Review.url, Review.simhash).order_by(Review.id)
+    ).all()
+    assert [(row.product_id, row.url) for row in stored[1:]] == [
+        (1, "https://example.com/r/1?utm_source=feed"),
+        (2, "https://example.com/r/2"),
+        (1, None),
+    ]
+    assert all(row.simhash is not None for row in stored[1:])
+
+    # Re-crawling stores nothing new
+    again = ingest_reviews(temp_db, records)
+    assert again.inserted == 0 and again.product_ids == set()
+
+
+def test_ingest_counts_rows_a_concurrent_ingest_stored_first(temp_db, monkeypatch):
+    """Test a URL stored between the lookup and the INSERT is skipped, not counted."""
+    hash_snippets = reviews.simhashes
+
+    def racing_simhashes(texts):
+        # Another worker stores the same review after this batch's lookup
+        temp_db.add(
+            Review(
+                product_id=1,
+                source="other",
+                url_hash=url_hash("https://example.com/r/1"),
+            )
+        )
+        temp_db.flush()
+        return hash_snippets(texts)
+
+    monkeypatch.setattr(reviews, "simhashes", racing_simhashes)
+    stats = ingest_reviews(
+        temp_db,
+        [
+            ReviewRecord(1, "crawler", "https://example.com/r/1", SNIPPET),
+            ReviewRecord(
+                2, "crawler", "https://example.com/r/2", "Solid bass for the price"
+            ),
+        ],
+    )
+
+    assert (stats.inserted, stats.duplicate_urls, stats.near_duplicates) == (1, 1, 0)
+    assert stats.product_ids == {2}
+    assert temp_db.scalar(select(func.count()).select_from(Review)) == 2
+
+
+def test_ingest_refreshes_search_and_features(temp_db):
+    """Test products that gained reviews get fresh search documents and features."""
+    ingest_reviews(
+        temp_db,
+        [
+            ReviewRecord(
+                2, "crawler", "https://example.com/r/5", "Excellent noise cancelling"
+            )
+        ],
+    )
+    temp_db.commit()
+
+    assert "Excellent" in temp_db.get(ProductSearch, 2).reviews
+    features = temp_db.get(ProductFeatures, 2)
+    assert (features.review_count, features.review_sentiment) == (1, 1.0)
+    assert temp_db.get(ProductSearch, 1) is None
+
+
+def test_ingest_reads_existing_hashes_once_per_batch(temp_db):
+    """Test each batch costs one lookup and one INSERT before the final refresh."""
+    statements = []
+    event.listen(
+        temp_db.get_bind(),
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2]),
+    )
+
+    records = [
+        ReviewRecord(
+            1, "crawler", f"https://example.com/r/{i}", f"review number {i} " * 3
+        )
+        for i in range(10)
+    ]
+    ingest_reviews(temp_db, records, batch_size=5)
+
+    inserts = [s for s in statements if s.startswith("INSERT INTO reviews")]
+    lookups = [
+        s for s in statements if "reviews.url_hash" in s and s.startswith("SELECT")
+    ]
+    assert len(inserts) == len(lookups) == 2
+
+
+def test_unique_constraint_rejects_same_url_hash(temp_db):
+    """Test the database enforces one review per product and URL hash."""
+    temp_db.add_all(
+        [
+            Review(product_id=1, source="a", url_hash="f" * 40),
+            Review(product_id=1, source="b", url_hash="f" * 40),
+        ]
+    )
+    with pytest.raises(IntegrityError):
+        temp_db.commit()
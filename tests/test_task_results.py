@@ -0,0 +1,126 @@
+"""Tests for compressed task serialization and result offloading."""
+
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+from celery import Celery
+from kombu.serialization import dumps, loads
+
+# Set Celery to always eager for testing and use memory backend
+os.environ["CELERY_TASK_ALWAYS_EAGER"] = "true"
+os.environ["CELERY_RESULT_BACKEND"] = "cache+memory://"
+
+from app.celery_app import celery_app
+from app.core import blobs
+from app.core.blobs import BLOB_KEY, BlobStore, offload_result, resolve_result
+from app.core.config import settings
+from app.core.serialization import JSON_ZLIB
+from app.tasks.example import process_data_task
+from app.tasks.results import prune_result_blobs
+
+PAYLOAD = {"product_ids": list(range(5000)), "status": "processed", "currency": "USD"}
+
+
+@pytest.fixture
+def offloading(tmp_path, monkeypatch):
+    """Enable offloading into a temporary blob store with a small threshold."""
+    monkeypatch.setattr(settings, "celery_result_offload_enabled", True)
+    monkeypatch.setattr(settings, "celery_result_offload_threshold_bytes", 1024)
+    monkeypatch.setattr(settings, "celery_result_blob_dir", str(tmp_path))
+    blobs.get_blob_store.cache_clear()
+    yield BlobStore(tmp_path)
+    blobs.get_blob_store.cache_clear()
+
+
+def test_json_zlib_roundtrip_is_smaller():
+    """Test the compressed JSON serializer round-trips and shrinks payloads."""
+    content_type, encoding, data = dumps(PAYLOAD, serializer=JSON_ZLIB)
+    _, _, plain = dumps(PAYLOAD, serializer="json")
+
+    assert loads(data, content_type, encoding) == PAYLOAD
+    assert len(data) < len(plain) / 2
+
+
+def test_result_backend_stores_compressed_results():
+    """Test a results backend configured with json+zlib stores and decodes results."""
+    app = Celery(backend="cache+memory://", result_serializer=JSON_ZLIB)
+    app.conf.accept_content = app.conf.result_accept_content = ["json", JSON_ZLIB]
+    app.backend.store_result("compressed-task", PAYLOAD, "SUCCESS")
+
+    assert app.backend.get_task_meta("compressed-task")["result"] == PAYLOAD
+
+
+def test_celery_result_settings_applied():
+    """Test expiry and accepted content come from settings."""
+    assert celery_app.conf.result_expires == settings.celery_result_expires
+    assert settings.celery_result_serializer in celery_app.conf.accept_content
+
+
+def test_blob_store_put_get_dedupe(tmp_path):
+    """Test blobs are content addressed and compressed on disk."""
+    store = BlobStore(tmp_path)
+    key = store.put(b"x" * 10000)
+
+    assert store.put(b"x" * 10000) == key
+    assert store.get(key) == b"x" * 10000
+    assert sum(path.stat().st_size for path in tmp_path.glob("*/*")) < 1000
+
+
+def test_blob_store_prune(tmp_path):
+    """Test blobs older than the cutoff are removed."""
+    store = BlobStore(tmp_path)
+    old, fresh = store.put(b"old"), store.put(b"fresh")
+    past = time.time() - 7200
+    os.utime(store._path(old), (past, past))
+
+    assert store.prune(3600) == 1
+    assert store.get(fresh) == b"fresh"
+    with pytest.raises(FileNotFoundError):
+        store.get(old)
+
+
+def test_offload_disabled_passes_through():
+    """Test results are untouched unless offloading is enabled."""
+    assert offload_result(PAYLOAD) is PAYLOAD
+
+
+def test_offload_threshold(offloading):
+    """Test only results at or above the threshold are offloaded."""
+    small = {"status": "ok"}
+    assert offload_result(small) is small
+
+    reference = offload_result(PAYLOAD)
+    assert set(reference) == {BLOB_KEY, "content_type", "encoding", "bytes"}
+    assert reference["bytes"] >= 1024
+    assert resolve_result(reference) == PAYLOAD
+    assert resolve_result(small) is small
+
+
+def test_task_result_offloaded_when_stored(offloading, monkeypatch):
+    """Test the backend holds a reference while callers still get the real result."""
+    monkeypatch.setattr(settings, "celery_result_offload_threshold_bytes", 16)
+    monkeypatch.setattr(process_data_task, "store_eager_result", True)
+    monkeypatch.setitem(celery_app.conf, "task_store_eager_result", True)
+    with (
+        patch("app.tasks.example.random.random", return_value=0.5),
+        patch("app.tasks.example.time.sleep"),
+    ):
+        result = process_data_task.delay(PAYLOAD)
+        direct = process_data_task(PAYLOAD)
+
+    assert result.result["fields"] == len(PAYLOAD) and BLOB_KEY not in result.result
+    assert direct["status"] == "processed" and BLOB_KEY not in direct
+    stored = celery_app.backend.get_task_meta(result.id)["result"]
+    assert BLOB_KEY in stored
+    assert resolve_result(stored) == result.result
+
+
+def test_prune_result_blobs_task(offloading):
+    """Test the housekeeping task prunes expired blobs."""
+    key = offloading.put(b"stale")
+    past = time.time() - settings.celery_result_expires - 60
+    os.utime(offloading._path(key), (past, past))
+
+    assert prune_result_blobs.delay().result == {"removed": 1}
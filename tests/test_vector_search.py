@@ -0,0 +1,137 @@
+"""Tests for embedding storage and vector similarity search."""
+
+import os
+import tempfile
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.models import Product, Review
+from app.db.types import EMBEDDING_DIM, Embedding
+from app.search import VectorIndex, search_products, search_reviews, vector
+from tests.utils import count_queries
+
+
+def unit(seed: int) -> np.ndarray:
+    """Deterministic random unit vector."""
+    v = np.random.default_rng(seed).standard_normal(EMBEDDING_DIM).astype(np.float32)
+    return v / np.linalg.norm(v)
+
+
+@pytest.fixture
+def temp_db():
+    """Temporary SQLite database with embedded products and reviews."""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+
+    engine = create_engine(f"sqlite:///{path}", echo=False)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    session = SessionLocal()
+
+    for i in range(1, 51):
+        session.add(
+            Product(
+                id=i, asin=f"B0VEC{i:05d}", title=f"Headphones {i}", embedding=unit(i)
+            )
+        )
+        session.add(
+            Review(
+                product_id=i,
+                source="Amazon",
+                snippet=f"Review {i}",
+                embedding=unit(1000 + i),
+            )
+        )
+    session.add(Product(id=99, asin="B0VECNONE", title="Not embedded yet"))
+    session.commit()
+    vector.invalidate_indexes()
+
+    yield session
+
+    # Cleanup
+    session.close()
+    engine.dispose()
+    os.unlink(path)
+
+
+def test_embedding_roundtrip_sqlite(temp_db):
+    """Test embeddings are stored as float32 blobs and read back as arrays."""
+    stored = temp_db.scalar(select(Product.embedding).where(Product.id == 7))
+
+    assert isinstance(stored, np.ndarray)
+    assert stored.dtype == np.float32
+    np.testing.assert_array_equal(stored, unit(7))
+    assert temp_db.scalar(select(Product.embedding).where(Product.id == 99)) is None
+
+
+def test_embedding_rejects_wrong_dimension():
+    """Test binding an embedding of the wrong size fails."""
+    with pytest.raises(ValueError, match="shape"):
+        Embedding(4).process_bind_param([1.0, 2.0], postgresql.dialect())
+
+
+def test_vector_index_matches_brute_force():
+    """Test top-k ordering matches an explicit cosine ranking."""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((500, 32)).astype(np.float32)
+    query = rng.standard_normal(32).astype(np.float32)
+    index = VectorIndex(range(1000, 1500), vectors)
+
+    hits = index.search(query, k=10)
+
+    cosine = vectors @ query / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query))
+    expected = (np.argsort(-cosine)[:10] + 1000).tolist()
+    assert [hit.id for hit in hits] == expected
+    assert hits[0].score == pytest.approx(float(cosine.max()), rel=1e-5)
+
+
+def test_vector_index_small_and_empty():
+    """Test k larger than the index and an empty index."""
+    index = VectorIndex([1, 2], np.eye(2, dtype=np.float32))
+    assert [hit.id for hit in index.search(np.array([0.0, 1.0]), k=5)] == [2, 1]
+    assert VectorIndex([], np.empty((0, 2))).search(np.array([1.0, 0.0])) == []
+
+
+def test_search_products_fallback(temp_db):
+    """Test the NumPy fallback finds the product whose embedding matches."""
+    hits = search_products(temp_db, unit(17), k=3)
+
+    assert hits[0].id == 17
+    assert hits[0].score == pytest.approx(1.0, abs=1e-5)
+    assert len(hits) == 3
+    assert 99 not in {hit.id for hit in hits}
+
+
+def test_search_reviews_fallback(temp_db):
+    """Test reviews are searchable through the same API."""
+    hits = search_reviews(temp_db, unit(1005), k=1)
+    review_product = temp_db.scalar(
+        select(Review.product_id).where(Review.id == hits[0].id)
+    )
+    assert review_product == 5
+
+
+def test_fallback_index_is_cached(temp_db):
+    """Test repeated searches reuse the in-memory index without querying."""
+    search_products(temp_db, unit(1))
+    with count_queries(temp_db.get_bind()) as statements:
+        search_products(temp_db, unit(2))
+    assert statements == []
+
+
+def test_postgres_search_uses_pgvector_operator():
+    """Test the Postgres path orders by the <=> cosine distance operator."""
+    distance = Product.embedding.op("<=>")(vector.literal(unit(1), Embedding()))
+    sql = str(
+        select(Product.id)
+        .order_by(distance)
+        .limit(5)
+        .compile(dialect=postgresql.dialect())
+    )
+    assert "embedding <=>" in sql
+    assert "LIMIT" in sql
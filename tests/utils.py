@@ -0,0 +1,29 @@
+"""Shared test helpers."""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@contextmanager
+def count_queries(engine: Engine) -> Iterator[list[str]]:
+    """
+    Record every SQL statement ``engine`` emits inside the block.
+
+    Usage:
+        with count_queries(engine) as statements:
+            ...
+        assert len(statements) == 2
+    """
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)